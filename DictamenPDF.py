@@ -8,7 +8,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage
 from reportlab.lib import colors
 import os
-from reportlab.pdfgen.canvas import Canvas
+from numeracion_paginas import CanvasNumerado
 
 # Tamaño carta en puntos
 LETTER_WIDTH = 8.5 * inch
@@ -89,38 +89,12 @@ class PDFGenerator:
         self.total_pages = canvas.getPageNumber()
 
 
-class NumberedCanvas(Canvas):
-    """Canvas que guarda los estados de página y permite escribir "Página X de Y" correctamente."""
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
+class NumberedCanvas(CanvasNumerado):
+    """Canvas que escribe "Página X de Y" en cada página (ver numeracion_paginas.py)."""
 
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        # total pages
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            # obtener el número de página guardado en el estado (más fiable que getPageNumber en este punto)
-            page = state.get('_pageNumber', state.get('pageNumber', 0))
-            try:
-                self.setFont("Helvetica", 9)
-                self.drawRightString(LETTER_WIDTH - 72, LETTER_HEIGHT - 40, f"Página {page} de {num_pages}")
-            except Exception:
-                pass
-            super().showPage()
-        # If no saved states (single page), still draw
-        if not self._saved_page_states:
-            try:
-                page = self.getPageNumber()
-                self.setFont("Helvetica", 9)
-                self.drawRightString(LETTER_WIDTH - 72, LETTER_HEIGHT - 40, f"Página {page} de {page}")
-            except Exception:
-                pass
-        super().save()
+    def dibujar_numero_pagina(self, pagina, total):
+        self.setFont("Helvetica", 9)
+        self.drawRightString(LETTER_WIDTH - 72, LETTER_HEIGHT - 40, f"Página {pagina} de {total}")
 
     def agregar_primera_pagina(self):
         """Agrega el contenido de la primera página"""
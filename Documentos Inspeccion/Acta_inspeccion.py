@@ -8,6 +8,12 @@ import json
 import sys
 from pathlib import Path
 
+# Caché de fondos y firmas compartida por los generadores de esta carpeta
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+import recursos_graficos
+
 # Simple debug logger for acta generation; writes to data/acta_debug.log next to exe when possible
 def _log_acta(msg: str):
     try:
@@ -62,13 +68,10 @@ class ActaPDFGenerator:
     
     def dibujar_fondo(self, c):
         """Dibuja la imagen de fondo"""
-        fondo_path = "img/Oficios.png"
-        if os.path.exists(fondo_path):
-            try:
-                img = ImageReader(fondo_path)
-                c.drawImage(img, 0, 0, width=self.width, height=self.height)
-            except Exception as e:
-                print(f"⚠️ Error al cargar imagen de fondo: {e}")
+        try:
+            recursos_graficos.dibujar_fondo(c, 'fondo_oficios', width=self.width, height=self.height)
+        except Exception as e:
+            print(f"⚠️ Error al cargar imagen de fondo: {e}")
     
     def dibujar_paginacion(self, c):
         """Dibuja la paginación"""
@@ -307,7 +310,7 @@ class ActaPDFGenerator:
 
             if firma_path and os.path.exists(firma_path):
                 try:
-                    img = ImageReader(firma_path)
+                    img = recursos_graficos.imagen(firma_path) or ImageReader(firma_path)
                     c.drawImage(img, x + 85 * mm, pos_y - (firma_alto / 2), width=firma_ancho, height=firma_alto, preserveAspectRatio=True, mask='auto')
                 except Exception as e:
                     print(f"⚠️ Error cargando firma {firma_path}: {e}")
@@ -731,10 +734,19 @@ def preparar_datos_desde_visita(datos_visita, firmas_json_path="data/Firmas.json
     
     return datos_acta
 
-def generar_acta_desde_visita(folio_visita=None, ruta_salida=None):
+def _leer_json_archivo(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def generar_acta_desde_visita(folio_visita=None, ruta_salida=None, leer_json=None):
     """Genera un acta a partir de la información en data/historial_visitas.json y
     data/tabla_de_relacion.json. Si `folio_visita` es None toma la última visita.
+
+    `leer_json(path)` permite compartir las lecturas de historial, folios y
+    tabla con otros documentos de la misma visita (ver `documentos_visita`).
     """
+    leer_json = leer_json or _leer_json_archivo
     # Resolver data_dir de forma robusta: preferir carpeta junto al exe,
     # luego ruta bundle (_MEIPASS), luego ruta relativa al paquete y cwd.
     candidates = []
@@ -802,8 +814,7 @@ def generar_acta_desde_visita(folio_visita=None, ruta_salida=None):
 
     # Load historial with diagnostics
     try:
-        with open(historial_path, 'r', encoding='utf-8') as f:
-            historial = json.load(f)
+        historial = leer_json(historial_path)
     except Exception as e:
         _log_acta(f"Error leyendo historial JSON: {e}; path={historial_path}")
         raise
@@ -830,40 +841,39 @@ def generar_acta_desde_visita(folio_visita=None, ruta_salida=None):
     folios_file = os.path.join(data_dir, 'folios_visitas', f'folios_{folio_num}.json')
     if os.path.exists(folios_file):
         try:
-            with open(folios_file, 'r', encoding='utf-8') as ff:
-                data = json.load(ff)
-                # Formatos soportados:
-                # - lista simple de números/strings
-                # - dict {'folios': [...]}
-                # - lista de dicts (cada dict con clave 'FOLIOS' o 'FOLIO')
-                if isinstance(data, list):
-                    # lista simple?
-                    if data and all(not isinstance(x, dict) for x in data):
-                        folios_list = [int(x) for x in data if str(x).strip().isdigit()]
-                    else:
-                        # lista de registros -> extraer campo FOLIOS/FOLIO
-                        extracted = []
-                        for rec in data:
-                            if not isinstance(rec, dict):
-                                continue
-                            val = None
-                            for key in ('FOLIOS', 'FOLIO', 'folios', 'folio'):
-                                if key in rec and rec.get(key) is not None:
-                                    val = rec.get(key)
-                                    break
-                            if val is None:
-                                continue
-                            # val puede ser '000867' u objeto. Extraer dígitos
-                            s = str(val)
-                            digits = ''.join([c for c in s if c.isdigit()])
-                            if digits:
-                                try:
-                                    extracted.append(int(digits))
-                                except Exception:
-                                    pass
-                        folios_list = extracted
-                elif isinstance(data, dict) and 'folios' in data:
-                    folios_list = [int(x) for x in data.get('folios', []) if str(x).strip().isdigit()]
+            data = leer_json(folios_file)
+            # Formatos soportados:
+            # - lista simple de números/strings
+            # - dict {'folios': [...]}
+            # - lista de dicts (cada dict con clave 'FOLIOS' o 'FOLIO')
+            if isinstance(data, list):
+                # lista simple?
+                if data and all(not isinstance(x, dict) for x in data):
+                    folios_list = [int(x) for x in data if str(x).strip().isdigit()]
+                else:
+                    # lista de registros -> extraer campo FOLIOS/FOLIO
+                    extracted = []
+                    for rec in data:
+                        if not isinstance(rec, dict):
+                            continue
+                        val = None
+                        for key in ('FOLIOS', 'FOLIO', 'folios', 'folio'):
+                            if key in rec and rec.get(key) is not None:
+                                val = rec.get(key)
+                                break
+                        if val is None:
+                            continue
+                        # val puede ser '000867' u objeto. Extraer dígitos
+                        s = str(val)
+                        digits = ''.join([c for c in s if c.isdigit()])
+                        if digits:
+                            try:
+                                extracted.append(int(digits))
+                            except Exception:
+                                pass
+                    folios_list = extracted
+            elif isinstance(data, dict) and 'folios' in data:
+                folios_list = [int(x) for x in data.get('folios', []) if str(x).strip().isdigit()]
         except Exception:
             folios_list = []
 
@@ -909,47 +919,46 @@ def generar_acta_desde_visita(folio_visita=None, ruta_salida=None):
 
     if os.path.exists(tabla_path):
         try:
-            with open(tabla_path, 'r', encoding='utf-8') as tf:
-                tabla = json.load(tf)
-
-                # Normalizar `tabla` a una lista de registros llamada `records`.
-                records = []
-                if isinstance(tabla, list):
-                    records = tabla
-                elif isinstance(tabla, dict):
-                    # Buscar el primer valor que sea una lista (común en backups)
-                    for v in tabla.values():
-                        if isinstance(v, list):
-                            records = v
+            tabla = leer_json(tabla_path)
+
+            # Normalizar `tabla` a una lista de registros llamada `records`.
+            records = []
+            if isinstance(tabla, list):
+                records = tabla
+            elif isinstance(tabla, dict):
+                # Buscar el primer valor que sea una lista (común en backups)
+                for v in tabla.values():
+                    if isinstance(v, list):
+                        records = v
+                        break
+                # Intentar claves comunes
+                if not records:
+                    for key in ("registros", "tabla", "data", "rows", "records"):
+                        if key in tabla and isinstance(tabla[key], list):
+                            records = tabla[key]
                             break
-                    # Intentar claves comunes
-                    if not records:
-                        for key in ("registros", "tabla", "data", "rows", "records"):
-                            if key in tabla and isinstance(tabla[key], list):
-                                records = tabla[key]
-                                break
 
-                _log_acta(f"Loaded tabla_path={tabla_path}; tabla_type={type(tabla).__name__}; records={len(records)}")
-
-                # tabla puede ser lista de dicts en `records`
-                for rec in records:
-                    if not isinstance(rec, dict):
-                        continue
-                    fol = rec.get('FOLIO')
-                    try:
-                        fol_int = int(fol) if fol is not None and str(fol).isdigit() else None
-                    except Exception:
-                        fol_int = None
-                    if folios_list and fol_int in folios_list:
-                        productos.append(rec)
-                        if not fecha_verificacion and rec.get('FECHA DE VERIFICACION'):
-                            fecha_verificacion = rec.get('FECHA DE VERIFICACION')
-
-                # si no encontramos por folios, intentar usar primer registro si existe
-                if not productos and records:
-                    first = records[0]
-                    if isinstance(first, dict) and first.get('FECHA DE VERIFICACION') and not fecha_verificacion:
-                        fecha_verificacion = first.get('FECHA DE VERIFICACION')
+            _log_acta(f"Loaded tabla_path={tabla_path}; tabla_type={type(tabla).__name__}; records={len(records)}")
+
+            # tabla puede ser lista de dicts en `records`
+            for rec in records:
+                if not isinstance(rec, dict):
+                    continue
+                fol = rec.get('FOLIO')
+                try:
+                    fol_int = int(fol) if fol is not None and str(fol).isdigit() else None
+                except Exception:
+                    fol_int = None
+                if folios_list and fol_int in folios_list:
+                    productos.append(rec)
+                    if not fecha_verificacion and rec.get('FECHA DE VERIFICACION'):
+                        fecha_verificacion = rec.get('FECHA DE VERIFICACION')
+
+            # si no encontramos por folios, intentar usar primer registro si existe
+            if not productos and records:
+                first = records[0]
+                if isinstance(first, dict) and first.get('FECHA DE VERIFICACION') and not fecha_verificacion:
+                    fecha_verificacion = first.get('FECHA DE VERIFICACION')
         except Exception as e:
             _log_acta(f"Error leyendo tabla_de_relacion: {e}")
             productos = []
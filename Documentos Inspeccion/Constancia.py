@@ -19,6 +19,14 @@ from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 import tempfile
 import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Caché de fondos y firmas compartida por los generadores de esta carpeta
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+import recursos_graficos
 
 
 # Determinar rutas base y data de manera consistente entre ejecución python y .exe
@@ -46,16 +54,17 @@ def get_data_dir():
 DATA_DIR = get_data_dir()
 
 
-# Canvas personalizado para numerar páginas como "Página X de Y"
-class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
+# Numeración "Página X de Y" compartida con DictamenPDF (numeracion_paginas.py, en la raíz)
+if PACKAGE_BASE not in sys.path:
+    sys.path.append(PACKAGE_BASE)
+from numeracion_paginas import CanvasNumerado
+from normalizacion import core_base, normalizar_codigo
+import paralelismo
 
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-        # Si se definió un encabezado, dibujarlo inmediatamente en la nueva página
+
+# Canvas personalizado para numerar páginas como "Página X de Y"
+class NumberedCanvas(CanvasNumerado):
+    def _dibujar_encabezado(self) -> None:
         try:
             # título en la posición alta (misma que usa la plantilla)
             if hasattr(self, 'header_title') and self.header_title:
@@ -75,36 +84,27 @@ class NumberedCanvas(canvas.Canvas):
         except Exception:
             pass
 
+    def _cerrar_con_encabezado(self) -> None:
+        # El encabezado se vuelve a dibujar al cierre de cada página, junto
+        # con la referencia a su "Página X de Y"
+        self._dibujar_encabezado()
+        self.cerrar_pagina()
+
+    def showPage(self):
+        self._cerrar_con_encabezado()
+        # Si se definió un encabezado, dibujarlo inmediatamente en la nueva página
+        self._dibujar_encabezado()
+
     def save(self):
-        # añadir estado de la última página
-        self._saved_page_states.append(dict(self.__dict__))
-        page_count = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            # Redibujar encabezado (si existe) para cada página al reconstruir
-            try:
-                if hasattr(self, 'header_title') and self.header_title:
-                    try:
-                        self.setFont('Helvetica-Bold', 12)
-                        self.drawCentredString(self._pagesize[0] / 2, self._pagesize[1] - 58, self.header_title)
-                    except Exception:
-                        pass
-                if hasattr(self, 'header_chain') and self.header_chain:
-                    try:
-                        self.setFont('Helvetica', 8)
-                        self.drawCentredString(self._pagesize[0] / 2, self._pagesize[1] - 74, self.header_chain)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-            self.draw_page_number(page_count)
-            canvas.Canvas.showPage(self)
+        # la última página se emite siempre (aunque no tenga contenido propio)
+        self._cerrar_con_encabezado()
+        self.definir_numeros_pagina()
         canvas.Canvas.save(self)
 
-    def draw_page_number(self, page_count: int) -> None:
+    def dibujar_numero_pagina(self, pagina: int, total: int) -> None:
         try:
             self.setFont('Helvetica', 8)
-            text = f"Página {self._pageNumber} de {page_count}"
+            text = f"Página {pagina} de {total}"
             # dibujar en la esquina superior derecha, con un pequeño margen
             x = self._pagesize[0] - 30
             y = self._pagesize[1] - 40
@@ -152,10 +152,15 @@ except Exception:
 
 
 class ConstanciaPDFGenerator:
-    def __init__(self, datos: dict, base_dir: str | None = None):
+    def __init__(self, datos: dict, base_dir: str | None = None, recursos: "RecursosConstancia | None" = None,
+                 folio_counter: dict | None = None):
         self.datos = datos or {}
         self.width, self.height = letter
         self.base_dir = base_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        # Recursos compartidos de un lote (ver RecursosConstancia); None = leer de disco
+        self.recursos = recursos
+        # Instantánea de folio_counter.json vigente para este documento (lotes)
+        self.folio_counter = folio_counter
         # bajar la posición inicial para que las firmas queden más abajo en la hoja
         self.cursor_y = self.height - 90
         
@@ -173,11 +178,61 @@ class ConstanciaPDFGenerator:
         if not p:
             return
         try:
-            img = ImageReader(p)
-            c.drawImage(img, 0, 0, width=self.width, height=self.height)
+            recursos_graficos.dibujar_fondo(c, p, width=self.width, height=self.height)
         except Exception:
             pass
 
+    def _imagen(self, ruta: str) -> ImageReader:
+        """ImageReader de `ruta` desde la caché de `recursos_graficos`."""
+        return recursos_graficos.imagen(ruta) or ImageReader(ruta)
+
+    def _catalogos(self, clientes_path: str | None = None, normas_path: str | None = None,
+                   firmas_path: str | None = None) -> tuple:
+        """(clientes_map, normas_map, firmas_map) del lote o leídos de disco."""
+        if self.recursos is not None:
+            self.recursos.cargar()
+            return self.recursos.clientes_map, self.recursos.normas_map, self.recursos.firmas_map
+        try:
+            if _cargar_clientes_ext:
+                clientes_map = _cargar_clientes_ext(clientes_path)
+            else:
+                clientes_map = _cargar_clientes(clientes_path)
+        except Exception:
+            clientes_map = {}
+        try:
+            if _cargar_normas_ext:
+                normas_map = _cargar_normas_ext(normas_path)
+            else:
+                normas_map = _cargar_normas(normas_path)
+        except Exception:
+            normas_map = {}
+        try:
+            firmas_map = cargar_firmas(firmas_path) if firmas_path else cargar_firmas()
+        except Exception:
+            firmas_map = {}
+        return clientes_map, normas_map, firmas_map
+
+    def _firmas(self) -> dict:
+        """Mapa de firmas del lote o `cargar_firmas()`."""
+        if self.recursos is not None:
+            self.recursos.cargar()
+            return self.recursos.firmas_map
+        return cargar_firmas()
+
+    def _leer_folios_visita(self, fid: str):
+        """Contenido de `folios_visitas/folios_{fid}.json` (None si no existe o no se puede leer)."""
+        if self.recursos is not None:
+            return self.recursos.folios_visita(fid)
+        return _leer_json(os.path.join(DATA_DIR, 'folios_visitas', f"folios_{fid}.json"))
+
+    def _leer_folio_counter(self):
+        """Contenido de `folio_counter.json` (None si no existe o no se puede leer)."""
+        if self.folio_counter is not None:
+            return self.folio_counter
+        if self.recursos is not None:
+            return self.recursos.folio_counter()
+        return _leer_json(os.path.join(DATA_DIR, 'folio_counter.json'))
+
     def _dibujar_texto_justificado(self, c: canvas.Canvas, x: float, y: float, texto: str, max_width: float,
                                   font_name: str = 'Helvetica', font_size: int = 10, leading: float = 12) -> None:
         """Dibuja texto justificado en el canvas y actualiza self.cursor_y.
@@ -266,10 +321,9 @@ class ConstanciaPDFGenerator:
         try:
             fid = str(self.datos.get('folio_visita') or self.datos.get('folio') or self.datos.get('folio_constancia') or '').strip()
             if fid:
-                archivo_f = os.path.join(DATA_DIR, 'folios_visitas', f"folios_{fid}.json")
-                if os.path.exists(archivo_f):
-                    with open(archivo_f, 'r', encoding='utf-8') as ff:
-                        obj = json.load(ff) or {}
+                obj = self._leer_folios_visita(fid)
+                if obj is not None:
+                    obj = obj or {}
                     fols_list = obj.get('folios') if isinstance(obj, dict) else obj
                     if isinstance(fols_list, list) and fols_list:
                         # Try to find the folio that matches the current 'lista' in datos.
@@ -315,10 +369,9 @@ class ConstanciaPDFGenerator:
 
         # 2) folio_counter.json: preferir si es >= al valor encontrado
         try:
-            fc_path = os.path.join(DATA_DIR, 'folio_counter.json')
-            if os.path.exists(fc_path):
-                with open(fc_path, 'r', encoding='utf-8') as fcf:
-                    j = json.load(fcf) or {}
+            j = self._leer_folio_counter()
+            if j is not None:
+                j = j or {}
                 last = j.get('last')
                 if last is not None:
                     try:
@@ -435,17 +488,16 @@ class ConstanciaPDFGenerator:
         Busca la entrada que coincida con `self.datos['lista']`, `folio_tabla` o `codigo`.
         """
         try:
-            # Leer desde DATA_DIR persistente (AppData cuando está empaquetado)
-            data_dir = DATA_DIR
+            # Leer desde DATA_DIR persistente (AppData cuando está empaquetado);
+            # en un lote se usa la instantánea de RecursosConstancia.
             # Primero, si hay archivo per-visit, intentar usarlo (y buscar por lista)
             fid = str(self.datos.get('folio_visita') or self.datos.get('folio') or self.datos.get('folio_constancia') or '').strip()
             chosen = None
             if fid:
-                archivo_f = os.path.join(data_dir, 'folios_visitas', f"folios_{fid}.json")
-                if os.path.exists(archivo_f):
+                obj = self._leer_folios_visita(fid)
+                if obj is not None:
                     try:
-                        with open(archivo_f, 'r', encoding='utf-8') as ff:
-                            obj = json.load(ff) or {}
+                        obj = obj or {}
                         fols_list = obj.get('folios') if isinstance(obj, dict) else obj
                         if isinstance(fols_list, list) and fols_list:
                             lista_pref = str(self.datos.get('lista') or '').strip()
@@ -494,10 +546,9 @@ class ConstanciaPDFGenerator:
 
             # Si no hallamos por visita, leer folio_counter.json
             try:
-                fc_path = os.path.join(data_dir, 'folio_counter.json')
-                if os.path.exists(fc_path):
-                    with open(fc_path, 'r', encoding='utf-8') as fcf:
-                        j = json.load(fcf) or {}
+                j = self._leer_folio_counter()
+                if j is not None:
+                    j = j or {}
                     last = j.get('last')
                     if last is not None:
                         try:
@@ -989,7 +1040,7 @@ class ConstanciaPDFGenerator:
         # Cargar mapa de firmas (si existe)
         firmas_map = {}
         try:
-            firmas_map = cargar_firmas()
+            firmas_map = self._firmas()
         except Exception:
             firmas_map = {}
 
@@ -1154,7 +1205,7 @@ class ConstanciaPDFGenerator:
             try:
                 p1 = img1 if os.path.isabs(img1) or os.path.exists(img1) else os.path.join(self.base_dir, img1)
                 if os.path.exists(p1):
-                    im1 = ImageReader(p1)
+                    im1 = self._imagen(p1)
                     iw, ih = im1.getSize()
                     w = iw * (sig_h / ih)
                     sig_w1 = w
@@ -1167,7 +1218,7 @@ class ConstanciaPDFGenerator:
             try:
                 p2 = img2 if os.path.isabs(img2) or os.path.exists(img2) else os.path.join(self.base_dir, img2)
                 if os.path.exists(p2):
-                    im2 = ImageReader(p2)
+                    im2 = self._imagen(p2)
                     iw2, ih2 = im2.getSize()
                     w2 = iw2 * (sig_h / ih2)
                     sig_w2 = w2
@@ -1262,10 +1313,9 @@ class ConstanciaPDFGenerator:
                     # folio_counter.json
                     try:
                         # leer desde DATA_DIR persistente
-                        fc_path = os.path.join(DATA_DIR, 'folio_counter.json')
-                        if os.path.exists(fc_path):
-                            with open(fc_path, 'r', encoding='utf-8') as fcf:
-                                j = json.load(fcf) or {}
+                        j = self._leer_folio_counter()
+                        if j is not None:
+                            j = j or {}
                             debug_lines.append(f"folio_counter.last={j.get('last')}")
                     except Exception as e:
                         debug_lines.append(f"folio_counter.read_error={e}")
@@ -1273,10 +1323,8 @@ class ConstanciaPDFGenerator:
                     try:
                         fid = fvis or (self.datos.get('folio') or '')
                         if fid:
-                            archivo_f = os.path.join(DATA_DIR, 'folios_visitas', f"folios_{fid}.json")
-                            if os.path.exists(archivo_f):
-                                with open(archivo_f, 'r', encoding='utf-8') as ffp:
-                                    obj = json.load(ffc:=ffp) if False else json.load(ffp)
+                            obj = self._leer_folios_visita(fid)
+                            if obj is not None:
                                 # include meta and first folios entries
                                 if isinstance(obj, dict):
                                     meta = obj.get('_meta') or {}
@@ -1304,7 +1352,7 @@ class ConstanciaPDFGenerator:
                         pass
                     # firmantes previstos
                     try:
-                        firmas_map = cargar_firmas()
+                        firmas_map = self._firmas()
                     except Exception:
                         firmas_map = {}
                     f1 = self.datos.get('nfirma1') or ''
@@ -1364,24 +1412,7 @@ class ConstanciaPDFGenerator:
             clientes_path = os.path.join(DATA_DIR, 'Clientes.json')
             normas_path = os.path.join(DATA_DIR, 'Normas.json')
             firmas_path = os.path.join(DATA_DIR, 'Firmas.json')
-            try:
-                if _cargar_clientes_ext:
-                    clientes_map = _cargar_clientes_ext(clientes_path)
-                else:
-                    clientes_map = _cargar_clientes(clientes_path)
-            except Exception:
-                clientes_map = {}
-            try:
-                if _cargar_normas_ext:
-                    normas_map = _cargar_normas_ext(normas_path)
-                else:
-                    normas_map = _cargar_normas(normas_path)
-            except Exception:
-                normas_map = {}
-            try:
-                firmas_map = cargar_firmas(firmas_path)
-            except Exception:
-                firmas_map = {}
+            clientes_map, normas_map, firmas_map = self._catalogos(clientes_path, normas_path, firmas_path)
 
             # Rellenar nombre_norma si está vacío y norma conocida
             try:
@@ -1425,72 +1456,23 @@ class ConstanciaPDFGenerator:
         try:
             # Intentar localizar evidencias automáticamente usando data/evidence_paths.json
             try:
-                evidencia_cfg = {}
-                cfg_path = os.path.join(self.base_dir, 'data', 'evidence_paths.json')
-                if os.path.exists(cfg_path):
-                    with open(cfg_path, 'r', encoding='utf-8') as ef:
-                        evidencia_cfg = json.load(ef) or {}
-
-                IMG_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
-                def _normalizar(s):
-                    return re.sub(r"[^A-Za-z0-9]", "", str(s or "")).upper()
-
                 # construir índice simple: clave_normalizada -> [paths]
-                indice = {}
-                for grp, lst in (evidencia_cfg or {}).items():
-                    if not isinstance(lst, list):
-                        continue
-                    for carpeta in lst:
-                        try:
-                            # permitir rutas relativas guardadas en la configuración
-                            carpeta_path = carpeta
-                            try:
-                                if not os.path.isabs(carpeta_path):
-                                    carpeta_path = os.path.join(self.base_dir, carpeta_path)
-                            except Exception:
-                                carpeta_path = carpeta
-                            if not os.path.exists(carpeta_path):
-                                continue
-                            for root, _, files in os.walk(carpeta_path):
-                                for nombre in files:
-                                    base, ext = os.path.splitext(nombre)
-                                    if ext.lower() not in IMG_EXTS:
-                                        continue
-                                    path = os.path.join(root, nombre)
-                                    # extraer core y normalizar
-                                    try:
-                                        core = re.sub(r"[\s\-_]*\(\s*\d+\s*\)$", "", base)
-                                        core = re.sub(r"[\s\-_]+\d+$", "", core)
-                                    except Exception:
-                                        core = base
-                                    key = _normalizar(core)
-                                    if not key:
-                                        continue
-                                    indice.setdefault(key, []).append(path)
-                                    # indexar también por nombre de carpeta padre
-                                    try:
-                                        parent = os.path.basename(root or "")
-                                        parent_core = re.sub(r"[\s\-_]*\(\s*\d+\s*\)$", "", parent)
-                                        parent_core = re.sub(r"[\s\-_]+\d+$", "", parent_core)
-                                        parent_key = _normalizar(parent_core)
-                                        if parent_key and parent_key != key:
-                                            indice.setdefault(parent_key, []).append(path)
-                                    except Exception:
-                                        pass
-                        except Exception:
-                            continue
+                if self.recursos is not None:
+                    indice = self.recursos.indice_evidencias(self.base_dir)
+                else:
+                    indice = _indice_evidencias(self.base_dir)
 
                 # claves a buscar: folio, solicitud, cliente y claves de tabla_relacion (CODIGO, DESCRIPCION, MARCA)
                 buscar = []
                 fol = str(self.datos.get('folio_constancia') or '')
                 if fol:
-                    buscar.append(_normalizar(fol))
+                    buscar.append(normalizar_codigo(fol))
                 sol = str(self.datos.get('solicitud_formateado') or self.datos.get('solicitud') or '')
                 if sol:
-                    buscar.append(_normalizar(sol))
+                    buscar.append(normalizar_codigo(sol))
                 cliente = str(self.datos.get('cliente') or '')
                 if cliente:
-                    buscar.append(_normalizar(cliente))
+                    buscar.append(normalizar_codigo(cliente))
                 # añadir claves desde la tabla de relación para mejorar matching (como en dictamen)
                 try:
                     tr = list(self.datos.get('tabla_relacion') or [])
@@ -1500,11 +1482,11 @@ class ConstanciaPDFGenerator:
                             desc = str(row.get('DESCRIPCION') or row.get('descripcion') or row.get('Contenido') or row.get('CONTENIDO') or '')
                             marca = str(row.get('MARCA') or row.get('marca') or '')
                             if codigo:
-                                buscar.append(_normalizar(codigo))
+                                buscar.append(normalizar_codigo(codigo))
                             if desc:
-                                buscar.append(_normalizar(desc))
+                                buscar.append(normalizar_codigo(desc))
                             if marca:
-                                buscar.append(_normalizar(marca))
+                                buscar.append(normalizar_codigo(marca))
                         except Exception:
                             continue
                 except Exception:
@@ -1539,6 +1521,60 @@ class ConstanciaPDFGenerator:
         c.save()
         return salida
 
+def _indice_evidencias(base_dir: str) -> dict:
+    """Índice clave_normalizada -> [rutas] de las carpetas de `data/evidence_paths.json`.
+
+    Recorre las carpetas con os.walk, por lo que en un lote se calcula una sola
+    vez (ver `RecursosConstancia.indice_evidencias`).
+    """
+    evidencia_cfg = {}
+    cfg_path = os.path.join(base_dir, 'data', 'evidence_paths.json')
+    if os.path.exists(cfg_path):
+        with open(cfg_path, 'r', encoding='utf-8') as ef:
+            evidencia_cfg = json.load(ef) or {}
+
+    IMG_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+    # construir índice simple: clave_normalizada -> [paths]
+    indice = {}
+    for grp, lst in (evidencia_cfg or {}).items():
+        if not isinstance(lst, list):
+            continue
+        for carpeta in lst:
+            try:
+                # permitir rutas relativas guardadas en la configuración
+                carpeta_path = carpeta
+                try:
+                    if not os.path.isabs(carpeta_path):
+                        carpeta_path = os.path.join(base_dir, carpeta_path)
+                except Exception:
+                    carpeta_path = carpeta
+                if not os.path.exists(carpeta_path):
+                    continue
+                for root, _, files in os.walk(carpeta_path):
+                    for nombre in files:
+                        base, ext = os.path.splitext(nombre)
+                        if ext.lower() not in IMG_EXTS:
+                            continue
+                        path = os.path.join(root, nombre)
+                        # extraer core y normalizar
+                        key = normalizar_codigo(core_base(base))
+                        if not key:
+                            continue
+                        indice.setdefault(key, []).append(path)
+                        # indexar también por nombre de carpeta padre
+                        try:
+                            parent = os.path.basename(root or "")
+                            parent_key = normalizar_codigo(core_base(parent))
+                            if parent_key and parent_key != key:
+                                indice.setdefault(parent_key, []).append(path)
+                        except Exception:
+                            pass
+            except Exception:
+                continue
+
+    return indice
+
+
 def _dividir_texto(c: canvas.Canvas, texto: str, max_width: float, font_name: str = 'Helvetica', font_size: int = 10):
     palabras = texto.split()
     lineas = []
@@ -1756,6 +1792,251 @@ def _get_last_historial_fecha(data_dir: str) -> str:
     except Exception:
         return ''
 
+def _leer_json(path: str):
+    """Carga un JSON; None si no existe o no se puede leer."""
+    try:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def leer_folio_counter() -> dict | None:
+    """Instantánea de `data/folio_counter.json` (None si no existe o no se puede leer)."""
+    return _leer_json(os.path.join(DATA_DIR, 'folio_counter.json'))
+
+
+# ============================================================
+# GENERACIÓN DE CONSTANCIAS EN LOTE
+# ============================================================
+# Cada `ConstanciaPDFGenerator.generar` volvía a leer Firmas.json (dos veces),
+# Clientes.json, Normas.json, `folios_{id}.json` y `folio_counter.json`,
+# y recorría con os.walk las carpetas de evidence_paths.json. En un lote esos
+# datos no cambian: `RecursosConstancia` los carga una vez y
+# `generar_constancias_lote` reparte los documentos entre procesos (o los
+# genera en el proceso actual con workers=1). El fondo y las firmas los
+# decodifica `recursos_graficos` una vez por proceso.
+#
+# Los folios se toman de una instantánea leída antes de empezar el lote, por
+# lo que quien llama debe persistir los folios de la visita (p. ej.
+# `guardar_folios_visita`) ANTES de lanzar el lote. Si el contador de folios
+# cambia entre documentos (reservas por documento), cada trabajo puede llevar
+# su propia instantánea de `folio_counter.json` (ver `leer_folio_counter`).
+
+# Tope de procesos aceptado
+MAX_WORKERS_CONSTANCIAS = 32
+
+# Recursos de solo lectura del proceso (los fija `_init_worker_constancias`)
+_RECURSOS_WORKER = None
+
+
+class RecursosConstancia:
+    """
+    Catálogos, instantáneas de folios e índice de evidencias compartidos por
+    todas las constancias de un lote. Se puede enviar a otros procesos.
+    """
+
+    def __init__(self, data_dir: str | None = None):
+        self.data_dir = data_dir or DATA_DIR
+        self.tiempos = {}
+        self._cargado = False
+        self.clientes_map = {}
+        self.normas_map = {}
+        self.firmas_map = {}
+        self._folios_visitas = {}
+        self._folio_counter = None
+        self._folio_counter_leido = False
+        self._indices_evidencias = {}
+
+    def cargar(self) -> "RecursosConstancia":
+        """Carga clientes, normas y firmas (solo la primera vez)."""
+        if self._cargado:
+            return self
+        self._cargado = True
+        t0 = time.perf_counter()
+        clientes_path = os.path.join(self.data_dir, 'Clientes.json')
+        normas_path = os.path.join(self.data_dir, 'Normas.json')
+        try:
+            if _cargar_clientes_ext:
+                self.clientes_map = _cargar_clientes_ext(clientes_path)
+            else:
+                self.clientes_map = _cargar_clientes(clientes_path)
+        except Exception:
+            self.clientes_map = {}
+        try:
+            if _cargar_normas_ext:
+                self.normas_map = _cargar_normas_ext(normas_path)
+            else:
+                self.normas_map = _cargar_normas(normas_path)
+        except Exception:
+            self.normas_map = {}
+        try:
+            self.firmas_map = cargar_firmas()
+        except Exception:
+            self.firmas_map = {}
+        self.tiempos['catalogos'] = time.perf_counter() - t0
+        return self
+
+    def folios_visita(self, fid: str):
+        """Instantánea de `folios_visitas/folios_{fid}.json` (None si no existe)."""
+        fid = str(fid or '').strip()
+        if fid not in self._folios_visitas:
+            self._folios_visitas[fid] = _leer_json(
+                os.path.join(self.data_dir, 'folios_visitas', f"folios_{fid}.json"))
+        return self._folios_visitas[fid]
+
+    def folio_counter(self):
+        """Instantánea de `folio_counter.json` (None si no existe)."""
+        if not self._folio_counter_leido:
+            self._folio_counter_leido = True
+            self._folio_counter = _leer_json(os.path.join(self.data_dir, 'folio_counter.json'))
+        return self._folio_counter
+
+    def precargar_folios(self, datos_lote) -> None:
+        """Toma la instantánea de folios de todas las visitas del lote."""
+        t0 = time.perf_counter()
+        self.folio_counter()
+        for datos in datos_lote:
+            try:
+                fid = str(datos.get('folio_visita') or datos.get('folio') or datos.get('folio_constancia') or '').strip()
+                if fid:
+                    self.folios_visita(fid)
+            except Exception:
+                continue
+        self.tiempos['folios'] = time.perf_counter() - t0
+
+    def indice_evidencias(self, base_dir: str) -> dict:
+        """Índice de evidencias (ver `_indice_evidencias`), una vez por base_dir."""
+        if base_dir not in self._indices_evidencias:
+            t0 = time.perf_counter()
+            self._indices_evidencias[base_dir] = _indice_evidencias(base_dir)
+            self.tiempos['evidencias'] = self.tiempos.get('evidencias', 0.0) + time.perf_counter() - t0
+        return self._indices_evidencias[base_dir]
+
+
+def obtener_workers_constancias(workers=None) -> int:
+    """Número de procesos para el lote.
+
+    Prioridad: argumento `workers`, luego la variable de entorno
+    `CONSTANCIA_WORKERS`; por defecto 1 (secuencial). `0` o `"auto"` usa todos
+    los núcleos disponibles.
+    """
+    return paralelismo.obtener_workers(workers, env="CONSTANCIA_WORKERS",
+                                      maximo=MAX_WORKERS_CONSTANCIAS)
+
+
+def _init_worker_constancias(recursos: RecursosConstancia) -> None:
+    global _RECURSOS_WORKER
+    _RECURSOS_WORKER = recursos
+
+
+def _generar_una_constancia(trabajo) -> dict:
+    """Genera un PDF del lote; devuelve un dict de resultado (no lanza excepciones)."""
+    datos, salida, contador, base_dir = trabajo
+    t0 = time.perf_counter()
+    ruta = None
+    error = None
+    try:
+        gen = ConstanciaPDFGenerator(datos, base_dir=base_dir, recursos=_RECURSOS_WORKER,
+                                     folio_counter=contador)
+        ruta = gen.generar(salida)
+    except Exception:
+        error = traceback.format_exc()
+    return {
+        'salida': salida,
+        'ruta': ruta,
+        'ok': bool(ruta) and error is None and os.path.exists(ruta),
+        'error': error,
+        # El generador completa `datos` (folio_formateado, nombre_norma...);
+        # se devuelve para que el proceso principal vea esos cambios.
+        'datos': datos,
+        'segundos': round(time.perf_counter() - t0, 3),
+    }
+
+
+def generar_constancias_lote(trabajos, workers=None, base_dir: str | None = None,
+                             recursos: RecursosConstancia | None = None, progreso=None) -> dict:
+    """
+    Genera varias constancias compartiendo catálogos, folios y evidencias.
+
+    Args:
+        trabajos: Lista de (datos, salida) — mismos argumentos que
+                  `ConstanciaPDFGenerator(datos).generar(salida)` — o de
+                  (datos, salida, folio_counter) con la instantánea del
+                  contador que debe ver ese documento
+        workers: Procesos a usar (ver `obtener_workers_constancias`)
+        base_dir: Carpeta base del proyecto (img/, Firmas/, data/evidence_paths.json)
+        recursos: Recursos ya cargados (se crean si no se pasan)
+        progreso: callback opcional progreso(hechos, total, resultado)
+
+    Returns:
+        {total, ok, errores, workers, segundos, tiempos_recursos, documentos: [...]}
+        con un resultado por trabajo en el mismo orden de `trabajos`.
+    """
+    t0 = time.perf_counter()
+    trabajos = list(trabajos)
+    base_dir = base_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    recursos = recursos or RecursosConstancia()
+    recursos.cargar()
+    recursos.precargar_folios([t[0] for t in trabajos])
+    recursos.indice_evidencias(base_dir)
+
+    workers = obtener_workers_constancias(workers)
+    if len(trabajos) < 2:
+        workers = 1
+    tareas = [(t[0], t[1], t[2] if len(t) > 2 else None, base_dir) for t in trabajos]
+
+    documentos = []
+
+    def _registrar(res):
+        documentos.append(res)
+        estado = "OK" if res['ok'] else "ERROR"
+        print(f"[constancias] {len(documentos)}/{len(tareas)} {estado} {res['segundos']:.2f}s {res['salida']}")
+        if progreso:
+            try:
+                progreso(len(documentos), len(tareas), res)
+            except Exception:
+                pass
+
+    global _RECURSOS_WORKER
+    if workers == 1:
+        anterior = _RECURSOS_WORKER
+        _RECURSOS_WORKER = recursos
+        try:
+            for tarea in tareas:
+                _registrar(_generar_una_constancia(tarea))
+        finally:
+            _RECURSOS_WORKER = anterior
+    else:
+        # Importar por nombre para que las funciones del pool se serialicen
+        # como referencia a un módulo importable en los procesos hijos.
+        _dir = os.path.dirname(os.path.abspath(__file__))
+        if _dir not in sys.path:
+            sys.path.append(_dir)
+        import Constancia as modulo
+        print(f"Generando {len(tareas)} constancias con {workers} procesos...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=modulo._init_worker_constancias,
+                                 initargs=(recursos,)) as pool:
+            # `map` entrega los resultados en el orden de entrada
+            for res in pool.map(modulo._generar_una_constancia, tareas):
+                _registrar(res)
+
+    resumen = {
+        'total': len(documentos),
+        'ok': sum(1 for r in documentos if r['ok']),
+        'errores': sum(1 for r in documentos if not r['ok']),
+        'workers': workers,
+        'segundos': round(time.perf_counter() - t0, 3),
+        'tiempos_recursos': {k: round(v, 3) for k, v in recursos.tiempos.items()},
+        'documentos': documentos,
+    }
+    print(f"Resumen constancias: {resumen['total']} documentos, {resumen['ok']} correctos, "
+          f"{resumen['errores']} con error en {resumen['segundos']}s (procesos={workers})")
+    return resumen
+
+
 def generar_constancia_desde_visita(folio_visita: str | None = None, salida: str | None = None) -> str:
     base = PACKAGE_BASE
     data_dir = DATA_DIR
@@ -2137,11 +2418,28 @@ def generar_constancia_desde_visita(folio_visita: str | None = None, salida: str
     gen = ConstanciaPDFGenerator(datos, base_dir=base)
     return gen.generar(salida)
 
-def generar_json_constancias_desde_historial(salida_dir: str | None = None, max_items: int | None = None) -> list:
+def _escribir_json_constancia(trabajo):
+    """Escribe un JSON del lote; devuelve la ruta o None si falló."""
+    out_path, datos = trabajo
+    try:
+        with open(out_path, 'w', encoding='utf-8') as jf:
+            json.dump(datos, jf, ensure_ascii=False, indent=2)
+        return out_path
+    except Exception:
+        return None
+
+
+def generar_json_constancias_desde_historial(salida_dir: str | None = None, max_items: int | None = None,
+                                             workers=None) -> list:
     """Lee `data/historial_visitas.json` y genera un JSON con los datos de constancia
     para cada visita encontrada. Guarda los JSON en `data/Constancias` o en `salida_dir`.
 
-    Devuelve la lista de rutas de los JSON creados.
+    Los datos de todas las visitas se arman en una pasada (una búsqueda de
+    cliente por visita) y los archivos se escriben en lote: en el hilo actual
+    o, con `workers` > 1 (ver `obtener_workers_constancias`), en un pool de
+    hilos, porque la escritura es de E/S y no compensa abrir procesos.
+
+    Devuelve la lista de rutas de los JSON creados, en el orden del historial.
     """
     base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     data_dir = get_data_dir()
@@ -2180,8 +2478,9 @@ def generar_json_constancias_desde_historial(salida_dir: str | None = None, max_
 
     out_dir = salida_dir or os.path.join(data_dir, 'Constancias')
     os.makedirs(out_dir, exist_ok=True)
-    created = []
+    trabajos = []
     count = 0
+    hoy = datetime.now().strftime('%d/%m/%Y')
     for v in visitas:
         if max_items is not None and count >= max_items:
             break
@@ -2192,13 +2491,14 @@ def generar_json_constancias_desde_historial(salida_dir: str | None = None, max_
             nombre_norma = normas.get(norma_str, '')
 
             cliente = v.get('cliente','')
-            rfc = (clientes.get(cliente.upper(), {}) or {}).get('RFC','')
+            # RFC, número y fecha de contrato desde Clientes.json
+            info_cliente = clientes.get(cliente.upper(), {}) or {}
+            rfc = info_cliente.get('RFC','')
 
-            fecha = v.get('fecha_termino') or v.get('fecha') or datetime.now().strftime('%d/%m/%Y')
+            fecha = v.get('fecha_termino') or v.get('fecha') or hoy
 
-            # Número y fecha de contrato desde Clientes.json
-            no_contrato = (clientes.get(cliente.upper(), {}) or {}).get('NÚMERO_DE_CONTRATO', '')
-            fecha_contrato = (clientes.get(cliente.upper(), {}) or {}).get('FECHA_DE_CONTRATO', '')
+            no_contrato = info_cliente.get('NÚMERO_DE_CONTRATO', '')
+            fecha_contrato = info_cliente.get('FECHA_DE_CONTRATO', '')
 
             fol = (v.get('folio_visita') or v.get('folio') or '')
             safe_fol = str(fol).replace('/','_').replace(' ', '_') or f'visita_{count+1}'
@@ -2218,28 +2518,34 @@ def generar_json_constancias_desde_historial(salida_dir: str | None = None, max_
                 'origen_visita': v,
             }
 
-            out_path = os.path.join(out_dir, f'Constancia_{safe_fol}.json')
-            with open(out_path, 'w', encoding='utf-8') as jf:
-                json.dump(datos, jf, ensure_ascii=False, indent=2)
-            created.append(out_path)
+            trabajos.append((os.path.join(out_dir, f'Constancia_{safe_fol}.json'), datos))
             count += 1
         except Exception:
             continue
 
-    return created
+    workers = obtener_workers_constancias(workers)
+    if workers == 1 or len(trabajos) < 2:
+        rutas = [_escribir_json_constancia(t) for t in trabajos]
+    else:
+        # `map` entrega los resultados en el orden de entrada
+        with ThreadPoolExecutor(max_workers=min(workers, len(trabajos))) as pool:
+            rutas = list(pool.map(_escribir_json_constancia, trabajos))
+    return [r for r in rutas if r]
 
 
-def convertir_constancia_a_json(datos: dict) -> dict:
+def convertir_constancia_a_json(datos: dict, folio_counter: dict | None = None) -> dict:
     """Convierte una estructura de constancia a un JSON con el mismo acomodo que el dictamen.
 
     Devuelve un dict serializable; intenta normalizar identificador, norma, fechas,
     cliente, producto, tabla_productos, cantidad_total, observaciones y firmas.
+    `folio_counter` es la instantánea del contador con la que se generó el PDF
+    (lotes); None = leer `folio_counter.json` de disco.
     """
     try:
         # Intentar reconstruir cadena identificadora
         cadena = datos.get('cadena') or ''
         try:
-            gen = ConstanciaPDFGenerator(datos)
+            gen = ConstanciaPDFGenerator(datos, folio_counter=folio_counter)
             cadena = gen.construir_cadena_identificacion() or cadena
         except Exception:
             pass
@@ -2339,9 +2645,12 @@ def convertir_constancia_a_json(datos: dict) -> dict:
         return {}
 
 
-def generar_constancias_desde_tabla(salida_dir: str | None = None) -> list:
+def generar_constancias_desde_tabla(salida_dir: str | None = None, workers=None) -> list:
     """Genera una constancia PDF por cada fila en data/tabla_de_relacion.json.
 
+    Los folios se reservan en orden de la tabla y los PDFs se generan en lote
+    (ver `generar_constancias_lote`); `workers` > 1 los reparte entre procesos.
+
     Devuelve la lista de rutas generadas.
     """
     base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -2362,6 +2671,11 @@ def generar_constancias_desde_tabla(salida_dir: str | None = None) -> list:
     os.makedirs(out_dir, exist_ok=True)
     created = []
 
+    # fecha de emisión desde historial o hoy (el historial no cambia durante el lote)
+    fecha_emision = _get_last_historial_fecha(data_dir) or datetime.now().strftime('%d/%m/%Y')
+
+    # 1) Preparar datos y reservar folios en el orden de la tabla
+    preparadas = []
     for i, row in enumerate(rows, start=1):
         try:
             # preparar campos básicos
@@ -2386,9 +2700,6 @@ def generar_constancias_desde_tabla(salida_dir: str | None = None) -> list:
             except Exception:
                 pass
 
-            # fecha de emisión desde historial o hoy
-            fecha_emision = _get_last_historial_fecha(data_dir) or datetime.now().strftime('%d/%m/%Y')
-
             # reservar folio
             fol_digits = _reserve_next_folio(data_dir)
             fol_display = str(fol_digits).zfill(6)
@@ -2414,44 +2725,57 @@ def generar_constancias_desde_tabla(salida_dir: str | None = None) -> list:
             }
 
             out_path = os.path.join(out_dir, f'Constancia_{fol_display}.pdf')
-            gen = ConstanciaPDFGenerator(datos, base_dir=base)
-            out = gen.generar(out_path)
-            created.append(out)
-            # Guardar JSON en formato similar al dictamen usando el convertidor
-            try:
-                # construir nombre similar al que usa la app: incluir lista/folio/solicitud
-                sol_no = ''
-                sol_year = ''
-                if '/' in solicitud_raw:
-                    parts = solicitud_raw.split('/')
-                    sol_no = parts[0].strip()
-                    sol_year = parts[1].strip() if len(parts) > 1 else ''
-                else:
-                    sol_no = solicitud_raw
-
-                json_name = f"Constancia_Lista_{datos.get('lista','')}_{fol_display}_{sol_no}_{sol_year}.json"
-                json_name = json_name.replace('/', '_').replace(' ', '_')
-                json_path = os.path.join(out_dir, json_name)
-                try:
-                    json_data = convertir_constancia_a_json(datos)
-                except Exception:
-                    json_data = datos
-                # añadir metadata
-                try:
-                    json_data.setdefault('metadata', {})
-                    json_data['metadata']['pdf_generado'] = True
-                    json_data['metadata']['pdf_path'] = out
-                except Exception:
-                    pass
-                with open(json_path, 'w', encoding='utf-8') as jf:
-                    json.dump(json_data, jf, ensure_ascii=False, indent=2)
-            except Exception:
-                pass
-            print('Generated:', out)
+            # El generador consulta folio_counter.json: cada documento ve el
+            # contador tal como quedó tras su propia reserva.
+            preparadas.append((i, datos, out_path, leer_folio_counter(), solicitud_raw, fol_display))
         except Exception as e:
             print('Error generating for row', i, e)
             continue
 
+    # 2) Generar los PDFs en lote
+    resumen = generar_constancias_lote([(p[1], p[2], p[3]) for p in preparadas], workers=workers, base_dir=base)
+
+    # 3) Guardar JSONs y reportar en el orden de la tabla
+    for (i, datos, out_path, contador, solicitud_raw, fol_display), res in zip(preparadas, resumen['documentos']):
+        if not res['ok']:
+            ultima = (res['error'] or '').strip().splitlines()
+            print('Error generating for row', i, ultima[-1] if ultima else 'PDF no generado')
+            continue
+        out = res['ruta']
+        datos = res.get('datos') or datos
+        created.append(out)
+        # Guardar JSON en formato similar al dictamen usando el convertidor
+        try:
+            # construir nombre similar al que usa la app: incluir lista/folio/solicitud
+            sol_no = ''
+            sol_year = ''
+            if '/' in solicitud_raw:
+                parts = solicitud_raw.split('/')
+                sol_no = parts[0].strip()
+                sol_year = parts[1].strip() if len(parts) > 1 else ''
+            else:
+                sol_no = solicitud_raw
+
+            json_name = f"Constancia_Lista_{datos.get('lista','')}_{fol_display}_{sol_no}_{sol_year}.json"
+            json_name = json_name.replace('/', '_').replace(' ', '_')
+            json_path = os.path.join(out_dir, json_name)
+            try:
+                json_data = convertir_constancia_a_json(datos, folio_counter=contador)
+            except Exception:
+                json_data = datos
+            # añadir metadata
+            try:
+                json_data.setdefault('metadata', {})
+                json_data['metadata']['pdf_generado'] = True
+                json_data['metadata']['pdf_path'] = out
+            except Exception:
+                pass
+            with open(json_path, 'w', encoding='utf-8') as jf:
+                json.dump(json_data, jf, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+        print('Generated:', out)
+
     return created
 
 if __name__ == '__main__':
@@ -6,11 +6,17 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen.canvas import Canvas
 import os
+import sys
 import json
 
+# Caché de fondos y firmas compartida por los generadores de esta carpeta
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+import recursos_graficos
+
 # =========================================================
 #   ESTILOS
 # =========================================================
@@ -233,10 +239,7 @@ def add_header_footer(canvas: Canvas, doc):
     canvas.saveState()
 
     # Fondo
-    bg_path = "img/Oficios.png"
-    if os.path.exists(bg_path):
-        bg = ImageReader(bg_path)
-        canvas.drawImage(bg, 0, 0, width=letter[0], height=letter[1])
+    recursos_graficos.dibujar_fondo(canvas, 'fondo_oficios', width=letter[0], height=letter[1])
 
     # Encabezado izquierdo
     canvas.setFont("Helvetica-Bold", 10)
@@ -1,11 +1,17 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
 import os
+import sys
 import json
 from datetime import datetime
 
+# Caché de fondos y firmas compartida por los generadores de esta carpeta
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+import recursos_graficos
+
 class OficioPDFGenerator:
     def __init__(self, datos, path_firmas_json="data/Firmas.json"):
         """
@@ -43,13 +49,10 @@ class OficioPDFGenerator:
     
     def dibujar_fondo(self, c):
         """Dibuja la imagen de fondo"""
-        fondo_path = "img/Oficios.png"
-        if os.path.exists(fondo_path):
-            try:
-                img = ImageReader(fondo_path)
-                c.drawImage(img, 0, 0, width=self.width, height=self.height)
-            except Exception as e:
-                print(f"⚠️ Error al cargar imagen de fondo: {e}")
+        try:
+            recursos_graficos.dibujar_fondo(c, 'fondo_oficios', width=self.width, height=self.height)
+        except Exception as e:
+            print(f"⚠️ Error al cargar imagen de fondo: {e}")
     
     def dibujar_paginacion(self, c):
         """Dibuja la paginación"""
@@ -256,7 +259,7 @@ class OficioPDFGenerator:
         if os.path.exists(firma_path):
             try:
                 c.drawImage(
-                    firma_path,
+                    recursos_graficos.imagen(firma_path) or firma_path,
                     x_start,                # izquierda
                     self.cursor_y - 18*mm,  # debajo del texto
                     width=45*mm,
@@ -517,7 +520,7 @@ class OficioPDFGenerator:
                 ruta = obtener_firma(left)
                 if ruta:
                     try:
-                        img = ImageReader(ruta)
+                        img = recursos_graficos.imagen(ruta) or ImageReader(ruta)
                         c.drawImage(img, firma_x, firma_y, width=firma_w, height=firma_h, preserveAspectRatio=True, mask="auto")
                     except Exception:
                         c.line(firma_x, firma_y + 2 * mm, firma_x + firma_w, firma_y + 2 * mm)
@@ -536,7 +539,7 @@ class OficioPDFGenerator:
                 ruta = obtener_firma(right)
                 if ruta:
                     try:
-                        img = ImageReader(ruta)
+                        img = recursos_graficos.imagen(ruta) or ImageReader(ruta)
                         c.drawImage(img, firma_x, firma_y, width=firma_w, height=firma_h, preserveAspectRatio=True, mask="auto")
                     except Exception:
                         c.line(firma_x, firma_y + 2 * mm, firma_x + firma_w, firma_y + 2 * mm)
@@ -563,7 +566,7 @@ class OficioPDFGenerator:
         ruta_alm = obtener_firma(almacen_nombre) if almacen_nombre else None
         if ruta_alm:
             try:
-                img = ImageReader(ruta_alm)
+                img = recursos_graficos.imagen(ruta_alm) or ImageReader(ruta_alm)
                 c.drawImage(img, firma_x_alm, firma_almacen_y, width=firma_w, height=firma_h, preserveAspectRatio=True, mask="auto")
             except Exception:
                 c.line(firma_x_alm, firma_almacen_y + 2 * mm, firma_x_alm + firma_w, firma_almacen_y + 2 * mm)
@@ -670,16 +673,13 @@ def generar_oficio_pdf(datos, ruta_salida="Oficio.pdf"):
     return generador.generar(ruta_salida)
 
 # Función para preparar datos desde la tabla de relación
-def preparar_datos_desde_visita(datos_visita, firmas_json_path="data/Firmas.json"):
+def preparar_datos_desde_visita(datos_visita, firmas_json_path="data/Firmas.json", clientes=None):
     """
     Prepara los datos para el oficio a partir de los datos de una visita
+
+    `clientes` es el contenido ya cargado de Clientes.json (si no se pasa, se
+    lee del disco). Las firmas las resuelve `OficioPDFGenerator` al dibujar.
     """
-    # Cargar firmas
-    firmas_data = []
-    if os.path.exists(firmas_json_path):
-        with open(firmas_json_path, 'r', encoding='utf-8') as f:
-            firmas_data = json.load(f)
-    
     # Obtener inspectores
     inspectores = []
     if 'supervisores_tabla' in datos_visita and datos_visita['supervisores_tabla']:
@@ -696,19 +696,19 @@ def preparar_datos_desde_visita(datos_visita, firmas_json_path="data/Firmas.json
     rfc = ''
     clientes_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'Clientes.json')
     try:
-        if os.path.exists(clientes_path):
+        if clientes is None and os.path.exists(clientes_path):
             with open(clientes_path, 'r', encoding='utf-8') as cf:
                 clientes = json.load(cf)
-                if isinstance(clientes, list):
-                    for c in clientes:
-                        if str(c.get('CLIENTE','')).strip().upper() == str(datos_visita.get('cliente','')).strip().upper():
-                            calle = c.get('CALLE Y NO') or c.get('CALLE','') or calle
-                            colonia = c.get('COLONIA O POBLACION') or c.get('COLONIA','') or colonia
-                            municipio = c.get('MUNICIPIO O ALCADIA') or c.get('MUNICIPIO','') or municipio
-                            ciudad_estado = c.get('CIUDAD O ESTADO') or c.get('CIUDAD/ESTADO') or ciudad_estado
-                            numero_contrato = c.get('NÚMERO_DE_CONTRATO','')
-                            rfc = c.get('RFC','')
-                            break
+        if isinstance(clientes, list):
+            for c in clientes:
+                if str(c.get('CLIENTE','')).strip().upper() == str(datos_visita.get('cliente','')).strip().upper():
+                    calle = c.get('CALLE Y NO') or c.get('CALLE','') or calle
+                    colonia = c.get('COLONIA O POBLACION') or c.get('COLONIA','') or colonia
+                    municipio = c.get('MUNICIPIO O ALCADIA') or c.get('MUNICIPIO','') or municipio
+                    ciudad_estado = c.get('CIUDAD O ESTADO') or c.get('CIUDAD/ESTADO') or ciudad_estado
+                    numero_contrato = c.get('NÚMERO_DE_CONTRATO','')
+                    rfc = c.get('RFC','')
+                    break
     except Exception:
         pass
 
@@ -14,9 +14,15 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import BaseDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, KeepTogether, Frame, PageTemplate
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
 from datetime import datetime
 import os
+import sys
+
+# Caché de fondos y firmas compartida por los generadores de esta carpeta
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+import recursos_graficos
 
 
 def generar_reporte_decathlon(nombre_cliente, folio_inspeccion, fecha_inspeccion, tabla_relacion=None, lista_equipos=None, observaciones_generales='', ruta_guardado='reporte.pdf', folio_visita=None, destinatario='Diana Cumpean', direccion=None):
@@ -56,9 +62,8 @@ def generar_reporte_decathlon(nombre_cliente, folio_inspeccion, fecha_inspeccion
         if os.path.exists(membrete_path):
             try:
                 page_w, page_h = doc_.pagesize
-                # Usar ImageReader para obtener proporciones de la imagen
-                img_reader = ImageReader(membrete_path)
-                img_w, img_h = img_reader.getSize()
+                # Proporciones de la imagen (decodificada una vez por proceso)
+                img_w, img_h = recursos_graficos.tamano(membrete_path) or (0, 0)
                 if img_w > 0 and img_h > 0:
                     # Escalar para cubrir la página preservando la relación de aspecto (cover)
                     scale = max(page_w / img_w, page_h / img_h)
@@ -67,7 +72,7 @@ def generar_reporte_decathlon(nombre_cliente, folio_inspeccion, fecha_inspeccion
                     # Centrar la imagen en la página
                     x = (page_w - draw_w) / 2.0
                     y = (page_h - draw_h) / 2.0
-                    canvas.drawImage(img_reader, x, y, width=draw_w, height=draw_h, preserveAspectRatio=False, mask='auto')
+                    recursos_graficos.dibujar_fondo(canvas, membrete_path, x, y, width=draw_w, height=draw_h, mask='auto')
                 else:
                     # Fallback: estirar a la página
                     canvas.drawImage(membrete_path, 0, 0, width=page_w, height=page_h, preserveAspectRatio=False, mask='auto')
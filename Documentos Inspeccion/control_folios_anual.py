@@ -1,13 +1,272 @@
+import bisect
 import json
 import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import unicodedata
 import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
+# Normalización memoizada compartida (raíz del proyecto). Si el módulo se
+# ejecuta de forma aislada y no está disponible se usa la versión local.
+try:
+    from normalizacion import normalizar_nombre as _normalizar_nombre_cache
+except Exception:
+    _normalizar_nombre_cache = None
+
+_RE_DIGITOS = re.compile(r"(\d+)")
+_RE_SOL_ARCHIVO = re.compile(r"([A-Za-z0-9\-]{4,})")
+
+# ============================================================
+# EXPORTACIÓN A EXCEL EN MODO STREAMING
+# ============================================================
+# Antes el control anual y el reporte EMA construían un `Workbook` completo en
+# memoria y asignaban fuente/relleno/borde celda por celda (un objeto de estilo
+# por celda). Con un año de folios eso ocupaba cientos de MB y tardaba minutos.
+# Ahora se usa `Workbook(write_only=True)`: las filas se escriben conforme las
+# entrega un generador y no quedan en memoria. Los estilos son `NamedStyle`
+# registrados una sola vez en el libro y cada celda solo guarda su nombre.
+#
+# En modo write_only los anchos de columna deben fijarse antes de la primera
+# fila, así que se toman las primeras `MUESTRA_ANCHOS` filas como muestra,
+# se calculan los anchos y luego se escriben esas filas y el resto del flujo.
+
+# Encabezados del control de folios anual (orden de columnas)
+ENCABEZADOS_CONTROL = [
+    "NÚMERO DE SOLICITUD",
+    "CLIENTE",
+    "NÚMERO DE CONTRATO",
+    "RFC",
+    "CURP",
+    "PRODUCTO VERIFICADO",
+    "MARCAS",
+    "NOM",
+    "TIPO DE DOCUMENTO OFICIAL EMITIDO",
+    "ESTATUS",
+    "DOCUMENTO EMITIDO",
+    "FECHA DE DOCUMENTO EMITIDO",
+    "VERIFICADOR",
+    "PEDIMENTO DE IMPORTACION",
+    "FECHA DE DESADUANAMIENTO (CUANDO APLIQUE)",
+    "FECHA DE VISITA (CUANDO APLIQUE)",
+    "MODELOS",
+    "SOL EMA",
+    "FOLIO EMA",
+    "INSP EMA"
+]
+
+MUESTRA_ANCHOS = 200
+ANCHO_MIN = 10
+ANCHO_MAX = 50
+
+ESTILO_ENCABEZADO = "cfa_encabezado"
+ESTILO_CELDA = "cfa_celda"
+ESTILO_CANCELADO = "cfa_cancelado"
+ESTILO_PENDIENTE = "cfa_pendiente"
+ESTILO_COMPLETADO = "cfa_completado"
+
+
+def _registrar_estilos_excel(wb) -> None:
+    """Registra en `wb` los NamedStyle usados por las exportaciones."""
+    lado = Side(style='thin')
+    borde = Border(left=lado, right=lado, top=lado, bottom=lado)
+    alin_celda = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+    def _relleno(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    estilos = [
+        NamedStyle(name=ESTILO_ENCABEZADO, font=Font(bold=True, color="FFFFFF"), fill=_relleno("366092"),
+                   alignment=Alignment(horizontal="center", vertical="center", wrap_text=True), border=borde),
+        NamedStyle(name=ESTILO_CELDA, alignment=alin_celda, border=borde),
+        NamedStyle(name=ESTILO_CANCELADO, font=Font(bold=True), fill=_relleno("FFC7CE"),
+                   alignment=alin_celda, border=borde),
+        NamedStyle(name=ESTILO_PENDIENTE, font=Font(bold=True), fill=_relleno("FFF2CC"),
+                   alignment=alin_celda, border=borde),
+        NamedStyle(name=ESTILO_COMPLETADO, font=Font(bold=False), fill=_relleno("C6EFCE"),
+                   alignment=alin_celda, border=borde),
+    ]
+    for estilo in estilos:
+        if estilo.name not in wb.named_styles:
+            wb.add_named_style(estilo)
+
+
+def _ancho_texto(valor) -> int:
+    if valor is None:
+        return 0
+    return max((len(linea) for linea in str(valor).splitlines()), default=0)
+
+
+def _calcular_anchos(encabezados: List[str], muestra: List[List]) -> List[float]:
+    """Ancho por columna a partir de una muestra de filas.
+
+    Los encabezados se escriben con ajuste de línea, así que solo cuenta su
+    palabra más larga; los valores cuentan completos. Se acota a
+    [ANCHO_MIN, ANCHO_MAX] (el resto se ve con el ajuste de línea).
+    """
+    anchos = []
+    for i, encabezado in enumerate(encabezados):
+        ancho = max((len(p) for p in str(encabezado).split()), default=0)
+        for valores in muestra:
+            if i < len(valores):
+                ancho = max(ancho, _ancho_texto(valores[i]))
+        anchos.append(float(max(ANCHO_MIN, min(ANCHO_MAX, ancho + 2))))
+    return anchos
+
+
+def escribir_excel_streaming(ruta: str, titulo: str, encabezados: List[str], filas,
+                             muestra: int = MUESTRA_ANCHOS) -> int:
+    """
+    Escribe un .xlsx en modo write_only a partir de un iterable de filas.
+
+    Args:
+        ruta: Archivo de salida
+        titulo: Nombre de la hoja
+        encabezados: Encabezados de la primera fila
+        filas: Iterable (idealmente un generador) de tuplas (valores, estilo)
+               donde `estilo` es uno de los NamedStyle ESTILO_*
+        muestra: Número de filas iniciales usadas para calcular los anchos
+
+    Returns:
+        Número de filas de datos escritas
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    _registrar_estilos_excel(wb)
+    ws = wb.create_sheet(title=titulo)
+
+    filas = iter(filas)
+    primeras = []
+    for fila in filas:
+        primeras.append(fila)
+        if len(primeras) >= muestra:
+            break
+
+    for col, ancho in enumerate(_calcular_anchos(encabezados, [v for v, _ in primeras]), 1):
+        ws.column_dimensions[get_column_letter(col)].width = ancho
+    # Congelar primera fila
+    ws.freeze_panes = 'A2'
+
+    def _celdas(valores, estilo):
+        celdas = []
+        for valor in valores:
+            celda = WriteOnlyCell(ws, value=valor)
+            celda.style = estilo
+            celdas.append(celda)
+        return celdas
+
+    ws.append(_celdas(encabezados, ESTILO_ENCABEZADO))
+    total = 0
+    for valores, estilo in primeras:
+        ws.append(_celdas(valores, estilo))
+        total += 1
+    for valores, estilo in filas:
+        ws.append(_celdas(valores, estilo))
+        total += 1
+
+    wb.save(ruta)
+    return total
+
+
+def _mapa_estatus_por_folio(historial_visitas) -> Dict[int, str]:
+    """Estatus (en minúsculas) por folio entero a partir de `folios_utilizados`
+    del historial: rangos 'A - B', listas separadas por comas o tokens con
+    prefijo (ej. CP000001 -> 1)."""
+    folio_status_map = {}
+    try:
+        for visita in historial_visitas:
+            est = str(visita.get('estatus', '')).strip().lower()
+            folios_str = str(visita.get('folios_utilizados', '')).strip()
+            if not folios_str:
+                continue
+            # Rango
+            if ' - ' in folios_str:
+                parts = folios_str.split(' - ')
+                if len(parts) == 2:
+                    try:
+                        inicio = int(parts[0].strip())
+                        fin = int(parts[1].strip())
+                        for f in range(inicio, fin + 1):
+                            folio_status_map[f] = est
+                    except Exception:
+                        pass
+            else:
+                # Puede ser lista separada por comas o único folio
+                for part in [p.strip() for p in folios_str.split(',') if p.strip()]:
+                    try:
+                        folio_status_map[int(part)] = est
+                    except Exception:
+                        # intentar extraer dígitos del token (ej. CP000001 -> 000001)
+                        digits = ''.join(ch for ch in part if ch.isdigit())
+                        if digits:
+                            try:
+                                folio_status_map[int(digits)] = est
+                            except Exception:
+                                pass
+    except Exception:
+        folio_status_map = {}
+    return folio_status_map
+
+
+# ============================================================
+# CONSTRUCCIÓN DE FILAS EN PARALELO
+# ============================================================
+# `generar_fila_excel` es independiente por dictamen y solo lee catálogos que
+# no cambian después de `cargar_datos` (clientes, firmas, normas, mapeo
+# folio -> cliente, fechas de backups e índice de dictámenes). Con
+# `workers` > 1 los dictámenes se reparten en lotes de `TAM_LOTE_FILAS` entre
+# procesos; los catálogos se entregan una sola vez por proceso vía
+# `initializer` y `map` devuelve los lotes en el orden de entrada, así que las
+# filas salen en el mismo orden que en modo secuencial.
+#
+# La app carga este archivo con `spec_from_file_location` (sin registrarlo en
+# sys.modules); los procesos del pool lo importan por nombre, por eso se
+# asegura que esta carpeta esté en sys.path y se envían los catálogos como
+# dict simple en lugar de la instancia.
+
+_BASE_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _BASE_DOCUMENTOS not in sys.path:
+    sys.path.append(_BASE_DOCUMENTOS)
+# Raíz del proyecto (paralelismo)
+_DIR_RAIZ = os.path.dirname(_BASE_DOCUMENTOS)
+if _DIR_RAIZ not in sys.path:
+    sys.path.append(_DIR_RAIZ)
+
+import paralelismo
+
+# Tope de procesos aceptado y tamaño de lote por tarea
+MAX_WORKERS_FILAS = 32
+TAM_LOTE_FILAS = 64
+
+# Generador de solo lectura del proceso (lo fija `_init_worker_filas`)
+_GENERADOR_WORKER = None
+
+
+def obtener_workers_filas(workers=None) -> int:
+    """Número de procesos para construir filas.
+
+    Prioridad: argumento `workers`, luego la variable de entorno
+    `CONTROL_FOLIOS_WORKERS`; por defecto 1 (secuencial). `0` o `"auto"`
+    usa todos los núcleos disponibles.
+    """
+    return paralelismo.obtener_workers(workers, env="CONTROL_FOLIOS_WORKERS",
+                                      maximo=MAX_WORKERS_FILAS)
+
+
+def _init_worker_filas(catalogos: Dict) -> None:
+    global _GENERADOR_WORKER
+    _GENERADOR_WORKER = ControlFoliosAnual.desde_catalogos(catalogos)
+
+
+def _filas_de_lote(lote: List[Dict]) -> List[Dict]:
+    return [_GENERADOR_WORKER.generar_fila_excel(d) for d in lote]
+
+
 class ControlFoliosAnual:
     """Clase para generar el control de folios anual desde archivos JSON"""
     
@@ -26,6 +285,13 @@ class ControlFoliosAnual:
         self.folio_to_cliente = {}  # Mapeo de folio a cliente
         self.normas = []
         self._dictamen_cache = {}
+        # Índice de dictámenes/constancias (ver _construir_indice_dictamenes)
+        self._indice_dictamenes = None
+        self._dictamen_lookup_cache = {}
+        # Mapas de clientes/firmas/backups (ver _construir_indices_catalogos)
+        self._indices_catalogos = None
+        # Tiempos de construcción de índices (segundos)
+        self.tiempos_indices: Dict[str, float] = {}
         # Mapeo (SOLICITUD, FOLIO) -> FECHA DE ENTRADA extraída de backups
         self.backup_fecha_entrada: Dict[Tuple[str, str], str] = {}
         
@@ -156,6 +422,22 @@ class ControlFoliosAnual:
                 except Exception:
                     pass
             
+            # Mapas de búsqueda de clientes, firmas y fechas de backups
+            try:
+                self._construir_indices_catalogos()
+                print(f"✅ Índices de clientes/firmas/backups en "
+                      f"{self.tiempos_indices.get('catalogos', 0.0):.3f}s")
+            except Exception:
+                self._indices_catalogos = None
+
+            # Índice de dictámenes: una pasada por Dictamenes/Constancias
+            try:
+                self._construir_indice_dictamenes()
+                print(f"✅ Índice de dictámenes: {len(self._indice_dictamenes['docs'])} archivos "
+                      f"en {self.tiempos_indices.get('dictamenes', 0.0):.3f}s")
+            except Exception:
+                self._indice_dictamenes = None
+
             return True, "Datos cargados correctamente"
             
         except json.JSONDecodeError as e:
@@ -163,6 +445,83 @@ class ControlFoliosAnual:
         except Exception as e:
             return False, f"Error al cargar datos: {e}"
     
+    def _construir_indices_catalogos(self) -> None:
+        """
+        Construye una sola vez los mapas que usan las búsquedas por fila.
+
+        Antes `buscar_cliente_por_solicitud`, `buscar_inspector_por_firma`, la
+        heurística de contrato de `generar_fila_excel` y `_lookup_backup_fecha`
+        recorrían `clientes`, `firmas` y `backup_fecha_entrada` (normalizando
+        cadenas) en cada fila. Cada mapa conserva el PRIMER elemento que cumple
+        la condición, igual que el recorrido lineal original:
+
+          - cliente_por_nombre: CLIENTE.strip().upper() -> cliente
+          - cliente_por_contrato: NÚMERO_DE_CONTRATO o RFC -> cliente
+          - firma_nombre: FIRMA -> nombre normalizado del inspector
+          - backup_por_sol / backup_por_folio: fecha por solicitud / por folio
+          - backup_sols_concat: solicitudes concatenadas para la coincidencia parcial
+        """
+        t0 = time.perf_counter()
+
+        cliente_por_nombre = {}
+        cliente_por_contrato = {}
+        for c in self.clientes:
+            try:
+                nombre = c.get('CLIENTE', '')
+                if isinstance(nombre, str):
+                    cliente_por_nombre.setdefault(nombre.strip().upper(), c)
+                contrato = str(c.get('NÚMERO_DE_CONTRATO') or c.get('NUMERO_DE_CONTRATO') or '').strip()
+                rfc = str(c.get('RFC') or '').strip()
+                cliente_por_contrato.setdefault(contrato, c)
+                cliente_por_contrato.setdefault(rfc, c)
+            except Exception:
+                continue
+
+        firma_nombre = {}
+        for inspector in self.firmas:
+            try:
+                firma = inspector.get("FIRMA")
+                if firma in firma_nombre:
+                    continue
+                # Intentar extraer nombre por varias claves posibles
+                nombre = (
+                    inspector.get("NOMBRE") or inspector.get("NOMBRE_COMPLETO")
+                    or inspector.get("NOMBRE DE INSPECTOR") or inspector.get("nombre")
+                    or inspector.get("NOMBRE INSPECTOR") or inspector.get("NOMBRE_COMPLETO_INSPECTOR")
+                    or inspector.get("FIRMA")
+                )
+                firma_nombre[firma] = self._normalize_name(nombre)
+            except Exception:
+                continue
+
+        backup_por_sol = {}
+        backup_por_folio = {}
+        backup_sols = []
+        backup_fechas = []
+        for (k_sol, k_fol), fecha in self.backup_fecha_entrada.items():
+            backup_por_sol.setdefault(k_sol, fecha)
+            backup_por_folio.setdefault(k_fol, fecha)
+            backup_sols.append(k_sol)
+            backup_fechas.append(fecha)
+
+        self._indices_catalogos = {
+            'cliente_por_nombre': cliente_por_nombre,
+            'cliente_por_contrato': cliente_por_contrato,
+            'firma_nombre': firma_nombre,
+            'backup_por_sol': backup_por_sol,
+            'backup_por_folio': backup_por_folio,
+            'backup_sols_concat': '\x00'.join(backup_sols) + '\x00',
+            'backup_sols_offsets': self._offsets(backup_sols),
+            'backup_fechas': backup_fechas,
+        }
+        self.tiempos_indices['catalogos'] = time.perf_counter() - t0
+
+    def _indices(self) -> Dict:
+        """Mapas de `_construir_indices_catalogos` (se construyen si faltan)."""
+        if self._indices_catalogos is None:
+            self._construir_indices_catalogos()
+        return self._indices_catalogos
+
     def _crear_mapeo_folio_cliente(self):
         """
         Crear un mapeo entre folios y clientes desde el historial de visitas
@@ -204,9 +563,9 @@ class ControlFoliosAnual:
         
         if cliente_nombre:
             # Buscar información completa del cliente por nombre
-            for cliente in self.clientes:
-                if cliente.get('CLIENTE', '').strip().upper() == cliente_nombre.strip().upper():
-                    return cliente
+            cliente = self._indices()['cliente_por_nombre'].get(cliente_nombre.strip().upper())
+            if cliente is not None:
+                return cliente
         
         # Si no se encontró, retornar información genérica con el nombre del historial
         if cliente_nombre:
@@ -235,17 +594,11 @@ class ControlFoliosAnual:
         Returns:
             Nombre completo del inspector o "N/A"
         """
-        for inspector in self.firmas:
-            if inspector.get("FIRMA") == firma:
-                # Intentar extraer nombre por varias claves posibles
-                nombre = (
-                    inspector.get("NOMBRE") or inspector.get("NOMBRE_COMPLETO")
-                    or inspector.get("NOMBRE DE INSPECTOR") or inspector.get("nombre")
-                    or inspector.get("NOMBRE INSPECTOR") or inspector.get("NOMBRE_COMPLETO_INSPECTOR")
-                    or inspector.get("FIRMA")
-                )
-                return self._normalize_name(nombre)
-        return "N/A"
+        try:
+            return self._indices()['firma_nombre'].get(firma, "N/A")
+        except TypeError:
+            # firma no hashable (ej. lista): no puede coincidir
+            return "N/A"
 
     def _format_date(self, value) -> str:
         """
@@ -289,6 +642,8 @@ class ControlFoliosAnual:
         """
         if not name:
             return "N/A"
+        if _normalizar_nombre_cache is not None:
+            return _normalizar_nombre_cache(str(name))
         nfkd = unicodedata.normalize('NFKD', str(name))
         only_ascii = ''.join([c for c in nfkd if not unicodedata.combining(c)])
         return only_ascii.upper()
@@ -332,126 +687,236 @@ class ControlFoliosAnual:
             return f"{penult}-{last}"
         return numero_solicitud
 
-    def _find_dictamen(self, solicitud: str, folio) -> Optional[Dict]:
-        """Buscar dictamen JSON en data/Dictamenes que coincida con solicitud y folio."""
-        try:
-            # Normalizar folio y solicitud para mejorar coincidencias
-            folio_s = str(folio).strip() if folio is not None else ''
-            sol_search = str(solicitud).strip() if solicitud is not None else ''
-            # Si viene con formato 'XXXX/25', usar la parte antes de la barra
-            sol_base = sol_search.split('/')[0] if '/' in sol_search else sol_search
+    def _listar_archivos_dictamen(self) -> List[str]:
+        """Archivos .json/.pdf de `Dictamenes` y `Constancias` (listado cacheado)."""
+        dicts_dir = os.path.join(self.data_dir, 'Dictamenes')
+        consts_dir = os.path.join(self.data_dir, 'Constancias')
 
-            # Buscar en `Dictamenes` y también en `Constancias` (nuevo tipo)
-            dicts_dir = os.path.join(self.data_dir, 'Dictamenes')
-            consts_dir = os.path.join(self.data_dir, 'Constancias')
+        files = []
+        for dpath in (dicts_dir, consts_dir):
+            try:
+                if dpath in self._dictamen_cache:
+                    files.extend(self._dictamen_cache[dpath])
+                    continue
+                if not os.path.exists(dpath):
+                    # no existe -> skip
+                    continue
+                found = [os.path.join(dpath, f) for f in os.listdir(dpath)
+                         if f.lower().endswith('.json') or f.lower().endswith('.pdf')]
+                self._dictamen_cache[dpath] = found
+                files.extend(found)
+            except Exception:
+                continue
+        return files
 
-            files = []
-            for dpath in (dicts_dir, consts_dir):
+    def _construir_indice_dictamenes(self) -> None:
+        """
+        Recorre una sola vez `Dictamenes`/`Constancias`, parsea cada archivo y
+        construye los mapas que usa `_find_dictamen`.
+
+        Antes cada búsqueda volvía a abrir y parsear todos los JSON (O(N×M) para
+        N filas del control y M archivos). Cada regla de coincidencia se
+        resuelve ahora con un mapa que devuelve la posición (orden del listado)
+        del primer archivo que la cumple:
+
+          - folio tal cual y folio como entero -> posiciones (regla 1)
+          - todos los sufijos de la solicitud del archivo -> posiciones (regla 2)
+          - segmentos `_X_` del nombre de archivo -> posiciones (regla 3)
+          - cadenas de identificación concatenadas, para buscar la primera
+            que contiene la solicitud con un solo `str.find` (regla 4)
+        """
+        t0 = time.perf_counter()
+        docs = []
+        por_folio_txt = {}
+        por_folio_int = {}
+        por_folio_txt_fn = {}
+        por_folio_int_fn = {}
+        por_sufijo_sol = {}
+        por_segmento = {}
+        nombres = []
+        cadenas = []
+
+        for fp in self._listar_archivos_dictamen():
+            fname = os.path.basename(fp)
+            # If JSON, load; if PDF, build a minimal dictamen object from filename
+            d = None
+            if fname.lower().endswith('.json'):
                 try:
-                    if dpath in self._dictamen_cache:
-                        files.extend(self._dictamen_cache[dpath])
-                        continue
-                    if not os.path.exists(dpath):
-                        # no existe -> skip
-                        continue
-                    found = [os.path.join(dpath, f) for f in os.listdir(dpath)
-                             if f.lower().endswith('.json') or f.lower().endswith('.pdf')]
-                    self._dictamen_cache[dpath] = found
-                    files.extend(found)
+                    with open(fp, 'r', encoding='utf-8') as f:
+                        d = json.load(f)
                 except Exception:
                     continue
-
-            if not files:
-                return None
-
-            # Buscamos coincidencias estrictas: preferir igualdad de folio+solicitud.
-            for fp in files:
-                fname = os.path.basename(fp)
-                # If JSON, load; if PDF, build a minimal dictamen object from filename
-                d = None
-                if fname.lower().endswith('.json'):
-                    try:
-                        with open(fp, 'r', encoding='utf-8') as f:
-                            d = json.load(f)
-                    except Exception:
-                        continue
-                elif fname.lower().endswith('.pdf'):
-                    # create minimal dict structure from filename
-                    name_base = os.path.splitext(fname)[0]
-                    digit_sequences = re.findall(r"(\d+)", name_base)
-                    fol_guess = ''
-                    sol_guess = ''
-                    if digit_sequences:
-                        fol_guess = max(digit_sequences, key=lambda s: len(s))
-                    sol_match = re.search(r"([A-Za-z0-9\-]{4,})", name_base)
-                    if sol_match:
-                        sol_guess = sol_match.group(1)
-                    d = {
-                        'identificacion': {
-                            'solicitud': sol_guess,
-                            'folio': fol_guess,
-                            'cadena_identificacion': ''
-                        }
+            elif fname.lower().endswith('.pdf'):
+                # create minimal dict structure from filename
+                name_base = os.path.splitext(fname)[0]
+                digit_sequences = _RE_DIGITOS.findall(name_base)
+                fol_guess = ''
+                sol_guess = ''
+                if digit_sequences:
+                    fol_guess = max(digit_sequences, key=lambda s: len(s))
+                sol_match = _RE_SOL_ARCHIVO.search(name_base)
+                if sol_match:
+                    sol_guess = sol_match.group(1)
+                d = {
+                    'identificacion': {
+                        'solicitud': sol_guess,
+                        'folio': fol_guess,
+                        'cadena_identificacion': ''
                     }
-                else:
-                    continue
+                }
+            else:
+                continue
 
+            try:
                 ident = d.get('identificacion', {})
                 sol_file = str(ident.get('solicitud', '')).strip()
                 fol_file = str(ident.get('folio', '')).strip()
                 cadena = (ident.get('cadena_identificacion') or '')
+                if not isinstance(cadena, str):
+                    cadena = str(cadena)
+            except Exception:
+                # JSON sin la estructura esperada: no puede coincidir
+                continue
 
-                # 1) Coincidencia exacta en folio y solicitud (cuando ambos estén presentes)
-                if fol_file and folio_s:
-                    equal_folio = False
-                    try:
-                        # Comparar como texto (posible padded) y como dígitos (ignorar ceros)
-                        if fol_file == folio_s:
-                            equal_folio = True
-                        else:
-                            digits_a = ''.join(ch for ch in fol_file if ch.isdigit())
-                            digits_b = ''.join(ch for ch in folio_s if ch.isdigit())
-                            if digits_a and digits_b and int(digits_a) == int(digits_b):
-                                equal_folio = True
-                    except Exception:
-                        equal_folio = False
-                    if equal_folio:
-                        if sol_base:
-                            if sol_file and (sol_file == sol_base or sol_file.endswith(sol_base)):
-                                return d
-                            # También checar si la solicitud completa aparece en la cadena_identificacion
-                            if cadena and sol_base in cadena:
-                                return d
-                            # también intentar por filename (considerar variantes sin padding)
-                            fname_digits = ''.join(ch for ch in fname if ch.isdigit())
-                            if (f"_{folio_s}_" in fname and sol_base and f"_{sol_base}_" in fname) or (digits_a and str(int(digits_a)) in fname_digits):
-                                return d
-                        else:
-                            return d
+            pos = len(docs)
+            docs.append(d)
+            nombres.append(fname)
+            cadenas.append(cadena)
+
+            # Regla 1: folio como texto y como entero (ignorando ceros a la izquierda).
+            # Los mapas *_fn solo incluyen archivos cuyo nombre contiene el folio
+            # del propio archivo (variante sin padding), condición que la regla 1
+            # acepta cuando hay solicitud pero esta no coincidió por otra vía.
+            if fol_file:
+                digits_a = ''.join(ch for ch in fol_file if ch.isdigit())
+                fname_digits = ''.join(ch for ch in fname if ch.isdigit())
+                fn_ok = bool(digits_a) and str(int(digits_a)) in fname_digits
+                por_folio_txt.setdefault(fol_file, []).append(pos)
+                if fn_ok:
+                    por_folio_txt_fn.setdefault(fol_file, []).append(pos)
+                if digits_a:
+                    n = int(digits_a)
+                    por_folio_int.setdefault(n, []).append(pos)
+                    if fn_ok:
+                        por_folio_int_fn.setdefault(n, []).append(pos)
+
+            # Regla 2: sol_file == sol_base o sol_file.endswith(sol_base)
+            for i in range(len(sol_file)):
+                por_sufijo_sol.setdefault(sol_file[i:], []).append(pos)
+
+            # Regla 3: f"_{folio}_" in fname -> segmentos entre dos guiones bajos
+            partes = fname.split('_')
+            for seg in set(partes[1:-1]):
+                por_segmento.setdefault(seg, []).append(pos)
+
+        self._indice_dictamenes = {
+            'docs': docs,
+            'por_folio_txt': por_folio_txt,
+            'por_folio_int': por_folio_int,
+            'por_folio_txt_fn': por_folio_txt_fn,
+            'por_folio_int_fn': por_folio_int_fn,
+            'por_sufijo_sol': por_sufijo_sol,
+            'por_segmento': por_segmento,
+            'nombres_concat': '\x00'.join(nombres) + '\x00',
+            'nombres_offsets': self._offsets(nombres),
+            'cadenas_concat': '\x00'.join(cadenas) + '\x00',
+            'cadenas_offsets': self._offsets(cadenas),
+        }
+        self._dictamen_lookup_cache = {}
+        self.tiempos_indices['dictamenes'] = time.perf_counter() - t0
+
+    @staticmethod
+    def _offsets(valores: List[str]) -> List[int]:
+        """Offset inicial de cada valor dentro de `'\\x00'.join(valores)`."""
+        offsets = []
+        acumulado = 0
+        for v in valores:
+            offsets.append(acumulado)
+            acumulado += len(v) + 1
+        return offsets
+
+    def _find_dictamen(self, solicitud: str, folio) -> Optional[Dict]:
+        """Buscar dictamen JSON en data/Dictamenes que coincida con solicitud y folio.
+
+        Se devuelve el primer archivo (en orden del listado) que cumpla alguna
+        de las reglas, evaluadas por archivo en este orden:
+          1) folio igual (texto o entero) y, si hay solicitud, que también
+             coincida la solicitud / cadena / nombre de archivo
+          2) solicitud igual o como sufijo de la del archivo
+          3) `_{folio}_` dentro del nombre de archivo (si hay solicitud)
+          4) solicitud contenida en cadena_identificacion
+        Usa el índice construido en `cargar_datos` (ver `_construir_indice_dictamenes`).
+        """
+        try:
+            # Normalizar folio y solicitud para mejorar coincidencias
+            folio_s = str(folio).strip() if folio is not None else ''
+            sol_search = str(solicitud).strip() if solicitud is not None else ''
+            # Si viene con formato 'XXXX/25', usar la parte antes de la barra
+            sol_base = sol_search.split('/')[0] if '/' in sol_search else sol_search
 
-                # 2) Coincidencia exacta en solicitud cuando folio no disponible
-                if sol_base and sol_file and (sol_file == sol_base or sol_file.endswith(sol_base)):
-                    return d
+            if getattr(self, '_indice_dictamenes', None) is None:
+                self._construir_indice_dictamenes()
+            idx = self._indice_dictamenes
+            docs = idx['docs']
+            if not docs:
+                return None
 
-                # 3) Intentar por filename patrones (folio y solicitud dentro del nombre)
-                try:
-                    if folio_s and f"_{folio_s}_" in fname:
-                        if sol_base:
-                            if f"_{sol_base}_" in fname:
-                                return d
-                            # si filename contiene folio pero no solicitud, aún puede ser válido
-                            return d
-                except Exception:
-                    pass
+            clave = (folio_s, sol_base)
+            if clave in self._dictamen_lookup_cache:
+                pos = self._dictamen_lookup_cache[clave]
+                return docs[pos] if pos is not None else None
+
+            candidatos = []
+
+            def _primero(mapa, k):
+                lst = mapa.get(k)
+                if lst:
+                    candidatos.append(lst[0])
+
+            # 1) Coincidencia en folio (texto o dígitos). Con solicitud, las
+            #    variantes "solicitud/cadena/nombre con folio y solicitud"
+            #    quedan cubiertas por las reglas 2-4; aquí solo falta la del
+            #    folio sin padding dentro del nombre de archivo.
+            if folio_s:
+                txt_map = idx['por_folio_txt_fn'] if sol_base else idx['por_folio_txt']
+                int_map = idx['por_folio_int_fn'] if sol_base else idx['por_folio_int']
+                _primero(txt_map, folio_s)
+                digits_b = ''.join(ch for ch in folio_s if ch.isdigit())
+                if digits_b:
+                    _primero(int_map, int(digits_b))
+
+            # 2) Coincidencia exacta en solicitud (o como sufijo)
+            if sol_base:
+                _primero(idx['por_sufijo_sol'], sol_base)
+
+            # 3) Patrón _folio_ en el nombre de archivo (solo cuando hay solicitud)
+            if folio_s and sol_base:
+                if '_' in folio_s or '\x00' in folio_s:
+                    p = self._buscar_en_concat(idx['nombres_concat'], idx['nombres_offsets'], f"_{folio_s}_")
+                    if p is not None:
+                        candidatos.append(p)
+                else:
+                    _primero(idx['por_segmento'], folio_s)
+
+            # 4) Solicitud contenida en cadena_identificacion
+            if sol_base and '\x00' not in sol_base:
+                p = self._buscar_en_concat(idx['cadenas_concat'], idx['cadenas_offsets'], sol_base)
+                if p is not None:
+                    candidatos.append(p)
 
-                # 4) Por último, coincidencia en cadena_identificacion pero más restrictiva: buscar sol_base rodeada
-                if cadena and sol_base:
-                    if sol_base in cadena:
-                        return d
-            # Si no encontramos ninguna coincidencia estricta, devolvemos None
+            pos = min(candidatos) if candidatos else None
+            self._dictamen_lookup_cache[clave] = pos
+            return docs[pos] if pos is not None else None
         except Exception:
             return None
-        return None
+
+    @staticmethod
+    def _buscar_en_concat(concat: str, offsets: List[int], patron: str) -> Optional[int]:
+        """Posición del primer valor (de los concatenados) que contiene `patron`."""
+        i = concat.find(patron)
+        if i < 0:
+            return None
+        return bisect.bisect_right(offsets, i) - 1
 
     def _lookup_backup_fecha(self, solicitud: str, folio) -> Optional[str]:
         """
@@ -466,27 +931,89 @@ class ControlFoliosAnual:
             if key in self.backup_fecha_entrada:
                 return self.backup_fecha_entrada[key]
 
+            idx = self._indices()
+
             # intento 2: buscar con la parte antes de '/' en la solicitud
             sol_base = sol.split('/')[0] if '/' in sol else sol
-            for (k_sol, k_fol), fecha in self.backup_fecha_entrada.items():
-                if k_sol == sol_base and (not fol_s or k_fol == fol_s):
-                    return fecha
+            if fol_s:
+                fecha = self.backup_fecha_entrada.get((sol_base, fol_s))
+            else:
+                fecha = idx['backup_por_sol'].get(sol_base)
+            if fecha is not None:
+                return fecha
 
             # intento 3: buscar por folio solamente
-            if fol_s:
-                for (k_sol, k_fol), fecha in self.backup_fecha_entrada.items():
-                    if k_fol == fol_s:
-                        return fecha
+            if fol_s and fol_s in idx['backup_por_folio']:
+                return idx['backup_por_folio'][fol_s]
 
             # intento 4: buscar por coincidencia parcial en solicitud
-            for (k_sol, k_fol), fecha in self.backup_fecha_entrada.items():
-                if sol and sol in k_sol:
-                    return fecha
+            if sol and '\x00' not in sol:
+                pos = self._buscar_en_concat(idx['backup_sols_concat'], idx['backup_sols_offsets'], sol)
+                if pos is not None:
+                    return idx['backup_fechas'][pos]
 
         except Exception:
             return None
         return None
     
+    # Atributos que necesita `generar_fila_excel` (de solo lectura tras cargar_datos)
+    CATALOGOS = (
+        'data_dir', 'clientes', 'firmas', 'normas', 'folio_to_cliente',
+        'backup_fecha_entrada', '_dictamen_cache', '_indice_dictamenes',
+        '_indices_catalogos',
+    )
+
+    def catalogos(self) -> Dict:
+        """Catálogos cargados, como dict simple para enviarlos a otros procesos."""
+        if self._indice_dictamenes is None:
+            try:
+                self._construir_indice_dictamenes()
+            except Exception:
+                self._indice_dictamenes = None
+        self._indices()
+        return {k: getattr(self, k) for k in self.CATALOGOS}
+
+    @classmethod
+    def desde_catalogos(cls, catalogos: Dict) -> "ControlFoliosAnual":
+        """Reconstruye un generador (sin tabla ni historial) a partir de `catalogos()`."""
+        gen = cls(data_dir=catalogos.get('data_dir', 'data'))
+        for k in cls.CATALOGOS:
+            if k in catalogos:
+                setattr(gen, k, catalogos[k])
+        return gen
+
+    def generar_filas(self, dictamenes: List[Dict], workers=None, tam_lote: int = TAM_LOTE_FILAS):
+        """
+        Genera (en orden) la fila de Excel de cada dictamen.
+
+        Args:
+            dictamenes: Dictámenes agrupados (ver `agrupar_por_dictamen`)
+            workers: Procesos a usar (ver `obtener_workers_filas`); 1 = secuencial
+            tam_lote: Dictámenes por tarea enviada al pool
+
+        Yields:
+            Dict de la fila, en el mismo orden que `dictamenes`
+        """
+        workers = obtener_workers_filas(workers)
+        tam_lote = max(1, int(tam_lote or 1))
+        if workers == 1 or len(dictamenes) <= tam_lote:
+            for dictamen in dictamenes:
+                yield self.generar_fila_excel(dictamen)
+            return
+
+        # Importar por nombre para que las funciones del pool se serialicen
+        # como referencia a un módulo importable en los procesos hijos.
+        import control_folios_anual as modulo
+
+        lotes = [dictamenes[i:i + tam_lote] for i in range(0, len(dictamenes), tam_lote)]
+        workers = min(workers, len(lotes))
+        print(f"Construyendo {len(dictamenes)} filas con {workers} procesos ({len(lotes)} lotes)...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=modulo._init_worker_filas,
+                                 initargs=(self.catalogos(),)) as pool:
+            # `map` entrega los lotes en el orden de entrada
+            for filas in pool.map(modulo._filas_de_lote, lotes):
+                yield from filas
+
     def agrupar_por_dictamen(self) -> List[Dict]:
         """
         Agrupar los registros de tabla_relacion por dictamen (SOLICITUD + FOLIO)
@@ -578,17 +1105,7 @@ class ControlFoliosAnual:
 
             # 4) si tenemos un contrato, buscar en self.clientes por NÚMERO_DE_CONTRATO o RFC
             if contrato:
-                found = None
-                for c in self.clientes:
-                    try:
-                        if str(c.get('NÚMERO_DE_CONTRATO') or c.get('NUMERO_DE_CONTRATO') or '').strip() == contrato:
-                            found = c
-                            break
-                        if str(c.get('RFC') or '').strip() == contrato:
-                            found = c
-                            break
-                    except Exception:
-                        continue
+                found = self._indices()['cliente_por_contrato'].get(contrato)
                 if found:
                     cliente = found
 
@@ -661,9 +1178,12 @@ class ControlFoliosAnual:
                 nombre_inspector = self._normalize_name(n2)
         
         # Extraer descripciones, marcas, NOMs y modelos de todos los registros
-        descripciones = set()
-        marcas = set()
-        noms = set()
+        # dict como conjunto ordenado: el orden de las columnas unidas queda
+        # determinado por el orden de aparición (un set depende del hash de
+        # cada proceso, y las filas construidas en paralelo no coincidirían)
+        descripciones = {}
+        marcas = {}
+        noms = {}
 
         # Preferir los códigos que vienen en el JSON del dictamen (tabla_productos)
         modelos = []
@@ -677,23 +1197,23 @@ class ControlFoliosAnual:
                 # También extraer marcas y descripciones desde el JSON si no vienen en registros
                 prod = dictamen['dictamen_json'].get('producto', {})
                 if prod.get('descripcion'):
-                    descripciones.add(prod.get('descripcion'))
+                    descripciones[prod.get('descripcion')] = None
                 if tp and isinstance(tp, list):
                     for p in tp:
                         m = p.get('marca')
                         if m:
-                            marcas.add(m)
+                            marcas[m] = None
             except Exception:
                 modelos = []
 
         # Si no hay dictamen_json, o además, recorrer registros (tabla_relacion) para completar datos
         for reg in registros:
             if reg.get("DESCRIPCION"):
-                descripciones.add(reg.get("DESCRIPCION"))
+                descripciones[reg.get("DESCRIPCION")] = None
             if reg.get("MARCA"):
-                marcas.add(reg.get("MARCA"))
+                marcas[reg.get("MARCA")] = None
             if reg.get("CLASIF UVA"):
-                noms.add(str(reg.get("CLASIF UVA")))
+                noms[str(reg.get("CLASIF UVA"))] = None
 
             # Aceptar tanto 'CODIGO' simple como 'CODIGOS' lista en registros de tabla_relacion
             if reg.get("CODIGO"):
@@ -916,324 +1436,226 @@ class ControlFoliosAnual:
             # En caso de error, incluir el registro
             return True
     
-    def crear_excel(self, nombre_archivo: str, fecha_inicio: Optional[str] = None,
-                   fecha_fin: Optional[str] = None) -> Tuple[bool, str]:
+    def _folios_para_exportar(self) -> Tuple[Dict[int, Dict], List[int]]:
         """
-        Crear el archivo Excel con el control de folios
-        
-        Args:
-            nombre_archivo: Nombre del archivo Excel a crear
-            fecha_inicio: Fecha de inicio para filtrar (YYYY-MM-DD)
-            fecha_fin: Fecha de fin para filtrar (YYYY-MM-DD)
-            
+        Agrupa por folio entero los dictámenes de `data/Dictamenes` y los
+        registros de `tabla_de_relacion`.
+
         Returns:
-            Tuple[bool, str]: (éxito, mensaje)
+            (mapa folio -> dictamen agrupado, folios a exportar en orden ascendente)
         """
+        # Reescribir la construcción de dictámenes para asegurar que
+        # cada folio entero presente en `data/Dictamenes` o en
+        # `tabla_de_relacion` se incluya una sola vez y en orden
+        # numérico ascendente (a partir de folio 849).
+        folio_map_int: Dict[int, Dict] = {}
         try:
-            print("\n🚀 Generando archivo Excel...")
-            
-            # Crear libro de trabajo
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Control de Folios"
-            
-            # Definir encabezados
-            encabezados = [
-                "NÚMERO DE SOLICITUD",
-                "CLIENTE",
-                "NÚMERO DE CONTRATO",
-                "RFC",
-                "CURP",
-                "PRODUCTO VERIFICADO",
-                "MARCAS",
-                "NOM",
-                "TIPO DE DOCUMENTO OFICIAL EMITIDO",
-                "ESTATUS",
-                "DOCUMENTO EMITIDO",
-                "FECHA DE DOCUMENTO EMITIDO",
-                "VERIFICADOR",
-                "PEDIMENTO DE IMPORTACION",
-                "FECHA DE DESADUANAMIENTO (CUANDO APLIQUE)",
-                "FECHA DE VISITA (CUANDO APLIQUE)",
-                "MODELOS",
-                "SOL EMA",
-                "FOLIO EMA",
-                "INSP EMA"
-            ]
-            
-            # Escribir encabezados
-            for col, encabezado in enumerate(encabezados, 1):
-                celda = ws.cell(row=1, column=col, value=encabezado)
-                # Estilo para encabezados
-                celda.font = Font(bold=True, color="FFFFFF")
-                celda.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                celda.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-                celda.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-            
-            # Reescribir la construcción de dictámenes para asegurar que
-            # cada folio entero presente en `data/Dictamenes` o en
-            # `tabla_de_relacion` se incluya una sola vez y en orden
-            # numérico ascendente (a partir de folio 849).
-            folio_map_int: Dict[int, Dict] = {}
-            try:
-                dicts_dir = os.path.join(self.data_dir, 'Dictamenes')
-                if os.path.exists(dicts_dir):
-                    for fname in os.listdir(dicts_dir):
-                        fp = os.path.join(dicts_dir, fname)
-                        if not (fname.lower().endswith('.json') or fname.lower().endswith('.pdf')):
-                            continue
+            dicts_dir = os.path.join(self.data_dir, 'Dictamenes')
+            if os.path.exists(dicts_dir):
+                for fname in os.listdir(dicts_dir):
+                    fp = os.path.join(dicts_dir, fname)
+                    if not (fname.lower().endswith('.json') or fname.lower().endswith('.pdf')):
+                        continue
 
-                        # Default registro
-                        registro = {
-                            'FECHA DE EMISION DE SOLICITUD': None,
-                            'FECHA DE VERIFICACION': None,
-                            'PEDIMENTO': None,
-                            'FIRMA': None,
-                            'DESCRIPCION': None,
-                            'MARCA': None,
-                            'CODIGOS': [],
-                        }
+                    # Default registro
+                    registro = {
+                        'FECHA DE EMISION DE SOLICITUD': None,
+                        'FECHA DE VERIFICACION': None,
+                        'PEDIMENTO': None,
+                        'FIRMA': None,
+                        'DESCRIPCION': None,
+                        'MARCA': None,
+                        'CODIGOS': [],
+                    }
 
-                        sol = ''
-                        fol_int = None
-                        d = None
+                    sol = ''
+                    fol_int = None
+                    d = None
 
-                        if fname.lower().endswith('.json'):
+                    if fname.lower().endswith('.json'):
+                        try:
+                            with open(fp, 'r', encoding='utf-8') as f:
+                                d = json.load(f)
+                            ident = d.get('identificacion', {})
+                            sol = str(ident.get('solicitud') or '').strip()
+                            fol_raw = ident.get('folio')
+                            # intentar parsear folio desde identificacion.folio
                             try:
-                                with open(fp, 'r', encoding='utf-8') as f:
-                                    d = json.load(f)
-                                ident = d.get('identificacion', {})
-                                sol = str(ident.get('solicitud') or '').strip()
-                                fol_raw = ident.get('folio')
-                                # intentar parsear folio desde identificacion.folio
+                                fol_int = int(float(str(fol_raw))) if fol_raw not in (None, '') else None
+                            except Exception:
+                                fol_int = None
+                            # intentar extraer folio desde el nombre de archivo con patrón conocido
+                            # muchos archivos tienen formato: Dictamen_Lista_<lista>_<folio>_<solicitud>_...
+                            m_f = re.search(r"Dictamen_Lista_[^_]+_([0-9]{3,})_", fname)
+                            if m_f:
                                 try:
-                                    fol_int = int(float(str(fol_raw))) if fol_raw not in (None, '') else None
+                                    fol_from_name = int(m_f.group(1))
+                                    # priorizar el folio extraído del nombre de archivo cuando exista
+                                    fol_int = fol_from_name
                                 except Exception:
-                                    fol_int = None
-                                # intentar extraer folio desde el nombre de archivo con patrón conocido
-                                # muchos archivos tienen formato: Dictamen_Lista_<lista>_<folio>_<solicitud>_...
-                                m_f = re.search(r"Dictamen_Lista_[^_]+_([0-9]{3,})_", fname)
-                                if m_f:
-                                    try:
-                                        fol_from_name = int(m_f.group(1))
-                                        # priorizar el folio extraído del nombre de archivo cuando exista
-                                        fol_int = fol_from_name
-                                    except Exception:
-                                        pass
-
-                                fechas = d.get('fechas', {})
-                                producto = d.get('producto', {})
-                                tabla_prod = d.get('tabla_productos', [])
-                                firmas = d.get('firmas', {})
-
-                                registro['FECHA DE EMISION DE SOLICITUD'] = fechas.get('emision')
-                                registro['FECHA DE VERIFICACION'] = fechas.get('verificacion')
-                                registro['PEDIMENTO'] = producto.get('pedimento')
-                                if isinstance(firmas, dict):
-                                    f1 = firmas.get('firma1')
-                                    if f1:
-                                        registro['FIRMA'] = f1.get('codigo_solicitado') or f1.get('codigo') or f1.get('nombre')
-                                registro['DESCRIPCION'] = producto.get('descripcion')
-                                if isinstance(tabla_prod, list) and tabla_prod:
-                                    registro['MARCA'] = tabla_prod[0].get('marca')
-                                    cods = []
-                                    for p in tabla_prod:
-                                        c = p.get('codigo')
-                                        if c is not None:
-                                            cods.append(str(c))
-                                    registro['CODIGOS'] = cods
+                                    pass
+
+                            fechas = d.get('fechas', {})
+                            producto = d.get('producto', {})
+                            tabla_prod = d.get('tabla_productos', [])
+                            firmas = d.get('firmas', {})
+
+                            registro['FECHA DE EMISION DE SOLICITUD'] = fechas.get('emision')
+                            registro['FECHA DE VERIFICACION'] = fechas.get('verificacion')
+                            registro['PEDIMENTO'] = producto.get('pedimento')
+                            if isinstance(firmas, dict):
+                                f1 = firmas.get('firma1')
+                                if f1:
+                                    registro['FIRMA'] = f1.get('codigo_solicitado') or f1.get('codigo') or f1.get('nombre')
+                            registro['DESCRIPCION'] = producto.get('descripcion')
+                            if isinstance(tabla_prod, list) and tabla_prod:
+                                registro['MARCA'] = tabla_prod[0].get('marca')
+                                cods = []
+                                for p in tabla_prod:
+                                    c = p.get('codigo')
+                                    if c is not None:
+                                        cods.append(str(c))
+                                registro['CODIGOS'] = cods
+                        except Exception:
+                            # Si falla la carga JSON, intentar extraer folio desde el nombre
+                            fol_int = None
+                    else:
+                        # PDF: extraer la mayor secuencia de dígitos como folio probable
+                        name_base = os.path.splitext(fname)[0]
+                        # Preferir patrón de nombre similar a JSON files
+                        m_f = re.search(r"Dictamen_Lista_[^_]+_([0-9]{3,})_", fname)
+                        if m_f:
+                            try:
+                                fol_int = int(m_f.group(1))
                             except Exception:
-                                # Si falla la carga JSON, intentar extraer folio desde el nombre
                                 fol_int = None
                         else:
-                            # PDF: extraer la mayor secuencia de dígitos como folio probable
-                            name_base = os.path.splitext(fname)[0]
-                            # Preferir patrón de nombre similar a JSON files
-                            m_f = re.search(r"Dictamen_Lista_[^_]+_([0-9]{3,})_", fname)
-                            if m_f:
+                            seqs = re.findall(r"(\d+)", name_base)
+                            if seqs:
                                 try:
-                                    fol_int = int(m_f.group(1))
+                                    fol_int = int(max(seqs, key=lambda s: len(s)))
                                 except Exception:
                                     fol_int = None
-                            else:
-                                seqs = re.findall(r"(\d+)", name_base)
-                                if seqs:
-                                    try:
-                                        fol_int = int(max(seqs, key=lambda s: len(s)))
-                                    except Exception:
-                                        fol_int = None
-                            m = re.search(r"([A-Za-z0-9\-]{4,})", name_base)
-                            if m:
-                                sol = m.group(1)
-
-                        if fol_int is None:
-                            # si no pudimos extraer folio numérico, saltar
-                            continue
-
-                        # Insertar o fusionar en folio_map_int
-                        if fol_int not in folio_map_int:
-                            folio_map_int[fol_int] = {
-                                'solicitud': sol,
-                                'folio': fol_int,
-                                'registros': [registro],
-                                'dictamen_json': d
-                            }
-                        else:
-                            # fusionar registros y preferir dictamen_json no nulo
-                            existing = folio_map_int[fol_int]
-                            if registro not in existing.get('registros', []):
-                                existing.setdefault('registros', []).append(registro)
-                            if not existing.get('dictamen_json') and d:
-                                existing['dictamen_json'] = d
-            except Exception:
-                pass
+                        m = re.search(r"([A-Za-z0-9\-]{4,})", name_base)
+                        if m:
+                            sol = m.group(1)
 
-            # Añadir folios presentes en tabla_de_relacion que no estén en Dictamenes
-            try:
-                for registro in self.tabla_relacion:
-                    fol = registro.get('FOLIO') or registro.get('folio')
-                    try:
-                        fol_i = int(float(str(fol)))
-                    except Exception:
+                    if fol_int is None:
+                        # si no pudimos extraer folio numérico, saltar
                         continue
-                    if fol_i not in folio_map_int:
-                        folio_map_int[fol_i] = {
-                            'solicitud': registro.get('SOLICITUD') or registro.get('solicitud') or '',
-                            'folio': fol_i,
+
+                    # Insertar o fusionar en folio_map_int
+                    if fol_int not in folio_map_int:
+                        folio_map_int[fol_int] = {
+                            'solicitud': sol,
+                            'folio': fol_int,
                             'registros': [registro],
-                            'dictamen_json': None
+                            'dictamen_json': d
                         }
                     else:
-                        # anexamos registro si no está
-                        existing = folio_map_int[fol_i]
+                        # fusionar registros y preferir dictamen_json no nulo
+                        existing = folio_map_int[fol_int]
                         if registro not in existing.get('registros', []):
                             existing.setdefault('registros', []).append(registro)
-            except Exception:
-                pass
+                        if not existing.get('dictamen_json') and d:
+                            existing['dictamen_json'] = d
+        except Exception:
+            pass
 
-            candidates = [k for k in folio_map_int.keys() if k >= 849]
-            if not candidates:
-                candidates = list(folio_map_int.keys())
-            all_folios_sorted = sorted(candidates)
-            print(f"📊 Folios detectados para exportar: {len(all_folios_sorted)} (threshold applied: {any(k>=849 for k in candidates)})")
+        # Añadir folios presentes en tabla_de_relacion que no estén en Dictamenes
+        try:
+            for registro in self.tabla_relacion:
+                fol = registro.get('FOLIO') or registro.get('folio')
+                try:
+                    fol_i = int(float(str(fol)))
+                except Exception:
+                    continue
+                if fol_i not in folio_map_int:
+                    folio_map_int[fol_i] = {
+                        'solicitud': registro.get('SOLICITUD') or registro.get('solicitud') or '',
+                        'folio': fol_i,
+                        'registros': [registro],
+                        'dictamen_json': None
+                    }
+                else:
+                    # anexamos registro si no está
+                    existing = folio_map_int[fol_i]
+                    if registro not in existing.get('registros', []):
+                        existing.setdefault('registros', []).append(registro)
+        except Exception:
+            pass
 
-            # Generar filas: iterar por folio entero ordenado para evitar saltos
-            fila_actual = 2
-            filas_procesadas = 0
+        candidates = [k for k in folio_map_int.keys() if k >= 849]
+        if not candidates:
+            candidates = list(folio_map_int.keys())
+        all_folios_sorted = sorted(candidates)
+        print(f"📊 Folios detectados para exportar: {len(all_folios_sorted)} (threshold applied: {any(k>=849 for k in candidates)})")
+        return folio_map_int, all_folios_sorted
 
-            # Construir mapa de estatus por folio a partir del historial (pendientes/cancelados)
-            folio_status_map = {}
-            try:
-                for visita in self.historial_visitas:
-                    est = str(visita.get('estatus', '')).strip().lower()
-                    folios_str = str(visita.get('folios_utilizados', '')).strip()
-                    if not folios_str:
-                        continue
-                    if ' - ' in folios_str:
-                        parts = folios_str.split(' - ')
-                        if len(parts) == 2:
-                            try:
-                                inicio = int(parts[0].strip())
-                                fin = int(parts[1].strip())
-                                for f in range(inicio, fin + 1):
-                                    folio_status_map[f] = est
-                            except Exception:
-                                pass
-                    else:
-                        for part in [p.strip() for p in folios_str.split(',') if p.strip()]:
-                            try:
-                                folio_status_map[int(part)] = est
-                            except Exception:
-                                digits = ''.join(ch for ch in part if ch.isdigit())
-                                if digits:
-                                    try:
-                                        folio_status_map[int(digits)] = est
-                                    except Exception:
-                                        pass
-            except Exception:
-                folio_status_map = {}
+    def _filas_control(self, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None,
+                       workers=None):
+        """
+        Generador de filas del control de folios: (valores, estilo) por folio,
+        en orden ascendente y ya filtradas por fechas.
+        """
+        folio_map_int, all_folios_sorted = self._folios_para_exportar()
 
-            for fol in all_folios_sorted:
-                dictamen = folio_map_int.get(fol)
-                if not dictamen:
-                    continue
+        # Mapa de estatus por folio a partir del historial (pendientes/cancelados)
+        folio_status_map = _mapa_estatus_por_folio(self.historial_visitas)
 
-                fila_datos = self.generar_fila_excel(dictamen)
+        folios = [fol for fol in all_folios_sorted if folio_map_int.get(fol)]
+        dictamenes = [folio_map_int[fol] for fol in folios]
 
-                # Filtrar por fechas si se especificaron
-                if not self.filtrar_por_fechas(fila_datos, fecha_inicio, fecha_fin):
-                    continue
+        for fol, fila_datos in zip(folios, self.generar_filas(dictamenes, workers=workers)):
 
-                # Determinar estatus (si existe en historial)
-                est = folio_status_map.get(int(fol), '') if fol is not None else ''
-                est_display = est.upper() if est else 'COMPLETADO'
+            # Filtrar por fechas si se especificaron
+            if not self.filtrar_por_fechas(fila_datos, fecha_inicio, fecha_fin):
+                continue
 
-                # Escribir datos (incluir ESTATUS)
-                for col_index, encabezado in enumerate(encabezados, 1):
-                    if encabezado == 'ESTATUS':
-                        valor = est_display
-                    else:
-                        valor = fila_datos.get(encabezado, "N/A")
-                    celda = ws.cell(row=fila_actual, column=col_index, value=valor)
-                    celda.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-                    celda.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-
-                # Aplicar color según estatus (más visible)
-                fill = None
-                font_mod = None
-                if est and est in ('cancelado', 'cancelada'):
-                    fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                    font_mod = Font(bold=True)
-                elif est and 'pend' in est:
-                    fill = PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid")
-                    font_mod = Font(bold=True)
-                elif not est:
-                    # considerar completado como verde
-                    fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                    font_mod = Font(bold=False)
-
-                if fill is not None:
-                    for col in range(1, len(encabezados) + 1):
-                        cell = ws.cell(row=fila_actual, column=col)
-                        try:
-                            cell.fill = fill
-                            if font_mod:
-                                # mantener legibilidad
-                                cell.font = Font(bold=font_mod.bold)
-                        except Exception:
-                            pass
+            # Determinar estatus (si existe en historial)
+            est = folio_status_map.get(int(fol), '') if fol is not None else ''
+            est_display = est.upper() if est else 'COMPLETADO'
+
+            valores = [est_display if encabezado == 'ESTATUS' else fila_datos.get(encabezado, "N/A")
+                       for encabezado in ENCABEZADOS_CONTROL]
+
+            # Color según estatus (más visible)
+            if est and est in ('cancelado', 'cancelada'):
+                estilo = ESTILO_CANCELADO
+            elif est and 'pend' in est:
+                estilo = ESTILO_PENDIENTE
+            elif not est:
+                # considerar completado como verde
+                estilo = ESTILO_COMPLETADO
+            else:
+                estilo = ESTILO_CELDA
+            yield valores, estilo
 
-                fila_actual += 1
-                filas_procesadas += 1
-            
-            # Ajustar ancho de columnas
-            for col in range(1, len(encabezados) + 1):
-                columna_letra = get_column_letter(col)
-                # Anchos específicos según el contenido
-                if col == 1:  # NÚMERO DE SOLICITUD
-                    ws.column_dimensions[columna_letra].width = 18
-                elif col in [2, 6, 16]:  # CLIENTE, PRODUCTO, MODELOS
-                    ws.column_dimensions[columna_letra].width = 30
-                elif col in [11, 14, 15]:  # FECHAS
-                    ws.column_dimensions[columna_letra].width = 15
-                else:
-                    ws.column_dimensions[columna_letra].width = 20
-            
-            # Congelar primera fila
-            ws.freeze_panes = 'A2'
+    def crear_excel(self, nombre_archivo: str, fecha_inicio: Optional[str] = None,
+                   fecha_fin: Optional[str] = None, workers=None) -> Tuple[bool, str]:
+        """
+        Crear el archivo Excel con el control de folios
+        
+        Las filas se escriben en streaming (ver `escribir_excel_streaming`).
+
+        Args:
+            nombre_archivo: Nombre del archivo Excel a crear
+            fecha_inicio: Fecha de inicio para filtrar (YYYY-MM-DD)
+            fecha_fin: Fecha de fin para filtrar (YYYY-MM-DD)
+            workers: Procesos para construir filas (ver `obtener_workers_filas`)
             
-            # Guardar archivo
-            wb.save(nombre_archivo)
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        try:
+            print("\n🚀 Generando archivo Excel...")
+
+            filas_procesadas = escribir_excel_streaming(
+                nombre_archivo,
+                "Control de Folios",
+                ENCABEZADOS_CONTROL,
+                self._filas_control(fecha_inicio, fecha_fin, workers=workers),
+            )
             
             mensaje = f"✅ Archivo Excel generado exitosamente: {nombre_archivo}\n"
             mensaje += f"   📊 Total de registros: {filas_procesadas}"
@@ -1279,6 +1701,12 @@ def main():
         default="data",
         help="Directorio donde se encuentran los archivos JSON (default: data)"
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        default=None,
+        help="Procesos para construir las filas (default: 1; 0 o 'auto' = todos los núcleos)"
+    )
     
     args = parser.parse_args()
     
@@ -1304,7 +1732,8 @@ def main():
     exito, mensaje = generador.crear_excel(
         args.output,
         fecha_inicio=args.fecha_inicio,
-        fecha_fin=args.fecha_fin
+        fecha_fin=args.fecha_fin,
+        workers=args.workers
     )
     
     if not exito:
@@ -1327,7 +1756,8 @@ def generar_control_folios_anual(
     end_date=None,
     export_cache=None,
     historial_list: Optional[List[Dict]] = None,
-    data_dir: Optional[str] = None
+    data_dir: Optional[str] = None,
+    workers=None
 ):
     from datetime import datetime
     import os
@@ -1388,7 +1818,8 @@ def generar_control_folios_anual(
     exito, mensaje = generador.crear_excel(
         output_path,
         fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin
+        fecha_fin=fecha_fin,
+        workers=workers
     )
 
     if not exito:
@@ -1407,9 +1838,6 @@ def generar_reporte_ema(tabla_de_relacion_path, historial_path, output_path, exp
         export_cache: (opcional) ruta a cache de export
     """
     import os
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
 
     # Resolver data_dir igual que en generar_control_folios_anual
     base_dir = os.path.dirname(os.path.dirname(historial_path))
@@ -1457,11 +1885,6 @@ def generar_reporte_ema(tabla_de_relacion_path, historial_path, output_path, exp
         clave = f"{solicitud}_{folio}"
         grupos.setdefault(clave, []).append(reg)
 
-    # Preparar workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "EMA"
-
     encabezados = [
         "Número de solicitud",
         "Fecha de inspección",
@@ -1479,52 +1902,8 @@ def generar_reporte_ema(tabla_de_relacion_path, historial_path, output_path, exp
         "NOM"
     ]
 
-    # Escribir encabezados con estilo
-    for col, h in enumerate(encabezados, 1):
-        c = ws.cell(row=1, column=col, value=h)
-        c.font = Font(bold=True, color="FFFFFF")
-        c.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        c.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    fila = 2
-    filas_procesadas = 0
-
     # Construir mapa de estatus por folio a partir del historial (pendientes/cancelados)
-    folio_status_map = {}
-    try:
-        for visita in generador.historial_visitas:
-            est = str(visita.get('estatus', '')).strip().lower()
-            folios_str = str(visita.get('folios_utilizados', '')).strip()
-            if not folios_str:
-                continue
-            # Rango
-            if ' - ' in folios_str:
-                parts = folios_str.split(' - ')
-                if len(parts) == 2:
-                    try:
-                        inicio = int(parts[0].strip())
-                        fin = int(parts[1].strip())
-                        for f in range(inicio, fin + 1):
-                            folio_status_map[f] = est
-                    except Exception:
-                        pass
-            else:
-                # Puede ser lista separada por comas o único folio
-                for part in [p.strip() for p in folios_str.split(',') if p.strip()]:
-                    try:
-                        folio_status_map[int(part)] = est
-                    except Exception:
-                        # intentar extraer dígitos del token (ej. CP000001 -> 000001)
-                        digits = ''.join(ch for ch in part if ch.isdigit())
-                        if digits:
-                            try:
-                                folio_status_map[int(digits)] = est
-                            except Exception:
-                                pass
-                        pass
-    except Exception:
-        folio_status_map = {}
+    folio_status_map = _mapa_estatus_por_folio(generador.historial_visitas)
 
     # Iterar grupos ordenados por número de folio para detectar saltos
     sorted_items = []
@@ -1543,125 +1922,96 @@ def generar_reporte_ema(tabla_de_relacion_path, historial_path, output_path, exp
         sorted_items.append((foln, clave, regs))
     sorted_items.sort(key=lambda x: x[0])
 
-    prev_folio_num = None
-    for foln, clave, regs in sorted_items:
-        primer = regs[0]
-        solicitud = primer.get('SOLICITUD', '')
-        folio = primer.get('FOLIO', '')
+    def _filas_ema():
+        prev_folio_num = None
+        for foln, clave, regs in sorted_items:
+            primer = regs[0]
+            solicitud = primer.get('SOLICITUD', '')
+            folio = primer.get('FOLIO', '')
 
-        # Formatos y búsquedas
-        try:
-            # normalizar folio a entero extrayendo dígitos (soporta prefijos como CP000001)
-            fol_digits = ''.join(ch for ch in str(folio) if ch.isdigit())
-            folio_num = int(fol_digits) if fol_digits else 0
-        except Exception:
-            folio_num = 0
+            # Formatos y búsquedas
+            try:
+                # normalizar folio a entero extrayendo dígitos (soporta prefijos como CP000001)
+                fol_digits = ''.join(ch for ch in str(folio) if ch.isdigit())
+                folio_num = int(fol_digits) if fol_digits else 0
+            except Exception:
+                folio_num = 0
+
+            cliente_info = generador.buscar_cliente_por_solicitud(solicitud, folio_num)
+
+            # Construir campos
+            numero_solicitud = generador.extraer_sol_ema(solicitud)
+            fecha_inspeccion = generador._format_date(primer.get('FECHA DE VERIFICACION', 'N/A'))
+            numero_dictamen = generador.formatear_folio_ema(folio)
+            numero_contrato = cliente_info.get('NÚMERO_DE_CONTRATO', 'N/A') if cliente_info else 'N/A'
+            tipo_raw = primer.get('TIPO DE DOCUMENTO', primer.get('TIPO DE DOCUMENTO OFICIAL EMITIDO', 'D'))
+            _tt = str(tipo_raw).strip().upper() if tipo_raw is not None else ''
+            if _tt == 'D':
+                tipo_doc = 'Dictamen'
+            elif _tt == 'C':
+                tipo_doc = 'Constancia'
+            else:
+                tipo_doc = str(tipo_raw)
+            fecha_doc_emitido = generador._format_date(primer.get('FECHA DE EMISION DE SOLICITUD', 'N/A'))
+
+            # Productos, noms
+            productos = set()
+            noms = set()
+            for r in regs:
+                if r.get('DESCRIPCION'):
+                    productos.add(r.get('DESCRIPCION'))
+                if r.get('CLASIF UVA'):
+                    noms.add(str(r.get('CLASIF UVA')))
+
+            producto_verificado = ", ".join(productos) if productos else 'N/A'
+            fecha_desaduanamiento = generador._format_date(primer.get('FECHA DE ENTRADA', 'N/A'))
+            fecha_visita = generador._format_date(primer.get('FECHA DE VERIFICACION', 'N/A'))
+            observaciones = 'N/A'
+
+            # Inspector(es)
+            firma = primer.get('FIRMA', '')
+            inspector_nombre = generador.buscar_inspector_por_firma(firma)
+            inspector_nombre = generador._normalize_name(inspector_nombre)
+
+            personas_apoyo = 'N/A'
+            nom_str = ", ".join(noms) if noms else 'N/A'
+
+            # Determinar estatus desde el mapeo (si existe)
+            est = folio_status_map.get(folio_num, '')
+            est_display = est.upper() if est else 'COMPLETADO'
+
+            fila_vals = [
+                numero_solicitud,
+                fecha_inspeccion,
+                numero_dictamen,
+                est_display,
+                numero_contrato,
+                tipo_doc,
+                fecha_doc_emitido,
+                producto_verificado,
+                fecha_desaduanamiento,
+                fecha_visita,
+                observaciones,
+                inspector_nombre,
+                personas_apoyo,
+                nom_str
+            ]
 
-        cliente_info = generador.buscar_cliente_por_solicitud(solicitud, folio_num)
-
-        # Construir campos
-        numero_solicitud = generador.extraer_sol_ema(solicitud)
-        fecha_inspeccion = generador._format_date(primer.get('FECHA DE VERIFICACION', 'N/A'))
-        numero_dictamen = generador.formatear_folio_ema(folio)
-        numero_contrato = cliente_info.get('NÚMERO_DE_CONTRATO', 'N/A') if cliente_info else 'N/A'
-        tipo_raw = primer.get('TIPO DE DOCUMENTO', primer.get('TIPO DE DOCUMENTO OFICIAL EMITIDO', 'D'))
-        _tt = str(tipo_raw).strip().upper() if tipo_raw is not None else ''
-        if _tt == 'D':
-            tipo_doc = 'Dictamen'
-        elif _tt == 'C':
-            tipo_doc = 'Constancia'
-        else:
-            tipo_doc = str(tipo_raw)
-        fecha_doc_emitido = generador._format_date(primer.get('FECHA DE EMISION DE SOLICITUD', 'N/A'))
-
-        # Productos, noms
-        productos = set()
-        noms = set()
-        for r in regs:
-            if r.get('DESCRIPCION'):
-                productos.add(r.get('DESCRIPCION'))
-            if r.get('CLASIF UVA'):
-                noms.add(str(r.get('CLASIF UVA')))
-
-        producto_verificado = ", ".join(productos) if productos else 'N/A'
-        fecha_desaduanamiento = generador._format_date(primer.get('FECHA DE ENTRADA', 'N/A'))
-        fecha_visita = generador._format_date(primer.get('FECHA DE VERIFICACION', 'N/A'))
-        observaciones = 'N/A'
-
-        # Inspector(es)
-        firma = primer.get('FIRMA', '')
-        inspector_nombre = generador.buscar_inspector_por_firma(firma)
-        inspector_nombre = generador._normalize_name(inspector_nombre)
-
-        personas_apoyo = 'N/A'
-        nom_str = ", ".join(noms) if noms else 'N/A'
-
-        # Determinar estatus desde el mapeo (si existe)
-        est = folio_status_map.get(folio_num, '')
-        est_display = est.upper() if est else 'COMPLETADO'
-
-        fila_vals = [
-            numero_solicitud,
-            fecha_inspeccion,
-            numero_dictamen,
-            est_display,
-            numero_contrato,
-            tipo_doc,
-            fecha_doc_emitido,
-            producto_verificado,
-            fecha_desaduanamiento,
-            fecha_visita,
-            observaciones,
-            inspector_nombre,
-            personas_apoyo,
-            nom_str
-        ]
-
-        # Escribir fila
-        for col, val in enumerate(fila_vals, 1):
-            cel = ws.cell(row=fila, column=col, value=val)
-            cel.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-            cel.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-        # Detectar salto (gap) con respecto al folio previo
-        is_salto = False
-        if prev_folio_num is not None and folio_num and (folio_num - prev_folio_num) > 1:
-            is_salto = True
-
-        # Detectar folio cancelado desde historial (solo 'cancelado'/'cancelada')
-        est = folio_status_map.get(folio_num, '')
-        is_cancelado = str(est).strip().lower() in ('cancelado', 'cancelada')
-
-        # Aplicar color únicamente para folios cancelados (rojo). El resto sin color.
-        if is_cancelado:
-            fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-            # Marcar negrita y aplicar relleno sólo en caso de cancelado
-            for col in range(1, len(fila_vals) + 1):
-                try:
-                    cell = ws.cell(row=fila, column=col)
-                    cell.fill = fill
-                    cell.font = Font(bold=True)
-                except Exception:
-                    pass
+            # Detectar salto (gap) con respecto al folio previo
+            is_salto = False
+            if prev_folio_num is not None and folio_num and (folio_num - prev_folio_num) > 1:
+                is_salto = True
 
-        prev_folio_num = folio_num
-        fila += 1
-        filas_procesadas += 1
-
-    # Ajustar anchos de columna
-    for col in range(1, len(encabezados) + 1):
-        col_letter = get_column_letter(col)
-        if col in (1, 3, 4):
-            ws.column_dimensions[col_letter].width = 18
-        elif col in (2, 7):
-            ws.column_dimensions[col_letter].width = 30
-        else:
-            ws.column_dimensions[col_letter].width = 20
+            # Detectar folio cancelado desde historial (solo 'cancelado'/'cancelada')
+            est = folio_status_map.get(folio_num, '')
+            is_cancelado = str(est).strip().lower() in ('cancelado', 'cancelada')
 
-    ws.freeze_panes = 'A2'
+            # Color únicamente para folios cancelados (rojo, negrita). El resto sin color.
+            prev_folio_num = folio_num
+            yield fila_vals, (ESTILO_CANCELADO if is_cancelado else ESTILO_CELDA)
 
     try:
-        wb.save(output_path)
+        escribir_excel_streaming(output_path, "EMA", encabezados, _filas_ema())
     except Exception as e:
         raise Exception(f"Error guardando Excel EMA: {e}")
 
@@ -1669,4 +2019,3 @@ def generar_reporte_ema(tabla_de_relacion_path, historial_path, output_path, exp
 
 if __name__ == "__main__":
     exit(main())
-
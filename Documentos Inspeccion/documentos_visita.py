@@ -0,0 +1,531 @@
+"""
+Generación de todos los documentos de una visita en un solo trabajo.
+
+Descargar el Acta, el Oficio de comisión, el Formato de supervisión y el
+Reporte Decathlon uno por uno volvía a ejecutar cada módulo con
+`spec_from_file_location`/`exec_module` y a leer historial, respaldos de la
+tabla de relación, folios y Clientes.json en cada descarga. Aquí:
+
+- `cargar_generador(nombre)` importa cada generador una sola vez (vía
+  `cargador_modulos`) y lo deja en `sys.modules`; se vuelve a ejecutar solo
+  si el archivo cambió.
+- `DatosVisita` resuelve una vez los datos de la visita (respaldo de la
+  tabla, folios, solicitudes, fecha de verificación, servicio) y comparte las
+  lecturas JSON entre documentos.
+- `generar_documentos_visita` genera los PDFs en hilos (comparten la caché de
+  fondos y firmas de `recursos_graficos`) y devuelve un resultado con tiempos.
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+_DIR_DOCUMENTOS = os.path.dirname(os.path.abspath(__file__))
+if _DIR_DOCUMENTOS not in sys.path:
+    sys.path.append(_DIR_DOCUMENTOS)
+# Raíz del proyecto (cargador_modulos, paralelismo)
+_DIR_RAIZ = os.path.dirname(_DIR_DOCUMENTOS)
+if _DIR_RAIZ not in sys.path:
+    sys.path.append(_DIR_RAIZ)
+
+import cargador_modulos
+import paralelismo
+
+# Documentos de una visita: tipo -> (módulo generador, nombre mostrado)
+DOCUMENTOS_VISITA = {
+    'oficio': ('Oficio_comision', 'Oficio de Comisión'),
+    'formato': ('Formato_supervision', 'Formato de Supervisión'),
+    'acta': ('Acta_inspeccion', 'Acta de Inspección'),
+    'decathlon': ('Reporte_Decathlon', 'Reporte Decathlon'),
+}
+
+# Cliente para el que se genera el Reporte Decathlon
+CLIENTE_DECATHLON = 'ARTICULOS DEPORTIVOS DECATHLON SA DE CV'
+
+# Máximo de hilos aceptado
+MAX_WORKERS_VISITA = 8
+
+MAPEO_SERVICIO = {
+    'D': 'Dictamen',
+    'C': 'Constancia',
+    'ND': 'Negacion de Dictamen',
+    'NC': 'Negacion de Constancia'
+}
+
+
+def archivo_generador(nombre: str) -> str:
+    """Archivo .py del generador (prefiere Oficio_comision_fixed.py si existe)."""
+    if nombre == 'Oficio_comision':
+        fijo = os.path.join(_DIR_DOCUMENTOS, 'Oficio_comision_fixed.py')
+        if os.path.exists(fijo):
+            return fijo
+    return os.path.join(_DIR_DOCUMENTOS, f"{nombre}.py")
+
+
+def cargar_generador(nombre: str):
+    """
+    Devuelve el módulo generador `nombre`, ejecutándolo solo la primera vez.
+
+    El módulo queda registrado en `sys.modules[nombre]`; si el archivo cambia
+    (mtime distinto) se vuelve a ejecutar para tomar los cambios (ver
+    `cargador_modulos.cargar_modulo`).
+
+    Raises:
+        FileNotFoundError: si no existe el archivo del generador
+        ImportError: si no se pudo crear el spec del módulo
+    """
+    return cargador_modulos.cargar_modulo(nombre, archivo_generador(nombre))
+
+
+def _fecha_dd_mm_aaaa(valor):
+    """Convierte 'YYYY-MM-DD' o 'dd/mm/YYYY' a 'dd/mm/YYYY' (o devuelve el valor)."""
+    if not valor:
+        return None
+    try:
+        if '-' in valor:
+            dt = datetime.strptime(valor[:10], '%Y-%m-%d')
+        else:
+            dt = datetime.strptime(valor[:10], '%d/%m/%Y')
+        return dt.strftime('%d/%m/%Y')
+    except Exception:
+        return valor
+
+
+class DatosVisita:
+    """
+    Datos de una visita compartidos por todos sus documentos.
+
+    Las lecturas JSON pasan por `leer_json`, que guarda cada archivo parseado
+    (por ruta, mtime y tamaño) para que el Acta, el Reporte y la preparación
+    de los demás documentos no vuelvan a leer el mismo respaldo. Los objetos
+    devueltos se comparten: los generadores solo los leen.
+    """
+
+    def __init__(self, registro: dict, data_dir: str):
+        self.registro = registro or {}
+        self.data_dir = data_dir
+        self.folio = self.registro.get('folio_visita', '') or ''
+        self.tiempos = {}
+        self._cargado = False
+        self._json = {}
+        self._lock = threading.Lock()
+        self.tabla_dest = os.path.join(data_dir, 'tabla_de_relacion.json')
+        self.backups_dir = os.path.join(data_dir, 'tabla_relacion_backups')
+        self.respaldo_reciente = None
+        self.folios_list = []
+        self.solicitudes = set()
+        self.fecha_verificacion = None
+        self.fecha_formateada = None
+        self.servicio = None
+        self.tabla_decathlon = None
+        self.clientes = None
+
+    def leer_json(self, path: str):
+        """Contenido JSON de `path` (una lectura por archivo y versión)."""
+        st = os.stat(path)
+        clave = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if clave in self._json:
+                return self._json[clave]
+        with open(path, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        with self._lock:
+            self._json[clave] = datos
+        return datos
+
+    def _respaldos(self) -> list:
+        if not os.path.exists(self.backups_dir):
+            return []
+        return [os.path.join(self.backups_dir, f) for f in os.listdir(self.backups_dir) if f.lower().endswith('.json')]
+
+    def cargar(self) -> "DatosVisita":
+        """Resuelve los datos de la visita (solo la primera vez)."""
+        if self._cargado:
+            return self
+        self._cargado = True
+        t0 = time.perf_counter()
+
+        # Preferir el backup más reciente en data/tabla_relacion_backups
+        archivos = self._respaldos()
+        if archivos:
+            latest = max(archivos, key=os.path.getmtime)
+            try:
+                shutil.copy2(latest, self.tabla_dest)
+                self.respaldo_reciente = latest
+                print(f"📁 Usando backup de tabla de relación: {latest}")
+            except Exception as e:
+                print(f"⚠️ No se pudo copiar backup de tabla de relación: {e}")
+
+        # Folios asociados a la visita (int)
+        try:
+            fol_num = ''.join([c for c in self.folio if c.isdigit()])
+            folios_file = os.path.join(self.data_dir, 'folios_visitas', f'folios_{fol_num}.json')
+            if os.path.exists(folios_file):
+                data_f = self.leer_json(folios_file)
+                if isinstance(data_f, list):
+                    self.folios_list = [int(x) for x in data_f if str(x).isdigit()]
+                elif isinstance(data_f, dict) and 'folios' in data_f:
+                    self.folios_list = [int(x) for x in data_f.get('folios', []) if str(x).isdigit()]
+        except Exception:
+            self.folios_list = []
+
+        # fallback: parsear rango en registro
+        if not self.folios_list:
+            fu = self.registro.get('folios_utilizados') or ''
+            if fu and isinstance(fu, str):
+                if '-' in fu:
+                    parts = [p.strip() for p in fu.split('-')]
+                    try:
+                        start = int(parts[0])
+                        end = int(parts[1]) if len(parts) > 1 else start
+                        self.folios_list = list(range(start, end + 1))
+                    except Exception:
+                        self.folios_list = []
+                elif ',' in fu:
+                    for v in [p.strip() for p in fu.split(',')]:
+                        if v.isdigit():
+                            self.folios_list.append(int(v))
+        self.tiempos['folios'] = time.perf_counter() - t0
+
+        # Tabla de relación: solicitudes únicas, FECHA DE VERIFICACION y servicio
+        t1 = time.perf_counter()
+        tabla = None
+        try:
+            # el respaldo copiado tiene el mismo contenido que tabla_de_relacion.json
+            origen = self.respaldo_reciente or self.tabla_dest
+            if os.path.exists(origen):
+                tabla = self.leer_json(origen)
+        except Exception as e:
+            print(f"⚠️ Error leyendo tabla de relación para generar documento: {e}")
+            tabla = None
+        self._resolver_tabla(tabla)
+        self.fecha_formateada = _fecha_dd_mm_aaaa(self.fecha_verificacion)
+        self.tiempos['tabla'] = time.perf_counter() - t1
+
+        # Tabla del Reporte Decathlon: backup que contenga el folio, si no el más reciente
+        t2 = time.perf_counter()
+        try:
+            matched = [a for a in archivos if self.folio in os.path.basename(a)]
+            src = None
+            if matched:
+                src = max(matched, key=os.path.getmtime)
+            elif archivos:
+                src = max(archivos, key=os.path.getmtime)
+            if src:
+                try:
+                    self.tabla_decathlon = self.leer_json(src)
+                except Exception:
+                    self.tabla_decathlon = None
+        except Exception:
+            self.tabla_decathlon = None
+
+        # Clientes.json (para completar la dirección del oficio)
+        try:
+            clientes_path = os.path.join(_DIR_DOCUMENTOS, '..', 'data', 'Clientes.json')
+            if os.path.exists(clientes_path):
+                self.clientes = self.leer_json(clientes_path)
+        except Exception:
+            self.clientes = None
+        self.tiempos['catalogos'] = time.perf_counter() - t2
+        return self
+
+    def _resolver_tabla(self, tabla) -> None:
+        try:
+            if tabla is None:
+                return
+            for rec in tabla:
+                try:
+                    fol = rec.get('FOLIO')
+                    fol_int = int(fol) if fol is not None and str(fol).isdigit() else None
+                except Exception:
+                    fol_int = None
+                if self.folios_list and fol_int in self.folios_list:
+                    sol = rec.get('SOLICITUD') or rec.get('SOLICITUDES')
+                    if sol:
+                        self.solicitudes.add(str(sol).strip())
+                    if not self.fecha_verificacion and rec.get('FECHA DE VERIFICACION'):
+                        self.fecha_verificacion = rec.get('FECHA DE VERIFICACION')
+                    # servicio a partir del primer registro de la visita
+                    if self.servicio is None:
+                        tipo_doc = (rec.get('TIPO DE DOCUMENTO') or rec.get('TIPO_DE_DOCUMENTO') or '')
+                        tipo_code = str(tipo_doc).strip().upper()
+                        self.servicio = MAPEO_SERVICIO.get(tipo_code, str(tipo_doc) if tipo_doc else 'Dictamen')
+            # si no filtró por folios, intentar colectar solicitudes globales
+            if not self.solicitudes and isinstance(tabla, list):
+                for rec in tabla:
+                    sol = rec.get('SOLICITUD') or rec.get('SOLICITUDES')
+                    if sol:
+                        self.solicitudes.add(str(sol).strip())
+            # si no se determinó por folios, inferir servicio desde cualquier registro
+            if not self.servicio and isinstance(tabla, list):
+                for rec in tabla:
+                    tipo_doc = rec.get('TIPO DE DOCUMENTO') or rec.get('TIPO_DE_DOCUMENTO') or ''
+                    if tipo_doc:
+                        tipo_code = str(tipo_doc).strip().upper()
+                        self.servicio = MAPEO_SERVICIO.get(tipo_code, str(tipo_doc))
+                        break
+        except Exception as e:
+            print(f"⚠️ Error leyendo tabla de relación para generar documento: {e}")
+
+    # ------------------------------------------------------------
+    # Datos por documento
+    # ------------------------------------------------------------
+    def datos_formato(self) -> dict:
+        self.cargar()
+        reg = self.registro
+        return {
+            'solicitud': ', '.join(sorted(list(self.solicitudes))) if self.solicitudes else reg.get('folio_visita', ''),
+            'servicio': self.servicio or 'Dictamen',
+            'fecha': reg.get('fecha_inicio') or reg.get('fecha_termino') or datetime.now().strftime('%d/%m/%Y'),
+            'cliente': reg.get('cliente', ''),
+            'supervisor': 'Mario Terrez Gonzalez'
+        }
+
+    def datos_oficio(self, mod) -> dict:
+        self.cargar()
+        reg = self.registro
+        try:
+            if hasattr(mod, 'preparar_datos_desde_visita'):
+                try:
+                    return mod.preparar_datos_desde_visita(reg, clientes=self.clientes)
+                except TypeError:
+                    # versión del módulo sin el parámetro `clientes`
+                    return mod.preparar_datos_desde_visita(reg)
+            # Heurística local: priorizar 'calle_numero' y anexar CP a colonia
+            calle = reg.get('calle_numero') or reg.get('direccion', '') or ''
+            colonia = reg.get('colonia', '') or ''
+            cp = reg.get('cp') or reg.get('CP') or ''
+            if cp and colonia:
+                colonia = f"{colonia}, {cp}"
+        except Exception:
+            calle = reg.get('calle_numero') or reg.get('direccion', '')
+            colonia = reg.get('colonia', '')
+        return {
+            'no_oficio': reg.get('folio_visita', ''),
+            'fecha_inspeccion': self.fecha_formateada or reg.get('fecha_termino') or datetime.now().strftime('%d/%m/%Y'),
+            'normas': reg.get('norma', '').split(', ') if reg.get('norma') else [],
+            'empresa_visitada': reg.get('cliente', ''),
+            'calle_numero': calle,
+            'colonia': colonia,
+            'municipio': reg.get('municipio', ''),
+            'ciudad_estado': reg.get('ciudad_estado', ''),
+            'fecha_confirmacion': reg.get('fecha_inicio') or datetime.now().strftime('%d/%m/%Y'),
+            'medio_confirmacion': 'correo electrónico',
+            'inspectores': [s.strip() for s in (reg.get('supervisores_tabla') or reg.get('nfirma1') or '').split(',') if s.strip()],
+            'observaciones': reg.get('observaciones', ''),
+            'num_solicitudes': ', '.join(sorted(list(self.solicitudes))) if self.solicitudes else ''
+        }
+
+    def argumentos_decathlon(self, ruta_guardado: str) -> dict:
+        self.cargar()
+        reg = self.registro
+        return {
+            'nombre_cliente': reg.get('cliente', ''),
+            'folio_inspeccion': reg.get('folio_visita', ''),
+            'fecha_inspeccion': reg.get('fecha_termino') or reg.get('fecha_inicio') or datetime.now().strftime('%Y-%m-%d'),
+            'tabla_relacion': self.tabla_decathlon,
+            'lista_equipos': None,
+            'observaciones_generales': reg.get('observaciones', ''),
+            'ruta_guardado': ruta_guardado,
+            'folio_visita': reg.get('folio_visita', ''),
+            'destinatario': reg.get('destinatario') or 'Diana Cumpean'
+        }
+
+
+def escribir_meta_decathlon(data_dir: str, registro: dict, ruta_usuario: str, tabla_relacion) -> str | None:
+    """
+    Guarda en data/Reportes_Decathlon el JSON con los datos impresos en el
+    Reporte Decathlon. Devuelve la ruta del JSON o None si no se pudo escribir.
+    """
+    folio = registro.get('folio_visita', '')
+    try:
+        reports_dir = os.path.join(data_dir, 'Reportes_Decathlon')
+        os.makedirs(reports_dir, exist_ok=True)
+        # Construir JSON reducido con solo los datos impresos
+        fecha_verif = None
+        printed_rows = []
+        if isinstance(tabla_relacion, list):
+            seen = {}
+            order = []
+            for item in tabla_relacion:
+                if fecha_verif is None:
+                    fecha_verif = item.get('FECHA DE VERIFICACION') or item.get('Fecha de Verificacion') or item.get('FECHA_VERIFICACION')
+                sol = item.get('SOLICITUD') or item.get('Solicitud') or item.get('solicitud') or ''
+                fol = item.get('FOLIO') or item.get('folio') or item.get('Folio') or ''
+                ped = item.get('PEDIMENTO') or item.get('pedimento') or item.get('Referencia') or item.get('referencia') or ''
+                key = str(fol)
+                if key not in seen:
+                    seen[key] = {'SOLICITUD': sol, 'FOLIO': fol, 'PEDIMENTO': ped}
+                    order.append(key)
+            for k in order:
+                printed_rows.append(seen[k])
+
+        meta = {
+            'generado_en': datetime.now().isoformat(),
+            'archivo_usuario': ruta_usuario,
+            'folio_visita': folio,
+            'cliente': registro.get('cliente', ''),
+            'destinatario': registro.get('destinatario') or 'Diana Cumpean',
+            'fecha_verificacion': fecha_verif,
+            'observaciones': registro.get('observaciones', ''),
+            'dictamenes_impresos': printed_rows
+        }
+        json_path = os.path.join(reports_dir, f"Reporte_Decathlon_{folio}.json")
+        with open(json_path, 'w', encoding='utf-8') as jf:
+            json.dump(meta, jf, ensure_ascii=False, indent=2)
+        return json_path
+    except Exception:
+        return None
+
+
+def es_cliente_decathlon(registro: dict) -> bool:
+    return str(registro.get('cliente', '') or '').strip().upper() == CLIENTE_DECATHLON.upper()
+
+
+def nombre_archivo_documento(tipo: str, folio: str) -> str:
+    """Nombre por defecto del PDF (el mismo que propone la descarga individual)."""
+    if tipo == 'acta':
+        return f"Acta_{folio}.pdf"
+    nombre = DOCUMENTOS_VISITA[tipo][1]
+    return f"{nombre.replace(' ', '_')}_{folio}.pdf"
+
+
+def obtener_workers_visita(workers=None, total: int = 4) -> int:
+    """Hilos para generar los documentos.
+
+    Prioridad: argumento `workers`, luego la variable de entorno
+    `DOCUMENTOS_VISITA_WORKERS`; por defecto un hilo por documento. `1` genera
+    en el hilo actual.
+    """
+    por_documento = max(1, min(total, MAX_WORKERS_VISITA))
+    return paralelismo.obtener_workers(workers, env="DOCUMENTOS_VISITA_WORKERS",
+                                      maximo=MAX_WORKERS_VISITA,
+                                      por_defecto=por_documento, auto=por_documento)
+
+
+def _generar_documento(tipo: str, mod, datos: DatosVisita, ruta: str) -> str:
+    """Genera un documento de la visita; devuelve la ruta generada."""
+    if tipo == 'acta':
+        return mod.generar_acta_desde_visita(folio_visita=datos.folio, ruta_salida=ruta,
+                                             leer_json=datos.leer_json)
+    if tipo == 'formato':
+        mod.generar_supervision(datos.datos_formato(), ruta)
+        return ruta
+    if tipo == 'oficio':
+        mod.generar_oficio_pdf(datos.datos_oficio(mod), ruta)
+        return ruta
+    if tipo == 'decathlon':
+        mod.generar_reporte_decathlon(**datos.argumentos_decathlon(ruta))
+        return ruta
+    raise ValueError(f"Tipo de documento desconocido: {tipo}")
+
+
+def generar_documentos_visita(registro: dict, salida_dir: str, data_dir: str, tipos=None,
+                              workers=None, progreso=None) -> dict:
+    """
+    Genera los documentos de una visita en un solo trabajo.
+
+    Args:
+        registro: Registro de la visita (como en historial_visitas.json)
+        salida_dir: Carpeta donde guardar los PDFs
+        data_dir: Carpeta de datos (respaldos de tabla, folios_visitas...)
+        tipos: Documentos a generar (claves de `DOCUMENTOS_VISITA`); por
+               defecto oficio, formato y acta, más el reporte Decathlon si
+               la visita es de ese cliente
+        workers: Hilos a usar (ver `obtener_workers_visita`)
+        progreso: callback opcional progreso(hechos, total, tipo, resultado)
+
+    Returns:
+        {folio_visita, ok, errores, segundos, workers, tiempos, documentos:
+        {tipo: {nombre, ok, ruta, error, segundos}}, meta_decathlon}
+    """
+    t0 = time.perf_counter()
+    if tipos is None:
+        tipos = ['oficio', 'formato', 'acta']
+        if es_cliente_decathlon(registro):
+            tipos.append('decathlon')
+    tipos = [t for t in tipos if t in DOCUMENTOS_VISITA]
+    os.makedirs(salida_dir, exist_ok=True)
+
+    documentos = {}
+    tiempos = {}
+
+    # 1) Módulos: cada generador se ejecuta una sola vez por proceso
+    t1 = time.perf_counter()
+    modulos = {}
+    for tipo in tipos:
+        try:
+            modulos[tipo] = cargar_generador(DOCUMENTOS_VISITA[tipo][0])
+        except Exception as e:
+            documentos[tipo] = {'nombre': DOCUMENTOS_VISITA[tipo][1], 'ok': False, 'ruta': None,
+                                'error': f"{type(e).__name__}: {e}", 'segundos': 0.0}
+    tiempos['modulos'] = time.perf_counter() - t1
+
+    # 2) Datos de la visita, resueltos una vez
+    datos = DatosVisita(registro, data_dir).cargar()
+    tiempos.update({f"datos_{k}": v for k, v in datos.tiempos.items()})
+
+    # 3) PDFs en paralelo
+    pendientes = [t for t in tipos if t in modulos]
+    n_workers = obtener_workers_visita(workers, total=len(pendientes) or 1)
+    folio = datos.folio
+    hechos = [0]
+    lock = threading.Lock()
+
+    def _uno(tipo):
+        inicio = time.perf_counter()
+        ruta = os.path.join(salida_dir, nombre_archivo_documento(tipo, folio))
+        res = {'nombre': DOCUMENTOS_VISITA[tipo][1], 'ok': False, 'ruta': None, 'error': None}
+        try:
+            generada = _generar_documento(tipo, modulos[tipo], datos, ruta)
+            res['ruta'] = generada or ruta
+            res['ok'] = bool(res['ruta']) and os.path.exists(res['ruta'])
+        except Exception:
+            res['error'] = traceback.format_exc()
+        res['segundos'] = round(time.perf_counter() - inicio, 3)
+        with lock:
+            hechos[0] += 1
+            n = hechos[0]
+        if progreso:
+            try:
+                progreso(n, len(pendientes), tipo, res)
+            except Exception:
+                pass
+        return res
+
+    t2 = time.perf_counter()
+    if n_workers == 1 or len(pendientes) < 2:
+        for tipo in pendientes:
+            documentos[tipo] = _uno(tipo)
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="documentos_visita") as pool:
+            for tipo, res in zip(pendientes, pool.map(_uno, pendientes)):
+                documentos[tipo] = res
+    tiempos['render'] = time.perf_counter() - t2
+
+    # Metadatos del Reporte Decathlon (mismo JSON que la descarga individual)
+    meta_decathlon = None
+    if documentos.get('decathlon', {}).get('ok'):
+        meta_decathlon = escribir_meta_decathlon(data_dir, registro, documentos['decathlon']['ruta'],
+                                                 datos.tabla_decathlon)
+
+    resultado = {
+        'folio_visita': folio,
+        'ok': sum(1 for r in documentos.values() if r['ok']),
+        'errores': sum(1 for r in documentos.values() if not r['ok']),
+        'workers': n_workers,
+        'segundos': round(time.perf_counter() - t0, 3),
+        'tiempos': {k: round(v, 3) for k, v in tiempos.items()},
+        'documentos': {t: documentos[t] for t in tipos if t in documentos},
+        'meta_decathlon': meta_decathlon,
+    }
+    detalle = ", ".join(f"{t}={r['segundos']:.2f}s{'' if r['ok'] else ' ERROR'}" for t, r in resultado['documentos'].items())
+    print(f"Documentos de la visita {folio}: {resultado['ok']} correctos, {resultado['errores']} con error "
+          f"en {resultado['segundos']}s (hilos={n_workers}) [{detalle}]")
+    return resultado
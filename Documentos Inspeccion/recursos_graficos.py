@@ -0,0 +1,200 @@
+"""
+Caché de recursos gráficos (fondos, membretes y firmas) compartida por todos
+los generadores de `Documentos Inspeccion`.
+
+Cada generador abría `img/Oficios.png`, `img/Membrete.jpg`, `img/Fondo.jpg` y
+las firmas PNG en cada página y en cada documento; cuando una visita produce
+Acta, Oficio, Formato, Reporte y Constancias juntos, el mismo archivo se
+decodificaba decenas de veces. Este módulo entrega:
+
+- `imagen(nombre)`: un `ImageReader` decodificado una sola vez por hilo. Los
+  bytes del archivo se leen una sola vez por proceso y se vuelven a leer solo
+  si el archivo cambia (mtime o tamaño distintos). El lector no es
+  thread-safe (ReportLab mueve su manejador de archivo al incrustar JPEG), por
+  eso cada hilo que genera documentos en paralelo tiene el suyo.
+- `dibujar_fondo(c, nombre, ...)`: dibuja la imagen como form XObject del
+  documento. La primera página la registra; las siguientes solo la
+  referencian, sin volver a calcular la huella de los píxeles como hace
+  `drawImage` en cada llamada.
+
+`nombre` puede ser un nombre lógico de `RECURSOS` ('fondo_oficios',
+'membrete', ...) o una ruta de archivo.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from io import BytesIO
+
+from reportlab.lib.utils import ImageReader
+
+# Carpeta base del paquete (junto al .exe empacado o la raíz del repositorio)
+try:
+    if getattr(sys, 'frozen', False):
+        PACKAGE_BASE = getattr(sys, '_MEIPASS', os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    else:
+        PACKAGE_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+except Exception:
+    PACKAGE_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Nombres lógicos -> ruta relativa a la carpeta base
+RECURSOS = {
+    'fondo_oficios': os.path.join('img', 'Oficios.png'),
+    'fondo_constancia': os.path.join('img', 'Fondo.jpg'),
+    'membrete': os.path.join('img', 'Membrete.jpg'),
+}
+
+# ruta absoluta -> (mtime_ns, tamaño, bytes del archivo), compartida por el proceso
+_CACHE = {}
+_LOCK = threading.Lock()
+# Por hilo: ruta absoluta -> (mtime_ns, tamaño, ImageReader)
+_LOCAL = threading.local()
+# Se incrementa en `limpiar_cache` para invalidar las cachés de todos los hilos
+_GENERACION = 0
+_ESTADISTICAS = {'aciertos': 0, 'decodificaciones': 0}
+
+
+def ruta_recurso(nombre: str) -> str | None:
+    """
+    Resuelve un nombre lógico o una ruta a una ruta existente.
+
+    Las rutas relativas se buscan primero respecto al directorio de trabajo
+    (como hacían los generadores) y luego respecto a la carpeta base.
+    """
+    if not nombre:
+        return None
+    rel = RECURSOS.get(nombre, nombre)
+    if os.path.isabs(rel):
+        return rel if os.path.exists(rel) else None
+    if os.path.exists(rel):
+        return os.path.abspath(rel)
+    candidato = os.path.join(PACKAGE_BASE, rel)
+    if os.path.exists(candidato):
+        return candidato
+    return None
+
+
+def ruta_firma(codigo: str) -> str | None:
+    """Ruta de `Firmas/{codigo}.png` si existe."""
+    if not codigo:
+        return None
+    return ruta_recurso(os.path.join('Firmas', f"{codigo}.png"))
+
+
+def _lectores_hilo() -> dict:
+    """Caché de lectores del hilo actual (vacía si se llamó `limpiar_cache`)."""
+    if getattr(_LOCAL, 'generacion', None) != _GENERACION:
+        _LOCAL.generacion = _GENERACION
+        _LOCAL.lectores = {}
+    return _LOCAL.lectores
+
+
+def _bytes_archivo(ruta: str, huella: tuple) -> bytes:
+    with _LOCK:
+        entrada = _CACHE.get(ruta)
+        if entrada is not None and entrada[:2] == huella:
+            return entrada[2]
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    with _LOCK:
+        _CACHE[ruta] = (huella[0], huella[1], datos)
+    return datos
+
+
+def imagen(nombre: str) -> ImageReader | None:
+    """
+    `ImageReader` del recurso, decodificado una sola vez por hilo.
+
+    No compartir el lector entre hilos: cada hilo recibe el suyo.
+
+    Returns:
+        El lector en caché del hilo (o uno nuevo si el archivo cambió), None
+        si el recurso no existe.
+    """
+    ruta = ruta_recurso(nombre)
+    if not ruta:
+        return None
+    try:
+        st = os.stat(ruta)
+        huella = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+    lectores = _lectores_hilo()
+    entrada = lectores.get(ruta)
+    if entrada is not None and entrada[:2] == huella:
+        with _LOCK:
+            _ESTADISTICAS['aciertos'] += 1
+        return entrada[2]
+    try:
+        lector = ImageReader(BytesIO(_bytes_archivo(ruta, huella)))
+    except OSError:
+        return None
+    try:
+        # Decodificar ahora para que todas las páginas reutilicen los píxeles
+        lector.getRGBData()
+    except Exception:
+        pass
+    lectores[ruta] = (huella[0], huella[1], lector)
+    with _LOCK:
+        _ESTADISTICAS['decodificaciones'] += 1
+    return lector
+
+
+def tamano(nombre: str) -> tuple | None:
+    """(ancho, alto) en píxeles del recurso, None si no existe."""
+    lector = imagen(nombre)
+    if lector is None:
+        return None
+    return lector.getSize()
+
+
+def _nombre_forma(ruta: str, x, y, width, height, mask) -> str:
+    clave = f"{ruta}|{x:.2f}|{y:.2f}|{width:.2f}|{height:.2f}|{mask}"
+    return "RG" + hashlib.md5(clave.encode('utf-8')).hexdigest()[:16]
+
+
+def dibujar_fondo(c, nombre: str, x: float = 0, y: float = 0, width: float | None = None,
+                  height: float | None = None, mask=None) -> bool:
+    """
+    Dibuja un recurso como form XObject reutilizable dentro del documento de `c`.
+
+    Args:
+        c: Canvas de ReportLab
+        nombre: Nombre lógico o ruta del recurso
+        x, y, width, height: Rectángulo destino (por defecto toda la página)
+        mask: Igual que en `canvas.drawImage`
+
+    Returns:
+        True si se dibujó, False si el recurso no existe.
+    """
+    ruta = ruta_recurso(nombre)
+    lector = imagen(ruta) if ruta else None
+    if lector is None:
+        return False
+    ancho_pag, alto_pag = c._pagesize
+    width = ancho_pag if width is None else width
+    height = alto_pag if height is None else height
+    forma = _nombre_forma(ruta, x, y, width, height, mask)
+    if not c.hasForm(forma):
+        c.beginForm(forma)
+        c.drawImage(lector, x, y, width=width, height=height, mask=mask)
+        c.endForm()
+    c.doForm(forma)
+    return True
+
+
+def estadisticas() -> dict:
+    """Aciertos de caché, decodificaciones y archivos en memoria."""
+    with _LOCK:
+        datos = dict(_ESTADISTICAS)
+        datos['en_cache'] = len(_CACHE)
+    return datos
+
+
+def limpiar_cache() -> None:
+    """Libera todas las imágenes en caché (las de cada hilo, en su próximo uso)."""
+    global _GENERACION
+    with _LOCK:
+        _CACHE.clear()
+        _GENERACION += 1
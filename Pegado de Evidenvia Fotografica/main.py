@@ -2,7 +2,12 @@ import os
 import json
 import sys
 import re
+import bisect
+from array import array
+import hashlib
 import unicodedata
+from collections import OrderedDict
+from io import BytesIO
 from tkinter import Tk, filedialog
 
 from docx import Document
@@ -118,12 +123,31 @@ def obtener_rutas():
 # ============================================================
 # NORMALIZACIÓN / UTILIDADES
 # ============================================================
+# Se prefieren las versiones memoizadas del módulo compartido `normalizacion`
+# (raíz del proyecto); si no está en sys.path se usan las implementaciones
+# locales equivalentes.
+try:
+    from normalizacion import sin_acentos as _sin_acentos_cache
+    from normalizacion import normalizar_codigo as _normalizar_codigo_cache
+    from normalizacion import core_base as _core_base_compartido
+except Exception:
+    _sin_acentos_cache = None
+    _normalizar_codigo_cache = None
+    _core_base_compartido = None
+
+_RE_NO_ALNUM = re.compile(r"[^A-Za-z0-9]")
+
+
 def _sin_acentos(s):
+    if _sin_acentos_cache is not None:
+        return _sin_acentos_cache(s)
     return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
 
 
 def normalizar_cadena_alnum_mayus(s):
-    return re.sub(r"[^A-Za-z0-9]", "", s or "").upper()
+    if _normalizar_codigo_cache is not None:
+        return _normalizar_codigo_cache(s or "")
+    return _RE_NO_ALNUM.sub("", s or "").upper()
 
 
 def contiene_digito(s):
@@ -137,6 +161,160 @@ def norm_path_key(path):
 # ============================================================
 # INDEXADO DE IMÁGENES (CARPETA ÚNICA)
 # ============================================================
+class IndiceImagenes(list):
+    """
+    Lista de entradas de imagen (mismo formato que devuelve `indexar_imagenes`)
+    con estructuras de búsqueda construidas una sola vez:
+
+      - mapas exactos base_norm -> posiciones y base_core_norm -> posiciones
+      - arreglos ordenados de prefijos (base_norm y base_core_norm) y de
+        sufijos (cadena invertida) para resolver "empieza/termina con el
+        código" con `bisect`
+      - arreglo de sufijos (perezoso) para "contiene al código", que solo se
+        construye si alguna búsqueda lo necesita; guarda pares enteros
+        (cadena, desplazamiento) y compara contra las bases sin copiar cada
+        sufijo
+
+    Antes cada código recorría la carpeta completa (dos comprensiones de lista
+    y un sort por código); con decenas de miles de imágenes y miles de
+    códigos eso era cuadrático. Las posiciones se conservan para desempatar
+    exactamente igual que el recorrido lineal (orden del índice).
+    """
+
+    def __init__(self, entradas=()):
+        super().__init__(entradas)
+        self._reconstruir()
+
+    def _reconstruir(self):
+        self._bn = []
+        self._bcore = []
+        self._path_keys = [None] * len(self)
+        self._exacto_bn = {}
+        self._exacto_bcore = {}
+        for pos, it in enumerate(self):
+            bn = it.get("base_norm") or ""
+            bcore = it.get("base_core_norm") or ""
+            self._bn.append(bn)
+            self._bcore.append(bcore)
+            self._exacto_bn.setdefault(bn, []).append(pos)
+            self._exacto_bcore.setdefault(bcore, []).append(pos)
+        self._prefijos_bn = sorted((bn, pos) for pos, bn in enumerate(self._bn))
+        self._prefijos_bcore = sorted((bc, pos) for pos, bc in enumerate(self._bcore))
+        self._sufijos_bn = sorted((bn[::-1], pos) for pos, bn in enumerate(self._bn))
+        self._contenido = None
+        self._n = len(self)
+
+    def _vigente(self):
+        # Si alguien modificó la lista después de construirla, reindexar
+        if self._n != len(self):
+            self._reconstruir()
+
+    def path_key(self, pos):
+        pk = self._path_keys[pos]
+        if pk is None:
+            pk = norm_path_key(self[pos].get("path") or "")
+            self._path_keys[pos] = pk
+        return pk
+
+    @staticmethod
+    def _rango_prefijo(arreglo, prefijo):
+        i = bisect.bisect_left(arreglo, (prefijo,))
+        out = []
+        while i < len(arreglo) and arreglo[i][0].startswith(prefijo):
+            out.append(arreglo[i][1])
+            i += 1
+        return out
+
+    def exactos(self, code):
+        """Posiciones (en orden del índice) con base_norm o base_core_norm == code."""
+        self._vigente()
+        a = self._exacto_bn.get(code, [])
+        b = self._exacto_bcore.get(code, [])
+        if not b:
+            return a
+        if not a:
+            return b
+        return sorted(set(a) | set(b))
+
+    def empiezan_o_terminan(self, code):
+        """Posiciones cuyo base_norm empieza o termina con `code`."""
+        self._vigente()
+        out = set(self._rango_prefijo(self._prefijos_bn, code))
+        out.update(self._rango_prefijo(self._sufijos_bn, code[::-1]))
+        return out
+
+    def empiezan_con(self, code):
+        """Posiciones cuyo base_norm o base_core_norm empieza con `code`."""
+        self._vigente()
+        out = set(self._rango_prefijo(self._prefijos_bn, code))
+        out.update(self._rango_prefijo(self._prefijos_bcore, code))
+        return out
+
+    def _construir_contenido(self):
+        # Cadena t: base_norm de la posición t (t < n) o base_core_norm de la
+        # posición t - n (solo si difiere de su base_norm). Se ordena por
+        # cubetas del primer carácter para no materializar todos los sufijos
+        # a la vez.
+        n = len(self)
+        textos = self._bn + [bc if bc != bn else "" for bn, bc in zip(self._bn, self._bcore)]
+        cubetas = {}
+        for t, valor in enumerate(textos):
+            for off in range(len(valor)):
+                cubetas.setdefault(valor[off], []).append((t, off))
+        ids = array("I")
+        offs = array("I")
+        for letra in sorted(cubetas):
+            pares = cubetas[letra]
+            pares.sort(key=lambda par: textos[par[0]][par[1]:])
+            for t, off in pares:
+                ids.append(t)
+                offs.append(off)
+        self._contenido = (textos, ids, offs, n)
+
+    def contienen(self, code):
+        """Posiciones cuyo base_norm o base_core_norm contiene a `code`."""
+        self._vigente()
+        if self._contenido is None:
+            self._construir_contenido()
+        textos, ids, offs, n = self._contenido
+        largo = len(code)
+
+        def cabeza(k):
+            off = offs[k]
+            return textos[ids[k]][off:off + largo]
+
+        # Primer sufijo >= code y primer sufijo cuya cabeza ya es > code
+        lo, hi = 0, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cabeza(mid) < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        inicio, hi = lo, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cabeza(mid) <= code:
+                lo = mid + 1
+            else:
+                hi = mid
+        return {ids[k] % n for k in range(inicio, lo)} if n else set()
+
+    def contenidos_en(self, code):
+        """Posiciones cuyo base_norm o base_core_norm es subcadena de `code`
+        (incluye bases vacías, que son subcadena de cualquier código)."""
+        self._vigente()
+        out = set()
+        subcadenas = {""}
+        for i in range(len(code)):
+            for j in range(i + 1, len(code) + 1):
+                subcadenas.add(code[i:j])
+        for sub in subcadenas:
+            out.update(self._exacto_bn.get(sub, ()))
+            out.update(self._exacto_bcore.get(sub, ()))
+        return out
+
+
 def indexar_imagenes(carpeta_imagenes):
     """
     Construye un índice de las imágenes en una carpeta:
@@ -144,11 +322,13 @@ def indexar_imagenes(carpeta_imagenes):
       - base (sin extensión)
       - base_norm (solo alfanumérico mayúsculas)
       - path
+    Devuelve un `IndiceImagenes` (una lista con mapas de búsqueda).
     """
     index = []
     def _core_base(name):
         # Eliminar sufijos comunes como ' (2)', '-2', '_2' al final del nombre
-        import re
+        if _core_base_compartido is not None:
+            return _core_base_compartido(name)
         core = re.sub(r"[\s\-_]*\(\s*\d+\s*\)$", "", name)
         core = re.sub(r"[\s\-_]+\d+$", "", core)
         return core
@@ -167,7 +347,14 @@ def indexar_imagenes(carpeta_imagenes):
             "base_core_norm": normalizar_cadena_alnum_mayus(core),
             "path": os.path.join(carpeta_imagenes, nombre),
         })
-    return index
+    return IndiceImagenes(index)
+
+
+def como_indice_imagenes(index):
+    """Devuelve `index` como `IndiceImagenes` (sin copiar si ya lo es)."""
+    if isinstance(index, IndiceImagenes):
+        return index
+    return IndiceImagenes(index or [])
 
 
 def buscar_imagen_index(index, codigo_canonico, usadas_paths, usadas_bases):
@@ -181,36 +368,41 @@ def buscar_imagen_index(index, codigo_canonico, usadas_paths, usadas_bases):
     if not code:
         return None
 
-    # Coincidencia exacta (tanto con base_norm como con base_core_norm)
-    exactos = [
-        it for it in index
-        if (it.get("base_norm") == code or it.get("base_core_norm") == code)
-        and norm_path_key(it["path"]) not in usadas_paths
-        and (it.get("base_norm") not in usadas_bases and it.get("base_core_norm") not in usadas_bases)
-    ]
-    if exactos:
-        return exactos[0]["path"]
-
-    # Coincidencias parciales
-    parciales = [
-        it for it in index
-        if ((code in (it.get("base_norm") or "") or (it.get("base_norm") or "") in code)
-            or (code in (it.get("base_core_norm") or "") or (it.get("base_core_norm") or "") in code))
-        and norm_path_key(it["path"]) not in usadas_paths
-        and (it.get("base_norm") not in usadas_bases and it.get("base_core_norm") not in usadas_bases)
-    ]
-    if not parciales:
-        return None
+    idx = como_indice_imagenes(index)
+
+    def disponible(pos):
+        it = idx[pos]
+        return (
+            idx.path_key(pos) not in usadas_paths
+            and it.get("base_norm") not in usadas_bases
+            and it.get("base_core_norm") not in usadas_bases
+        )
+
+    # Coincidencia exacta (tanto con base_norm como con base_core_norm):
+    # la primera disponible en orden del índice
+    for pos in idx.exactos(code):
+        if disponible(pos):
+            return idx[pos]["path"]
 
-    def score(it):
-        bn = it["base_norm"]
+    def score(pos):
+        bn = idx[pos]["base_norm"]
         starts = bn.startswith(code)
         ends = bn.endswith(code)
         delta = abs(len(bn) - len(code))
-        return (0 if starts or ends else 1, delta, bn)
+        return (0 if starts or ends else 1, delta, bn, pos)
 
-    parciales.sort(key=score)
-    return parciales[0]["path"]
+    # Coincidencias parciales. Las que empiezan/terminan con el código siempre
+    # ganan (primer componente del score), así que se prueban primero y solo
+    # si ninguna está disponible se consulta el resto de contenciones.
+    preferidas = [pos for pos in idx.empiezan_o_terminan(code) if disponible(pos)]
+    if preferidas:
+        return idx[min(preferidas, key=score)]["path"]
+
+    parciales = idx.contienen(code) | idx.contenidos_en(code)
+    parciales = [pos for pos in parciales if disponible(pos)]
+    if not parciales:
+        return None
+    return idx[min(parciales, key=score)]["path"]
 
 
 # ============================================================
@@ -392,6 +584,98 @@ def insertar_imagen_con_transparencia(run, img_path):
 # ============================================================
 # INSERCIÓN EN PDF (PLACEHOLDER)
 # ============================================================
+# Servicio compartido de hashes con caché persistente (raíz del proyecto);
+# si no está en sys.path se calculan aquí sin caché.
+try:
+    import hashes_imagenes as _hashes_imagenes
+except Exception:
+    _hashes_imagenes = None
+
+
+def _file_md5(p):
+    if _hashes_imagenes is not None:
+        return _hashes_imagenes.hash_archivo(p)
+    try:
+        h = hashlib.md5()
+        with open(p, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(8192), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def _image_normalized_hash(p, size=(64, 64)):
+    if _hashes_imagenes is not None and tuple(size) == _hashes_imagenes.TAMANO_NORMALIZADO:
+        return _hashes_imagenes.hash_normalizado(p)
+    try:
+        # Usar PIL para abrir, convertir a RGB, redimensionar y hash de bytes
+        with Image.open(p) as im:
+            im = im.convert('RGB')
+            im = im.resize(size, resample=Image.LANCZOS)
+            data = im.tobytes()
+        return hashlib.md5(data).hexdigest()
+    except Exception:
+        return None
+
+
+# Caché de imágenes reducidas para PDF: (ruta, mtime, tamaño, caja) -> bytes.
+# Las fotos de evidencia suelen venir a resolución de cámara (varios MB) y se
+# muestran en una caja de ~4x6 cm; insertarlas completas infla el PDF y hace
+# lento el guardado. Se reducen una vez a PDF_IMG_DPI y el buffer se reutiliza
+# si la misma imagen se pega en otro documento del lote.
+PDF_IMG_DPI = 200
+_BUFFERS_REDUCIDOS = OrderedDict()
+_MAX_BUFFERS_REDUCIDOS = 256
+
+
+def imagen_reducida_bytes(ruta, caja_w_pt, caja_h_pt, dpi=PDF_IMG_DPI):
+    """
+    Devuelve los bytes de la imagen reducida para caber en la caja
+    (caja_w_pt x caja_h_pt puntos) a `dpi`. Si la imagen ya es menor que eso
+    devuelve el archivo original tal cual. Devuelve None si no se pudo leer.
+    """
+    try:
+        st = os.stat(ruta)
+        clave = (norm_path_key(ruta), st.st_mtime_ns, st.st_size, round(caja_w_pt, 2), round(caja_h_pt, 2), dpi)
+    except Exception:
+        return None
+
+    buf = _BUFFERS_REDUCIDOS.get(clave)
+    if buf is not None:
+        _BUFFERS_REDUCIDOS.move_to_end(clave)
+        return buf
+
+    max_px = (max(1, int(caja_w_pt / 72.0 * dpi)), max(1, int(caja_h_pt / 72.0 * dpi)))
+    try:
+        with Image.open(ruta) as im:
+            if im.width <= max_px[0] and im.height <= max_px[1]:
+                with open(ruta, "rb") as fh:
+                    buf = fh.read()
+            else:
+                exif = im.info.get("exif")
+                im.thumbnail(max_px, Image.LANCZOS)
+                out = BytesIO()
+                if im.mode in ("RGBA", "LA", "P"):
+                    # Conservar transparencia
+                    im.save(out, format="PNG", optimize=False)
+                else:
+                    if im.mode != "RGB":
+                        im = im.convert("RGB")
+                    kwargs = {"quality": 90}
+                    if exif:
+                        kwargs["exif"] = exif
+                    im.save(out, format="JPEG", **kwargs)
+                buf = out.getvalue()
+    except Exception:
+        return None
+
+    _BUFFERS_REDUCIDOS[clave] = buf
+    if len(_BUFFERS_REDUCIDOS) > _MAX_BUFFERS_REDUCIDOS:
+        _BUFFERS_REDUCIDOS.popitem(last=False)
+    return buf
+
+
 def insertar_imagenes_en_pdf_placeholder(ruta_pdf, rutas_imagenes, placeholder="${imagen}"):
     """
     Inserta una o varias imágenes en un PDF usando un marcador de texto
@@ -501,10 +785,19 @@ def insertar_imagenes_en_pdf_placeholder(ruta_pdf, rutas_imagenes, placeholder="
 
     page_rect = page_target.rect
 
-    # Borramos el texto del marcador usando redacción
+    # Borramos el texto del marcador usando redacción. Solo se elimina texto:
+    # con los valores por defecto PyMuPDF también blanquea los píxeles de
+    # imágenes y recorta dibujos vectoriales que toquen el rectángulo.
     try:
         page_target.add_redact_annot(marca, fill=(1, 1, 1))
-        page_target.apply_redactions()
+        try:
+            page_target.apply_redactions(
+                images=fitz.PDF_REDACT_IMAGE_NONE,
+                graphics=getattr(fitz, "PDF_REDACT_LINE_ART_NONE", 0),
+            )
+        except TypeError:
+            # Versiones anteriores de PyMuPDF sin el parámetro `graphics`
+            page_target.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
     except Exception as e:
         print(f"No se pudo aplicar redacción sobre marcador en {ruta_pdf}: {e}")
 
@@ -529,37 +822,6 @@ def insertar_imagenes_en_pdf_placeholder(ruta_pdf, rutas_imagenes, placeholder="
         # Si se sale por abajo, movemos hacia arriba
         start_y = max(margen_sup, margen_inf - max_h_pt * 2)
 
-    # Inserción de imágenes
-    # Mantener conjunto de rutas insertadas para evitar insertar exactamente
-    # la misma ruta más de una vez (pero permitir distintos paths aunque
-    # tengan contenido idéntico, ya que el usuario puede querer ese comportamiento).
-    inserted_paths = set()
-    # Además mantener hashes insertados para evitar pegar la misma imagen
-    # visual más de una vez aunque venga desde paths distintos.
-    inserted_hashes = set()
-    import hashlib
-    # Funciones de hashing: por defecto usar hash normalizado de imagen
-    def _file_md5(p):
-        try:
-            h = hashlib.md5()
-            with open(p, 'rb') as fh:
-                for chunk in iter(lambda: fh.read(8192), b''):
-                    h.update(chunk)
-            return h.hexdigest()
-        except Exception:
-            return None
-
-    def _image_normalized_hash(p, size=(64, 64)):
-        try:
-            # Usar PIL para abrir, convertir a RGB, redimensionar y hash de bytes
-            with Image.open(p) as im:
-                im = im.convert('RGB')
-                im = im.resize(size, resample=Image.LANCZOS)
-                data = im.tobytes()
-            return hashlib.md5(data).hexdigest()
-        except Exception:
-            return None
-
     # Leer configuración para decidir modo de deduplicación por contenido
     try:
         cfg_local = cargar_config() if 'cargar_config' in globals() else {}
@@ -570,6 +832,51 @@ def insertar_imagenes_en_pdf_placeholder(ruta_pdf, rutas_imagenes, placeholder="
         print(f"Iniciando inserción en {ruta_pdf}: {len(rutas_imagenes)} imágenes; dedupe_by_content={DEDUPE_CONTENT}. Ejemplo: {rutas_imagenes[:3]}")
     except Exception:
         pass
+
+    # Pre-pase: no insertar exactamente la misma ruta más de una vez (varios
+    # códigos pueden resolver a la misma carpeta o a las mismas imágenes).
+    # Solo compara rutas normalizadas, sin leer archivos.
+    inserted_paths = set()
+    filtradas = []
+    for img_path in rutas_imagenes:
+        try:
+            pnorm = os.path.normcase(os.path.normpath(img_path))
+        except Exception:
+            pnorm = img_path
+        if pnorm in inserted_paths:
+            print(f"Omitida inserción duplicada por ruta: {img_path}")
+            continue
+        inserted_paths.add(pnorm)
+        filtradas.append(img_path)
+    rutas_imagenes = filtradas
+
+    # Solo si `dedupe_by_content` está activo se calcula el hash de cada imagen
+    # para omitir las que tengan el mismo contenido visual aunque vengan de
+    # rutas distintas. Con la opción apagada no se abre ningún archivo aquí.
+    if DEDUPE_CONTENT:
+        inserted_hashes = set()
+        filtradas = []
+        # Con el servicio compartido, los hashes que faltan en caché se
+        # calculan en paralelo de una vez
+        hashes_lote = {}
+        if _hashes_imagenes is not None:
+            try:
+                hashes_lote = _hashes_imagenes.hashes_contenido(rutas_imagenes)
+            except Exception:
+                hashes_lote = {}
+        for img_path in rutas_imagenes:
+            img_hash = hashes_lote.get(str(img_path)) or _image_normalized_hash(img_path)
+            # si falla el método normalizado, caer al hash de archivo
+            if img_hash is None:
+                img_hash = _file_md5(img_path)
+            if img_hash is not None and img_hash in inserted_hashes:
+                print(f"Omitida inserción duplicada por contenido (hash): {img_path}")
+                continue
+            if img_hash is not None:
+                inserted_hashes.add(img_hash)
+            filtradas.append(img_path)
+        rutas_imagenes = filtradas
+
     for idx, img_path in enumerate(rutas_imagenes):
         fila = idx // por_fila
         col = idx % por_fila
@@ -596,39 +903,41 @@ def insertar_imagenes_en_pdf_placeholder(ruta_pdf, rutas_imagenes, placeholder="
         rect = fitz.Rect(x0, y0, x1, y1)
 
         try:
-            try:
-                pnorm = os.path.normcase(os.path.normpath(img_path))
-            except Exception:
-                pnorm = img_path
-            if pnorm in inserted_paths:
-                print(f"Omitida inserción duplicada por ruta: {img_path}")
-                continue
-
-            # calcular hash y omitir si ya se insertó una imagen idéntica
-            img_hash = None
-            if DEDUPE_CONTENT:
-                img_hash = _image_normalized_hash(pnorm)
-                # si falla el método normalizado, caer al hash de archivo
-                if img_hash is None:
-                    img_hash = _file_md5(pnorm)
+            # Insertar desde el buffer reducido a la caja destino (compartido
+            # entre documentos); si no se pudo preparar, usar el archivo original
+            buf = imagen_reducida_bytes(img_path, max_w_pt, max_h_pt)
+            if buf:
+                page_target.insert_image(rect, stream=buf, keep_proportion=True)
             else:
-                img_hash = _file_md5(pnorm)
-
-            if img_hash is not None and img_hash in inserted_hashes:
-                print(f"Omitida inserción duplicada por contenido (hash): {img_path}")
-                # marcar ruta como vista para evitar procesarla otra vez
-                inserted_paths.add(pnorm)
-                continue
-
-            inserted_paths.add(pnorm)
-            if img_hash is not None:
-                inserted_hashes.add(img_hash)
-
-            page_target.insert_image(rect, filename=img_path, keep_proportion=True)
+                page_target.insert_image(rect, filename=img_path, keep_proportion=True)
             print(f"Imagen insertada en PDF {ruta_pdf}: {img_path}")
         except Exception as e:
             print(f"Error al insertar imagen en PDF {ruta_pdf}: {e}")
 
+    # Guardado incremental: solo se agregan al final del archivo los objetos
+    # nuevos/modificados (la página del marcador y las imágenes), sin reescribir
+    # el resto del documento.
+    # Nota: tras `apply_redactions` MuPDF reporta can_save_incrementally() = 0
+    # porque el texto redactado sigue existiendo en la revisión anterior del
+    # archivo. Aquí lo redactado es solo el marcador `${imagen}` (no es un dato
+    # sensible) y la revisión vigente ya no lo contiene, así que no se usa ese
+    # aviso para decidir; solo se evita el incremental si el PDF se reparó al
+    # abrirlo (en ese caso el archivo original no es reutilizable) y ante
+    # cualquier error se cae al guardado completo en archivo temporal.
+    try:
+        puede_incremental = not doc.is_repaired
+    except Exception:
+        puede_incremental = False
+
+    if puede_incremental:
+        try:
+            doc.saveIncr()
+            doc.close()
+            print(f"PDF actualizado (incremental): {ruta_pdf}")
+            return True
+        except Exception as e:
+            print(f"Guardado incremental falló en {ruta_pdf}, se usará guardado completo: {e}")
+
     # Guardar cambios usando archivo temporal para evitar el error
     # "save to original must be incremental"
     temp_path = ruta_pdf + ".tmp"
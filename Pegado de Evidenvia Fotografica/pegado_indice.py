@@ -3,6 +3,7 @@ import json
 import pandas as pd
 import re
 from datetime import datetime
+from functools import lru_cache
 from tkinter import filedialog, Tk
 from docx import Document
 from registro_fallos import registrar_fallo, limpiar_registro, mostrar_registro, LOG_FILE
@@ -12,12 +13,15 @@ from main import (
     APPDATA_DIR,
     extraer_codigos_pdf,
     insertar_imagenes_en_pdf_placeholder,
+    cargar_config,
 )
 from main import normalizar_cadena_alnum_mayus
 from plantillaPDF import cargar_tabla_relacion
+from pool_pegado import procesar_documentos, obtener_workers
 
 INDEX_FILE = os.path.join(APPDATA_DIR, "index_indice.json")
 IMG_EXTS = [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif"]
+_RE_PLACEHOLDER_IMAGEN = re.compile(r"\$\{\s*imagen\s*\}", re.IGNORECASE)
 
 # Debug logger for pegado indice
 DEBUG_INDEX_LOG = os.path.join(APPDATA_DIR, "pegado_indice_debug.log")
@@ -47,16 +51,20 @@ def normalizar_codigo(codigo):
     - Elimina sufijos ".0" en strings y quita espacios alrededor.
     - Devuelve string vacío si el resultado está vacío o es 'nan'.
     """
+    if codigo is None:
+        return ""
+
+    # Camino rápido: los códigos leídos del Excel/DOCX suelen ser strings y se
+    # repiten muchas veces; se resuelven con el caché sin pasar por pandas.
+    if isinstance(codigo, str):
+        return _normalizar_codigo_str(codigo)
+
     try:
-        import pandas as _pd
-        if _pd.isna(codigo):
+        if pd.isna(codigo):
             return ""
     except Exception:
         pass
 
-    if codigo is None:
-        return ""
-
     # Enteros y floats
     if isinstance(codigo, float):
         # 28013578.0 -> '28013578'
@@ -69,7 +77,12 @@ def normalizar_codigo(codigo):
     if isinstance(codigo, int):
         return str(codigo)
 
-    s = str(codigo).strip()
+    return _normalizar_codigo_str(str(codigo))
+
+
+@lru_cache(maxsize=65536)
+def _normalizar_codigo_str(s):
+    s = s.strip()
     # Eliminar sufijo .0 que pandas a veces pone en strings
     if s.endswith('.0'):
         s = s[:-2]
@@ -156,7 +169,7 @@ def construir_indice_desde_excel(ruta_excel):
         cols = list(df.columns)
         # Normalizar encabezados para detección
         def _norm_col(c):
-            return re.sub(r"[^A-Za-z0-9]", "", str(c or "")).upper()
+            return normalizar_cadena_alnum_mayus(str(c or ""))
 
         norm = {c: _norm_col(c) for c in cols}
         # Buscar columna de código
@@ -341,7 +354,7 @@ def procesar_doc_con_indice_docx(ruta_doc, ruta_imagenes, indice):
     for p in doc.paragraphs:
         txt = (p.text or "")
         # Accept case-variants like ${IMAGEN} or ${imagen} (allow spaces inside braces)
-        if re.search(r"\$\{\s*imagen\s*\}", txt, flags=re.IGNORECASE):
+        if _RE_PLACEHOLDER_IMAGEN.search(txt):
             # Limpiar el párrafo de forma segura (python-docx no tiene `clear()` pública)
             try:
                 for r in list(p.runs):
@@ -505,13 +518,16 @@ def procesar_indice():
         if (f.endswith(".docx") or f.endswith(".pdf")) and not f.startswith("~$")
     ]
 
-    for archivo in archivos:
-        procesar_doc_con_indice(os.path.join(ruta_docs, archivo), ruta_imgs, indice)
+    # Con `pegado_workers` > 1 en config.json los documentos se reparten entre procesos
+    rutas = [os.path.join(ruta_docs, archivo) for archivo in archivos]
+    compartido = {"indice": indice, "ruta_imgs": ruta_imgs}
+    resumen = procesar_documentos("indice", rutas, compartido, workers=obtener_workers(cargar_config()))
 
     mostrar_registro()
 
     if os.path.exists(LOG_FILE):
         os.startfile(LOG_FILE)
+    return resumen
 
 
         
\ No newline at end of file
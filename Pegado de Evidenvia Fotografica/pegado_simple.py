@@ -1,4 +1,5 @@
 import os
+import re
 from docx import Document
 from main import (
     obtener_rutas,
@@ -9,11 +10,29 @@ from main import (
     extraer_codigos_pdf,
     normalizar_cadena_alnum_mayus,
     norm_path_key,
+    como_indice_imagenes,
+    cargar_config,
     insertar_imagenes_en_pdf_placeholder,
 )
-from plantillaPDF import cargar_tabla_relacion
+from sesion_pegado import SesionPegado
+from pool_pegado import procesar_documentos, obtener_workers
 from registro_fallos import registrar_fallo, limpiar_registro, mostrar_registro, LOG_FILE
 
+# Resto permitido tras el código: continuación numérica o formato (N), -N, _N
+_RE_SUFIJO_PERMITIDO = re.compile(r"(?:\(\d+\)|[-_]\d+|\d+)?")
+
+
+def _allowed_suffix_norm(base, code):
+    """Coincidencia permitida: el resto del nombre tras el código debe ser una
+    continuación numérica o formato (N), -N, _N (sobre versiones normalizadas,
+    sin puntos ni guiones)."""
+    if base == code:
+        return True
+    if not base.startswith(code):
+        return False
+    rem = base[len(code):].strip()
+    return bool(_RE_SUFIJO_PERMITIDO.fullmatch(rem))
+
 
 def buscar_imagen_index_all(index, codigo_canonico, usadas_paths, usadas_bases):
     """Devuelve una lista de rutas de imagen en el índice que correspondan
@@ -24,47 +43,34 @@ def buscar_imagen_index_all(index, codigo_canonico, usadas_paths, usadas_bases):
     if not code:
         return []
 
-    matches = []
+    idx = como_indice_imagenes(index)
 
-    # Buscar coincidencias exactas y parcialmente permitidas (solo sufijos numéricos/continuaciones)
-    import re
-    for it in index:
+    # Toda coincidencia aceptada empieza con el código (exacta o con sufijo
+    # permitido), así que basta con el arreglo de prefijos del índice, en
+    # orden del índice.
+    matches = []
+    for pos in sorted(idx.empiezan_con(code)):
         try:
-            bn_raw = it.get('base_norm') or ''
-            bcore_raw = it.get('base_core_norm') or ''
-            path_key = norm_path_key(it.get('path') or '')
-
+            it = idx[pos]
             # Normalizar las bases quitando puntos, guiones, comas, etc.
-            bn = normalizar_cadena_alnum_mayus(bn_raw)
-            bcore = normalizar_cadena_alnum_mayus(bcore_raw)
+            bn = normalizar_cadena_alnum_mayus(it.get('base_norm') or '')
+            bcore = normalizar_cadena_alnum_mayus(it.get('base_core_norm') or '')
 
             # Evitar entradas sin base normalizada o ya usadas
             if not bn and not bcore:
                 continue
-            if path_key in usadas_paths:
+            if idx.path_key(pos) in usadas_paths:
                 continue
             # Comparar contra el set de bases usadas (ya normalizadas)
             if bn in usadas_bases or bcore in usadas_bases:
                 continue
 
-            # aceptar coincidencia si base_norm o base_core_norm empata exactamente
+            # aceptar coincidencia si base_norm o base_core_norm empata exactamente,
+            # o si el resto del nombre tras el código es una continuación permitida
             if bn == code or bcore == code:
                 matches.append(it['path'])
                 continue
-
-            # coincidencias permitidas: el resto del nombre tras el código debe ser
-            # una continuación numérica o formato (N), -N, _N (trabajamos sobre
-            # versiones normalizadas, sin puntos ni guiones)
-            def allowed_suffix_norm(base, code):
-                if base == code:
-                    return True
-                if code not in base:
-                    return False
-                rem = base.replace(code, '', 1)
-                rem = rem.strip()
-                return bool(re.fullmatch(r"(?:\(\d+\)|[-_]\d+|\d+)?", rem))
-
-            if allowed_suffix_norm(bn, code) or allowed_suffix_norm(bcore, code):
+            if _allowed_suffix_norm(bn, code) or _allowed_suffix_norm(bcore, code):
                 matches.append(it['path'])
         except Exception:
             continue
@@ -81,6 +87,91 @@ def buscar_imagen_index_all(index, codigo_canonico, usadas_paths, usadas_bases):
     return out
 
 
+def _marcar_usada(img_path, usadas_paths, usadas_bases):
+    usadas_paths.add(norm_path_key(img_path))
+    usar_base = normalizar_cadena_alnum_mayus(os.path.splitext(os.path.basename(img_path))[0])
+    usadas_bases.add(usar_base)
+
+
+def procesar_docx_simple(ruta_doc, index, sesion):
+    """Inserta en un DOCX las imágenes de sus códigos (modo simple)."""
+    archivo = os.path.basename(ruta_doc)
+    print(f"Procesando documento (modo simple DOCX): {ruta_doc}")
+
+    doc = Document(ruta_doc)
+    codigos = extraer_codigos(doc)
+
+    # Filtrar códigos contra la tabla de relación (si existe)
+    codigos = sesion.filtrar_codigos(codigos)
+
+    if not codigos:
+        registrar_fallo(archivo)
+        return False
+
+    imagen_insertada = False
+    usadas_paths = set()
+    usadas_bases = set()
+
+    for p in doc.paragraphs:
+        if "${imagen}" in (p.text or ""):
+            p.clear()
+            run = p.add_run()
+
+            for codigo in codigos:
+                img_paths = buscar_imagen_index_all(index, codigo, usadas_paths, usadas_bases)
+                for img_path in img_paths or []:
+                    if norm_path_key(img_path) in usadas_paths:
+                        continue
+                    _marcar_usada(img_path, usadas_paths, usadas_bases)
+                    insertar_imagen_con_transparencia(run, img_path)
+                    imagen_insertada = True
+
+            break
+
+    if not imagen_insertada:
+        registrar_fallo(archivo)
+
+    doc.save(ruta_doc)
+    print(f"Documento DOCX actualizado: {ruta_doc}")
+    return imagen_insertada
+
+
+def procesar_pdf_simple(ruta_doc, index, sesion):
+    """Inserta en un PDF (placeholder ${imagen}) las imágenes de sus códigos (modo simple)."""
+    archivo = os.path.basename(ruta_doc)
+    print(f"Procesando documento (modo simple PDF): {ruta_doc}")
+
+    codigos = extraer_codigos_pdf(ruta_doc)
+
+    # Filtrar códigos contra la tabla de relación (si existe)
+    codigos = sesion.filtrar_codigos(codigos)
+
+    if not codigos:
+        registrar_fallo(archivo)
+        return False
+
+    rutas_imagenes = []
+    usadas_paths = set()
+    usadas_bases = set()
+
+    for codigo in codigos:
+        img_paths = buscar_imagen_index_all(index, codigo, usadas_paths, usadas_bases)
+        for img_path in img_paths or []:
+            if norm_path_key(img_path) in usadas_paths:
+                continue
+            rutas_imagenes.append(img_path)
+            _marcar_usada(img_path, usadas_paths, usadas_bases)
+
+    if not rutas_imagenes:
+        registrar_fallo(archivo)
+        return False
+
+    exito = insertar_imagenes_en_pdf_placeholder(ruta_doc, rutas_imagenes)
+    if not exito:
+        registrar_fallo(archivo)
+    return bool(exito)
+
+
 def procesar_simple():
     limpiar_registro()
 
@@ -91,6 +182,9 @@ def procesar_simple():
     # Índice normal de imágenes para el modo simple
     index = indexar_imagenes(ruta_imgs)
 
+    # Tabla de relación / códigos válidos: una sola carga para toda la corrida
+    sesion = SesionPegado().cargar()
+
     # Ahora modo simple procesa Word y PDF
     try:
         docs_entries = os.listdir(ruta_docs)
@@ -101,122 +195,14 @@ def procesar_simple():
         if (f.lower().endswith(".docx") or f.lower().endswith(".pdf")) and not f.startswith("~$")
     ]
 
-    for archivo in archivos:
-        ruta_doc = os.path.join(ruta_docs, archivo)
-        ext = os.path.splitext(archivo)[1].lower()
-
-        # ========================================
-        # WORD
-        # ========================================
-        if ext == ".docx":
-            print(f"Procesando documento (modo simple DOCX): {ruta_doc}")
-
-            doc = Document(ruta_doc)
-            codigos = extraer_codigos(doc)
-
-            # Filtrar códigos contra la tabla de relación (si existe)
-            try:
-                df_rel = cargar_tabla_relacion()
-                valid_codes = set()
-                for col in ("CODIGO","CODIGOS","CODE","SKU","CLAVE"):
-                    if col in df_rel.columns:
-                        for v in df_rel[col].astype(str).fillna(""):
-                            valid_codes.add(normalizar_cadena_alnum_mayus(v))
-                        break
-            except Exception:
-                valid_codes = None
-
-            if codigos:
-                if valid_codes is not None:
-                    codigos = [c for c in codigos if normalizar_cadena_alnum_mayus(c) in valid_codes]
-
-            if not codigos:
-                registrar_fallo(archivo)
-                continue
-
-            imagen_insertada = False
-            usadas_paths = set()
-            usadas_bases = set()
-
-            for p in doc.paragraphs:
-                 if "${imagen}" in (p.text or ""):
-                    p.clear()
-                    run = p.add_run()
-
-                    for codigo in codigos:
-                        img_paths = buscar_imagen_index_all(index, codigo, usadas_paths, usadas_bases)
-                        if img_paths:
-                            for img_path in img_paths:
-                                kp = norm_path_key(img_path)
-                                if kp in usadas_paths:
-                                    continue
-                                usadas_paths.add(kp)
-                                usar_base = normalizar_cadena_alnum_mayus(os.path.splitext(os.path.basename(img_path))[0])
-                                usadas_bases.add(usar_base)
-                                insertar_imagen_con_transparencia(run, img_path)
-                                imagen_insertada = True
-
-                    break
-
-            if not imagen_insertada:
-                registrar_fallo(archivo)
-
-            doc.save(ruta_doc)
-            print(f"Documento DOCX actualizado: {ruta_doc}")
-            continue
-
-        # ========================================
-        # PDF
-        # ========================================
-        if ext == ".pdf":
-            print(f"Procesando documento (modo simple PDF): {ruta_doc}")
-
-            codigos = extraer_codigos_pdf(ruta_doc)
-
-            # Filtrar códigos contra la tabla de relación (si existe)
-            try:
-                df_rel = cargar_tabla_relacion()
-                valid_codes = set()
-                for col in ("CODIGO","CODIGOS","CODE","SKU","CLAVE"):
-                    if col in df_rel.columns:
-                        for v in df_rel[col].astype(str).fillna(""):
-                            valid_codes.add(normalizar_cadena_alnum_mayus(v))
-                        break
-            except Exception:
-                valid_codes = None
-
-            if codigos:
-                if valid_codes is not None:
-                    codigos = [c for c in codigos if normalizar_cadena_alnum_mayus(c) in valid_codes]
-
-            if not codigos:
-                registrar_fallo(archivo)
-                continue
-
-            rutas_imagenes = []
-            usadas_paths = set()
-            usadas_bases = set()
-
-            for codigo in codigos:
-                img_paths = buscar_imagen_index_all(index, codigo, usadas_paths, usadas_bases)
-                if img_paths:
-                    for img_path in img_paths:
-                        kp = norm_path_key(img_path)
-                        if kp in usadas_paths:
-                            continue
-                        rutas_imagenes.append(img_path)
-                        usadas_paths.add(kp)
-                        usar_base = normalizar_cadena_alnum_mayus(os.path.splitext(os.path.basename(img_path))[0])
-                        usadas_bases.add(usar_base)
-
-            if not rutas_imagenes:
-                registrar_fallo(archivo)
-                continue
-
-            exito = insertar_imagenes_en_pdf_placeholder(ruta_doc, rutas_imagenes)
-            if not exito:
-                registrar_fallo(archivo)
+    # Cada documento (Word o PDF) se procesa con su handler; con
+    # `pegado_workers` > 1 en config.json se reparten entre procesos.
+    rutas = [os.path.join(ruta_docs, archivo) for archivo in archivos]
+    compartido = {"index": index, "sesion": sesion.para_workers()}
+    resumen = procesar_documentos("simple", rutas, compartido, workers=obtener_workers(cargar_config()))
 
+    print(sesion.resumen_tiempos())
     mostrar_registro()
     if os.path.exists(LOG_FILE):
-        os.startfile(LOG_FILE)  
\ No newline at end of file
+        os.startfile(LOG_FILE)
+    return resumen
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Asegurar que esta carpeta esté en sys.path: los procesos del pool importan
+# `pegado_simple`, `pegado_carpetas`, etc. por nombre (la app carga los
+# scripts con nombres propios y retira la carpeta de sys.path al terminar).
+_BASE_PEGADO = os.path.dirname(os.path.abspath(__file__))
+if _BASE_PEGADO not in sys.path:
+    sys.path.append(_BASE_PEGADO)
+# Raíz del proyecto (paralelismo)
+_DIR_RAIZ = os.path.dirname(_BASE_PEGADO)
+if _DIR_RAIZ not in sys.path:
+    sys.path.append(_DIR_RAIZ)
+
+import paralelismo
+
+import registro_fallos
+from registro_fallos import registrar_fallo
+
+# ============================================================
+# POOL DE PROCESOS PARA EL PEGADO
+# ============================================================
+# La mayor parte del tiempo de un lote se va en decodificar imágenes, en
+# serializar el DOCX (python-docx) y en el `save` de PyMuPDF; todo eso es
+# independiente por documento. Con `pegado_workers` > 1 los documentos se
+# reparten entre procesos. Los datos de solo lectura (índice de imágenes,
+# índice de carpetas, códigos válidos...) se entregan una vez por proceso vía
+# `initializer` (compartidos por fork en Linux, serializados en Windows).
+#
+# Los fallos se capturan dentro de cada proceso (ver
+# `registro_fallos.iniciar_captura`) y el proceso principal los registra con
+# `registrar_fallo` en el orden de la lista de documentos, de modo que el log
+# sale idéntico sin importar qué proceso termina primero.
+
+# Tope de procesos aceptado desde la configuración
+MAX_WORKERS = 32
+
+# Estado de solo lectura del proceso (lo fija `_init_worker`)
+_ESTADO = {}
+
+
+def obtener_workers(cfg=None):
+    """Número de procesos para el pegado.
+
+    Prioridad: variable de entorno `PEGADO_WORKERS`, luego la clave
+    `pegado_workers` de config.json; por defecto 1 (secuencial). El valor
+    `0` o `"auto"` usa todos los núcleos disponibles.
+    """
+    return paralelismo.obtener_workers(env="PEGADO_WORKERS",
+                                      config=(cfg or {}).get("pegado_workers"),
+                                      maximo=MAX_WORKERS)
+
+
+def _para_envio(compartido):
+    """Prepara los datos compartidos para enviarlos a otros procesos: el índice
+    de imágenes viaja como lista simple y se reconstruye en cada proceso."""
+    envio = dict(compartido)
+    if "index" in envio:
+        envio["index"] = [dict(it) for it in envio["index"]]
+    return envio
+
+
+def _init_worker(modo, compartido):
+    if "index" in compartido:
+        from main import como_indice_imagenes
+        compartido = dict(compartido)
+        compartido["index"] = como_indice_imagenes(compartido["index"])
+    _ESTADO.clear()
+    _ESTADO["modo"] = modo
+    _ESTADO["compartido"] = compartido
+
+
+def _ejecutar_handler(modo, compartido, ruta_doc):
+    ext = os.path.splitext(ruta_doc)[1].lower()
+    if modo == "simple":
+        import pegado_simple
+        fn = pegado_simple.procesar_docx_simple if ext == ".docx" else pegado_simple.procesar_pdf_simple
+        return fn(ruta_doc, compartido["index"], compartido["sesion"])
+    if modo == "carpetas":
+        import pegado_carpetas
+        fn = pegado_carpetas.procesar_docx_carpetas if ext == ".docx" else pegado_carpetas.procesar_pdf_carpetas
+        return fn(ruta_doc, compartido["carpetas_index"], compartido["sesion"])
+    if modo == "indice":
+        import pegado_indice
+        return pegado_indice.procesar_doc_con_indice(ruta_doc, compartido["ruta_imgs"], compartido["indice"])
+    raise ValueError(f"Modo de pegado desconocido: {modo}")
+
+
+def _procesar_uno(ruta_doc):
+    """Procesa un documento capturando sus fallos; devuelve un dict de resultado."""
+    archivo = os.path.basename(ruta_doc)
+    error = None
+    t0 = time.perf_counter()
+    registro_fallos.iniciar_captura()
+    try:
+        _ejecutar_handler(_ESTADO.get("modo"), _ESTADO.get("compartido") or {}, ruta_doc)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        fallos = registro_fallos.terminar_captura()
+    if error is not None:
+        fallos.append((archivo, "error", {"ruta_doc": ruta_doc, "error": error}))
+    return {
+        "archivo": archivo,
+        "ruta": ruta_doc,
+        "ok": not fallos,
+        "fallos": fallos,
+        "error": error,
+        "segundos": round(time.perf_counter() - t0, 3),
+    }
+
+
+def procesar_documentos(modo, rutas_docs, compartido, workers=1):
+    """
+    Procesa `rutas_docs` con el handler del `modo` ('simple', 'carpetas' o
+    'indice') usando `workers` procesos (1 = en el proceso actual).
+
+    Devuelve un resumen:
+        {modo, workers, total, ok, con_fallo, errores, segundos, documentos: [...]}
+    """
+    # Orden estable (por nombre) para que el log de fallos sea reproducible
+    # entre corridas; os.listdir no garantiza ningún orden.
+    rutas_docs = sorted(rutas_docs, key=lambda r: os.path.basename(r).lower())
+    workers = max(1, int(workers or 1))
+    if len(rutas_docs) < 2:
+        workers = 1
+
+    t0 = time.perf_counter()
+    resultados = []
+
+    def _registrar(res):
+        # Reproducir los fallos en orden de documento (y de aparición dentro de él)
+        for nombre_doc, reason, details in res["fallos"]:
+            registrar_fallo(nombre_doc, reason=reason, details=details)
+        if res["error"]:
+            print(f"Error procesando {res['ruta']}: {res['error']}")
+        resultados.append(res)
+
+    if workers == 1:
+        _ESTADO.clear()
+        _ESTADO["modo"] = modo
+        _ESTADO["compartido"] = compartido
+        try:
+            for ruta_doc in rutas_docs:
+                _registrar(_procesar_uno(ruta_doc))
+        finally:
+            _ESTADO.clear()
+    else:
+        print(f"Procesando {len(rutas_docs)} documentos con {workers} procesos...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(modo, _para_envio(compartido))) as pool:
+            # `map` entrega los resultados en el orden de entrada
+            for res in pool.map(_procesar_uno, rutas_docs):
+                _registrar(res)
+
+    resumen = {
+        "modo": modo,
+        "workers": workers,
+        "total": len(resultados),
+        "ok": sum(1 for r in resultados if r["ok"]),
+        "con_fallo": sum(1 for r in resultados if not r["ok"]),
+        "errores": sum(1 for r in resultados if r["error"]),
+        "segundos": round(time.perf_counter() - t0, 3),
+        "documentos": resultados,
+    }
+    print(
+        f"Resumen pegado ({modo}): {resumen['total']} documentos, {resumen['ok']} correctos, "
+        f"{resumen['con_fallo']} con fallo, {resumen['errores']} errores en {resumen['segundos']}s "
+        f"(procesos={workers})"
+    )
+    return resumen
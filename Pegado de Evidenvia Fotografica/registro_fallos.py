@@ -8,6 +8,27 @@ LOG_FILE = os.path.join(APPDATA_DIR, "documentos_sin_imagenes.txt")
 # JSONL con detalles estructurados: cada línea es un JSON con keys: doc, reason, details, timestamp
 LOG_JSON = os.path.join(APPDATA_DIR, "documentos_sin_imagenes.jsonl")
 
+# Captura en memoria de fallos (usada por los procesos del pool de pegado):
+# mientras está activa, `registrar_fallo` acumula las llamadas en vez de
+# escribir los logs; el proceso principal las vuelve a registrar después en
+# el orden de los documentos, así el log queda igual que en modo secuencial.
+_captura = None
+
+
+def iniciar_captura():
+    """Empieza a acumular en memoria las llamadas a `registrar_fallo`."""
+    global _captura
+    _captura = []
+
+
+def terminar_captura():
+    """Detiene la captura y devuelve la lista de (nombre_doc, reason, details)."""
+    global _captura
+    capturados = _captura or []
+    _captura = None
+    return capturados
+
+
 def registrar_fallo(nombre_doc, reason=None, details=None):
     """
     Registra un fallo de pegado para `nombre_doc`.
@@ -16,6 +37,9 @@ def registrar_fallo(nombre_doc, reason=None, details=None):
 
     Mantiene la compatibilidad hacia atrás: si se llama solo con `nombre_doc` funcionará igual.
     """
+    if _captura is not None:
+        _captura.append((nombre_doc, reason, details))
+        return
     try:
         # Escribir versión legible
         with open(LOG_FILE, "a", encoding="utf-8") as f:
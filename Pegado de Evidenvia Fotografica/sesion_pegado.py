@@ -0,0 +1,116 @@
+import time
+
+from main import normalizar_cadena_alnum_mayus
+from plantillaPDF import cargar_tabla_relacion
+
+# Columnas que pueden contener el código del producto (se usa la primera que exista)
+CODE_COLS = ("CODIGO", "CODIGOS", "CODE", "SKU", "CLAVE")
+
+
+class SesionPegado:
+    """
+    Datos compartidos por todos los documentos de una corrida de pegado.
+
+    Antes cada documento volvía a llamar `cargar_tabla_relacion()` y a
+    reconstruir el set de códigos válidos y el mapeo código -> ASIG (con
+    `iterrows`); en una carpeta con cientos de dictámenes eso re-parseaba el
+    mismo JSON cientos de veces. La sesión lo carga una sola vez (de forma
+    perezosa, en el primer acceso) y guarda cuánto tardó cada paso en
+    `self.tiempos` (segundos).
+    """
+
+    def __init__(self, ruta_tabla=None):
+        self.ruta_tabla = ruta_tabla
+        self.tiempos = {}
+        self._cargada = False
+        self.df_rel = None
+        self.valid_codes = None
+        self.code_to_asigs = {}
+
+    def cargar(self):
+        """Carga la tabla de relación y sus derivados (solo la primera vez)."""
+        if self._cargada:
+            return self
+        self._cargada = True
+
+        t0 = time.perf_counter()
+        try:
+            if self.ruta_tabla:
+                self.df_rel = cargar_tabla_relacion(self.ruta_tabla)
+            else:
+                self.df_rel = cargar_tabla_relacion()
+        except Exception as e:
+            print(f"No se pudo cargar la tabla de relación: {e}")
+            self.df_rel = None
+        self.tiempos["tabla_relacion"] = time.perf_counter() - t0
+
+        df_rel = self.df_rel
+        code_col = None
+
+        # Set de códigos válidos (normalizados); None = sin filtro
+        t0 = time.perf_counter()
+        try:
+            if df_rel is None:
+                raise ValueError("tabla de relación no disponible")
+            valid_codes = set()
+            for col in CODE_COLS:
+                if col in df_rel.columns:
+                    code_col = col
+                    for v in df_rel[col].astype(str).fillna(""):
+                        valid_codes.add(normalizar_cadena_alnum_mayus(v))
+                    break
+            self.valid_codes = valid_codes
+        except Exception:
+            self.valid_codes = None
+        self.tiempos["valid_codes"] = time.perf_counter() - t0
+
+        # Mapeo codigo -> {ASIG} (normalizado) si existe columna ASIG/asig
+        t0 = time.perf_counter()
+        code_to_asigs = {}
+        try:
+            asig_col = None
+            if df_rel is not None:
+                for c in df_rel.columns:
+                    if str(c).upper() == "ASIG":
+                        asig_col = c
+                        break
+            if code_col and asig_col:
+                for code_raw, asig_raw in zip(df_rel[code_col].tolist(), df_rel[asig_col].tolist()):
+                    code_val = normalizar_cadena_alnum_mayus(str(code_raw or ""))
+                    asig_val = normalizar_cadena_alnum_mayus(str(asig_raw or ""))
+                    if code_val and asig_val:
+                        code_to_asigs.setdefault(code_val, set()).add(asig_val)
+        except Exception:
+            code_to_asigs = {}
+        self.code_to_asigs = code_to_asigs
+        self.tiempos["code_to_asigs"] = time.perf_counter() - t0
+        return self
+
+    def para_workers(self):
+        """Copia ligera (sin el DataFrame) para enviar a los procesos del pool."""
+        self.cargar()
+        copia = SesionPegado(self.ruta_tabla)
+        copia._cargada = True
+        copia.valid_codes = self.valid_codes
+        copia.code_to_asigs = self.code_to_asigs
+        copia.tiempos = dict(self.tiempos)
+        return copia
+
+    def filtrar_codigos(self, codigos):
+        """Conserva solo los códigos presentes en la tabla de relación (si se pudo cargar)."""
+        self.cargar()
+        if codigos and self.valid_codes is not None:
+            return [c for c in codigos if normalizar_cadena_alnum_mayus(c) in self.valid_codes]
+        return codigos
+
+    def asigs_de(self, clave):
+        """Claves ASIG normalizadas asociadas a un código normalizado."""
+        self.cargar()
+        return self.code_to_asigs.get(clave, set())
+
+    def resumen_tiempos(self):
+        """Texto corto con los tiempos de carga de la sesión."""
+        if not self.tiempos:
+            return "Sesión de pegado: tabla de relación no cargada."
+        partes = [f"{k}={v:.3f}s" for k, v in self.tiempos.items()]
+        return "Sesión de pegado: " + ", ".join(partes)
@@ -1,12 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+import subprocess
+import sys
 
+# Manifiesto de datos/recursos empacados (ver sincronizacion_datos.py): el exe
+# solo compara huellas al arrancar en lugar de recorrer cada carpeta.
+subprocess.check_call([sys.executable, 'sincronizacion_datos.py', '--generar'])
 
 a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[('C:\\Users\\bost2\\AppData\\Local\\Programs\\Python\\Python311\\python311.dll', '.')],
-    datas=[('data', 'data'), ('Documentos Inspeccion', 'Documentos Inspeccion'), ('Pegado de Evidenvia Fotografica', 'Pegado de Evidenvia Fotografica'), ('Firmas', 'Firmas'), ('img', 'img')],
-    hiddenimports=['fitz', 'docx', 'PIL', 'PyPDF2', 'reportlab'],
+    datas=[('data', 'data'), ('Documentos Inspeccion', 'Documentos Inspeccion'), ('Pegado de Evidenvia Fotografica', 'Pegado de Evidenvia Fotografica'), ('Firmas', 'Firmas'), ('img', 'img'), ('manifest_recursos.json', '.')],
+    hiddenimports=['fitz', 'docx', 'PIL', 'PyPDF2', 'reportlab', 'paralelismo'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
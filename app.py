@@ -4,13 +4,27 @@ import sys
 import uuid
 import shutil
 import json
-import pandas as pd
+import multiprocessing
+
+# Procesos del pool de pegado (`pegado_workers`) en el .exe: `freeze_support`
+# ejecuta el trabajo del hijo y termina aquí, antes de importar la interfaz,
+# sincronizar datos o escribir el log de arranque.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+# Fuera del .exe, los hijos lanzados con 'spawn' vuelven a importar este
+# módulo como `__mp_main__`; en ellos se omite el trabajo de arranque.
+ES_PROCESO_PRINCIPAL = multiprocessing.parent_process() is None
+
+import perfil_arranque
+PERFIL_ARRANQUE = perfil_arranque.PerfilArranque()
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, simpledialog
 from tkinter import ttk
 import tkinter as tk
 import tkinter.font as tkfont
 import threading
+import queue
 import subprocess
 import importlib
 import importlib.util
@@ -20,12 +34,48 @@ try:
 except Exception:
     Calendar = None
 import folio_manager
-from plantillaPDF import cargar_tabla_relacion
+import cargador_modulos
+import progreso
+import sincronizacion_datos
+from normalizacion import plegar_acentos
 import time
 import platform
-import unicodedata
-from PyPDF2 import PdfReader
-from PIL import Image
+
+# ============================================================
+# IMPORTACIONES PEREZOSAS
+# ============================================================
+# pandas, PIL y plantillaPDF (que arrastra ReportLab y etiqueta_dictamen)
+# sumaban casi un segundo antes de mostrar la ventana. Se importan en el
+# primer uso; cada función contiene el `import` explícito para que
+# PyInstaller siga empacando la dependencia.
+def _importar_pandas():
+    import pandas
+    return pandas
+
+
+def _importar_pil_image():
+    from PIL import Image as _Image
+    return _Image
+
+
+pd = cargador_modulos.ModuloPerezoso('pandas', _importar_pandas)
+Image = cargador_modulos.ModuloPerezoso('PIL.Image', _importar_pil_image)
+
+
+def cargar_tabla_relacion(*args, **kwargs):
+    """`plantillaPDF.cargar_tabla_relacion` importando plantillaPDF en el primer uso."""
+    from plantillaPDF import cargar_tabla_relacion as _cargar_tabla_relacion
+    return _cargar_tabla_relacion(*args, **kwargs)
+
+
+# Construir las pestañas secundarias al mostrarlas por primera vez;
+# IMAGENESVC_INICIO_COMPLETO=1 restaura la construcción completa al arrancar
+INICIO_DIFERIDO = os.environ.get('IMAGENESVC_INICIO_COMPLETO') != '1'
+
+# Cada cuánto drena la interfaz los eventos de progreso de la generación (ms)
+INTERVALO_PROGRESO_MS = 150
+
+PERFIL_ARRANQUE.marcar('imports')
 
 # ---------- ESTILO VISUAL V&C ---------- #
 STYLE = {
@@ -59,6 +109,73 @@ if getattr(sys, 'frozen', False):
 else:
     APP_DIR = os.path.abspath(os.path.dirname(__file__))
 
+
+def _ruta_en_bundle(subpath):
+    """Primera ruta existente de `subpath` dentro del bundle (BASE_DIR o BASE_DIR/_internal)."""
+    for base in (BASE_DIR, os.path.join(BASE_DIR, '_internal')):
+        p = os.path.join(base, subpath)
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def sincronizar_bundle(data_dir, carpetas, forzar=False, marcador=None):
+    """Copia los datos/recursos empacados que cambiaron (ver `sincronizacion_datos`).
+
+    'data' va a `data_dir`; las demás carpetas junto al ejecutable (APP_DIR).
+    Con `manifest_recursos.json` en el bundle solo se comparan huellas contra
+    el último manifiesto aplicado. Sin manifiesto (builds anteriores) se
+    recorre cada carpeta con la regla anterior; si se pasa `marcador`, ese
+    recorrido se omite mientras el .exe no cambie (mtime+tamaño).
+    """
+    origenes, destinos = {}, {}
+    for carpeta in carpetas:
+        origen = _ruta_en_bundle(carpeta)
+        destino = data_dir if carpeta == 'data' else os.path.join(APP_DIR, carpeta)
+        if origen and os.path.abspath(origen) != os.path.abspath(destino):
+            origenes[carpeta] = origen
+            destinos[carpeta] = destino
+
+    manifiesto = sincronizacion_datos.leer_manifiesto(_ruta_en_bundle(sincronizacion_datos.NOMBRE_MANIFIESTO))
+    if manifiesto is not None:
+        return sincronizacion_datos.sincronizar(
+            manifiesto, origenes, destinos,
+            os.path.join(data_dir, sincronizacion_datos.NOMBRE_APLICADO), forzar=forzar)
+
+    # ----- Sin manifiesto: marcador de versión con la huella del propio
+    # ejecutable para no repetir el recorrido completo en cada arranque.
+    exe_fingerprint = None
+    if marcador:
+        try:
+            st = os.stat(sys.executable)
+            exe_fingerprint = f"{st.st_mtime_ns}:{st.st_size}"
+        except Exception:
+            exe_fingerprint = None
+        if not forzar and exe_fingerprint is not None:
+            try:
+                with open(marcador, 'r', encoding='utf-8') as _mf:
+                    if (json.load(_mf) or {}).get('exe_fingerprint') == exe_fingerprint:
+                        return {}
+            except Exception:
+                pass
+
+    resultado = {}
+    for carpeta, origen in origenes.items():
+        politica = sincronizacion_datos.POLITICA_DATA if carpeta == 'data' else sincronizacion_datos.POLITICA_RECURSOS
+        try:
+            copiados = sincronizacion_datos.sincronizar_por_recorrido(origen, destinos[carpeta], politica, forzar)
+            resultado[carpeta] = {'omitida': False, 'copiados': copiados, 'errores': 0}
+        except Exception:
+            pass
+    if marcador and exe_fingerprint is not None:
+        try:
+            with open(marcador, 'w', encoding='utf-8') as _mf:
+                json.dump({'exe_fingerprint': exe_fingerprint}, _mf)
+        except Exception:
+            pass
+    return resultado
+
+
 DATA_DIR = os.getenv('IMAGENESVC_DATA_DIR')
 if DATA_DIR:
     DATA_DIR = os.path.abspath(DATA_DIR)
@@ -93,49 +210,18 @@ else:
             bundled_data = cands[0]
 
         # Debug info into the chosen preferred_data
-        try:
-            bdbg = os.path.join(preferred_data, 'startup_exe_debug.log')
-            with open(bdbg, 'a', encoding='utf-8') as _bd:
-                _bd.write(f"bundle_candidates={cands}\nchosen={bundled_data}\npreferred={preferred_data}\n")
-        except Exception:
-            pass
+        if ES_PROCESO_PRINCIPAL:
+            try:
+                bdbg = os.path.join(preferred_data, 'startup_exe_debug.log')
+                with open(bdbg, 'a', encoding='utf-8') as _bd:
+                    _bd.write(f"bundle_candidates={cands}\nchosen={bundled_data}\npreferred={preferred_data}\n")
+            except Exception:
+                pass
 
         try:
             FORCE_REFRESH = os.environ.get('IMAGENESVC_FORCE_REFRESH') == '1'
-            if bundled_data and os.path.exists(bundled_data):
-                for root, dirs, files in os.walk(bundled_data):
-                    rel = os.path.relpath(root, bundled_data)
-                    target_root = os.path.join(preferred_data, rel) if rel != '.' else preferred_data
-                    os.makedirs(target_root, exist_ok=True)
-                    for f in files:
-                        src = os.path.join(root, f)
-                        dst = os.path.join(target_root, f)
-                        try:
-                            copy_it = False
-                            if FORCE_REFRESH:
-                                copy_it = True
-                            elif not os.path.exists(dst):
-                                copy_it = True
-                            else:
-                                try:
-                                    dst_size = os.path.getsize(dst)
-                                except Exception:
-                                    dst_size = None
-                                if dst_size == 0:
-                                    copy_it = True
-                                else:
-                                    try:
-                                        src_mtime = os.path.getmtime(src)
-                                        dst_mtime = os.path.getmtime(dst)
-                                        if src_mtime > dst_mtime + 1:
-                                            copy_it = True
-                                    except Exception:
-                                        pass
-
-                            if copy_it:
-                                shutil.copy2(src, dst)
-                        except Exception:
-                            pass
+            if ES_PROCESO_PRINCIPAL and bundled_data and os.path.exists(bundled_data):
+                sincronizar_bundle(preferred_data, ['data'], forzar=FORCE_REFRESH)
         except Exception:
             pass
 
@@ -147,58 +233,65 @@ try:
 except Exception:
     pass
 
+PERFIL_ARRANQUE.marcar('datos_bundle')
+
 # DEBUG: volcar información de rutas y existencia de archivos clave al iniciar
-try:
-    dbg_files = [
-        'Clientes.json', 'tabla_de_relacion.json', 'Firmas.json',
-        'folio_counter.json', 'historial_visitas.json', 'pending_folios.json'
-    ]
-    dbg_path = None
+if ES_PROCESO_PRINCIPAL:
     try:
-        dbg_path = os.path.join(DATA_DIR, 'startup_exe_debug.log')
-    except Exception:
-        dbg_path = os.path.join(os.path.expanduser('~'), 'startup_exe_debug.log')
-
-    with open(dbg_path, 'a', encoding='utf-8') as dbg:
-        import time
-        dbg.write('\n===== STARTUP DEBUG: ' + time.strftime('%Y-%m-%d %H:%M:%S') + ' =====\n')
-        try:
-            dbg.write(f"frozen={getattr(sys,'frozen',False)}\n")
-            dbg.write(f"BASE_DIR={BASE_DIR}\n")
-            dbg.write(f"APP_DIR={APP_DIR}\n")
-            dbg.write(f"DATA_DIR={DATA_DIR}\n")
-            dbg.write(f"CWD={os.path.abspath(os.getcwd())}\n")
-            dbg.write(f"ENV.IMAGENESVC_DATA_DIR={os.environ.get('IMAGENESVC_DATA_DIR')}\n")
-            dbg.write(f"ENV.FOLIO_DATA_DIR={os.environ.get('FOLIO_DATA_DIR')}\n")
-        except Exception as e:
-            dbg.write(f"ERROR writing basic info: {e}\n")
+        dbg_files = [
+            'Clientes.json', 'tabla_de_relacion.json', 'Firmas.json',
+            'folio_counter.json', 'historial_visitas.json', 'pending_folios.json'
+        ]
+        dbg_path = None
+        try:
+            dbg_path = os.path.join(DATA_DIR, 'startup_exe_debug.log')
+        except Exception:
+            dbg_path = os.path.join(os.path.expanduser('~'), 'startup_exe_debug.log')
 
-        for fn in dbg_files:
+        with open(dbg_path, 'a', encoding='utf-8') as dbg:
+            import time
+            dbg.write('\n===== STARTUP DEBUG: ' + time.strftime('%Y-%m-%d %H:%M:%S') + ' =====\n')
             try:
-                p = os.path.join(DATA_DIR, fn)
-                exists = os.path.exists(p)
-                size = os.path.getsize(p) if exists and os.path.isfile(p) else None
-                dbg.write(f"{fn}: exists={exists} size={size} path={p}\n")
+                dbg.write(f"frozen={getattr(sys,'frozen',False)}\n")
+                dbg.write(f"BASE_DIR={BASE_DIR}\n")
+                dbg.write(f"APP_DIR={APP_DIR}\n")
+                dbg.write(f"DATA_DIR={DATA_DIR}\n")
+                dbg.write(f"CWD={os.path.abspath(os.getcwd())}\n")
+                dbg.write(f"ENV.IMAGENESVC_DATA_DIR={os.environ.get('IMAGENESVC_DATA_DIR')}\n")
+                dbg.write(f"ENV.FOLIO_DATA_DIR={os.environ.get('FOLIO_DATA_DIR')}\n")
             except Exception as e:
-                dbg.write(f"{fn}: error checking: {e}\n")
+                dbg.write(f"ERROR writing basic info: {e}\n")
 
-        # list top-level data files
-        try:
-            for root, dirs, files in os.walk(DATA_DIR):
-                rel = os.path.relpath(root, DATA_DIR)
-                dbg.write(f"DIR: {rel}\n")
-                for f in files:
-                    try:
-                        fp = os.path.join(root, f)
-                        dbg.write(f"  - {f} ({os.path.getsize(fp)} bytes)\n")
-                    except Exception:
-                        dbg.write(f"  - {f} (size error)\n")
-        except Exception as e:
-            dbg.write(f"ERROR walking DATA_DIR: {e}\n")
+            for fn in dbg_files:
+                try:
+                    p = os.path.join(DATA_DIR, fn)
+                    exists = os.path.exists(p)
+                    size = os.path.getsize(p) if exists and os.path.isfile(p) else None
+                    dbg.write(f"{fn}: exists={exists} size={size} path={p}\n")
+                except Exception as e:
+                    dbg.write(f"{fn}: error checking: {e}\n")
 
-        dbg.write('===== END STARTUP DEBUG =====\n')
-except Exception:
-    pass
+            # Listado completo de DATA_DIR: diagnóstico opcional (recorre todo el
+            # árbol; lento en carpetas sincronizadas por la nube)
+            if os.environ.get('IMAGENESVC_DEBUG_INICIO') == '1':
+                try:
+                    for root, dirs, files in os.walk(DATA_DIR):
+                        rel = os.path.relpath(root, DATA_DIR)
+                        dbg.write(f"DIR: {rel}\n")
+                        for f in files:
+                            try:
+                                fp = os.path.join(root, f)
+                                dbg.write(f"  - {f} ({os.path.getsize(fp)} bytes)\n")
+                            except Exception:
+                                dbg.write(f"  - {f} (size error)\n")
+                except Exception as e:
+                    dbg.write(f"ERROR walking DATA_DIR: {e}\n")
+
+            dbg.write('===== END STARTUP DEBUG =====\n')
+    except Exception:
+        pass
+
+PERFIL_ARRANQUE.marcar('debug_inicio')
 
 
 class SistemaDictamenesVC(ctk.CTk):
@@ -208,6 +301,7 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def __init__(self):
         super().__init__()
+        PERFIL_ARRANQUE.marcar('ventana')
 
         # Configuración general
         self.title("Generador de Dictámenes")
@@ -235,11 +329,11 @@ class SistemaDictamenesVC(ctk.CTk):
         self.archivo_json_generado = None
         self.json_filename = None
         self.generando_dictamenes = False
-        # Progreso: watcher para animar barra cuando el generador no emite actualizaciones frecuentes
-        self._progress_watcher_thread = None
-        self._progress_watcher_stop_event = None
-        self._last_progress_value = 0.0
-        self._last_progress_ts = 0.0
+        # Progreso: los hilos de generación publican eventos en esta cola y
+        # el hilo de Tk la drena con un solo ciclo `after` (ver `progreso.py`)
+        self._cola_progreso = queue.Queue()
+        self._hilo_generacion = None
+        self._drenando_progreso = False
         self.clientes_data = []
         self.cliente_seleccionado = None
         self.domicilio_seleccionado = None
@@ -266,113 +360,12 @@ class SistemaDictamenesVC(ctk.CTk):
                 if not os.path.exists(data_dir):
                     os.makedirs(data_dir, exist_ok=True)
 
+                # Data y recursos junto al exe (Plantillas PDF, Firmas, img...):
+                # con manifiesto solo se comparan huellas; sin él, recorrido
+                # completo una vez por versión del ejecutable (marcador).
                 FORCE_REFRESH = os.environ.get('IMAGENESVC_FORCE_REFRESH') == '1'
-
-                # ----- Marcador de versión: evita recorrer y comparar TODOS los
-                # archivos de recursos en cada arranque (costoso en carpetas
-                # sincronizadas por la nube). Se usa mtime+tamaño del propio
-                # ejecutable como huella: si no cambió desde el último arranque,
-                # nos saltamos por completo el escaneo/copiado de abajo. Si el
-                # .exe se actualiza (nueva huella) o no hay marcador, se corre
-                # la sincronización completa una vez y se actualiza el marcador.
-                # Esto NO afecta la lógica de qué se copia ni sobrescribe nunca
-                # `data/folio_counter.json` u otros archivos ya existentes: solo
-                # decide si vale la pena repetir esa revisión completa.
-                marker_path = os.path.join(data_dir, '.resource_sync_marker.json')
-                exe_fingerprint = None
-                try:
-                    exe_path = sys.executable
-                    st = os.stat(exe_path)
-                    exe_fingerprint = f"{st.st_mtime_ns}:{st.st_size}"
-                except Exception:
-                    exe_fingerprint = None
-
-                marker_matches = False
-                if not FORCE_REFRESH and exe_fingerprint is not None:
-                    try:
-                        with open(marker_path, 'r', encoding='utf-8') as _mf:
-                            _marker = json.load(_mf) or {}
-                        marker_matches = (_marker.get('exe_fingerprint') == exe_fingerprint)
-                    except Exception:
-                        marker_matches = False
-
-                if not marker_matches:
-                    embedded_data = os.path.join(BASE_DIR, 'data')
-                    if os.path.exists(embedded_data):
-                        for root, dirs, files in os.walk(embedded_data):
-                            rel = os.path.relpath(root, embedded_data)
-                            target_root = os.path.join(data_dir, rel) if rel != '.' else data_dir
-                            os.makedirs(target_root, exist_ok=True)
-                            for f in files:
-                                sfile = os.path.join(root, f)
-                                dfile = os.path.join(target_root, f)
-                                try:
-                                    copy_it = False
-                                    if FORCE_REFRESH:
-                                        copy_it = True
-                                    elif not os.path.exists(dfile):
-                                        copy_it = True
-                                    else:
-                                        try:
-                                            dsize = os.path.getsize(dfile)
-                                        except Exception:
-                                            dsize = None
-                                        if dsize == 0:
-                                            copy_it = True
-                                        else:
-                                            try:
-                                                sm = os.path.getmtime(sfile)
-                                                dm = os.path.getmtime(dfile)
-                                                if sm > dm + 1:
-                                                    copy_it = True
-                                            except Exception:
-                                                pass
-
-                                    if copy_it:
-                                        shutil.copy2(sfile, dfile)
-                                except Exception:
-                                    pass
-
-                    # Asegurar que otros recursos estén disponibles junto al exe.
-                    resource_folders = [
-                        'Plantillas PDF',
-                        'Pegado de Evidenvia Fotografica',
-                        'Documentos Inspeccion',
-                        'Firmas',
-                        'img'
-                    ]
-                    for rf in resource_folders:
-                        # buscar candidatos en BASE_DIR y en BASE_DIR/_internal
-                        candidates = [os.path.join(BASE_DIR, rf), os.path.join(BASE_DIR, '_internal', rf)]
-                        src = None
-                        for c in candidates:
-                            if os.path.exists(c):
-                                src = c
-                                break
-                        if not src:
-                            continue
-                        dst = os.path.join(APP_DIR, rf)
-                        os.makedirs(dst, exist_ok=True)
-                        # copiar solo archivos/carpetas faltantes
-                        for root, dirs, files in os.walk(src):
-                            rel = os.path.relpath(root, src)
-                            target_root = os.path.join(dst, rel) if rel != '.' else dst
-                            os.makedirs(target_root, exist_ok=True)
-                            for f in files:
-                                sfile = os.path.join(root, f)
-                                dfile = os.path.join(target_root, f)
-                                try:
-                                    if (not os.path.exists(dfile)) or (os.path.exists(dfile) and os.path.getsize(dfile) == 0):
-                                        shutil.copy2(sfile, dfile)
-                                except Exception:
-                                    pass
-
-                    if exe_fingerprint is not None:
-                        try:
-                            with open(marker_path, 'w', encoding='utf-8') as _mf:
-                                json.dump({'exe_fingerprint': exe_fingerprint}, _mf)
-                        except Exception:
-                            pass
+                sincronizar_bundle(data_dir, sincronizacion_datos.CARPETAS_BUNDLE, forzar=FORCE_REFRESH,
+                                   marcador=os.path.join(data_dir, '.resource_sync_marker.json'))
             except Exception:
                 try:
                     os.makedirs(data_dir, exist_ok=True)
@@ -393,10 +386,13 @@ class SistemaDictamenesVC(ctk.CTk):
             self.pending_folios = []
         # Directorio donde están los generadores/documentos (ReportLab, tablas, etc.)
         self.documentos_dir = os.path.join(BASE_DIR, "Documentos Inspeccion")
+        PERFIL_ARRANQUE.marcar('recursos')
 
         # ===== NUEVA ESTRUCTURA DE NAVEGACIÓN =====
         self.crear_navegacion()
+        PERFIL_ARRANQUE.marcar('navegacion')
         self.crear_area_contenido()
+        PERFIL_ARRANQUE.marcar('pestanas')
 
         # ===== FOOTER =====
         self.crear_footer()
@@ -407,16 +403,58 @@ class SistemaDictamenesVC(ctk.CTk):
         # Cargar clientes al iniciar
         self.cargar_clientes_desde_json()
         self.cargar_ultimo_folio()
+        PERFIL_ARRANQUE.marcar('catalogos')
         try:
             # Mostrar ventana de login / aplicar permisos según usuarios
             self._ensure_user_authenticated()
         except Exception:
             pass
+        PERFIL_ARRANQUE.marcar('login')
+        try:
+            # Precargar generadores en segundo plano (después del primer dibujo)
+            # para que el primer clic no pague el import
+            if getattr(self, 'current_user', None):
+                self.after(300, self._precargar_generadores)
+        except Exception:
+            pass
         try:
             self._generar_datos_exportable()
         except Exception:
             pass
-        
+        PERFIL_ARRANQUE.marcar('datos_exportable')
+        # Reportar cuando Tk quede libre (ventana ya dibujada)
+        self.after_idle(self._reportar_arranque)
+
+    def _reportar_arranque(self):
+        try:
+            if not PERFIL_ARRANQUE.reportado:
+                PERFIL_ARRANQUE.marcar('primer_dibujo')
+                PERFIL_ARRANQUE.reportar(DATA_DIR)
+        except Exception:
+            pass
+
+    def _precargar_generadores(self):
+        """Carga en un hilo de fondo los módulos generadores usados por los botones."""
+        docs = self.documentos_dir
+        pegado = os.path.join(APP_DIR, "Pegado de Evidenvia Fotografica")
+        if docs not in sys.path:
+            sys.path.append(docs)
+        modulos = [
+            ('Constancia', os.path.join(docs, 'Constancia.py')),
+            ('Acta_inspeccion', os.path.join(docs, 'Acta_inspeccion.py')),
+            ('Oficio_comision', self._documentos_visita().archivo_generador('Oficio_comision')),
+            ('Formato_supervision', os.path.join(docs, 'Formato_supervision.py')),
+            ('Reporte_Decathlon', os.path.join(docs, 'Reporte_Decathlon.py')),
+            ('control_folios_anual', os.path.join(docs, 'control_folios_anual.py')),
+            ('pegado_indice', os.path.join(pegado, 'pegado_indice.py'), pegado),
+        ]
+        modulos = [m for m in modulos if os.path.exists(m[1])]
+
+        def _listo(resumen):
+            print(f"📦 Generadores precargados en {resumen.get('precarga_segundos')}s: {resumen.get('segundos')}")
+
+        return cargador_modulos.precargar(modulos, al_terminar=_listo)
+
     # ----------------- Overlay de Acciones (botones interactivos) -----------------
     def _create_actions_overlay(self, parent, actions_col=None):
         """Crea un frame flotante con botones que se posiciona sobre la columna 'Acciones'."""
@@ -733,20 +771,41 @@ class SistemaDictamenesVC(ctk.CTk):
         # Frame para inspectores
         self.frame_inspectores = ctk.CTkFrame(self.contenido_frame, fg_color="transparent")
         
-        # Construir el contenido de cada sección
+        # Construir el contenido de cada sección. La principal se construye
+        # siempre; las demás, la primera vez que se muestran (ver
+        # `_asegurar_pestana`) salvo con IMAGENESVC_INICIO_COMPLETO=1.
+        self._pestanas_pendientes = {
+            'historial': (self._construir_tab_historial, self.frame_historial),
+            'clientes': (self._construir_tab_clientes, self.frame_reportes),
+            'reportes_ejecutivo': (self._construir_tab_reportes_ejecutivo, self.frame_reportes_ejecutivo),
+            'inspectores': (self._construir_tab_inspectores, self.frame_inspectores),
+        }
         self._construir_tab_principal(self.frame_principal)
-        self._construir_tab_historial(self.frame_historial)
-        self._construir_tab_clientes(self.frame_reportes)
-        # construir pestaña de reportes ejecutivos
-        try:
-            self._construir_tab_reportes_ejecutivo(self.frame_reportes_ejecutivo)
-        except Exception:
-            pass
-        self._construir_tab_inspectores(self.frame_inspectores)
+        if not INICIO_DIFERIDO:
+            for nombre in list(self._pestanas_pendientes):
+                self._asegurar_pestana(nombre)
         
         # Mostrar la sección principal por defecto
         self.mostrar_principal()
 
+    def _pestana_pendiente(self, nombre):
+        """True si la pestaña `nombre` todavía no se ha construido."""
+        return nombre in getattr(self, '_pestanas_pendientes', {})
+
+    def _asegurar_pestana(self, nombre):
+        """Construye la pestaña `nombre` si aún no existe (solo la primera vez)."""
+        pendiente = getattr(self, '_pestanas_pendientes', {}).pop(nombre, None)
+        if pendiente is None:
+            return
+        constructor, frame = pendiente
+        t0 = time.perf_counter()
+        try:
+            constructor(frame)
+        except Exception as e:
+            print(f"⚠️ Error construyendo la pestaña {nombre}: {e}")
+        if not PERFIL_ARRANQUE.reportado:
+            PERFIL_ARRANQUE.fases.append((f"pestana_{nombre}", time.perf_counter() - t0))
+
     # ----------------- Autenticación y permisos -----------------
     def _load_users(self):
         """Carga `data/usuarios.json`. Si no existe crea un archivo por defecto."""
@@ -1592,6 +1651,7 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def mostrar_reportes_ejecutivo(self):
         """Muestra la pestaña de reportes para ejecutivos y oculta las demás."""
+        self._asegurar_pestana('reportes_ejecutivo')
         try:
             # ocultar otras secciones
             try:
@@ -1697,6 +1757,7 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def mostrar_historial(self):
             """Muestra la sección de historial y oculta las demás"""
+            self._asegurar_pestana('historial')
             # Ocultar todos los frames primero
             self.frame_principal.pack_forget()
             self.frame_historial.pack_forget()
@@ -1754,6 +1815,7 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def mostrar_clientes(self):
         """Muestra la sección de reportes y oculta las demás"""
+        self._asegurar_pestana('clientes')
         # Ocultar todos los frames primero
         self.frame_principal.pack_forget()
         self.frame_historial.pack_forget()
@@ -3079,6 +3141,7 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def mostrar_inspectores(self):
         """Muestra la sección de Inspectores y oculta las demás"""
+        self._asegurar_pestana('inspectores')
         # Ocultar todos los frames primero
         try:
             self.frame_principal.pack_forget()
@@ -4228,6 +4291,9 @@ class SistemaDictamenesVC(ctk.CTk):
 
     def _refrescar_tabla_clientes(self):
         """Carga `Clientes.json` y muestra los registros en la tabla Treeview."""
+        # La pestaña se llena al construirse (ver `_asegurar_pestana`)
+        if self._pestana_pendiente('clientes'):
+            return
         ruta = os.path.join(DATA_DIR, 'Clientes.json')
         datos = []
         try:
@@ -7099,12 +7165,9 @@ class SistemaDictamenesVC(ctk.CTk):
 
             thread = threading.Thread(target=self._ejecutar_generador_con_progreso)
             thread.daemon = True
+            self._hilo_generacion = thread
             thread.start()
-            try:
-                # iniciar watcher que mantiene la barra moviéndose si el generador no informa progreso
-                self._start_progress_watcher()
-            except Exception:
-                pass
+            self._iniciar_seguimiento_progreso()
 
         except Exception as e:
             self.mostrar_error(f"No se pudo iniciar el generador:\n{e}")
@@ -7150,18 +7213,8 @@ class SistemaDictamenesVC(ctk.CTk):
 
             if 'CONSTANCIA' in tipo_upper:
                 try:
-                    import importlib.util, time
                     const_file = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Constancia.py')
-                    if os.path.exists(const_file):
-                        spec = importlib.util.spec_from_file_location('Constancia', const_file)
-                        if spec and getattr(spec, 'loader', None):
-                            mod = importlib.util.module_from_spec(spec)
-                            sys.modules['Constancia'] = mod
-                            spec.loader.exec_module(mod)
-                        else:
-                            mod = None
-                    else:
-                        mod = None
+                    mod = cargador_modulos.cargar_modulo('Constancia', const_file) if os.path.exists(const_file) else None
                 except Exception:
                     mod = None
 
@@ -7246,6 +7299,8 @@ class SistemaDictamenesVC(ctk.CTk):
                         carpeta_raiz = os.path.join(out_base_pdf, f"Constancia_{dt_now_root.strftime('%Y%m%d_%H%M%S')}")
                         os.makedirs(carpeta_raiz, exist_ok=True)
 
+                    # 1) Preparar los datos de cada lista y persistir sus folios (en orden)
+                    preparadas = []
                     for lista, filas_grp in grupos.items():
                         try:
                             # Actualizar progreso por lista (evitar bloquear UI)
@@ -7385,8 +7440,6 @@ class SistemaDictamenesVC(ctk.CTk):
                                 os.makedirs(carpeta_solicitud, exist_ok=True)
                                 ruta_pdf = os.path.join(carpeta_solicitud, nombre_pdf)
 
-                            pdf_ok = False
-                            gen_exception = None
                             # Persistir folios para la visita ANTES de generar el PDF
                             try:
                                 if filas_grp:
@@ -7397,26 +7450,83 @@ class SistemaDictamenesVC(ctk.CTk):
                                         pass
                             except Exception:
                                 pass
+                            # Instantánea del contador de folios tal como la verá el PDF de esta lista
+                            contador = None
                             try:
-                                if ruta_pdf and ConstGen:
-                                    gen_inst = ConstGen(datos_const, base_dir=BASE_DIR)
-                                    ruta_generada = gen_inst.generar(ruta_pdf)
-                                    pdf_ok = True if ruta_generada and os.path.exists(ruta_generada) else False
-                                elif ruta_pdf and mod is not None:
-                                    try:
-                                        ruta_generada = getattr(mod, 'generar_constancia_desde_visita')(folio_vis, salida=ruta_pdf)
+                                if mod is not None and hasattr(mod, 'leer_folio_counter'):
+                                    contador = getattr(mod, 'leer_folio_counter')()
+                            except Exception:
+                                contador = None
+                            preparadas.append({
+                                'lista': lista, 'filas_grp': filas_grp, 'folio_vis': folio_vis,
+                                'datos_const': datos_const, 'ruta_pdf': ruta_pdf, 'contador': contador,
+                                'folio_for_name': folio_for_name, 'sol_no': sol_no, 'sol_year': sol_year,
+                                'pdf_ok': None, 'gen_exception': None,
+                            })
+                        except Exception as e:
+                            errores.append((lista, str(e)))
+
+                    # 2) Generar los PDFs en lote: catálogos, folios e imágenes se cargan una
+                    #    sola vez y CONSTANCIA_WORKERS > 1 reparte los documentos entre procesos
+                    lote_fn = getattr(mod, 'generar_constancias_lote', None) if mod is not None else None
+                    con_ruta = [p for p in preparadas if p['ruta_pdf']]
+                    if ConstGen and lote_fn and con_ruta:
+                        try:
+                            try:
+                                if self.winfo_exists():
+                                    self.actualizar_progreso(50, f"Generando {len(con_ruta)} constancias (PDF)...")
+                            except Exception:
+                                pass
+                            resumen_lote = lote_fn([(p['datos_const'], p['ruta_pdf'], p['contador']) for p in con_ruta], base_dir=BASE_DIR)
+                            for p, res in zip(con_ruta, resumen_lote.get('documentos') or []):
+                                p['pdf_ok'] = bool(res.get('ok'))
+                                p['gen_exception'] = res.get('error')
+                                # en procesos separados los cambios del generador a `datos` vuelven en el resultado
+                                if isinstance(res.get('datos'), dict):
+                                    p['datos_const'] = res['datos']
+                        except Exception:
+                            # si el lote falla por completo, generar uno por uno
+                            for p in con_ruta:
+                                p['pdf_ok'] = None
+
+                    # 3) Guardar JSONs, respaldos y errores en el orden de las listas
+                    listas_procesadas = 0
+                    for p in preparadas:
+                        lista = p['lista']
+                        try:
+                            listas_procesadas += 1
+                            filas_grp = p['filas_grp']
+                            folio_vis = p['folio_vis']
+                            datos_const = p['datos_const']
+                            ruta_pdf = p['ruta_pdf']
+                            contador = p['contador']
+                            folio_for_name = p['folio_for_name']
+                            sol_no = p['sol_no']
+                            sol_year = p['sol_year']
+                            pdf_ok = bool(p['pdf_ok'])
+                            gen_exception = p['gen_exception']
+                            if p['pdf_ok'] is None:
+                                # sin lote disponible: generar este PDF en el proceso actual
+                                try:
+                                    if ruta_pdf and ConstGen:
+                                        gen_inst = ConstGen(datos_const, base_dir=BASE_DIR)
+                                        ruta_generada = gen_inst.generar(ruta_pdf)
                                         pdf_ok = True if ruta_generada and os.path.exists(ruta_generada) else False
-                                    except Exception as e:
+                                    elif ruta_pdf and mod is not None:
+                                        try:
+                                            ruta_generada = getattr(mod, 'generar_constancia_desde_visita')(folio_vis, salida=ruta_pdf)
+                                            pdf_ok = True if ruta_generada and os.path.exists(ruta_generada) else False
+                                        except Exception as e:
+                                            pdf_ok = False
+                                            import traceback
+                                            gen_exception = traceback.format_exc()
+                                    else:
+                                        # Usuario canceló selección de carpeta para PDFs -> no generar PDF
                                         pdf_ok = False
-                                        import traceback
-                                        gen_exception = traceback.format_exc()
-                                else:
-                                    # Usuario canceló selección de carpeta para PDFs -> no generar PDF
+                                except Exception as e:
                                     pdf_ok = False
-                            except Exception as e:
-                                pdf_ok = False
-                                import traceback
-                                gen_exception = traceback.format_exc()
+                                    import traceback
+                                    gen_exception = traceback.format_exc()
 
                             try:
                                 json_name = f"Constancia_Lista_{lista}_{folio_for_name}_{sol_no}_{sol_year}.json"
@@ -7424,7 +7534,7 @@ class SistemaDictamenesVC(ctk.CTk):
                                 json_path = os.path.join(out_base_json, json_name)
                                 try:
                                     if mod is not None and hasattr(mod, 'convertir_constancia_a_json'):
-                                        json_data = getattr(mod, 'convertir_constancia_a_json')(datos_const)
+                                        json_data = getattr(mod, 'convertir_constancia_a_json')(datos_const, folio_counter=contador)
                                     else:
                                         # convertir de forma básica local
                                         def _basic_convert(d):
@@ -7545,8 +7655,7 @@ class SistemaDictamenesVC(ctk.CTk):
                             pass
                         # Marcar progreso final
                         try:
-                            if self.winfo_exists():
-                                self.after(200, lambda: self.actualizar_progreso(100, "Completado") if self.winfo_exists() else None)
+                            self.actualizar_progreso(100, "Completado")
                         except Exception:
                             pass
                     except Exception:
@@ -7566,111 +7675,111 @@ class SistemaDictamenesVC(ctk.CTk):
             sys.path.append(BASE_DIR)
             from generador_dictamen import generar_dictamenes_gui
             
-            def actualizar_progreso(porcentaje, mensaje):
-                # VERIFICACIÓN EN CALLBACK
-                if self.winfo_exists():
-                    self.actualizar_progreso(porcentaje, mensaje)
-            
             def finalizado(exito, mensaje, resultado):
-                # VERIFICACIÓN EN CALLBACK FINAL
-                if not self.winfo_exists():
-                    return
-                    
-                if exito and resultado:
-                    directorio = resultado['directorio']
-                    total_gen = resultado['total_generados']
-                    total_fam = resultado['total_familias']
-                    
-                    dictamenes_fallidos = resultado.get('dictamenes_fallidos', 0)
-                    folios_fallidos = resultado.get('folios_fallidos', [])
-                    folios_utilizados = resultado.get('folios_utilizados', "No disponible")
-                    
-                    archivos_existentes = []
-                    if os.path.exists(directorio):
-                        archivos_existentes = [f for f in os.listdir(directorio) if f.endswith('.pdf')]
-                    
-                    mensaje_final = f"✅ {mensaje}\n\n📁 Ubicación: {directorio}"
-                    
-                    if archivos_existentes:
-                        mensaje_final += f"\n📄 Archivos creados: {len(archivos_existentes)}"
-                    
-                    
-                    if dictamenes_fallidos > 0:
-                        mensaje_final += f"\n❌ Dictámenes no generados: {dictamenes_fallidos}"
-                        if folios_fallidos:
-                            mensaje_final += f"\n📋 Folios fallidos: {', '.join(map(str, folios_fallidos))}"
-                    
-                    # VERIFICAR ANTES DE MOSTRAR MESSAGEBOX
-                    if self.winfo_exists():
-                        self.after(0, lambda: messagebox.showinfo("Generación Completada", mensaje_final) if self.winfo_exists() else None)
-                        
-                        resultado['folios_utilizados_info'] = folios_utilizados
-                        self.registrar_visita_automatica(resultado)
-
-                        # Si se generó usando un folio reservado seleccionado, marcarlo como completado
-                        try:
-                            sel_id = getattr(self, 'selected_pending_id', None)
-                            if sel_id:
-                                try:
-                                    self.hist_update_visita(sel_id, {'estatus': 'Completada'})
-                                except Exception:
-                                    # fallback: buscar y modificar manualmente
-                                    for v in self.historial.get('visitas', []):
-                                        if v.get('_id') == sel_id or v.get('id') == sel_id:
-                                            v['estatus'] = 'Completada'
-                                    try:
-                                        self._guardar_historial()
-                                    except Exception:
-                                        pass
-
-                                # Eliminar de archivo de reservas
-                                try:
-                                    pf = os.path.join(DATA_DIR, 'pending_folios.json')
-                                    if os.path.exists(pf):
-                                        with open(pf, 'r', encoding='utf-8') as f:
-                                            arr = json.load(f) or []
-                                        # Eliminar por _id / id si coincide con sel_id
-                                        try:
-                                            arr = [p for p in arr if ((p.get('_id') or p.get('id')) != sel_id)]
-                                        except Exception:
-                                            arr = [p for p in arr if p.get('folio_visita') != (getattr(self, 'entry_folio_visita', None).get() if hasattr(self, 'entry_folio_visita') else None)]
-                                        with open(pf, 'w', encoding='utf-8') as f:
-                                  
-                                            json.dump(arr, f, ensure_ascii=False, indent=2)
-                                        self.pending_folios = arr
-                                except Exception:
-                                    pass
-                                # limpiar selección
-                                try:
-                                    self.selected_pending_id = None
-                                    self.usando_folio_reservado = False
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-                        
-                        if archivos_existentes and self.winfo_exists():
-                            self.after(1000, lambda: self._abrir_carpeta(directorio) if self.winfo_exists() else None)
-                    
-                else:
-                    if self.winfo_exists():
-                        self.after(0, lambda: self.mostrar_error(mensaje) if self.winfo_exists() else None)
+                # Corre en el hilo de trabajo: solo encola el resultado; los
+                # diálogos los abre el ciclo de progreso en el hilo de Tk
+                self._cola_progreso.put(progreso.evento_resultado(exito, mensaje, resultado))
             
             # LLAMADA CORREGIDA - sin folios_info
+            # El avance llega por familia a self._cola_progreso
             generar_dictamenes_gui(
                 cliente_manual=self.cliente_seleccionado['CLIENTE'],
                 rfc_manual=self.cliente_seleccionado.get('RFC', ''),
-                callback_progreso=actualizar_progreso,
-                callback_finalizado=finalizado
+                callback_finalizado=finalizado,
+                cola_progreso=self._cola_progreso
             )
             
         except Exception as e:
             error_msg = f"Error iniciando generador: {str(e)}"
+            self._cola_progreso.put(progreso.evento_resultado(False, error_msg))
+        # _finalizar_generacion lo llama el ciclo de progreso al terminar este hilo
+
+    def _aplicar_resultado_generacion(self, evento):
+        """Cierre del lote de dictámenes (evento 'resultado'), en el hilo de Tk."""
+        if not self.winfo_exists():
+            return
+        exito = evento.get('exito')
+        mensaje = evento.get('mensaje')
+        resultado = evento.get('resultado')
+
+        if exito and resultado:
+            directorio = resultado['directorio']
+            total_gen = resultado['total_generados']
+            total_fam = resultado['total_familias']
+            
+            dictamenes_fallidos = resultado.get('dictamenes_fallidos', 0)
+            folios_fallidos = resultado.get('folios_fallidos', [])
+            folios_utilizados = resultado.get('folios_utilizados', "No disponible")
+            
+            archivos_existentes = []
+            if os.path.exists(directorio):
+                archivos_existentes = [f for f in os.listdir(directorio) if f.endswith('.pdf')]
+            
+            mensaje_final = f"✅ {mensaje}\n\n📁 Ubicación: {directorio}"
+            
+            if archivos_existentes:
+                mensaje_final += f"\n📄 Archivos creados: {len(archivos_existentes)}"
+            
+            
+            if dictamenes_fallidos > 0:
+                mensaje_final += f"\n❌ Dictámenes no generados: {dictamenes_fallidos}"
+                if folios_fallidos:
+                    mensaje_final += f"\n📋 Folios fallidos: {', '.join(map(str, folios_fallidos))}"
+            
             if self.winfo_exists():
-                self.after(0, lambda: self.mostrar_error(error_msg) if self.winfo_exists() else None)
-        finally:
-            if self.winfo_exists():
-                self.after(0, self._finalizar_generacion)
+                resultado['folios_utilizados_info'] = folios_utilizados
+                self.registrar_visita_automatica(resultado)
+
+                # Si se generó usando un folio reservado seleccionado, marcarlo como completado
+                try:
+                    sel_id = getattr(self, 'selected_pending_id', None)
+                    if sel_id:
+                        try:
+                            self.hist_update_visita(sel_id, {'estatus': 'Completada'})
+                        except Exception:
+                            # fallback: buscar y modificar manualmente
+                            for v in self.historial.get('visitas', []):
+                                if v.get('_id') == sel_id or v.get('id') == sel_id:
+                                    v['estatus'] = 'Completada'
+                            try:
+                                self._guardar_historial()
+                            except Exception:
+                                pass
+
+                        # Eliminar de archivo de reservas
+                        try:
+                            pf = os.path.join(DATA_DIR, 'pending_folios.json')
+                            if os.path.exists(pf):
+                                with open(pf, 'r', encoding='utf-8') as f:
+                                    arr = json.load(f) or []
+                                # Eliminar por _id / id si coincide con sel_id
+                                try:
+                                    arr = [p for p in arr if ((p.get('_id') or p.get('id')) != sel_id)]
+                                except Exception:
+                                    arr = [p for p in arr if p.get('folio_visita') != (getattr(self, 'entry_folio_visita', None).get() if hasattr(self, 'entry_folio_visita') else None)]
+                                with open(pf, 'w', encoding='utf-8') as f:
+                          
+                                    json.dump(arr, f, ensure_ascii=False, indent=2)
+                                self.pending_folios = arr
+                        except Exception:
+                            pass
+                        # limpiar selección
+                        try:
+                            self.selected_pending_id = None
+                            self.usando_folio_reservado = False
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+                
+                # Diálogo al final: es modal y no debe retrasar el registro de la visita
+                messagebox.showinfo("Generación Completada", mensaje_final)
+
+                if archivos_existentes and self.winfo_exists():
+                    self.after(1000, lambda: self._abrir_carpeta(directorio) if self.winfo_exists() else None)
+
+        else:
+            self.mostrar_error(mensaje)
 
     def _abrir_carpeta(self, directorio):
         try:
@@ -7683,84 +7792,58 @@ class SistemaDictamenesVC(ctk.CTk):
             print(f"Error abriendo carpeta: {e}")
 
     def actualizar_progreso(self, porcentaje, mensaje):
-        def _actualizar():
-            if self.winfo_exists():  # Verificar si la ventana aún existe
-                # Asegurar porcentaje entre 0 y 100
-                try:
-                    pct = float(porcentaje)
-                except Exception:
-                    pct = 0.0
-                pct = max(0.0, min(100.0, pct))
-                self.barra_progreso.set(pct / 100.0)
-                # Mostrar porcentaje y mensaje breve
-                if mensaje:
-                    self.etiqueta_progreso.configure(text=f"{int(pct)}% - {mensaje}")
-                else:
-                    self.etiqueta_progreso.configure(text=f"{int(pct)}%")
-                self.update_idletasks()
-                # Registrar marca de tiempo y valor para el watcher
-                try:
-                    self._last_progress_value = float(pct)
-                    self._last_progress_ts = time.time()
-                except Exception:
-                    pass
-        
-        self.after(0, _actualizar)
-
-    def _start_progress_watcher(self):
-        """Inicia un hilo que anima ligeramente la barra de progreso mientras
-        `self.generando_dictamenes` es True y el generador no actualiza con frecuencia.
         """
-        try:
-            # Si ya existe, no crear otro
-            if getattr(self, '_progress_watcher_thread', None) and self._progress_watcher_thread.is_alive():
-                return
-            stop_event = threading.Event()
-            self._progress_watcher_stop_event = stop_event
+        Muestra un porcentaje y un mensaje en la barra. Desde un hilo de
+        trabajo solo encola el evento; lo aplica el ciclo de progreso.
+        """
+        evento = progreso.evento_manual(porcentaje, mensaje)
+        if threading.current_thread() is not threading.main_thread():
+            self._cola_progreso.put(evento)
+            return
+        self._aplicar_evento_progreso(evento)
 
-            def _watcher():
-                try:
-                    while not stop_event.is_set() and getattr(self, 'generando_dictamenes', False):
-                        try:
-                            now = time.time()
-                            last_ts = getattr(self, '_last_progress_ts', 0) or 0
-                            last_val = getattr(self, '_last_progress_value', 0.0) or 0.0
-                            # Si no hubo actualización en 1.2s, animar un pequeño paso
-                            if now - last_ts > 1.2 and last_val < 95:
-                                # avanzar un paso pequeño entre 1-4%
-                                step = 1 + int((now - last_ts) % 4)
-                                new_val = min(95.0, last_val + step)
-                                try:
-                                    if self.winfo_exists():
-                                        self.after(0, lambda nv=new_val: self.actualizar_progreso(nv, "Procesando...") )
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-                        time.sleep(0.8)
-                except Exception:
-                    pass
+    def _aplicar_evento_progreso(self, evento):
+        if not self.winfo_exists():  # Verificar si la ventana aún existe
+            return
+        pct = evento.get('porcentaje') or 0.0
+        mensaje = evento.get('mensaje')
+        self.barra_progreso.set(pct / 100.0)
+        # Mostrar porcentaje y mensaje breve
+        if mensaje:
+            self.etiqueta_progreso.configure(text=f"{int(pct)}% - {mensaje}")
+        else:
+            self.etiqueta_progreso.configure(text=f"{int(pct)}%")
 
-            t = threading.Thread(target=_watcher, daemon=True)
-            self._progress_watcher_thread = t
-            t.start()
-        except Exception:
-            pass
+    def _iniciar_seguimiento_progreso(self):
+        """Arranca el ciclo `after` que drena la cola de progreso (uno a la vez)."""
+        if self._drenando_progreso:
+            return
+        self._drenando_progreso = True
+        self.after(INTERVALO_PROGRESO_MS, self._drenar_progreso)
 
-    def _stop_progress_watcher(self):
+    def _drenar_progreso(self):
         try:
-            ev = getattr(self, '_progress_watcher_stop_event', None)
-            if ev:
-                ev.set()
-            th = getattr(self, '_progress_watcher_thread', None)
-            try:
-                if th and th.is_alive():
-                    # give it a moment to exit
-                    th.join(timeout=0.5)
-            except Exception:
-                pass
+            if not self.winfo_exists():
+                self._drenando_progreso = False
+                return
+            hilo = self._hilo_generacion
+            terminado = hilo is None or not hilo.is_alive()
+            eventos = progreso.drenar(self._cola_progreso)
+            resultados = [e for e in eventos if e.get('tipo') == 'resultado']
+            avance = [e for e in eventos if e.get('tipo') != 'resultado']
+            # Solo el último evento importa para la barra: los intermedios se descartan
+            if avance:
+                self._aplicar_evento_progreso(avance[-1])
+            for evento in resultados:
+                self._aplicar_resultado_generacion(evento)
+            if terminado and self._cola_progreso.empty():
+                self._drenando_progreso = False
+                self._hilo_generacion = None
+                self._finalizar_generacion()
+                return
         except Exception:
             pass
+        self.after(INTERVALO_PROGRESO_MS, self._drenar_progreso)
 
     def actualizar_tipo_documento(self, valor=None):
         """Actualiza la UI del panel Generador según el tipo de documento seleccionado."""
@@ -8051,15 +8134,9 @@ class SistemaDictamenesVC(ctk.CTk):
         if self.winfo_exists():  # Verificar si la ventana aún existe
             self.generando_dictamenes = False
             self.boton_generar_dictamen.configure(state="normal")
-        # Detener watcher si existe
-        try:
-            self._stop_progress_watcher()
-        except Exception:
-            pass
         # Asegurar que la barra muestre completado cuando terminemos
         try:
-            if self.winfo_exists():
-                self.after(50, lambda: self.actualizar_progreso(100, "Completado"))
+            self.actualizar_progreso(100, "Completado")
         except Exception:
             pass
 
@@ -8972,6 +9049,9 @@ class SistemaDictamenesVC(ctk.CTk):
     # -- BOTONES DE ACCION PARA CADA VISITA -- #
     def _poblar_historial_ui(self):
         """Poblar historial usando Treeview virtualizado (más eficiente)."""
+        # Sin pestaña construida no hay nada que poblar; `mostrar_historial` lo hará
+        if self._pestana_pendiente('historial'):
+            return
         # Cargar datos solo si no existen o si se solicita recarga (permite que búsquedas filtradas persistan)
         if (not hasattr(self, 'historial_data') or not self.historial_data) or getattr(self, '_force_reload_hist', False):
             self._cargar_historial()
@@ -9409,6 +9489,70 @@ class SistemaDictamenesVC(ctk.CTk):
         
         return hora_str
 
+    def _documentos_visita(self):
+        """Módulo `documentos_visita` (carga única de generadores de la visita)."""
+        docs_dir = os.path.join(BASE_DIR, 'Documentos Inspeccion')
+        if docs_dir not in sys.path:
+            sys.path.append(docs_dir)
+        import documentos_visita
+        return documentos_visita
+
+    def generar_todos_documentos_visita(self, registro):
+        """Genera Oficio, Formato, Acta (y Reporte Decathlon si aplica) en una carpeta."""
+        folio = registro.get('folio_visita', '')
+        if not folio:
+            messagebox.showwarning("Error", "No se encontró el folio de la visita para generar los documentos.")
+            return
+        salida_dir = filedialog.askdirectory(title="Seleccione carpeta para guardar los documentos de la visita")
+        if not salida_dir:
+            return
+
+        def _worker():
+            try:
+                resultado = self._documentos_visita().generar_documentos_visita(registro, salida_dir, DATA_DIR)
+            except Exception as e:
+                mensaje = f"Error generando documentos de la visita:\n{e}"
+                self.after(0, lambda: messagebox.showerror("Error", mensaje) if self.winfo_exists() else None)
+                return
+            self.after(0, lambda: self._finalizar_documentos_visita(folio, resultado))
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _finalizar_documentos_visita(self, folio, resultado):
+        """Persiste en el historial las rutas generadas e informa al usuario (hilo principal)."""
+        claves = {
+            'acta': 'ruta_acta',
+            'oficio': 'ruta_oficio_de_comisión',
+            'formato': 'ruta_formato_de_supervisión',
+            'decathlon': 'ruta_reporte_decathlon',
+        }
+        documentos = resultado.get('documentos', {})
+        try:
+            for v in self.historial.get('visitas', []):
+                if v.get('folio_visita') == folio:
+                    for tipo, res in documentos.items():
+                        if res.get('ok') and tipo in claves:
+                            v[claves[tipo]] = res.get('ruta')
+                    if resultado.get('meta_decathlon'):
+                        v['ruta_reporte_decathlon_meta'] = resultado['meta_decathlon']
+                    break
+            self._guardar_historial()
+        except Exception as e:
+            print(f"⚠️ Error guardando rutas de documentos en historial: {e}")
+
+        lineas = []
+        for res in documentos.values():
+            if res.get('ok'):
+                lineas.append(f"✅ {res.get('nombre')}: {res.get('ruta')}")
+            else:
+                error = (res.get('error') or '').strip().splitlines()
+                lineas.append(f"❌ {res.get('nombre')}: {error[-1] if error else 'error desconocido'}")
+        mensaje = "\n".join(lineas) + f"\n\nTiempo total: {resultado.get('segundos', 0)}s"
+        if resultado.get('errores'):
+            messagebox.showwarning("Documentos de la visita", mensaje)
+        else:
+            messagebox.showinfo("Documentos de la visita", mensaje)
+
     def mostrar_opciones_documentos(self, registro):
         """Muestra una ventana con opciones para descargar documentos"""
         # Crear ventana modal
@@ -9498,23 +9642,13 @@ class SistemaDictamenesVC(ctk.CTk):
                     if not save_path:
                         return
 
-                    # Importar dinámicamente el generador de actas y generar
+                    # Cargar el generador de actas (una sola vez por sesión) y generar
                     try:
-                        import importlib.util
-                        acta_file = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Acta_inspeccion.py')
-                        if not os.path.exists(acta_file):
-                            messagebox.showerror("Error", f"No se encontró el generador de actas: {acta_file}")
-                            return
-
-                        spec = importlib.util.spec_from_file_location("Acta_inspeccion", acta_file)
-                        if spec is None or getattr(spec, 'loader', None) is None:
-                            messagebox.showerror("Error", f"No se pudo cargar el módulo Acta_inspeccion (spec inválido): {acta_file}")
+                        try:
+                            acta_mod = self._documentos_visita().cargar_generador('Acta_inspeccion')
+                        except Exception as e:
+                            messagebox.showerror("Error", f"No se pudo cargar el generador de actas:\n{e}")
                             return
-                        acta_mod = importlib.util.module_from_spec(spec)
-                        import sys
-                        # Registrar el módulo temporalmente para permitir reload() desde el código
-                        sys.modules["Acta_inspeccion"] = acta_mod
-                        spec.loader.exec_module(acta_mod)
 
                         # Generar acta para el folio y guardarla en la ruta indicada
                         ruta_generada = acta_mod.generar_acta_desde_visita(folio_visita=folio, ruta_salida=save_path)
@@ -9641,9 +9775,9 @@ class SistemaDictamenesVC(ctk.CTk):
                 if not save_path:
                     return
 
-                # Importar dinámicamente y generar según tipo
+                # Cargar el generador (una sola vez por sesión) y generar según tipo
                 try:
-                    import importlib.util
+                    documentos_visita = self._documentos_visita()
                     # --- Generador especial: Reporte Decathlon ---
                     if tipo == 'decathlon':
                         # Generar y guardar automáticamente en data/Reportes_Decathlon
@@ -9684,18 +9818,11 @@ class SistemaDictamenesVC(ctk.CTk):
                         output_path = os.path.join(reports_dir, output_name)
 
                         # Cargar módulo Reporte_Decathlon
-                        rep_file = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Reporte_Decathlon.py')
-                        if not os.path.exists(rep_file):
-                            messagebox.showerror('Error', f'No se encontró el generador de reportes: {rep_file}')
-                            return
-                        spec_rep = importlib.util.spec_from_file_location('Reporte_Decathlon', rep_file)
-                        if spec_rep is None or getattr(spec_rep, 'loader', None) is None:
-                            messagebox.showerror('Error', f'No se pudo cargar el módulo Reporte_Decathlon (spec inválido): {rep_file}')
+                        try:
+                            rep_mod = documentos_visita.cargar_generador('Reporte_Decathlon')
+                        except Exception as e:
+                            messagebox.showerror('Error', f'No se pudo cargar el generador de reportes:\n{e}')
                             return
-                        rep_mod = importlib.util.module_from_spec(spec_rep)
-                        import sys as _sys
-                        _sys.modules['Reporte_Decathlon'] = rep_mod
-                        spec_rep.loader.exec_module(rep_mod)
 
                         # Llamar al generador
                         try:
@@ -9719,41 +9846,7 @@ class SistemaDictamenesVC(ctk.CTk):
                             return
 
                         # Guardar JSON meta en carpeta local de Reportes_Decathlon
-                        try:
-                            # Construir JSON reducido con solo los datos impresos
-                            fecha_verif = None
-                            printed_rows = []
-                            if isinstance(tabla_relacion_data, list):
-                                seen = {}
-                                order = []
-                                for item in tabla_relacion_data:
-                                    if fecha_verif is None:
-                                        fecha_verif = item.get('FECHA DE VERIFICACION') or item.get('Fecha de Verificacion') or item.get('FECHA_VERIFICACION')
-                                    sol = item.get('SOLICITUD') or item.get('Solicitud') or item.get('solicitud') or ''
-                                    fol = item.get('FOLIO') or item.get('folio') or item.get('Folio') or ''
-                                    ped = item.get('PEDIMENTO') or item.get('pedimento') or item.get('Referencia') or item.get('referencia') or ''
-                                    key = str(fol)
-                                    if key not in seen:
-                                        seen[key] = {'SOLICITUD': sol, 'FOLIO': fol, 'PEDIMENTO': ped}
-                                        order.append(key)
-                                for k in order:
-                                    printed_rows.append(seen[k])
-
-                            meta = {
-                                'generado_en': datetime.now().isoformat(),
-                                'archivo_usuario': ruta_usuario,
-                                'folio_visita': folio,
-                                'cliente': registro.get('cliente',''),
-                                'destinatario': registro.get('destinatario') or 'Diana Cumpean',
-                                'fecha_verificacion': fecha_verif,
-                                'observaciones': registro.get('observaciones',''),
-                                'dictamenes_impresos': printed_rows
-                            }
-                            json_path = os.path.join(reports_dir, f"Reporte_Decathlon_{folio}.json")
-                            with open(json_path, 'w', encoding='utf-8') as jf:
-                                json.dump(meta, jf, ensure_ascii=False, indent=2)
-                        except Exception:
-                            json_path = None
+                        json_path = documentos_visita.escribir_meta_decathlon(data_dir_local, registro, ruta_usuario, tabla_relacion_data)
 
                         # Persistir ruta en historial (usar ruta de usuario si existe)
                         try:
@@ -9774,18 +9867,11 @@ class SistemaDictamenesVC(ctk.CTk):
                         messagebox.showinfo('Reporte Decathlon generado', info_msg)
                         return
                     if tipo == 'formato':
-                        formato_file = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Formato_supervision.py')
-                        if not os.path.exists(formato_file):
-                            messagebox.showerror('Error', f'No se encontró el módulo: {formato_file}')
-                            return
-                        spec = importlib.util.spec_from_file_location('Formato_supervision', formato_file)
-                        if spec is None or getattr(spec, 'loader', None) is None:
-                            messagebox.showerror('Error', f'No se pudo cargar el módulo Formato_supervision (spec inválido): {formato_file}')
+                        try:
+                            mod = documentos_visita.cargar_generador('Formato_supervision')
+                        except Exception as e:
+                            messagebox.showerror('Error', f'No se pudo cargar el módulo Formato_supervision:\n{e}')
                             return
-                        mod = importlib.util.module_from_spec(spec)
-                        import sys
-                        sys.modules['Formato_supervision'] = mod
-                        spec.loader.exec_module(mod)
 
                         datos = {
                             'solicitud': ', '.join(sorted(list(solicitudes))) if solicitudes else registro.get('folio_visita',''),
@@ -9854,22 +9940,12 @@ class SistemaDictamenesVC(ctk.CTk):
                             return
 
                     elif tipo == 'oficio':
-                        # Prefer a fixed fallback module if present to avoid importing a corrupted original
-                        oficio_file = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Oficio_comision.py')
-                        oficio_fixed = os.path.join(BASE_DIR, 'Documentos Inspeccion', 'Oficio_comision_fixed.py')
-                        if os.path.exists(oficio_fixed):
-                            oficio_file = oficio_fixed
-                        if not os.path.exists(oficio_file):
-                            messagebox.showerror('Error', f'No se encontró el módulo: {oficio_file}')
-                            return
-                        spec = importlib.util.spec_from_file_location('Oficio_comision', oficio_file)
-                        if spec is None or getattr(spec, 'loader', None) is None:
-                            messagebox.showerror('Error', f'No se pudo cargar el módulo Oficio_comision (spec inválido): {oficio_file}')
+                        # cargar_generador prefiere Oficio_comision_fixed.py si existe
+                        try:
+                            mod = documentos_visita.cargar_generador('Oficio_comision')
+                        except Exception as e:
+                            messagebox.showerror('Error', f'No se pudo cargar el módulo Oficio_comision:\n{e}')
                             return
-                        mod = importlib.util.module_from_spec(spec)
-                        import sys
-                        sys.modules['Oficio_comision'] = mod
-                        spec.loader.exec_module(mod)
 
                         # Preferir usar la función de preparación del propio módulo si existe
                         datos_oficio = None
@@ -10091,6 +10167,24 @@ class SistemaDictamenesVC(ctk.CTk):
         footer_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         footer_frame.pack(fill="x", pady=(20, 0))
 
+        # Botón: generar todos los documentos de la visita en un solo trabajo
+        def _generar_todos():
+            modal.destroy()
+            self.generar_todos_documentos_visita(registro)
+
+        btn_todos = ctk.CTkButton(
+            footer_frame,
+            text="Generar todos",
+            command=_generar_todos,
+            font=("Inter", 12, "bold"),
+            fg_color=STYLE["primario"],
+            hover_color="#1a1a1a",
+            text_color=STYLE["texto_claro"],
+            height=35,
+            corner_radius=6
+        )
+        btn_todos.pack(pady=(0, 15))
+
         # --- Tile especial: Reporte Decathlon (solo para cliente Decathlon) ---
         try:
             if registro.get('cliente','').strip().upper() == 'ARTICULOS DEPORTIVOS DECATHLON SA DE CV'.upper():
@@ -11397,18 +11491,14 @@ class SistemaDictamenesVC(ctk.CTk):
     def descargar_excel_ema(self, registro=None):
         """Descarga el reporte EMA en Excel"""
         try:
-            # Cargar el módulo control_folios_anual dinámicamente
-            import importlib.util
-            
+            # Cargar el módulo control_folios_anual (una sola vez por sesión)
             excel_gen_file = os.path.join(self.documentos_dir, 'control_folios_anual.py')
             
             if not os.path.exists(excel_gen_file):
                 messagebox.showerror("Error", f"No se encontró el archivo generador de Excel: {excel_gen_file}")
                 return
             
-            spec = importlib.util.spec_from_file_location('control_folios_anual', excel_gen_file)
-            excel_mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(excel_mod)
+            excel_mod = cargador_modulos.cargar_modulo('control_folios_anual', excel_gen_file)
             
             # Preparar rutas (usar config persistente si existe)
             tabla_de_relacion_path = self.excel_export_config.get('tabla_de_relacion') if hasattr(self, 'excel_export_config') else os.path.join(self.documentos_dir, 'tabla_de_relacion.json')
@@ -11469,18 +11559,14 @@ class SistemaDictamenesVC(ctk.CTk):
     def descargar_excel_anual(self, registro=None):
         """Descarga el reporte de control de folios anual en Excel"""
         try:
-            # Cargar el módulo control_folios_anual dinámicamente
-            import importlib.util
-            
+            # Cargar el módulo control_folios_anual (una sola vez por sesión)
             excel_gen_file = os.path.join(self.documentos_dir, 'control_folios_anual.py')
             
             if not os.path.exists(excel_gen_file):
                 messagebox.showerror("Error", f"No se encontró el archivo generador de Excel: {excel_gen_file}")
                 return
             
-            spec = importlib.util.spec_from_file_location('control_folios_anual', excel_gen_file)
-            excel_mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(excel_mod)
+            excel_mod = cargador_modulos.cargar_modulo('control_folios_anual', excel_gen_file)
             
             # Obtener el año actual
             year = datetime.now().year
@@ -11634,11 +11720,11 @@ class SistemaDictamenesVC(ctk.CTk):
             except Exception:
                 busqueda_raw = ''
             # Normalizar (quitar acentos) y bajar a minúsculas para comparaciones
+            # (plegar_acentos está memoizada: el filtro re-normaliza los mismos
+            # campos del historial en cada pulsación)
             def _norm(s):
                 try:
-                    s2 = str(s)
-                    s2 = unicodedata.normalize('NFKD', s2).encode('ASCII', 'ignore').decode('ASCII')
-                    return s2.lower()
+                    return plegar_acentos(str(s)).lower()
                 except Exception:
                     return str(s).lower()
 
@@ -16223,28 +16309,11 @@ class SistemaDictamenesVC(ctk.CTk):
 
             # Si el usuario proporcionó un Excel, construir el índice usando el script pegado_indice.py
             if excel_path:
-                import importlib.util
-                import sys
                 mod_path = os.path.join(APP_DIR, "Pegado de Evidenvia Fotografica", "pegado_indice.py")
-                base = os.path.dirname(mod_path)
-                # Añadir temporalmente el directorio al sys.path para resolver imports locales (registro_fallos, main, etc.)
-                added_to_path = False
-                if base and base not in sys.path:
-                    sys.path.insert(0, base)
-                    added_to_path = True
-
-                spec = importlib.util.spec_from_file_location("pegado_indice", mod_path)
-                pegado_mod = importlib.util.module_from_spec(spec)
-
-                try:
-                    spec.loader.exec_module(pegado_mod)
-                finally:
-                    # Quitar la ruta añadida
-                    try:
-                        if added_to_path and base in sys.path:
-                            sys.path.remove(base)
-                    except Exception:
-                        pass
+                # La carpeta se agrega a sys.path solo mientras se ejecuta el módulo
+                # (imports locales: registro_fallos, main, etc.)
+                pegado_mod = cargador_modulos.cargar_modulo("pegado_indice", mod_path,
+                                                            ruta_busqueda=os.path.dirname(mod_path))
 
                 # Llamar a la función para construir el índice desde el Excel
                 try:
@@ -16456,6 +16525,8 @@ class SistemaDictamenesVC(ctk.CTk):
 
 # ================== EJECUCIÓN ================== #
 if __name__ == "__main__":
+    # (`multiprocessing.freeze_support()` se llama al inicio del módulo)
+
     # En Windows, habilitar DPI awareness antes de crear la ventana
     # se respeten cuando la app está empaquetada como .exe.
     if sys.platform.startswith("win"):
@@ -0,0 +1,25 @@
+"""Benchmarks reproducibles del flujo completo de dictámenes.
+
+El paquete genera un espacio de trabajo sintético (tabla de relación,
+BASE_ETIQUETADO, config_etiquetas, normas, clientes, firmas PNG y un árbol de
+evidencias fotográficas anidado) y mide sobre él:
+
+- `dictamenes`: `generador_dictamen.generar_dictamenes_completos`
+  (familias/s y páginas/s)
+- `etiquetas`: `GeneradorEtiquetasDecathlon.generar_etiquetas_por_codigos`
+  (etiquetas/s)
+- `evidencias`: búsquedas de las herramientas de pegado (índice de carpetas
+  e `IndiceImagenes`; búsquedas/s)
+- `control_folios`: `ControlFoliosAnual.generar_filas` sobre un año
+  sintético, secuencial y en paralelo (filas/s; falla si las filas paralelas
+  difieren de las secuenciales)
+
+Cada escenario corre en un proceso propio, así que el pico de RSS reportado
+es el del escenario. Los resultados se agregan a un historial JSON para
+comparar corridas.
+
+Uso:
+    python -m benchmarks --familias 40 --imagenes 3
+    python -m benchmarks --escenarios etiquetas evidencias --repeticiones 3
+    python -m benchmarks --escenarios control_folios --folios 6000 --procesos-folios 4
+"""
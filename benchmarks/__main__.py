@@ -0,0 +1,175 @@
+"""Ejecuta los benchmarks y agrega el resultado al historial JSON.
+
+Uso:
+    python -m benchmarks [--escenarios dictamenes etiquetas evidencias control_folios]
+                         [--familias 30] [--productos 4] [--imagenes 2]
+                         [--profundidad 2] [--folios 2000] [--procesos-folios 4]
+                         [--repeticiones 1] [--semilla 2025]
+                         [--historial benchmarks/resultados/historial.json]
+                         [--conservar]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.datos_sinteticos import generar_espacio_trabajo
+from benchmarks.escenarios import ESCENARIOS, RAIZ_REPO, ejecutar_escenario
+
+HISTORIAL_DEFAULT = os.path.join(RAIZ_REPO, 'benchmarks', 'resultados', 'historial.json')
+
+# Métricas que se comparan contra la corrida anterior (más es mejor, salvo el RSS)
+METRICAS_TASA = ('familias_s', 'paginas_s', 'etiquetas_s', 'busquedas_s',
+                 'busquedas_carpeta_s', 'busquedas_indice_s', 'filas_s', 'filas_s_paralelo')
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ_REPO,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _resumir(corridas):
+    """Mediana de cada métrica numérica entre repeticiones."""
+    resumen = {'ok': all(c.get('ok') for c in corridas)}
+    claves = {k for c in corridas for k, v in c.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    for k in sorted(claves):
+        valores = [c[k] for c in corridas if isinstance(c.get(k), (int, float))]
+        if valores:
+            resumen[k] = round(statistics.median(valores), 3)
+    errores = [c['error'] for c in corridas if c.get('error')]
+    if errores:
+        resumen['errores'] = errores
+    return resumen
+
+
+def leer_historial(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        return datos if isinstance(datos, list) else []
+    except Exception:
+        return []
+
+
+def guardar_en_historial(ruta, corrida):
+    historial = leer_historial(ruta)
+    historial.append(corrida)
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    tmp = ruta + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(historial, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta)
+    return historial
+
+
+def corrida_anterior(historial, parametros):
+    """Última corrida previa con los mismos parámetros de datos sintéticos."""
+    for previa in reversed(historial[:-1]):
+        if previa.get('parametros') == parametros:
+            return previa
+    return None
+
+
+def imprimir_comparacion(actual, previa):
+    for nombre, res in actual['resultados'].items():
+        antes = (previa or {}).get('resultados', {}).get(nombre, {})
+        partes = []
+        for k in METRICAS_TASA + ('pico_rss_mb',):
+            if k not in res:
+                continue
+            texto = f"{k}={res[k]}"
+            if isinstance(antes.get(k), (int, float)) and antes[k]:
+                cambio = (res[k] - antes[k]) / antes[k] * 100
+                texto += f" ({cambio:+.1f}%)"
+            partes.append(texto)
+        estado = 'OK' if res.get('ok') else 'FALLÓ'
+        print(f"  {nombre:<14} [{estado}] " + ', '.join(partes))
+        for err in res.get('errores', []):
+            print(f"      ⚠️ {err}")
+    if previa:
+        print(f"  (comparado con {previa.get('fecha')} @ {previa.get('commit') or '?'})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del flujo de dictámenes con datos sintéticos")
+    parser.add_argument("--escenarios", nargs="+", default=list(ESCENARIOS), choices=list(ESCENARIOS))
+    parser.add_argument("--familias", type=int, default=30, help="Familias (LISTA) en la tabla de relación")
+    parser.add_argument("--productos", type=int, default=4, help="Máximo de productos por familia")
+    parser.add_argument("--imagenes", type=int, default=2, help="Fotografías por carpeta de código")
+    parser.add_argument("--profundidad", type=int, default=2, help="Niveles de carpetas sobre cada código")
+    parser.add_argument("--decathlon", type=float, default=0.3, help="Fracción de familias Decathlon")
+    parser.add_argument("--folios", type=int, default=2000, help="Folios del año sintético de control_folios")
+    parser.add_argument("--procesos-folios", type=int, default=4,
+                        help="Procesos de la medición paralela de control_folios")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--historial", default=HISTORIAL_DEFAULT, help="JSON donde se acumulan las corridas")
+    parser.add_argument("--conservar", action="store_true", help="No borrar el espacio de trabajo sintético")
+    args = parser.parse_args(argv)
+
+    parametros = {
+        'familias': args.familias,
+        'productos': args.productos,
+        'imagenes': args.imagenes,
+        'profundidad': args.profundidad,
+        'decathlon': args.decathlon,
+        'semilla': args.semilla,
+    }
+    if 'control_folios' in args.escenarios:
+        parametros.update(folios=args.folios, procesos_folios=args.procesos_folios)
+    raiz = tempfile.mkdtemp(prefix='bench_dictamenes_')
+    try:
+        t0 = time.perf_counter()
+        espacio = generar_espacio_trabajo(
+            raiz, familias=args.familias, productos=args.productos, imagenes_por_codigo=args.imagenes,
+            profundidad=args.profundidad, proporcion_decathlon=args.decathlon,
+            folios=args.folios if 'control_folios' in args.escenarios else 0, semilla=args.semilla)
+        espacio['procesos_folios'] = args.procesos_folios
+        print(f"Espacio sintético en {raiz}: {espacio['familias']} familias, {espacio['filas']} filas, "
+              f"{espacio['imagenes']} imágenes ({time.perf_counter() - t0:.1f}s)")
+
+        resultados = {}
+        for nombre in args.escenarios:
+            corridas = []
+            for i in range(max(1, args.repeticiones)):
+                salida = os.path.join(raiz, 'salidas', f'{nombre}_{i + 1}')
+                corridas.append(ejecutar_escenario(nombre, espacio, salida))
+            resultados[nombre] = _resumir(corridas)
+            for c in corridas:
+                if c.get('traza'):
+                    print(c['traza'])
+
+        corrida = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'parametros': parametros,
+            'repeticiones': max(1, args.repeticiones),
+            'resultados': resultados,
+        }
+        historial = guardar_en_historial(args.historial, corrida)
+        print(f"Resultados (mediana de {corrida['repeticiones']} repetición/es), historial: {args.historial}")
+        imprimir_comparacion(corrida, corrida_anterior(historial, parametros))
+        return 0 if all(r.get('ok') for r in resultados.values()) else 1
+    finally:
+        if args.conservar:
+            print(f"Espacio de trabajo conservado en {raiz}")
+        else:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""Espacio de trabajo sintético para los benchmarks del flujo de dictámenes.
+
+`generar_espacio_trabajo` escribe en un directorio (normalmente temporal) lo
+mismo que la aplicación encuentra en una instalación real:
+
+    <raiz>/data/tabla_de_relacion.json     filas por familia (LISTA)
+    <raiz>/data/BASE_ETIQUETADO.json       productos por EAN
+    <raiz>/data/config_etiquetas.json      campos y tamaño por norma
+    <raiz>/data/Normas.json, Clientes.json, Firmas.json, folio_counter.json,
+                historial_visitas.json
+    <raiz>/data/evidence_paths.json        grupo -> [carpeta de evidencias]
+    <raiz>/Firmas/INSPxx.png               firmas de inspectores
+    <raiz>/evidencias/...                  árbol anidado de fotografías
+    <raiz>/appdata/ImagenesVC/config.json  configuración del pegado
+    <raiz>/control_folios/...              año sintético del control de
+                                           folios (solo con `folios` > 0)
+
+Todo depende de `semilla`: dos llamadas con los mismos parámetros producen
+los mismos datos (las imágenes incluidas), así que las corridas del
+historial son comparables.
+"""
+
+import json
+import os
+import random
+from typing import Dict, List
+
+from PIL import Image, ImageDraw
+
+# Norma UVA -> (NOM en Normas.json, clave en config_etiquetas.json)
+NORMAS = {
+    4: ('NOM-004-SE-2021', 'NOM-004-SE-2021'),
+    15: ('NOM-015-SCFI-2007', 'NOM-015-SCFI-2007'),
+    20: ('NOM-020-SCFI-1997', 'NOM-020-SCFI-1997'),
+    24: ('NOM-024-SCFI-2013', 'NOM-024-SCFI-2013'),
+    50: ('NOM-050-SCFI-2004', 'NOM-050-SCFI-2004-1'),
+    141: ('NOM-141-SSA1/SCFI-2012', 'NOM-141-SSA1 SCFI-2012'),
+}
+
+# Campos de etiqueta por clave de config_etiquetas (mismo formato que el real)
+CAMPOS_ETIQUETA = {
+    'NOM-004-SE-2021': ["EAN", "MARCA", "INSUMOS", "CUIDADO", "PAIS DE ORIGEN", "IMPORTADOR", "TALLA"],
+    'NOM-004-TEX': ["EAN", "MARCA", "CUIDADO", "PAIS DE ORIGEN", "IMPORTADOR", "TALLA"],
+    'NOM-015-SCFI-2007': ["EAN", "MARCA", "DESCRIPCION", "PAIS DE ORIGEN", "IMPORTADOR", "ADVERTENCIAS"],
+    'NOM-020-SCFI-1997': ["EAN", "MARCA", "DESCRIPCION", "INSUMOS", "PAIS DE ORIGEN", "IMPORTADOR"],
+    'NOM-024-SCFI-2013': ["EAN", "MARCA", "DESCRIPCION", "PAIS DE ORIGEN", "IMPORTADOR", "ESPECIFICACIONES"],
+    'NOM-050-SCFI-2004-1': ["EAN", "MARCA", "DESCRIPCION", "CONTENIDO", "PAIS DE ORIGEN", "IMPORTADOR"],
+    'NOM-141-SSA1 SCFI-2012': ["EAN", "MARCA", "DESCRIPCION", "INGREDIENTES", "CONTENIDO", "PAIS DE ORIGEN", "IMPORTADOR"],
+}
+
+PAISES = ['CHINA', 'VIETNAM', 'INDIA', 'BANGLADESH', 'ITALIA', 'MEXICO', 'TURQUIA']
+MARCAS_DECATHLON = ['KALENJI', 'QUECHUA', 'DOMYOS', 'KIPSTA', 'TRIBORD']
+CLIENTE_DECATHLON = 'ARTICULOS DEPORTIVOS DECATHLON S.A. DE C.V.'
+
+
+def _escribir_json(ruta: str, datos) -> None:
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+
+
+def _ean(rnd: random.Random) -> str:
+    return '789' + ''.join(str(rnd.randint(0, 9)) for _ in range(10))
+
+
+def _imagen(ruta: str, rnd: random.Random, tamano, texto: str) -> None:
+    """Fotografía sintética: fondo de color, rectángulos y el código escrito."""
+    img = Image.new('RGB', tamano, tuple(rnd.randint(60, 230) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x0, y0 = rnd.randint(0, tamano[0] - 20), rnd.randint(0, tamano[1] - 20)
+        x1, y1 = rnd.randint(x0 + 10, tamano[0]), rnd.randint(y0 + 10, tamano[1])
+        draw.rectangle([x0, y0, x1, y1], fill=tuple(rnd.randint(0, 255) for _ in range(3)))
+    draw.text((10, 10), texto, fill=(0, 0, 0))
+    if ruta.lower().endswith('.png'):
+        img.save(ruta, format='PNG')
+    else:
+        img.save(ruta, format='JPEG', quality=75)
+
+
+def generar_firmas(raiz: str, rnd: random.Random, inspectores: int = 8) -> List[dict]:
+    """Firmas.json (formato real) y un PNG con fondo transparente por inspector."""
+    carpeta = os.path.join(raiz, 'Firmas')
+    os.makedirs(carpeta, exist_ok=True)
+    noms = [nom for nom, _ in NORMAS.values()]
+    firmas = []
+    for i in range(inspectores):
+        codigo = f'INSP{i:02d}'
+        img = Image.new('RGBA', (360, 140), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(img)
+        puntos = [(20 + k * 30, 70 + rnd.randint(-40, 40)) for k in range(11)]
+        draw.line(puntos, fill=(10, 20, 120, 255), width=4)
+        img.save(os.path.join(carpeta, f'{codigo}.png'), format='PNG')
+        # El último inspector no está acreditado en todas las normas (dictámenes sin firma)
+        acreditadas = noms if i < inspectores - 1 else noms[:2]
+        firmas.append({
+            'NOMBRE DE INSPECTOR': f'Inspector Sintético {i:02d}',
+            'CORREO': f'insp{i:02d}@ejemplo.mx',
+            'IMAGEN': f'Firmas/{codigo}.png',
+            'FIRMA': codigo,
+            'Puesto': 'Inspector',
+            'VIGENCIA': 'INDEFINIDA',
+            'Normas acreditadas': acreditadas,
+            'Referencia': f'24UI{4000 + i}',
+            'Fecha de acreditación': '2024-10-10',
+        })
+    return firmas
+
+
+def generar_config_etiquetas(rnd: random.Random) -> Dict[str, dict]:
+    """config_etiquetas.json: campos y tamaño (cadena '(ancho,alto)') por norma."""
+    return {
+        norma: {'campos': list(campos), 'tamaño_cm': f"({rnd.choice([4, 5, 6])},{rnd.choice([5, 6, 7])})"}
+        for norma, campos in CAMPOS_ETIQUETA.items()
+    }
+
+
+def generar_tabla_y_base(rnd: random.Random, familias: int, productos: int,
+                         proporcion_decathlon: float, proporcion_asig: float,
+                         firmas: List[dict]):
+    """
+    Filas de tabla_de_relacion.json y productos de BASE_ETIQUETADO.json.
+
+    Returns:
+        (tabla, base_etiquetado, codigos) donde `codigos` es la lista de
+        dicts {codigo, solicitud, marca, pais_origen, asig} por fila.
+    """
+    tabla, base, codigos = [], [], []
+    solicitud_num = rnd.randint(100, 900)
+    for lista in range(1, familias + 1):
+        if lista % 3 == 1:
+            solicitud_num += 1
+        solicitud = f"{solicitud_num:06d}/25"
+        decathlon = rnd.random() < proporcion_decathlon
+        norma_uva = rnd.choice(list(NORMAS))
+        marca = rnd.choice(MARCAS_DECATHLON) if decathlon else f'MARCA {rnd.randint(1, 60):02d}'
+        firma = rnd.choice(firmas)['FIRMA']
+        fecha = f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        asig_familia = f'LOTE {lista:04d}'
+        for _ in range(max(1, rnd.randint(productos // 2 or 1, productos))):
+            codigo = _ean(rnd) if decathlon else f'MOD-{rnd.randint(1, 99999):05d}{rnd.choice("ABCDEFGH")}'
+            pais = rnd.choice(PAISES)
+            insumos = rnd.choice(['100% ALGODÓN', '80% POLIÉSTER 20% ELASTANO', 'N/A'])
+            asig = asig_familia if rnd.random() < proporcion_asig else ''
+            fila = {
+                'SOLICITUD': solicitud,
+                'LISTA': str(lista),
+                'FOLIO': '',
+                'NORMA UVA': norma_uva,
+                'CLASIF UVA': str(norma_uva),
+                'CODIGO': codigo,
+                'EAN': codigo,
+                'ASIG': asig,
+                'MARCA': marca,
+                'DESCRIPCION': f'PRODUCTO SINTÉTICO {rnd.randint(1, 400)}',
+                'PAIS DE ORIGEN': pais,
+                'INSUMOS': insumos,
+                'TALLA': rnd.choice(['CH', 'M', 'G', 'N/A']),
+                'IMPORTADOR': 'IMPORTADORA SINTÉTICA S.A. DE C.V.',
+                'FACTURA': f'F{rnd.randint(1000, 9999)}',
+                'CANTIDAD': rnd.randint(1, 500),
+                'FECHA DE VERIFICACION': fecha,
+                'FECHA DE ENTRADA': fecha,
+                'FIRMA': firma,
+                'TIPO DE DOCUMENTO': 'D',
+                'OBSERVACIONES DICTAMEN': 'NINGUNA',
+            }
+            tabla.append(fila)
+            base.append({
+                'EAN': codigo,
+                'MARCA': marca,
+                'DESCRIPCION': fila['DESCRIPCION'],
+                'INSUMOS': insumos,
+                'CUIDADO': 'LAVAR A MANO, NO USAR BLANQUEADOR',
+                'PAIS DE ORIGEN': pais,
+                'IMPORTADOR': fila['IMPORTADOR'],
+                'TALLA': fila['TALLA'],
+                'CONTENIDO': f'{rnd.randint(1, 12)} PIEZAS',
+            })
+            codigos.append({'codigo': codigo, 'solicitud': solicitud, 'marca': marca,
+                            'pais_origen': pais, 'asig': asig})
+    return tabla, base, codigos
+
+
+def generar_arbol_evidencias(raiz: str, rnd: random.Random, codigos: List[dict],
+                             imagenes_por_codigo: int = 2, profundidad: int = 2,
+                             ancho_rama: int = 4, tamano_imagen=(640, 480)) -> dict:
+    """
+    Árbol de evidencias anidado: `profundidad` niveles intermedios
+    (`grupo_XX/nivel_YY/...`) y bajo ellos una carpeta por código con
+    `CODIGO.jpg`, `CODIGO (2).jpg`, ... Las filas con ASIG tienen además su
+    fotografía en la carpeta del lote.
+
+    Returns:
+        {'raiz': ruta, 'carpetas_codigo': n, 'imagenes': n}
+    """
+    raiz_ev = os.path.join(raiz, 'evidencias')
+    os.makedirs(raiz_ev, exist_ok=True)
+    imagenes = carpetas = 0
+    for item in codigos:
+        niveles = [f'grupo_{rnd.randrange(ancho_rama):02d}']
+        niveles += [f'nivel_{rnd.randrange(ancho_rama):02d}' for _ in range(max(0, profundidad - 1))]
+        carpeta = os.path.join(raiz_ev, *niveles, item['codigo'])
+        os.makedirs(carpeta, exist_ok=True)
+        carpetas += 1
+        for k in range(imagenes_por_codigo):
+            nombre = item['codigo'] + ('' if k == 0 else f' ({k + 1})') + '.jpg'
+            _imagen(os.path.join(carpeta, nombre), rnd, tamano_imagen, item['codigo'])
+            imagenes += 1
+        if item.get('asig'):
+            carpeta_lote = os.path.join(raiz_ev, item['asig'])
+            os.makedirs(carpeta_lote, exist_ok=True)
+            _imagen(os.path.join(carpeta_lote, item['codigo'] + '.jpg'), rnd, tamano_imagen, item['codigo'])
+            imagenes += 1
+    return {'raiz': raiz_ev, 'carpetas_codigo': carpetas, 'imagenes': imagenes}
+
+
+def generar_anio_folios(data_dir: str, rnd: random.Random, folios: int,
+                        proporcion_json: float = 0.3) -> int:
+    """
+    Año sintético para `ControlFoliosAnual`: clientes, firmas, normas,
+    tabla_de_relacion e historial de visitas con `folios` folios (a partir del
+    849); una fracción `proporcion_json` tiene además dictamen JSON en
+    `Dictamenes/`. Devuelve el número de filas de la tabla.
+    """
+    dicts_dir = os.path.join(data_dir, 'Dictamenes')
+    os.makedirs(dicts_dir, exist_ok=True)
+
+    clientes = [{
+        'CLIENTE': f'CLIENTE SINTÉTICO {i:03d} S.A. DE C.V.',
+        'NÚMERO_DE_CONTRATO': f'25049U{i:05d}',
+        'RFC': f'CSI{i:06d}AB1',
+        'CURP': 'N/A',
+    } for i in range(120)]
+    firmas = [{'FIRMA': f'INSP{i:02d}', 'NOMBRE': f'Inspector Núñez {i:02d}'} for i in range(15)]
+    normas = [{'NOM': f'NOM-{n:03d}-SCFI-2020'} for n in (4, 15, 24, 50, 141)]
+
+    tabla: List[dict] = []
+    visitas: List[dict] = []
+    folio = 849
+    fin = 849 + folios
+    while folio < fin:
+        cliente = rnd.choice(clientes)
+        solicitud = f"{rnd.randint(1, 99999):06d}/25"
+        inicio = folio
+        for _ in range(rnd.randint(1, 6)):
+            if folio >= fin:
+                break
+            mes = rnd.randint(1, 12)
+            dia = rnd.randint(1, 28)
+            for _ in range(rnd.randint(1, 4)):
+                tabla.append({
+                    'SOLICITUD': solicitud,
+                    'FOLIO': folio,
+                    'FIRMA': rnd.choice(firmas)['FIRMA'],
+                    'DESCRIPCION': f'PRODUCTO {rnd.randint(1, 400)}',
+                    'MARCA': f'MARCA {rnd.randint(1, 60)}',
+                    'CLASIF UVA': rnd.choice(['4', '15', '24', '50']),
+                    'CODIGO': f'MOD-{rnd.randint(1, 99999):05d}',
+                    'PEDIMENTO': str(rnd.randint(10 ** 14, 10 ** 15)),
+                    'TIPO DE DOCUMENTO': rnd.choice('DDDC'),
+                    'FECHA DE VERIFICACION': f'2025-{mes:02d}-{dia:02d}',
+                    'FECHA DE EMISION DE SOLICITUD': f'{dia:02d}/{mes:02d}/2025',
+                    'FECHA DE ENTRADA': f'2025-{mes:02d}-{max(1, dia - 3):02d}',
+                })
+            if rnd.random() < proporcion_json:
+                sol_base = solicitud.split('/')[0]
+                dictamen = {
+                    'identificacion': {
+                        'solicitud': sol_base,
+                        'folio': f'{folio:06d}',
+                        'cadena_identificacion': f'25049UCC{folio:09d} Solicitud de Servicio: 25049USD{sol_base}-{folio}',
+                    },
+                    'norma': {'codigo': rnd.choice(normas)['NOM']},
+                    'producto': {'descripcion': f'PRODUCTO {rnd.randint(1, 400)}', 'pedimento': '1'},
+                    'tabla_productos': [{'codigo': f'MOD-{rnd.randint(1, 99999):05d}', 'marca': 'MARCA JSON'}],
+                    'fechas': {'emision': f'2025-{mes:02d}-{dia:02d}', 'verificacion': f'2025-{mes:02d}-{dia:02d}'},
+                    'firmas': {'firma1': {'nombre': 'Inspector Núñez 00', 'codigo': 'INSP00'}},
+                }
+                _escribir_json(os.path.join(dicts_dir, f'Dictamen_Lista_1_{folio:06d}_{sol_base}.json'), dictamen)
+            folio += 1
+        visitas.append({
+            'cliente': cliente['CLIENTE'],
+            'folios_utilizados': f'{inicio:06d} - {folio - 1:06d}',
+            'estatus': rnd.choice(['Completado', 'Completado', 'Pendiente', 'Cancelado']),
+        })
+
+    _escribir_json(os.path.join(data_dir, 'Clientes.json'), clientes)
+    _escribir_json(os.path.join(data_dir, 'Firmas.json'), firmas)
+    _escribir_json(os.path.join(data_dir, 'Normas.json'), normas)
+    _escribir_json(os.path.join(data_dir, 'tabla_de_relacion.json'), tabla)
+    _escribir_json(os.path.join(data_dir, 'historial_visitas.json'), {'visitas': visitas})
+    return len(tabla)
+
+
+def generar_espacio_trabajo(raiz: str, familias: int = 30, productos: int = 4,
+                            imagenes_por_codigo: int = 2, profundidad: int = 2,
+                            proporcion_decathlon: float = 0.3, proporcion_asig: float = 0.2,
+                            tamano_imagen=(640, 480), folios: int = 0,
+                            semilla: int = 2025) -> dict:
+    """
+    Escribe el espacio de trabajo completo en `raiz` (ver docstring del módulo).
+
+    Args:
+        familias: Número de familias (LISTA) de la tabla de relación
+        productos: Máximo de productos por familia (mínimo la mitad)
+        imagenes_por_codigo: Fotografías por carpeta de código
+        profundidad: Niveles de carpetas entre la raíz de evidencias y cada código
+        proporcion_decathlon: Fracción de familias de marcas Decathlon
+            (flujo etiqueta, EAN numéricos)
+        proporcion_asig: Fracción de filas con columna ASIG (carpeta de lote)
+        tamano_imagen: (ancho, alto) en píxeles de cada fotografía
+        folios: Folios del año sintético de `control_folios/` (0 = no se genera)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        dict con rutas (`raiz`, `data`, `appdata`, `evidencias`,
+        `control_folios`), los
+        `codigos` generados y conteos (`filas`, `familias`, `imagenes`...).
+    """
+    rnd = random.Random(semilla)
+    data_dir = os.path.join(raiz, 'data')
+    appdata = os.path.join(raiz, 'appdata')
+    os.makedirs(data_dir, exist_ok=True)
+
+    firmas = generar_firmas(raiz, rnd)
+    tabla, base, codigos = generar_tabla_y_base(rnd, familias, productos, proporcion_decathlon,
+                                                proporcion_asig, firmas)
+    arbol = generar_arbol_evidencias(raiz, rnd, codigos, imagenes_por_codigo, profundidad,
+                                     tamano_imagen=tuple(tamano_imagen))
+
+    normas = [{'NOM': nom, 'NOMBRE': f'Norma sintética {num}', 'CAPITULO': '4 (Especificaciones)'}
+              for num, (nom, _) in NORMAS.items()]
+    # `cargar_clientes` indexa por las claves en minúsculas marca/nombre/rfc
+    clientes = [{'CLIENTE': CLIENTE_DECATHLON, 'RFC': 'ADD000101AB1', 'marca': m,
+                 'nombre': CLIENTE_DECATHLON, 'rfc': 'ADD000101AB1'} for m in MARCAS_DECATHLON]
+    clientes.append({'CLIENTE': 'CLIENTE SINTÉTICO S.A. DE C.V.', 'RFC': 'CSI000101AB1'})
+
+    _escribir_json(os.path.join(data_dir, 'tabla_de_relacion.json'), tabla)
+    _escribir_json(os.path.join(data_dir, 'BASE_ETIQUETADO.json'), base)
+    _escribir_json(os.path.join(data_dir, 'config_etiquetas.json'), generar_config_etiquetas(rnd))
+    _escribir_json(os.path.join(data_dir, 'Normas.json'), normas)
+    _escribir_json(os.path.join(data_dir, 'Clientes.json'), clientes)
+    _escribir_json(os.path.join(data_dir, 'Firmas.json'), firmas)
+    _escribir_json(os.path.join(data_dir, 'folio_counter.json'), {'last': 1000})
+    # folio_manager puntúa las carpetas `data` candidatas por los archivos que
+    # contienen (contador, historial, clientes); sin historial ganaría la
+    # `data` del repositorio y las corridas avanzarían su contador real.
+    _escribir_json(os.path.join(data_dir, 'historial_visitas.json'), {'visitas': []})
+    _escribir_json(os.path.join(data_dir, 'evidence_paths.json'), {'evidencias': [arbol['raiz']]})
+    _escribir_json(os.path.join(appdata, 'ImagenesVC', 'config.json'),
+                   {'ruta_imagenes': arbol['raiz'], 'ruta_docs': os.path.join(raiz, 'documentos')})
+
+    # Año del control de folios en su propia carpeta: sus Clientes/Normas no
+    # deben mezclarse con los del flujo de dictámenes
+    control_folios = os.path.join(raiz, 'control_folios') if folios > 0 else None
+    filas_folios = generar_anio_folios(control_folios, rnd, folios) if control_folios else 0
+
+    return {
+        'raiz': raiz,
+        'data': data_dir,
+        'appdata': appdata,
+        'evidencias': arbol['raiz'],
+        'codigos': codigos,
+        'filas': len(tabla),
+        'familias': familias,
+        'carpetas_codigo': arbol['carpetas_codigo'],
+        'imagenes': arbol['imagenes'],
+        'control_folios': control_folios,
+        'filas_folios': filas_folios,
+    }
@@ -0,0 +1,292 @@
+"""Escenarios medibles sobre un espacio de trabajo de `datos_sinteticos`.
+
+Cada escenario es una función `escenario(espacio, salida) -> dict` que
+devuelve conteos y segundos; `ejecutar_escenario` la corre en un proceso
+nuevo (contexto `spawn`) para que el cambio de directorio, las variables de
+entorno y el pico de RSS queden aislados por escenario.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_PEGADO = os.path.join(RAIZ_REPO, 'Pegado de Evidenvia Fotografica')
+DIR_DOCUMENTOS = os.path.join(RAIZ_REPO, 'Documentos Inspeccion')
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso actual en MB (None si no se puede medir)."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB; macOS, bytes
+        return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class _Contadores(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        contadores = _Contadores()
+        contadores.cb = ctypes.sizeof(contadores)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return round(contadores.PeakWorkingSetSize / (1024 * 1024), 1)
+    except Exception:
+        pass
+    return None
+
+
+def _preparar_entorno(espacio: dict) -> None:
+    """Apunta la aplicación al espacio sintético (datos, APPDATA y folios)."""
+    for ruta in (RAIZ_REPO, DIR_PEGADO):
+        if ruta not in sys.path:
+            sys.path.insert(0, ruta)
+    os.environ['APPDATA'] = espacio['appdata']
+    os.environ['FOLIO_DATA_DIR'] = espacio['data']
+    os.environ['IMAGENESVC_DATA_DIR'] = espacio['data']
+    os.chdir(espacio['raiz'])
+
+
+@contextlib.contextmanager
+def _silencio():
+    """
+    Descarta los print de los generadores (su E/S de consola distorsiona la
+    medición) y pone la bitácora en modo lote, como una corrida desatendida.
+    """
+    import bitacora
+    with open(os.devnull, 'w', encoding='utf-8') as nulo:
+        with contextlib.redirect_stdout(nulo), contextlib.redirect_stderr(nulo), bitacora.modo_lote():
+            yield
+
+
+# ============================================================
+# ESCENARIOS
+# ============================================================
+def escenario_dictamenes(espacio: dict, salida: str) -> dict:
+    """Flujo completo de `generar_dictamenes_completos` sobre la tabla sintética."""
+    from PyPDF2 import PdfReader
+
+    t0 = time.perf_counter()
+    with _silencio():
+        import generador_dictamen
+    importacion = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with _silencio():
+        exito, mensaje, resultado = generador_dictamen.generar_dictamenes_completos(salida)
+    segundos = time.perf_counter() - t0
+
+    archivos = (resultado or {}).get('archivos') or []
+    paginas = 0
+    for ruta in archivos:
+        try:
+            paginas += len(PdfReader(ruta).pages)
+        except Exception:
+            pass
+    familias = (resultado or {}).get('total_familias') or 0
+    # Tiempo propio por etapa (resultado['timings'] de generador_dictamen)
+    etapas = ((resultado or {}).get('timings') or {}).get('etapas') or {}
+    tiempos_etapa = {f"t_{nombre}": v.get('propio_s') for nombre, v in etapas.items()}
+    return {
+        **tiempos_etapa,
+        'ok': bool(exito),
+        'mensaje': mensaje,
+        'segundos': round(segundos, 3),
+        'importacion_s': round(importacion, 3),
+        'familias': familias,
+        'dictamenes': len(archivos),
+        'paginas': paginas,
+        'familias_s': round(familias / segundos, 2) if segundos else None,
+        'paginas_s': round(paginas / segundos, 2) if segundos else None,
+    }
+
+
+def escenario_etiquetas(espacio: dict, salida: str) -> dict:
+    """Etiquetas en memoria para todas las filas (clave compuesta, como el dictamen)."""
+    with _silencio():
+        from etiqueta_dictamen import GeneradorEtiquetasDecathlon
+        t0 = time.perf_counter()
+        generador = GeneradorEtiquetasDecathlon()
+        carga = time.perf_counter() - t0
+
+    codigos = [{k: c[k] for k in ('codigo', 'solicitud', 'marca', 'pais_origen')} for c in espacio['codigos']]
+    t0 = time.perf_counter()
+    with _silencio():
+        etiquetas = generador.generar_etiquetas_por_codigos(codigos)
+    segundos = time.perf_counter() - t0
+    return {
+        'ok': bool(etiquetas),
+        'segundos': round(segundos, 3),
+        'carga_s': round(carga, 3),
+        'solicitadas': len(codigos),
+        'etiquetas': len(etiquetas),
+        'etiquetas_s': round(len(etiquetas) / segundos, 2) if segundos else None,
+    }
+
+
+def escenario_evidencias(espacio: dict, salida: str) -> dict:
+    """
+    Búsquedas de evidencias de las herramientas de pegado:
+    índice de carpetas + ASIG (`pegado_carpetas`) e `IndiceImagenes` (`main`).
+    """
+    with _silencio():
+        import main as pegado_main
+        import pegado_carpetas
+        from sesion_pegado import SesionPegado
+
+    # Indexado: carpetas que contienen carpetas de código y sus imágenes
+    t0 = time.perf_counter()
+    with _silencio():
+        sesion = SesionPegado(os.path.join(espacio['data'], 'tabla_de_relacion.json')).cargar()
+        indice_carpetas = {}
+        entradas = []
+        for root, dirs, files in os.walk(espacio['evidencias']):
+            if dirs:
+                for clave, rutas in pegado_carpetas.construir_indice_carpetas(root).items():
+                    indice_carpetas.setdefault(clave, []).extend(rutas)
+            if files:
+                entradas.extend(pegado_main.indexar_imagenes(root))
+        indice_imagenes = pegado_main.IndiceImagenes(entradas)
+    indexado = time.perf_counter() - t0
+
+    claves = [pegado_main.normalizar_cadena_alnum_mayus(c['codigo']) for c in espacio['codigos']]
+
+    t0 = time.perf_counter()
+    encontradas_carpeta = 0
+    for clave in claves:
+        for carpeta in pegado_carpetas.carpetas_para_codigo(clave, indice_carpetas, sesion):
+            if pegado_carpetas.imagenes_de_carpeta(carpeta, clave):
+                encontradas_carpeta += 1
+                break
+    seg_carpeta = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    encontradas_indice = 0
+    for c in espacio['codigos']:
+        if pegado_main.buscar_imagen_index(indice_imagenes, c['codigo'], set(), set()):
+            encontradas_indice += 1
+    seg_indice = time.perf_counter() - t0
+
+    busquedas = 2 * len(claves)
+    segundos = seg_carpeta + seg_indice
+    return {
+        'ok': encontradas_carpeta > 0 and encontradas_indice > 0,
+        'segundos': round(segundos, 3),
+        'indexado_s': round(indexado, 3),
+        'imagenes_indexadas': len(indice_imagenes),
+        'busquedas': busquedas,
+        'encontradas_carpeta': encontradas_carpeta,
+        'encontradas_indice': encontradas_indice,
+        'busquedas_carpeta_s': round(len(claves) / seg_carpeta, 1) if seg_carpeta else None,
+        'busquedas_indice_s': round(len(claves) / seg_indice, 1) if seg_indice else None,
+        'busquedas_s': round(busquedas / segundos, 1) if segundos else None,
+    }
+
+
+def escenario_control_folios(espacio: dict, salida: str) -> dict:
+    """
+    `ControlFoliosAnual.generar_filas` sobre el año sintético, secuencial y con
+    `procesos_folios` procesos; falla si las filas paralelas no son idénticas
+    (y en el mismo orden) a las secuenciales.
+    """
+    if not espacio.get('control_folios'):
+        return {'ok': False, 'error': "Espacio sin año sintético de control de folios (--folios 0)"}
+    if DIR_DOCUMENTOS not in sys.path:
+        sys.path.insert(0, DIR_DOCUMENTOS)
+    with _silencio():
+        from control_folios_anual import ControlFoliosAnual
+        generador = ControlFoliosAnual(data_dir=espacio['control_folios'])
+        t0 = time.perf_counter()
+        exito, mensaje = generador.cargar_datos()
+        carga = time.perf_counter() - t0
+    if not exito:
+        return {'ok': False, 'error': mensaje}
+    # Mismos dictámenes agrupados que exporta crear_excel
+    with _silencio():
+        folio_map_int, folios = generador._folios_para_exportar()
+    dictamenes = [folio_map_int[f] for f in folios if folio_map_int.get(f)]
+
+    def _medir(workers):
+        # Sin memo entre corridas para medir trabajo completo
+        generador._dictamen_lookup_cache = {}
+        t0 = time.perf_counter()
+        with _silencio():
+            filas = list(generador.generar_filas(dictamenes, workers=workers))
+        return filas, time.perf_counter() - t0
+
+    procesos = max(2, int(espacio.get('procesos_folios') or 2))
+    secuenciales, segundos = _medir(1)
+    paralelas, seg_paralelo = _medir(procesos)
+    return {
+        'ok': paralelas == secuenciales,
+        'segundos': round(segundos, 3),
+        'carga_s': round(carga, 3),
+        'filas': len(secuenciales),
+        'procesos': procesos,
+        'paralelo_s': round(seg_paralelo, 3),
+        'filas_s': round(len(secuenciales) / segundos, 1) if segundos else None,
+        'filas_s_paralelo': round(len(paralelas) / seg_paralelo, 1) if seg_paralelo else None,
+        'aceleracion': round(segundos / seg_paralelo, 2) if seg_paralelo else None,
+    }
+
+
+ESCENARIOS = {
+    'dictamenes': escenario_dictamenes,
+    'etiquetas': escenario_etiquetas,
+    'evidencias': escenario_evidencias,
+    'control_folios': escenario_control_folios,
+}
+
+
+# ============================================================
+# EJECUCIÓN AISLADA
+# ============================================================
+def _proceso_escenario(nombre: str, espacio: dict, salida: str, cola) -> None:
+    try:
+        _preparar_entorno(espacio)
+        resultado = ESCENARIOS[nombre](espacio, salida)
+    except Exception as e:
+        resultado = {'ok': False, 'error': f"{type(e).__name__}: {e}", 'traza': traceback.format_exc()}
+    resultado['pico_rss_mb'] = pico_rss_mb()
+    cola.put(resultado)
+
+
+def ejecutar_escenario(nombre: str, espacio: dict, salida: str, timeout: float = 3600) -> dict:
+    """
+    Corre el escenario `nombre` en un proceso nuevo y devuelve sus métricas
+    (incluye `pico_rss_mb` del proceso hijo).
+    """
+    if nombre not in ESCENARIOS:
+        raise ValueError(f"Escenario desconocido: {nombre} (disponibles: {', '.join(ESCENARIOS)})")
+    ctx = multiprocessing.get_context('spawn')
+    cola = ctx.Queue()
+    proceso = ctx.Process(target=_proceso_escenario, args=(nombre, espacio, salida, cola),
+                          name=f"benchmark_{nombre}")
+    proceso.start()
+    try:
+        resultado = cola.get(timeout=timeout)
+    except Exception:
+        resultado = {'ok': False, 'error': f"Sin resultado tras {timeout:.0f}s (código de salida {proceso.exitcode})"}
+    proceso.join(10)
+    if proceso.is_alive():
+        proceso.terminate()
+    return resultado
@@ -0,0 +1,222 @@
+"""Bitácora con niveles para los bucles por código (evidencias, etiquetas).
+
+Los generadores reportan su avance con `print`, incluso dentro de los bucles
+por código, por base de evidencias y por etiqueta. En una consola de Windows
+esa E/S es una parte real del tiempo del lote. Este módulo ofrece una fachada
+sobre `logging` pensada para esos bucles:
+
+    from bitacora import obtener
+    log = obtener('evidencias')
+    log.debug("         -> Revisando base: %s, carpeta esperada: %s", base, carpeta)
+
+- Formato diferido estilo `%`: el mensaje solo se arma si el nivel está
+  habilitado (`log.debug(...)` con el nivel en INFO cuesta una comparación).
+- Salida con búfer: las líneas se acumulan y se escriben en bloque en
+  `sys.stdout` (al llenarse el búfer, cada `INTERVALO_VACIADO` segundos, ante
+  un aviso/error, con `vaciar()` y al salir del proceso).
+- Límite de repeticiones: una misma plantilla de mensaje se imprime como
+  máximo `LIMITE_POR_PLANTILLA` veces por ventana de `VENTANA_LIMITE`
+  segundos; el resto se cuenta y se informa al vaciar.
+- `modo_lote()`: modo silencioso para lotes; solo deja pasar avisos y errores.
+
+El nivel se controla con `establecer_nivel` (el generador lo liga a
+`DEBUG_VERBOSE`) o con la variable de entorno `IMAGENESVC_LOG_NIVEL`
+(DEBUG, INFO, AVISO, ERROR).
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+AVISO = logging.WARNING
+ERROR = logging.ERROR
+
+_NOMBRES_NIVEL = {
+    'DEBUG': DEBUG,
+    'INFO': INFO,
+    'AVISO': AVISO,
+    'WARNING': AVISO,
+    'ERROR': ERROR,
+}
+
+RAIZ = 'imagenesvc'
+CAPACIDAD_BUFER = 200
+INTERVALO_VACIADO = 0.5
+VENTANA_LIMITE = 1.0
+LIMITE_POR_PLANTILLA = 50
+
+
+# ============================================================
+# SALIDA CON BÚFER Y LÍMITE DE REPETICIONES
+# ============================================================
+class SalidaConsola(logging.Handler):
+    """Escribe en `sys.stdout` por bloques y limita mensajes repetidos."""
+
+    def __init__(self, capacidad: int = CAPACIDAD_BUFER, intervalo: float = INTERVALO_VACIADO,
+                 limite: int = LIMITE_POR_PLANTILLA, ventana: float = VENTANA_LIMITE):
+        super().__init__()
+        self.capacidad = capacidad
+        self.intervalo = intervalo
+        self.limite = limite
+        self.ventana = ventana
+        self._lineas = []
+        self._ultimo_vaciado = time.monotonic()
+        # plantilla -> [inicio de ventana, emitidos, omitidos]
+        self._conteos: Dict[tuple, list] = {}
+        self.omitidos_por_limite = 0
+
+    def _permitir(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= ERROR or not self.limite:
+            return True
+        clave = (record.name, record.msg)
+        ahora = record.created
+        conteo = self._conteos.get(clave)
+        if conteo is None or ahora - conteo[0] >= self.ventana:
+            if conteo is not None and conteo[2]:
+                self._lineas.append(self._texto_omitidos(record.msg, conteo[2]))
+            self._conteos[clave] = [ahora, 1, 0]
+            return True
+        if conteo[1] < self.limite:
+            conteo[1] += 1
+            return True
+        conteo[2] += 1
+        self.omitidos_por_limite += 1
+        return False
+
+    @staticmethod
+    def _texto_omitidos(plantilla, cantidad: int) -> str:
+        muestra = str(plantilla).strip()
+        if len(muestra) > 60:
+            muestra = muestra[:57] + '...'
+        return f"   … {cantidad} mensajes repetidos omitidos: «{muestra}»"
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            with self.lock:
+                if not self._permitir(record):
+                    return
+                linea = self.format(record)
+                if (record.levelno >= AVISO or len(self._lineas) + 1 >= self.capacidad
+                        or time.monotonic() - self._ultimo_vaciado >= self.intervalo):
+                    self._vaciar_sin_bloqueo(linea)
+                else:
+                    self._lineas.append(linea)
+        except Exception:
+            self.handleError(record)
+
+    def _vaciar_sin_bloqueo(self, ultima: Optional[str] = None) -> None:
+        # Reportar ventanas con mensajes omitidos antes del mensaje que provocó el vaciado
+        for plantilla, conteo in list(self._conteos.items()):
+            if conteo[2]:
+                self._lineas.append(self._texto_omitidos(plantilla[1], conteo[2]))
+                conteo[2] = 0
+        if ultima is not None:
+            self._lineas.append(ultima)
+        self._ultimo_vaciado = time.monotonic()
+        if not self._lineas:
+            return
+        texto = '\n'.join(self._lineas) + '\n'
+        self._lineas = []
+        # Resolver sys.stdout en cada vaciado: respeta redirecciones
+        # (contextlib.redirect_stdout) y el .exe sin consola (stdout None).
+        salida = sys.stdout
+        if salida is None:
+            return
+        try:
+            salida.write(texto)
+        except UnicodeEncodeError:
+            codificacion = getattr(salida, 'encoding', None) or 'ascii'
+            salida.write(texto.encode(codificacion, errors='replace').decode(codificacion, errors='replace'))
+        try:
+            salida.flush()
+        except Exception:
+            pass
+
+    def flush(self) -> None:
+        with self.lock:
+            try:
+                self._vaciar_sin_bloqueo()
+            except Exception:
+                pass
+
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+_LOCK = threading.Lock()
+_salida: Optional[SalidaConsola] = None
+
+
+def _nivel_desde_entorno() -> int:
+    try:
+        return _NOMBRES_NIVEL.get(str(os.environ.get('IMAGENESVC_LOG_NIVEL', '')).strip().upper(), INFO)
+    except Exception:
+        return INFO
+
+
+def _configurar() -> logging.Logger:
+    global _salida
+    raiz = logging.getLogger(RAIZ)
+    if _salida is not None:
+        return raiz
+    with _LOCK:
+        if _salida is None:
+            salida = SalidaConsola()
+            salida.setFormatter(logging.Formatter('%(message)s'))
+            raiz.addHandler(salida)
+            # No pasar por el logger raíz: otras librerías pueden configurarlo
+            raiz.propagate = False
+            raiz.setLevel(_nivel_desde_entorno())
+            _salida = salida
+            atexit.register(vaciar)
+    return raiz
+
+
+def obtener(nombre: Optional[str] = None) -> logging.Logger:
+    """Logger de la aplicación (`imagenesvc.<nombre>`)."""
+    raiz = _configurar()
+    return raiz.getChild(nombre) if nombre else raiz
+
+
+def establecer_nivel(nivel) -> None:
+    """Fija el nivel global (DEBUG/INFO/AVISO/ERROR, numérico o por nombre)."""
+    if isinstance(nivel, str):
+        nivel = _NOMBRES_NIVEL.get(nivel.strip().upper(), INFO)
+    _configurar().setLevel(nivel)
+
+
+def nivel_actual() -> int:
+    """Nivel global vigente."""
+    return _configurar().level
+
+
+def vaciar() -> None:
+    """Escribe de inmediato las líneas pendientes (p. ej. antes de un `print`)."""
+    if _salida is not None:
+        _salida.flush()
+
+
+@contextmanager
+def modo_lote(nivel_minimo: int = AVISO):
+    """
+    Modo silencioso para lotes: durante el bloque solo se imprimen mensajes de
+    `nivel_minimo` o superior. Sube el nivel del logger (no filtra después),
+    así que los mensajes de detalle ni siquiera se formatean.
+    """
+    raiz = _configurar()
+    anterior = raiz.level
+    vaciar()
+    raiz.setLevel(max(anterior, nivel_minimo))
+    try:
+        yield
+    finally:
+        raiz.setLevel(anterior)
+        vaciar()
@@ -43,8 +43,15 @@ SET ADD5=--add-data "img;img"
 
 
 
+REM Manifest of bundled data/resources: the exe compares fingerprints at startup
+REM instead of walking every folder (see sincronizacion_datos.py)
+echo Generating resource manifest...
+py sincronizacion_datos.py --generar
+SET ADD7=--add-data "manifest_recursos.json;."
+
 REM Build ADD_FLAGS from existing source folders to avoid PyInstaller errors
 SET ADD_FLAGS=
+IF EXIST "manifest_recursos.json" SET ADD_FLAGS=%ADD_FLAGS% %ADD7%
 IF EXIST "data" SET ADD_FLAGS=%ADD_FLAGS% %ADD1%
 IF EXIST "Documentos Inspeccion" SET ADD_FLAGS=%ADD_FLAGS% %ADD2%
 IF EXIST "Pegado de Evidenvia Fotografica" SET ADD_FLAGS=%ADD_FLAGS% %ADD3%
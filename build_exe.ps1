@@ -13,8 +13,13 @@ try {
     python -m pip install pyinstaller --upgrade
 }
 
+# Manifest of bundled data/resources (see sincronizacion_datos.py)
+Write-Host "Generating resource manifest..."
+python sincronizacion_datos.py --generar
+
 # Build command
 $addData = @(
+    '"manifest_recursos.json;."',
     '"data;data"',
     '"Firmas;Firmas"',
     '"img;img"',
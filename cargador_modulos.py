@@ -0,0 +1,217 @@
+"""Caché de módulos cargados desde archivo (generadores y scripts de pegado).
+
+La aplicación cargaba `Constancia.py`, `Acta_inspeccion.py`,
+`Oficio_comision.py`, `Formato_supervision.py`, `control_folios_anual.py` y
+`pegado_indice.py` con `spec_from_file_location(...).loader.exec_module` en
+cada clic, volviendo a ejecutar el módulo completo (y sus imports de
+ReportLab, pandas u openpyxl). Aquí cada módulo se ejecuta una sola vez por
+proceso y queda registrado en `sys.modules`; solo se vuelve a ejecutar si el
+archivo cambió (mtime o tamaño distintos).
+
+`precargar(...)` carga una lista de módulos en un hilo de fondo (por ejemplo
+después del login) para que el primer clic tampoco pague el tiempo de import.
+
+`ModuloPerezoso` difiere el import de bibliotecas pesadas (pandas, PIL...)
+hasta el primer acceso a uno de sus atributos.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# nombre -> (ruta, mtime_ns, tamaño, módulo)
+_MODULOS: Dict[str, Tuple[str, int, int, object]] = {}
+# Un lock por nombre: dos hilos que piden el mismo módulo esperan a una sola ejecución
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCK_GLOBAL = threading.Lock()
+_ESTADISTICAS = {'aciertos': 0, 'ejecuciones': 0, 'segundos': {}, 'errores': {}}
+
+
+def _lock_de(nombre: str) -> threading.Lock:
+    with _LOCK_GLOBAL:
+        lock = _LOCKS.get(nombre)
+        if lock is None:
+            lock = _LOCKS[nombre] = threading.Lock()
+        return lock
+
+
+def _huella(ruta: str) -> Tuple[int, int]:
+    st = os.stat(ruta)
+    return st.st_mtime_ns, st.st_size
+
+
+def cargar_modulo(nombre: str, ruta: str, ruta_busqueda: Optional[str] = None):
+    """
+    Devuelve el módulo `nombre` ejecutado desde `ruta`, reutilizando la
+    ejecución anterior si el archivo no cambió.
+
+    Args:
+        nombre: Nombre con el que se registra en `sys.modules`
+        ruta: Archivo .py del módulo
+        ruta_busqueda: Carpeta que se agrega temporalmente a `sys.path`
+            mientras se ejecuta el módulo (para sus imports locales)
+
+    Raises:
+        FileNotFoundError: si no existe `ruta`
+        ImportError: si no se pudo crear el spec del módulo
+        Exception: cualquier error al ejecutar el módulo (no queda en caché)
+    """
+    ruta = os.path.abspath(ruta)
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No se encontró el módulo: {ruta}")
+    with _lock_de(nombre):
+        huella = _huella(ruta)
+        entrada = _MODULOS.get(nombre)
+        if entrada is not None and entrada[0] == ruta and entrada[1:3] == huella:
+            with _LOCK_GLOBAL:
+                _ESTADISTICAS['aciertos'] += 1
+            # Otro código pudo reemplazarlo en sys.modules; dejar el de la caché
+            sys.modules[nombre] = entrada[3]
+            return entrada[3]
+
+        spec = importlib.util.spec_from_file_location(nombre, ruta)
+        if spec is None or getattr(spec, 'loader', None) is None:
+            raise ImportError(f"No se pudo cargar el módulo {nombre} (spec inválido): {ruta}")
+        mod = importlib.util.module_from_spec(spec)
+        anterior = sys.modules.get(nombre)
+        sys.modules[nombre] = mod
+
+        agregada = False
+        if ruta_busqueda and ruta_busqueda not in sys.path:
+            sys.path.insert(0, ruta_busqueda)
+            agregada = True
+        t0 = time.perf_counter()
+        try:
+            spec.loader.exec_module(mod)
+        except Exception as e:
+            # No dejar un módulo a medio ejecutar registrado
+            if anterior is not None:
+                sys.modules[nombre] = anterior
+            else:
+                sys.modules.pop(nombre, None)
+            with _LOCK_GLOBAL:
+                _ESTADISTICAS['errores'][nombre] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if agregada:
+                try:
+                    sys.path.remove(ruta_busqueda)
+                except ValueError:
+                    pass
+
+        _MODULOS[nombre] = (ruta, huella[0], huella[1], mod)
+        with _LOCK_GLOBAL:
+            _ESTADISTICAS['ejecuciones'] += 1
+            _ESTADISTICAS['segundos'][nombre] = round(time.perf_counter() - t0, 3)
+            _ESTADISTICAS['errores'].pop(nombre, None)
+        return mod
+
+
+def precargar(modulos: Iterable[Tuple], en_hilo: bool = True,
+              al_terminar: Optional[Callable[[dict], None]] = None):
+    """
+    Carga `modulos` (tuplas `(nombre, ruta)` o `(nombre, ruta, ruta_busqueda)`)
+    sin propagar errores; un módulo que falla se reintenta en el siguiente
+    `cargar_modulo`.
+
+    Args:
+        en_hilo: Si True, carga en un hilo de fondo (daemon) y devuelve el hilo
+        al_terminar: Callback opcional con `estadisticas()` al finalizar
+
+    Returns:
+        El hilo iniciado (en_hilo=True) o el dict de estadísticas.
+    """
+    lista = [tuple(m) for m in modulos]
+
+    def _cargar():
+        t0 = time.perf_counter()
+        for spec in lista:
+            try:
+                cargar_modulo(*spec)
+            except Exception as e:
+                print(f"⚠️ No se pudo precargar {spec[0]}: {e}")
+        resumen = estadisticas()
+        resumen['precarga_segundos'] = round(time.perf_counter() - t0, 3)
+        if al_terminar:
+            try:
+                al_terminar(resumen)
+            except Exception:
+                pass
+        return resumen
+
+    if not en_hilo:
+        return _cargar()
+    hilo = threading.Thread(target=_cargar, name="precarga_modulos", daemon=True)
+    hilo.start()
+    return hilo
+
+
+class ModuloPerezoso:
+    """
+    Sustituto de un módulo que lo importa en el primer acceso a un atributo.
+
+    `importar` debe contener el `import` explícito (no una cadena) para que
+    PyInstaller siga detectando la dependencia:
+
+        def _importar_pandas():
+            import pandas
+            return pandas
+        pd = ModuloPerezoso('pandas', _importar_pandas)
+    """
+
+    def __init__(self, nombre: str, importar: Callable[[], object]):
+        self.__dict__['_nombre'] = nombre
+        self.__dict__['_importar'] = importar
+        self.__dict__['_modulo'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _cargar(self):
+        mod = self.__dict__['_modulo']
+        if mod is None:
+            with self.__dict__['_lock']:
+                mod = self.__dict__['_modulo']
+                if mod is None:
+                    mod = self.__dict__['_importar']()
+                    self.__dict__['_modulo'] = mod
+        return mod
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __setattr__(self, atributo, valor):
+        setattr(self._cargar(), atributo, valor)
+
+    def __repr__(self):
+        estado = 'cargado' if self.__dict__['_modulo'] is not None else 'sin cargar'
+        return f"<ModuloPerezoso {self.__dict__['_nombre']} ({estado})>"
+
+
+def modulo_cargado(nombre: str):
+    """Módulo en caché (sin comprobar el archivo) o None."""
+    entrada = _MODULOS.get(nombre)
+    return entrada[3] if entrada else None
+
+
+def estadisticas() -> dict:
+    """Aciertos, ejecuciones, segundos por módulo y errores de la última carga."""
+    with _LOCK_GLOBAL:
+        return {
+            'aciertos': _ESTADISTICAS['aciertos'],
+            'ejecuciones': _ESTADISTICAS['ejecuciones'],
+            'segundos': dict(_ESTADISTICAS['segundos']),
+            'errores': dict(_ESTADISTICAS['errores']),
+            'en_cache': sorted(_MODULOS),
+        }
+
+
+def olvidar(nombre: Optional[str] = None) -> None:
+    """Quita un módulo (o todos) de la caché; la siguiente carga lo vuelve a ejecutar."""
+    with _LOCK_GLOBAL:
+        if nombre is None:
+            _MODULOS.clear()
+        else:
+            _MODULOS.pop(nombre, None)
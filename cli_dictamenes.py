@@ -0,0 +1,505 @@
+"""Generación de dictámenes sin interfaz gráfica (lotes programados, perfilado).
+
+Corre el mismo flujo que el botón "Generar dictámenes" de la aplicación
+(`generador_dictamen.generar_dictamenes_completos`) sin importar tkinter ni
+customtkinter:
+
+    python cli_dictamenes.py --salida D:/Dictamenes/2025-06-01
+                             [--tabla tabla.xlsx | tabla.json] [--base CARPETA]
+                             [--cliente NOMBRE --rfc RFC] [--workers 4]
+                             [--profile [RUTA.prof]] [--trace [RUTA.json]] [--quiet]
+                             [--no-reanudar]
+
+- `--tabla`: se importa como lo hace "Cargar tabla de relación" (Excel ->
+  JSON con folios asignados en memoria a partir del contador) y queda en
+  `<base>/data/tabla_de_relacion.json`; sin `--tabla` se usa la tabla ya
+  cargada.
+- `--workers N`: reparte las familias en N procesos. Antes de repartir se
+  asignan los folios en la tabla (en orden) para que cada proceso use los
+  suyos sin reservar bloques por separado.
+- Reanudación: si la carpeta de salida ya tiene un diario de un lote anterior
+  (`diario_lote.py`), solo se regeneran las familias que fallaron o cuyos
+  datos cambiaron, con sus mismos folios. `--no-reanudar` regenera todo.
+- `--profile` / `--trace`: cProfile (.prof, combinado entre procesos) y traza
+  por etapa en formato Chrome trace (ver `trazas.py`).
+
+Los mensajes del flujo se escriben en stderr; stdout recibe solo el resumen
+JSON final (código de salida 0 si se generó al menos un dictamen, 1 si no,
+2 si la entrada no es válida).
+"""
+
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import multiprocessing
+import os
+import pstats
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+BASE_DEFAULT = os.path.dirname(os.path.abspath(__file__))
+
+# Alias aceptados para las columnas obligatorias (mismos que la importación de la app)
+COLUMNAS_REQUERIDAS = {
+    'SOLICITUD': ['SOLICITUD', 'Solicitud', 'solicitud'],
+    'LISTA': ['LISTA', 'Lista', 'lista'],
+    'FIRMA': ['FIRMA', 'Firma', 'firma', 'INSPECTOR', 'Inspector'],
+}
+COLUMNAS_SOLICITUD = ['SOLICITUD', 'SOLICITUDES', 'NO. SOLICITUD', 'NO SOLICITUD', 'SOLICITUD NO.', 'NÚMERO DE SOLICITUD']
+
+
+class EntradaInvalida(Exception):
+    """La tabla indicada no se puede importar."""
+
+
+def _preparar_entorno(base: str) -> None:
+    """Apunta los módulos del generador a `<base>/data` (rutas relativas y folios)."""
+    base = os.path.abspath(base)
+    if base not in sys.path:
+        sys.path.insert(0, base)
+    if BASE_DEFAULT not in sys.path:
+        sys.path.insert(0, BASE_DEFAULT)
+    datos = os.path.join(base, 'data')
+    os.environ['IMAGENESVC_DATA_DIR'] = datos
+    os.environ['FOLIO_DATA_DIR'] = datos
+    os.chdir(base)
+
+
+# ============================================================
+# IMPORTACIÓN DE LA TABLA DE RELACIÓN
+# ============================================================
+def _valor(registro: dict, claves) -> str:
+    for k in claves:
+        v = registro.get(k)
+        if v is not None and str(v).strip() != '':
+            return str(v).strip()
+    return ''
+
+
+def _norm_codigo(v):
+    """CODIGO/SKU como texto sin '.0' (igual que la importación de la app)."""
+    try:
+        import pandas as pd
+        if pd.isna(v):
+            return None
+    except Exception:
+        pass
+    if v is None:
+        return None
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else format(v, 'g')
+    if isinstance(v, int):
+        return str(v)
+    s = str(v).strip()
+    if s.endswith('.0'):
+        s = s[:-2]
+    if s.lower() == 'nan' or s == '':
+        return None
+    return s
+
+
+def registros_desde_excel(ruta: str) -> list:
+    """Convierte el Excel de la tabla de relación a registros (como `convertir_a_json`)."""
+    import pandas as pd
+
+    df = pd.read_excel(ruta)
+    if df.empty:
+        raise EntradaInvalida("El archivo seleccionado no contiene datos.")
+
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].astype(str)
+
+    def _fecha_suelta(v):
+        if isinstance(v, (pd.Timestamp, datetime, date)):
+            return v.strftime('%d/%m/%Y')
+        return v
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].apply(_fecha_suelta)
+
+    df.columns = df.columns.str.strip()
+    col_solicitud = next((c for c in COLUMNAS_SOLICITUD if c in df.columns), None)
+    if col_solicitud is None:
+        col_solicitud = next((c for c in df.columns if isinstance(c, str) and 'solicitud' in c.lower()), None)
+    if col_solicitud and col_solicitud != 'SOLICITUD':
+        df.rename(columns={col_solicitud: 'SOLICITUD'}, inplace=True)
+
+    try:
+        df = df.astype(object).where(pd.notnull(df), None)
+    except Exception:
+        pass
+
+    registros = []
+    for idx, row in df.iterrows():
+        rec = {c: row.get(c, None) for c in df.columns}
+        rec['_orig_index'] = idx
+        rec['_excel_row'] = idx + 2 if isinstance(idx, int) else str(idx)
+        for k in ('CODIGO', 'SKU'):
+            if k in rec:
+                rec[k] = _norm_codigo(rec[k])
+        registros.append(rec)
+    return registros
+
+
+def validar_registros(registros: list) -> None:
+    """Columnas y valores obligatorios (SOLICITUD, LISTA, FIRMA)."""
+    if not registros:
+        raise EntradaInvalida("La tabla de relación está vacía.")
+    columnas = {str(c).upper().strip() for r in registros for c in r.keys()}
+    faltantes = [c for c, alias in COLUMNAS_REQUERIDAS.items()
+                 if not any(a.upper() in columnas for a in alias)]
+    if faltantes:
+        raise EntradaInvalida("Columnas requeridas no encontradas: " + ", ".join(faltantes))
+    vacias = {}
+    for registro in registros:
+        normalizado = {str(k).upper().strip(): v for k, v in registro.items()}
+        for campo, alias in COLUMNAS_REQUERIDAS.items():
+            if not _valor(normalizado, [a.upper() for a in alias]):
+                vacias.setdefault(campo, []).append(registro.get('_excel_row') or '?')
+    if vacias:
+        detalle = "; ".join(f"{c}: {len(filas)} fila(s) vacías (p. ej. {', '.join(map(str, filas[:10]))})"
+                            for c, filas in vacias.items())
+        raise EntradaInvalida("Filas con datos incompletos: " + detalle)
+
+
+def _norma(registro: dict) -> str:
+    return _valor(registro, ('NORMA UVA', 'NORMA_UVA', 'CLASIF UVA', 'CLASIF_UVA', 'NORMA', 'Norma', 'norma'))
+
+
+def asignar_folios_en_memoria(registros: list) -> int:
+    """
+    Asigna un folio por (SOLICITUD, LISTA, NORMA) a partir del contador de
+    `folio_manager`, sin avanzarlo (como la importación de la app). Devuelve
+    el número de folios asignados.
+    """
+    import folio_manager
+
+    try:
+        siguiente = int(folio_manager.get_last() or 0) + 1
+    except Exception:
+        siguiente = 1
+    por_par = {}
+    for r in registros:
+        lista = _valor(r, ('LISTA', 'Lista', 'lista'))
+        if not lista:
+            continue
+        par = (_valor(r, ('SOLICITUD', 'Solicitud', 'solicitud')), lista, _norma(r))
+        if par not in por_par:
+            por_par[par] = siguiente
+            siguiente += 1
+        r['FOLIO'] = por_par[par]
+    return len(por_par)
+
+
+def _folios_preasignados(registros: list) -> bool:
+    """True si todas las filas con LISTA traen un folio mayor al contador actual."""
+    import folio_manager
+
+    try:
+        ultimo = int(folio_manager.get_last() or 0)
+    except Exception:
+        ultimo = 0
+    folios = []
+    for r in registros:
+        if not _valor(r, ('LISTA', 'Lista', 'lista')):
+            continue
+        try:
+            folios.append(int(float(str(r.get('FOLIO') if 'FOLIO' in r else r.get('folio')))))
+        except Exception:
+            return False
+    return bool(folios) and min(folios) > ultimo
+
+
+def importar_tabla(ruta: str, destino: str) -> list:
+    """Importa `ruta` (.xlsx/.xls/.json) como la tabla de relación en `destino`."""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.xlsx', '.xlsm', '.xls', '.xlsb'):
+        registros = registros_desde_excel(ruta)
+        validar_registros(registros)
+        asignados = asignar_folios_en_memoria(registros)
+        print(f"🔢 Folios asignados en memoria a {asignados} familias", file=sys.stderr)
+    elif extension == '.json':
+        with open(ruta, 'r', encoding='utf-8') as f:
+            registros = json.load(f)
+        if not isinstance(registros, list):
+            raise EntradaInvalida(f"{ruta} no es una tabla de relación (se esperaba una lista de registros).")
+        validar_registros(registros)
+    else:
+        raise EntradaInvalida(f"Formato no soportado: {extension or ruta}")
+    guardar_tabla(registros, destino)
+    return registros
+
+
+def guardar_tabla(registros: list, destino: str) -> None:
+    """Escribe la tabla (respaldando la anterior en `tabla_relacion_backups`)."""
+    if os.path.exists(destino):
+        respaldos = os.path.join(os.path.dirname(destino), 'tabla_relacion_backups')
+        try:
+            os.makedirs(respaldos, exist_ok=True)
+            respaldo = os.path.join(respaldos, f"tabla_de_relacion_cli_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(destino, 'rb') as fo, open(respaldo, 'wb') as fd:
+                fd.write(fo.read())
+        except Exception as e:
+            print(f"⚠️ No se pudo respaldar la tabla anterior: {e}", file=sys.stderr)
+
+    def _json_default(o):
+        if isinstance(o, (datetime, date)):
+            return o.strftime('%d/%m/%Y')
+        return str(o)
+
+    tmp = destino + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(registros, f, ensure_ascii=False, indent=2, default=_json_default)
+    os.replace(tmp, destino)
+
+
+# ============================================================
+# REPARTO ENTRE PROCESOS
+# ============================================================
+def repartir_familias(familias: dict, partes: int) -> list:
+    """
+    Divide las familias en `partes` bloques contiguos (respetando el orden de
+    la tabla) con un número parecido de registros.
+    """
+    claves = list(familias)
+    partes = max(1, min(partes, len(claves)))
+    total = sum(len(v) for v in familias.values())
+    bloques, actual, acumulado = [], [], 0
+    for clave in claves:
+        actual.append(clave)
+        acumulado += len(familias[clave])
+        restantes = partes - len(bloques) - 1
+        if restantes and acumulado >= total * (len(bloques) + 1) / partes:
+            bloques.append(actual)
+            actual = []
+    if actual:
+        bloques.append(actual)
+    return bloques
+
+
+def _ruta_parte(ruta: str, indice: int) -> str:
+    raiz, extension = os.path.splitext(ruta)
+    return f"{raiz}_w{indice}{extension}"
+
+
+def ejecutar_particion(base, salida, listas=None, cliente=None, rfc=None, silencioso=False,
+                       ruta_traza=None, ruta_perfil=None, reanudar=True):
+    """
+    Corre `generar_dictamenes_completos` (en el proceso actual o en un worker).
+    Los `print` del flujo van a stderr (o se descartan con `silencioso`).
+    """
+    _preparar_entorno(base)
+    salida_texto = open(os.devnull, 'w', encoding='utf-8') if silencioso else sys.stderr
+    try:
+        with contextlib.redirect_stdout(salida_texto):
+            import generador_dictamen
+            perfil = cProfile.Profile() if ruta_perfil else None
+            if perfil:
+                perfil.enable()
+            try:
+                exito, mensaje, resultado = generador_dictamen.generar_dictamenes_completos(
+                    salida, cliente, rfc, ruta_traza=ruta_traza, silencioso=silencioso, listas=listas,
+                    reanudar=reanudar)
+            finally:
+                if perfil:
+                    perfil.disable()
+                    perfil.dump_stats(ruta_perfil)
+    finally:
+        if silencioso:
+            salida_texto.close()
+    return exito, mensaje, resultado
+
+
+# ============================================================
+# RESUMEN
+# ============================================================
+_CONTADORES = ('total_generados', 'con_firma', 'sin_firma', 'con_error', 'total_familias', 'json_errores',
+               'reanudadas')
+_LISTAS = ('archivos', 'sin_firma_detalle', 'json_errores_detalle')
+
+
+def combinar_resultados(partes: list) -> dict:
+    """Une los `resultado` de cada partición en uno solo."""
+    combinado = {k: 0 for k in _CONTADORES}
+    combinado.update({k: [] for k in _LISTAS})
+    folios = set()
+    mensajes = []
+    for exito, mensaje, resultado in partes:
+        mensajes.append(mensaje)
+        resultado = resultado or {}
+        for k in _CONTADORES:
+            try:
+                combinado[k] += int(resultado.get(k) or 0)
+            except Exception:
+                pass
+        for k in _LISTAS:
+            combinado[k].extend(resultado.get(k) or [])
+        for f in resultado.get('folios_usados_list') or []:
+            try:
+                folios.add(int(f))
+            except Exception:
+                pass
+    ordenados = sorted(folios)
+    combinado['folios_usados_list'] = [f"{f:06d}" for f in ordenados]
+    if ordenados:
+        combinado['folios_utilizados'] = (f"{ordenados[0]:06d}" if len(ordenados) == 1
+                                          else f"{ordenados[0]:06d} - {ordenados[-1]:06d}")
+    else:
+        combinado['folios_utilizados'] = None
+    combinado['mensajes'] = mensajes
+    return combinado
+
+
+def _avanzar_contador(folios_usados: list) -> None:
+    """Lleva el contador de folios al mayor folio usado (solo hacia arriba)."""
+    if not folios_usados:
+        return
+    try:
+        import folio_manager
+        maximo = max(int(f) for f in folios_usados)
+        if maximo > int(folio_manager.get_last() or 0):
+            folio_manager.set_last(maximo)
+            print(f"🔁 folio_counter.json actualizado a {maximo:06d}", file=sys.stderr)
+    except Exception as e:
+        print(f"⚠️ No se pudo actualizar el contador de folios: {e}", file=sys.stderr)
+
+
+def _imprimir_perfil(ruta: str, lineas: int = 25) -> None:
+    texto = io.StringIO()
+    pstats.Stats(ruta, stream=texto).sort_stats('cumulative').print_stats(lineas)
+    print(texto.getvalue(), file=sys.stderr)
+
+
+# ============================================================
+# PUNTO DE ENTRADA
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera dictámenes sin interfaz gráfica")
+    parser.add_argument("--salida", required=True, help="Carpeta donde se escriben los dictámenes")
+    parser.add_argument("--tabla", help="Tabla de relación a importar (.xlsx/.xls o .json)")
+    parser.add_argument("--base", default=BASE_DEFAULT, help="Carpeta que contiene `data/` (por defecto, la del programa)")
+    parser.add_argument("--cliente", help="Cliente manual (reemplaza al de la tabla)")
+    parser.add_argument("--rfc", help="RFC del cliente manual")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (por familias)")
+    parser.add_argument("--profile", nargs='?', const='', default=None, metavar='RUTA.prof',
+                        help="Perfil cProfile (por defecto <salida>/perfil_dictamenes.prof)")
+    parser.add_argument("--trace", nargs='?', const='', default=None, metavar='RUTA.json',
+                        help="Traza por etapa (por defecto <salida>/traza_dictamenes.json)")
+    parser.add_argument("--quiet", action="store_true", help="Sin mensajes por código ni por familia")
+    parser.add_argument("--no-reanudar", dest="reanudar", action="store_false",
+                        help="Regenerar todas las familias aunque el diario de la salida las tenga completas")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    salida = os.path.abspath(args.salida)
+    base = os.path.abspath(args.base)
+    ruta_perfil = None if args.profile is None else os.path.abspath(args.profile or os.path.join(salida, 'perfil_dictamenes.prof'))
+    ruta_traza = None if args.trace is None else os.path.abspath(args.trace or os.path.join(salida, 'traza_dictamenes.json'))
+
+    tabla = os.path.abspath(args.tabla) if args.tabla else None
+    if not os.path.isdir(os.path.join(base, 'data')):
+        print(json.dumps({'ok': False, 'error': f"No existe la carpeta de datos {os.path.join(base, 'data')}"},
+                         ensure_ascii=False))
+        return 2
+
+    _preparar_entorno(base)
+    destino_tabla = os.path.join(base, 'data', 'tabla_de_relacion.json')
+    try:
+        if tabla:
+            importar_tabla(tabla, destino_tabla)
+        if not os.path.exists(destino_tabla):
+            raise EntradaInvalida(f"No existe {destino_tabla}; indique --tabla")
+    except EntradaInvalida as e:
+        print(json.dumps({'ok': False, 'error': str(e)}, ensure_ascii=False))
+        return 2
+    os.makedirs(salida, exist_ok=True)
+
+    workers = max(1, args.workers)
+    particiones = [None]
+    if workers > 1:
+        with open(destino_tabla, 'r', encoding='utf-8') as f:
+            registros = json.load(f)
+        if not _folios_preasignados(registros):
+            asignados = asignar_folios_en_memoria(registros)
+            guardar_tabla(registros, destino_tabla)
+            print(f"🔢 Folios asignados en la tabla a {asignados} familias antes de repartir", file=sys.stderr)
+        import pandas as pd
+        with contextlib.redirect_stdout(sys.stderr):
+            from plantillaPDF import procesar_familias
+            familias = procesar_familias(pd.DataFrame(registros))
+        particiones = repartir_familias(familias, workers) or [None]
+
+    if not args.reanudar:
+        # Un solo reinicio del diario antes de repartir: si cada worker
+        # reiniciara por su cuenta, borraría lo que otro ya anotó.
+        from diario_lote import DiarioLote
+        DiarioLote(salida, reanudar=False).cerrar()
+
+    trabajos = []
+    for i, listas in enumerate(particiones):
+        varios = len(particiones) > 1
+        trabajos.append(dict(
+            base=base, salida=salida, listas=listas, cliente=args.cliente, rfc=args.rfc,
+            silencioso=args.quiet,
+            ruta_traza=(_ruta_parte(ruta_traza, i) if varios else ruta_traza) if ruta_traza else None,
+            ruta_perfil=(_ruta_parte(ruta_perfil, i) if varios else ruta_perfil) if ruta_perfil else None,
+        ))
+
+    if len(trabajos) == 1:
+        partes = [ejecutar_particion(**trabajos[0])]
+    else:
+        print(f"⚙️ Repartiendo {sum(len(p) for p in particiones)} familias en {len(trabajos)} procesos", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=len(trabajos), mp_context=multiprocessing.get_context('spawn')) as pool:
+            futuros = [pool.submit(ejecutar_particion, **t) for t in trabajos]
+            partes = []
+            for futuro in futuros:
+                try:
+                    partes.append(futuro.result())
+                except Exception as e:
+                    partes.append((False, f"{type(e).__name__}: {e}", None))
+
+    resumen = combinar_resultados(partes)
+    _avanzar_contador(resumen['folios_usados_list'])
+
+    import trazas
+    segundos = time.perf_counter() - inicio
+    resumen['timings'] = trazas.combinar_resumenes([(r or {}).get('timings') for _, _, r in partes], segundos)
+    if ruta_traza and len(trabajos) > 1:
+        piezas = [t['ruta_traza'] for t in trabajos]
+        trazas.combinar_chrome_traces(piezas, ruta_traza)
+        for pieza in piezas:
+            with contextlib.suppress(OSError):
+                os.remove(pieza)
+    if ruta_perfil and len(trabajos) > 1:
+        piezas = [t['ruta_perfil'] for t in trabajos if os.path.exists(t['ruta_perfil'])]
+        if piezas:
+            estadisticas = pstats.Stats(*piezas)
+            estadisticas.dump_stats(ruta_perfil)
+            for pieza in piezas:
+                with contextlib.suppress(OSError):
+                    os.remove(pieza)
+    if ruta_perfil and os.path.exists(ruta_perfil) and not args.quiet:
+        _imprimir_perfil(ruta_perfil)
+
+    ok = resumen['total_generados'] > 0
+    resumen.update({
+        'ok': ok,
+        'directorio': salida,
+        'workers': len(trabajos),
+        'segundos': round(segundos, 3),
+        'traza_path': ruta_traza,
+        'perfil_path': ruta_perfil,
+    })
+    print(json.dumps(resumen, ensure_ascii=False, default=str))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Diario de avance para reanudar lotes de dictámenes.
+
+`generar_dictamenes_completos` anota aquí, por familia, el hash de sus datos
+de entrada, el folio asignado, el PDF generado y su estado. Si el lote se
+interrumpe (o se corrige una fila de la tabla) y se vuelve a correr sobre la
+misma carpeta de salida:
+
+- las familias con estado 'ok', mismo hash y el mismo PDF en disco (tamaño y
+  fecha de modificación) se omiten;
+- las que fallaron, quedaron a medias o cambiaron se regeneran con el folio
+  que ya tenían;
+- los folios de un bloque reservado que no llegaron a usarse se asignan antes
+  de reservar otros.
+
+El diario vive en `<salida>/diario_dictamenes/`, un archivo JSON Lines por
+proceso (`<fecha>_<pid>.jsonl`) para que varios workers puedan escribir sin
+bloquearse; al cargar se leen todos y gana el evento más reciente de cada
+familia. Solo se agregan líneas, así que una caída a media escritura a lo
+sumo deja una última línea incompleta que se ignora.
+
+Al terminar un lote se anota un evento 'fin'. La interfaz crea una carpeta
+`Dictamenes_<fecha>` por corrida; `buscar_lote_pendiente` revisa la más
+reciente y, si quedó sin 'fin' o con familias fallidas, la ofrece para
+continuar en ella.
+
+Los datos que entran al hash son los registros de la familia (sin FOLIO ni
+columnas internas), el cliente/RFC manual y un hash de contexto con los
+catálogos (normas, clientes, firmas) y la configuración de evidencias. Las
+fotografías no se hashean: si se reemplaza una imagen sin cambiar la tabla,
+hay que regenerar sin reanudar.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CARPETA_DIARIO = 'diario_dictamenes'
+
+# Carpetas de salida que crea la interfaz (generar_dictamenes_gui)
+PREFIJO_CARPETA_GUI = 'Dictamenes_'
+
+# Columnas que no forman parte de los datos de entrada de una familia
+_COLUMNAS_IGNORADAS = {'FOLIO', 'folio', '_orig_index', '_excel_row'}
+
+
+def hash_datos(valor) -> str:
+    """SHA-256 del JSON canónico de `valor` (claves ordenadas)."""
+    texto = json.dumps(valor, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def clave_familia(registros: list, lista_por_defecto: str = '') -> str:
+    """
+    Clave estable de una familia: NORMA UVA, SOLICITUD y LISTA (la clave de
+    `procesar_familias` sin el FOLIO, que cambia al reasignar folios).
+    """
+    try:
+        r = registros[0]
+        return '_'.join(str(r.get(k, '') or '').strip() for k in ('NORMA UVA', 'SOLICITUD', 'LISTA'))
+    except Exception:
+        return str(lista_por_defecto)
+
+
+def hash_familia(registros: list, contexto: str = '') -> str:
+    """Hash de los datos de entrada de una familia (sin folio ni columnas internas)."""
+    filas = [{k: v for k, v in r.items() if k not in _COLUMNAS_IGNORADAS} for r in registros]
+    return hash_datos({'registros': filas, 'contexto': contexto})
+
+
+class DiarioLote:
+    """Estado por familia de los lotes anteriores en una carpeta de salida."""
+
+    def __init__(self, directorio_salida: str, reanudar: bool = True):
+        self.directorio_salida = os.path.abspath(directorio_salida)
+        self.carpeta = os.path.join(self.directorio_salida, CARPETA_DIARIO)
+        self.ruta = os.path.join(self.carpeta, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.jsonl")
+        # clave -> último evento de la familia
+        self.familias: Dict[str, dict] = {}
+        self.reservas: List[dict] = []
+        # Último evento 'fin' (None si el lote más reciente no terminó)
+        self.fin: Optional[dict] = None
+        self._archivo = None
+        if reanudar:
+            self._cargar()
+        else:
+            self._anotar({'tipo': 'reinicio'})
+
+    # ---------------- lectura ----------------
+    def _cargar(self) -> None:
+        eventos = []
+        try:
+            nombres = sorted(n for n in os.listdir(self.carpeta) if n.endswith('.jsonl'))
+        except OSError:
+            return
+        for nombre in nombres:
+            try:
+                with open(os.path.join(self.carpeta, nombre), 'r', encoding='utf-8') as f:
+                    for linea in f:
+                        try:
+                            eventos.append(json.loads(linea))
+                        except ValueError:
+                            # Línea incompleta por una caída a media escritura
+                            continue
+            except OSError:
+                continue
+        eventos.sort(key=lambda e: e.get('ts', 0))
+        for evento in eventos:
+            tipo = evento.get('tipo')
+            if tipo == 'fin':
+                self.fin = evento
+                continue
+            self.fin = None
+            if tipo == 'reinicio':
+                self.familias.clear()
+                self.reservas.clear()
+            elif tipo == 'reserva':
+                self.reservas.append(evento)
+            elif tipo == 'familia' and evento.get('clave'):
+                self.familias[evento['clave']] = evento
+
+    def _ruta_absoluta(self, ruta: Optional[str]) -> Optional[str]:
+        if not ruta:
+            return None
+        return ruta if os.path.isabs(ruta) else os.path.join(self.directorio_salida, ruta)
+
+    @property
+    def pendiente(self) -> bool:
+        """True si hay familias anotadas y el lote no terminó o alguna no quedó 'ok'."""
+        if not self.familias:
+            return False
+        if self.fin is None:
+            return True
+        return any(e.get('estado') != 'ok' for e in self.familias.values())
+
+    def familia_vigente(self, clave: str, hash_entrada: str) -> Optional[dict]:
+        """
+        Evento de la familia si quedó completa con los mismos datos y su PDF
+        sigue igual en disco; None si hay que (re)generarla.
+        """
+        evento = self.familias.get(clave)
+        if not evento or evento.get('estado') != 'ok' or evento.get('hash') != hash_entrada:
+            return None
+        ruta = self._ruta_absoluta(evento.get('pdf'))
+        try:
+            st = os.stat(ruta)
+        except (OSError, TypeError):
+            return None
+        if st.st_size != evento.get('pdf_tamano') or st.st_mtime_ns != evento.get('pdf_mtime_ns'):
+            return None
+        return dict(evento, pdf=ruta)
+
+    def folio_previo(self, clave: str) -> Optional[int]:
+        """Folio que la familia ya tenía asignado en un lote anterior."""
+        try:
+            folio = (self.familias.get(clave) or {}).get('folio')
+            return int(folio) if folio not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    def folios_libres(self) -> List[int]:
+        """Folios de bloques reservados antes que ninguna familia llegó a usar."""
+        usados = {self.folio_previo(c) for c in self.familias}
+        libres = []
+        for reserva in self.reservas:
+            try:
+                inicio, cantidad = int(reserva['inicio']), int(reserva['cantidad'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            libres.extend(f for f in range(inicio, inicio + cantidad) if f not in usados)
+        return sorted(set(libres))
+
+    # ---------------- escritura ----------------
+    def _anotar(self, evento: dict) -> None:
+        evento['ts'] = time.time()
+        try:
+            if self._archivo is None:
+                os.makedirs(self.carpeta, exist_ok=True)
+                self._archivo = open(self.ruta, 'a', encoding='utf-8')
+            self._archivo.write(json.dumps(evento, ensure_ascii=False, default=str) + '\n')
+            self._archivo.flush()
+        except Exception as e:
+            print(f"   ⚠️ No se pudo escribir en el diario del lote: {e}")
+
+    def registrar_reserva(self, inicio: int, cantidad: int) -> None:
+        evento = {'tipo': 'reserva', 'inicio': int(inicio), 'cantidad': int(cantidad)}
+        self.reservas.append(evento)
+        self._anotar(evento)
+
+    def registrar_familia(self, clave: str, hash_entrada: str, folio=None, estado: str = 'en_proceso',
+                          pdf: Optional[str] = None, **extra) -> None:
+        """Anota el estado de una familia ('en_proceso', 'ok' o 'error')."""
+        evento = {'tipo': 'familia', 'clave': clave, 'hash': hash_entrada,
+                  'folio': folio, 'estado': estado}
+        if pdf:
+            ruta = os.path.abspath(pdf)
+            try:
+                st = os.stat(ruta)
+                evento['pdf_tamano'] = st.st_size
+                evento['pdf_mtime_ns'] = st.st_mtime_ns
+            except OSError:
+                pass
+            try:
+                evento['pdf'] = os.path.relpath(ruta, self.directorio_salida)
+            except ValueError:
+                # Otra unidad en Windows
+                evento['pdf'] = ruta
+        evento.update(extra)
+        self.familias[clave] = evento
+        self._anotar(evento)
+
+    def registrar_fin(self, generadas: int, errores: int) -> None:
+        """Marca el lote como terminado (aunque haya familias con error)."""
+        evento = {'tipo': 'fin', 'generadas': int(generadas), 'errores': int(errores)}
+        self.fin = evento
+        self._anotar(evento)
+
+    def cerrar(self) -> None:
+        if self._archivo is not None:
+            try:
+                self._archivo.close()
+            except Exception:
+                pass
+            self._archivo = None
+
+
+def buscar_lote_pendiente(directorio_base: str) -> Optional[str]:
+    """
+    Carpeta `Dictamenes_*` más reciente dentro de `directorio_base` si su lote
+    quedó incompleto (ver `DiarioLote.pendiente`); None si no hay o terminó bien.
+    """
+    try:
+        carpetas = sorted(
+            (n for n in os.listdir(directorio_base)
+             if n.startswith(PREFIJO_CARPETA_GUI)
+             and os.path.isdir(os.path.join(directorio_base, n, CARPETA_DIARIO))),
+            reverse=True)
+    except OSError:
+        return None
+    if not carpetas:
+        return None
+    ruta = os.path.join(directorio_base, carpetas[0])
+    try:
+        # Solo lectura: el diario no crea archivos hasta anotar algo
+        return ruta if DiarioLote(ruta, reanudar=True).pendiente else None
+    except Exception:
+        return None
@@ -15,9 +15,129 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from io import BytesIO
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Flowable, Image as RLImage
+from functools import lru_cache
+from normalizacion import RE_DIGITOS
+import bitacora
+
+_log = bitacora.obtener('etiquetas')
+
+# ============================================================
+# FORMATO DE LAS ETIQUETAS (raster / vectorial)
+# ============================================================
+# 'raster': imagen PNG a 300 DPI (Pillow) que ReportLab incrusta como mapa de bits.
+# 'vectorial': las mismas secciones dibujadas como texto y trazos de ReportLab;
+#   PDFs mucho más ligeros y con texto seleccionable.
+# Se elige con la clave "_formato" de config_etiquetas.json, la variable de
+# entorno IMAGENESVC_ETIQUETAS_FORMATO o el parámetro `formato` del generador.
+FORMATO_RASTER = 'raster'
+FORMATO_VECTORIAL = 'vectorial'
+_ALIAS_FORMATO = {
+    'raster': FORMATO_RASTER,
+    'png': FORMATO_RASTER,
+    'vectorial': FORMATO_VECTORIAL,
+    'vector': FORMATO_VECTORIAL,
+}
+
+# Fuente estándar de PDF (no se incrusta) equivalente a Arial Bold
+FUENTE_VECTORIAL = 'Helvetica-Bold'
+PUNTOS_POR_CM = 72 / 2.54
+
+
+def normalizar_formato(valor, por_defecto=None):
+    """'raster' / 'vectorial' a partir de un valor de configuración (o `por_defecto`)."""
+    return _ALIAS_FORMATO.get(str(valor or '').strip().lower(), por_defecto)
+
+
+def dibujar_etiqueta(c, etiqueta, x, y, ancho_pt, alto_pt):
+    """
+    Dibuja una etiqueta de `generar_etiquetas_por_codigos` en el canvas `c`
+    con la esquina inferior izquierda en (x, y), en cualquiera de los dos
+    formatos.
+    """
+    vector = etiqueta.get('vector')
+    if vector:
+        ancho_px, alto_px = vector['ancho_px'], vector['alto_px']
+        tamano = vector['tamano_fuente']
+        # Ascendente de la fuente: Pillow ubica el texto por su parte superior
+        ascendente = pdfmetrics.getAscent(FUENTE_VECTORIAL, tamano)
+        c.saveState()
+        c.translate(x, y)
+        # Unidades de la etiqueta: píxeles a 300 DPI, como la versión raster
+        c.scale(ancho_pt / float(ancho_px), alto_pt / float(alto_px))
+        c.setLineWidth(2)
+        c.rect(1, 1, ancho_px - 2, alto_px - 2, stroke=1, fill=0)
+        c.setFont(FUENTE_VECTORIAL, tamano)
+        for lx, ly, linea in vector['lineas']:
+            c.drawString(lx, alto_px - ly - ascendente, linea)
+        c.restoreState()
+        return
+    img_bytes = etiqueta.get('imagen_bytes')
+    try:
+        img_bytes.seek(0)
+    except Exception:
+        pass
+    c.drawImage(ImageReader(img_bytes), x, y, width=ancho_pt, height=alto_pt)
+
+
+class EtiquetaVectorial(Flowable):
+    """Flowable de platypus para una etiqueta en formato vectorial."""
+
+    def __init__(self, etiqueta, ancho_pt, alto_pt):
+        super().__init__()
+        self.etiqueta = etiqueta
+        self.width = ancho_pt
+        self.height = alto_pt
+
+    def wrap(self, ancho_disponible, alto_disponible):
+        return self.width, self.height
+
+    def draw(self):
+        dibujar_etiqueta(self.canv, self.etiqueta, 0, 0, self.width, self.height)
+
+
+def flowable_etiqueta(etiqueta, ancho_pt, alto_pt, almacen=None):
+    """
+    Flowable de la etiqueta (vectorial o imagen PNG) del tamaño indicado; None si no hay contenido.
+    Con `almacen` (AlmacenImagenesPDF del documento) los PNG repetidos comparten XObject.
+    """
+    if etiqueta.get('vector'):
+        return EtiquetaVectorial(etiqueta, ancho_pt, alto_pt)
+    img_bytes = etiqueta.get('imagen_bytes')
+    if not img_bytes:
+        return None
+    if almacen is not None:
+        return almacen.flowable(img_bytes, ancho_pt, alto_pt)
+    img_bytes.seek(0)
+    return RLImage(img_bytes, width=ancho_pt, height=alto_pt)
+
+
+@lru_cache(maxsize=65536)
+def _norm_texto(s):
+    return s.strip().upper()
+
+
+def _norm_valor(v):
+    """Normaliza un valor de la tabla de relación para comparaciones (strip + mayúsculas)."""
+    try:
+        if isinstance(v, str):
+            return _norm_texto(v)
+        return _norm_texto(str(v or ''))
+    except Exception:
+        return ''
+
+
+def _primeros_digitos(s):
+    """Primer grupo de dígitos de `s` (ej. '000191/26' -> '000191')."""
+    try:
+        m = RE_DIGITOS.search(str(s or ''))
+        return m.group(0) if m else ''
+    except Exception:
+        return ''
 
 class GeneradorEtiquetasDecathlon:
-    def __init__(self):
+    def __init__(self, formato=None):
         # Detectar ruta de `data` en tres lugares (preferir carpeta junto al exe):
         # 1) carpeta junto al ejecutable (APP_DIR / exe dir)
         # 2) PyInstaller _MEIPASS (bundle interno)
@@ -75,8 +195,14 @@ class GeneradorEtiquetasDecathlon:
 
         # Pasar None si no existen; la función `cargar_datos` manejará la ausencia
         self.cargar_datos(base_etiquetado_path, tabla_relacion_path)
+        self.formato_config = None
         self.configuraciones = self.cargar_configuraciones(config_etiquetas_path)
         self.mapeo_norma_uva = self.crear_mapeo_norma_uva()
+        # Prioridad: parámetro > variable de entorno > config_etiquetas.json > raster
+        self.formato = (normalizar_formato(formato)
+                        or normalizar_formato(os.environ.get('IMAGENESVC_ETIQUETAS_FORMATO'))
+                        or normalizar_formato(self.formato_config)
+                        or FORMATO_RASTER)
 
     def cargar_datos(self, base_etiquetado_path, tabla_relacion_path):
         """Carga los datos de la base de etiquetado y tabla de relación"""
@@ -125,11 +251,11 @@ class GeneradorEtiquetasDecathlon:
                 ancho_pt = ancho_cm * 28.35
                 alto_pt = alto_cm * 28.35
 
-                img_bytes = etiqueta["imagen_bytes"]
+                img_bytes = etiqueta.get("imagen_bytes")
 
                 # Insertar etiqueta en PDF temporal (usar ImageReader para BytesIO/objetos)
                 try:
-                    c.drawImage(ImageReader(img_bytes), x, y - alto_pt, width=ancho_pt, height=alto_pt)
+                    dibujar_etiqueta(c, etiqueta, x, y - alto_pt, ancho_pt, alto_pt)
                 except Exception:
                     # Fallback: intentar usar la ruta si está disponible como str
                     try:
@@ -167,6 +293,9 @@ class GeneradorEtiquetasDecathlon:
         try:
             with open(config_etiquetas_path, 'r', encoding='utf-8') as f:
                 configs = json.load(f)
+
+            # Claves de opciones generales (no son normas)
+            self.formato_config = configs.pop('_formato', None)
             
             # Procesar tamaños (convertir de string a tupla)
             for norma, config in configs.items():
@@ -202,12 +331,13 @@ class GeneradorEtiquetasDecathlon:
     
     def buscar_en_tabla_relacion(self, codigo):
         """Busca un código en la tabla de relación (que es una lista)"""
+        objetivo = str(codigo).strip()
         for item in self.tabla_relacion:
             # Intentar buscar por EAN primero
-            if str(item.get('EAN', '')).strip() == str(codigo).strip():
+            if str(item.get('EAN', '')).strip() == objetivo:
                 return item
             # Si no encuentra por EAN, intentar por CODIGO
-            if str(item.get('CODIGO', '')).strip() == str(codigo).strip():
+            if str(item.get('CODIGO', '')).strip() == objetivo:
                 return item
         return None
 
@@ -218,11 +348,7 @@ class GeneradorEtiquetasDecathlon:
         `SOLICITUD`, `MARCA` y `PAIS` cuando esos valores estén presentes.
         Si no encuentra una coincidencia estricta, hace fallback a `buscar_en_tabla_relacion(codigo)`.
         """
-        def _norm(v):
-            try:
-                return str(v or '').strip().upper()
-            except Exception:
-                return ''
+        _norm = _norm_valor
 
         target_codigo = _norm(codigo)
         target_solicitud = _norm(solicitud)
@@ -231,13 +357,8 @@ class GeneradorEtiquetasDecathlon:
 
         # Preferir coincidencias que cumplan todos los campos proporcionados
         best = None
-        import re as _re
-        def _digits(s):
-            try:
-                d = _re.findall(r"\d+", str(s or ''))
-                return d[0] if d else ''
-            except Exception:
-                return ''
+        _digits = _primeros_digitos
+        target_sol_digits = _digits(target_solicitud)
 
         for item in self.tabla_relacion:
             ean = _norm(item.get('EAN'))
@@ -253,7 +374,6 @@ class GeneradorEtiquetasDecathlon:
 
             # si se proporcionaron valores y coinciden, devolver inmediatamente
             # comparar solicitudes preferentemente por dígitos (ej. '000191/26' vs '191')
-            target_sol_digits = _digits(target_solicitud)
             sol_i_digits = _digits(sol_i)
             if target_sol_digits and sol_i_digits:
                 ok_sol = (not target_solicitud) or (sol_i_digits == target_sol_digits)
@@ -276,8 +396,9 @@ class GeneradorEtiquetasDecathlon:
     
     def buscar_producto_por_ean(self, ean):
         """Busca un producto en la base por EAN"""
+        objetivo = str(ean).strip()
         for producto in self.base_etiquetado:
-            if str(producto.get('EAN', '')).strip() == str(ean).strip():
+            if str(producto.get('EAN', '')).strip() == objetivo:
                 return producto
         return None
     
@@ -524,19 +645,19 @@ class GeneradorEtiquetasDecathlon:
                 marca = ''
                 pais_origen = ''
 
-            print(f"   🔍 Procesando código EAN: {codigo} (solicitud={solicitud}, marca={marca}, pais={pais_origen})")
+            _log.debug("   🔍 Procesando código EAN: %s (solicitud=%s, marca=%s, pais=%s)", codigo, solicitud, marca, pais_origen)
             
             producto_relacionado = self.buscar_en_tabla_relacion_compuesta(codigo, solicitud=solicitud, marca=marca, pais_origen=pais_origen)
             if not producto_relacionado:
-                print(f"      ❌ EAN {codigo} no encontrado en tabla de relación (clave compuesta)")
+                _log.warning("      ❌ EAN %s no encontrado en tabla de relación (clave compuesta)", codigo)
                 continue
             
             norma_uva = producto_relacionado.get('NORMA UVA')
             if norma_uva is None:
-                print(f"      ❌ No se encontró NORMA UVA para EAN {codigo}")
+                _log.warning("      ❌ No se encontró NORMA UVA para EAN %s", codigo)
                 continue
             
-            print(f"      📋 NORMA UVA encontrada: {norma_uva}")
+            _log.debug("      📋 NORMA UVA encontrada: %s", norma_uva)
             
             # Obtener producto base desde la base de etiquetado (puede ser None)
             producto_base = self.buscar_producto_por_ean(codigo)
@@ -578,14 +699,14 @@ class GeneradorEtiquetasDecathlon:
             
             norma = self.determinar_norma_por_uva(norma_uva, producto)
             if not norma:
-                print(f"      ❌ No se pudo determinar la norma para NORMA UVA {norma_uva}")
+                _log.warning("      ❌ No se pudo determinar la norma para NORMA UVA %s", norma_uva)
                 continue
             
-            print(f"      🏷️ Norma determinada: {norma}")
+            _log.debug("      🏷️ Norma determinada: %s", norma)
             
             config = self.configuraciones.get(norma)
             if not config:
-                print(f"      ❌ No hay configuración para la norma {norma}")
+                _log.warning("      ❌ No hay configuración para la norma %s", norma)
                 continue
 
             # Usar copia local de la configuración para no mutar el objeto global
@@ -603,7 +724,7 @@ class GeneradorEtiquetasDecathlon:
                     campos_config.insert(idx, 'PAIS DE ORIGEN')
                 except ValueError:
                     campos_config.append('PAIS DE ORIGEN')
-                print(f"      ℹ️ Añadido 'PAIS DE ORIGEN' a campos de la norma {norma} para el código {codigo}")
+                _log.debug("      ℹ️ Añadido 'PAIS DE ORIGEN' a campos de la norma %s para el código %s", norma, codigo)
 
             # Actualizar la copia local de la config con los campos ajustados
             config_local['campos'] = campos_config
@@ -629,6 +750,21 @@ class GeneradorEtiquetasDecathlon:
             except Exception:
                 pass
             
+            if self.formato == FORMATO_VECTORIAL:
+                try:
+                    etiquetas_generadas.append({
+                        'codigo': codigo,
+                        'ean': producto.get('EAN'),
+                        'norma': norma,
+                        'imagen_bytes': None,
+                        'vector': self._etiqueta_vectorial(producto, config_local),
+                        'tamaño_cm': config_local['tamaño']
+                    })
+                    _log.debug("      ✅ Etiqueta vectorial generada")
+                except Exception as e:
+                    _log.error("      ❌ Error generando etiqueta para %s: %s", codigo, e, exc_info=True)
+                continue
+
             try:
                 # Crear imagen en memoria
                 ancho_cm, alto_cm = config_local['tamaño']
@@ -653,19 +789,30 @@ class GeneradorEtiquetasDecathlon:
                     'imagen_bytes': img_bytes,
                     'tamaño_cm': config_local['tamaño']
                 })
-                print(f"      ✅ Etiqueta generada en memoria")
+                _log.debug("      ✅ Etiqueta generada en memoria")
             except Exception as e:
-                print(f"      ❌ Error generando etiqueta para {codigo}: {e}")
-                import traceback
-                traceback.print_exc()
-        
+                _log.error("      ❌ Error generando etiqueta para %s: %s", codigo, e, exc_info=True)
+
+        _log.info("   🏷️ Etiquetas generadas: %d de %d códigos", len(etiquetas_generadas), len(codigos))
+        bitacora.vaciar()
         return etiquetas_generadas
     
-    def _dibujar_etiqueta_en_imagen(self, img, draw, producto, config):
-        """Dibuja el contenido de la etiqueta en la imagen proporcionada"""
-        ancho, alto = img.size
+    def _tamano_fuente(self, config):
+        """Tamaño de fuente (en píxeles a 300 DPI) según el área de la etiqueta."""
         ancho_cm, alto_cm = config['tamaño']
-        
+        area = ancho_cm * alto_cm
+        if area < 25:
+            return 22
+        elif area < 35:
+            return 26
+        return 30
+
+    def _fuente_etiqueta(self, config):
+        """
+        Fuente Pillow de la etiqueta. Sin la TTF se usa `load_default()`, cuyo
+        `size` real (no el de `_tamano_fuente`) es el que rige el acomodo.
+        """
+        font_size = self._tamano_fuente(config)
         try:
             font_paths = [
                 "arialbd.ttf",
@@ -676,13 +823,6 @@ class GeneradorEtiquetasDecathlon:
             font = None
             for font_path in font_paths:
                 try:
-                    area = ancho_cm * alto_cm
-                    if area < 25:
-                        font_size = 22
-                    elif area < 35:
-                        font_size = 26
-                    else:
-                        font_size = 30
                     font = ImageFont.truetype(font_path, font_size)
                     break
                 except:
@@ -691,22 +831,42 @@ class GeneradorEtiquetasDecathlon:
                 font = ImageFont.load_default()
         except:
             font = ImageFont.load_default()
-        
-        # Dibujar borde
-        draw.rectangle([0, 0, ancho-1, alto-1], outline='black', width=2)
-        
+        return font
+
+    def _distribuir_lineas(self, producto, config, ancho, alto, font_size, medir):
+        """
+        Acomoda las secciones encabezado, centro y pie de la etiqueta.
+
+        Trabaja en píxeles a 300 DPI con el origen arriba a la izquierda y
+        devuelve `[(x, y, linea), ...]` con `y` en la parte superior del texto.
+        `medir(linea)` da el ancho de una línea en esas mismas unidades; así
+        el formato raster (Pillow) y el vectorial (ReportLab) comparten el
+        mismo acomodo.
+        """
         margin_x = 50  # Aumentado de 40 a 50 para márgenes más amplios y uniformes
         margin_y = 40  # Aumentado de 35 a 40
-        line_height = font.size + 10
+        line_height = font_size + 10
         
         ancho_disponible = ancho - (2 * margin_x)
         
         # Calcular max_caracteres basado en el ancho real de la fuente
-        char_width_estimate = font.size * 0.6  # Estimación del ancho promedio de carácter
+        char_width_estimate = font_size * 0.6  # Estimación del ancho promedio de carácter
         max_caracteres = int(ancho_disponible / char_width_estimate)
         max_caracteres = max(20, min(max_caracteres, 45))  # Entre 20 y 45 caracteres
         
         campos_encabezado, campos_centro, campos_pie = self.organizar_campos_por_seccion(config['campos'], producto)
+
+        def _x_centrado(line):
+            text_width = medir(line)
+            x_centered = (ancho - text_width) / 2
+            # Asegurar que no se salga de los márgenes
+            if x_centered < margin_x:
+                x_centered = margin_x
+            if x_centered + text_width > ancho - margin_x:
+                x_centered = margin_x
+            return x_centered
+
+        lineas = []
         
         # ENCABEZADO
         y_actual = margin_y
@@ -715,22 +875,8 @@ class GeneradorEtiquetasDecathlon:
             texto = self.formatear_dato(campo, valor) if campo != 'EAN' else str(valor)
             
             if texto:
-                lines = textwrap.wrap(texto, width=max_caracteres)
-                for line in lines:
-                    if hasattr(draw, 'textbbox'):
-                        bbox = draw.textbbox((0, 0), line, font=font)
-                        text_width = bbox[2] - bbox[0]
-                    else:
-                        text_width = draw.textsize(line, font=font)[0]
-                    
-                    x_centered = (ancho - text_width) / 2
-                    # Asegurar que no se salga de los márgenes
-                    if x_centered < margin_x:
-                        x_centered = margin_x
-                    if x_centered + text_width > ancho - margin_x:
-                        x_centered = margin_x
-                    
-                    draw.text((x_centered, y_actual), line, font=font, fill='black')
+                for line in textwrap.wrap(texto, width=max_caracteres):
+                    lineas.append((_x_centrado(line), y_actual, line))
                     y_actual += line_height
         
         y_actual += 10
@@ -741,8 +887,7 @@ class GeneradorEtiquetasDecathlon:
             valor = producto.get(campo, '')
             texto = self.formatear_dato(campo, valor)
             if texto:
-                lines = textwrap.wrap(texto, width=max_caracteres)
-                lineas_pie.extend(lines)
+                lineas_pie.extend(textwrap.wrap(texto, width=max_caracteres))
         
         altura_pie = len(lineas_pie) * line_height + margin_y if lineas_pie else margin_y
         
@@ -765,40 +910,56 @@ class GeneradorEtiquetasDecathlon:
         for campo, line in lineas_centro_total:
             if y_actual >= alto - altura_pie - margin_y:
                 break
-            
-            if hasattr(draw, 'textbbox'):
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_width = bbox[2] - bbox[0]
-            else:
-                text_width = draw.textsize(line, font=font)[0]
-            
-            x_centered = (ancho - text_width) / 2
-            if x_centered < margin_x:
-                x_centered = margin_x
-            if x_centered + text_width > ancho - margin_x:
-                x_centered = margin_x
-            
-            draw.text((x_centered, y_actual), line, font=font, fill='black')
+            lineas.append((_x_centrado(line), y_actual, line))
             y_actual += line_height + 5
         
         # PIE
         y_pie = alto - margin_y
         for line in reversed(lineas_pie):
             y_pie -= line_height
-            
+            lineas.append((_x_centrado(line), y_pie, line))
+
+        return lineas
+
+    def _dibujar_etiqueta_en_imagen(self, img, draw, producto, config):
+        """Dibuja el contenido de la etiqueta en la imagen proporcionada"""
+        ancho, alto = img.size
+        font = self._fuente_etiqueta(config)
+        
+        # Dibujar borde
+        draw.rectangle([0, 0, ancho-1, alto-1], outline='black', width=2)
+
+        def _medir(line):
             if hasattr(draw, 'textbbox'):
                 bbox = draw.textbbox((0, 0), line, font=font)
-                text_width = bbox[2] - bbox[0]
-            else:
-                text_width = draw.textsize(line, font=font)[0]
-            
-            x_centered = (ancho - text_width) / 2
-            if x_centered < margin_x:
-                x_centered = margin_x
-            if x_centered + text_width > ancho - margin_x:
-                x_centered = margin_x
-            
-            draw.text((x_centered, y_pie), line, font=font, fill='black')
+                return bbox[2] - bbox[0]
+            return draw.textsize(line, font=font)[0]
+
+        for x, y, line in self._distribuir_lineas(producto, config, ancho, alto, font.size, _medir):
+            draw.text((x, y), line, font=font, fill='black')
+
+    def _etiqueta_vectorial(self, producto, config):
+        """
+        Acomodo de la etiqueta para el formato vectorial: las mismas líneas
+        que la imagen raster, para dibujarlas con ReportLab como texto
+        (`dibujar_etiqueta`).
+        """
+        ancho_cm, alto_cm = config['tamaño']
+        ancho = self.cm_a_pixeles(ancho_cm)
+        alto = self.cm_a_pixeles(alto_cm)
+        # Mismo tamaño que la imagen raster: el de la fuente cargada
+        font = self._fuente_etiqueta(config)
+        font_size = getattr(font, 'size', None) or self._tamano_fuente(config)
+
+        def _medir(line):
+            return pdfmetrics.stringWidth(line, FUENTE_VECTORIAL, font_size)
+
+        return {
+            'ancho_px': ancho,
+            'alto_px': alto,
+            'tamano_fuente': font_size,
+            'lineas': self._distribuir_lineas(producto, config, ancho, alto, font_size, _medir),
+        }
     
     def crear_pdf_etiquetas(self, etiquetas_generadas, output_pdf="etiquetas.pdf"):
         """Crea un PDF con todas las etiquetas generadas"""
@@ -821,7 +982,7 @@ class GeneradorEtiquetasDecathlon:
                 alto_pt = alto_cm * 28.35
                 
                 try:
-                    c.drawImage(ImageReader(etiqueta['imagen_bytes']), x, y - alto_pt, width=ancho_pt, height=alto_pt)
+                    dibujar_etiqueta(c, etiqueta, x, y - alto_pt, ancho_pt, alto_pt)
                 except Exception:
                     try:
                         c.drawImage(etiqueta['imagen_bytes'], x, y - alto_pt, width=ancho_pt, height=alto_pt)
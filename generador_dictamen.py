@@ -8,6 +8,8 @@ import traceback
 import time
 import shutil
 import re
+import hashlib
+from io import BytesIO
 
 # Evitar UnicodeEncodeError en consolas Windows (CP1252) al imprimir emojis u
 # otros caracteres Unicode. Intentar reconfigurar stdout/stderr a UTF-8 cuando
@@ -18,18 +20,24 @@ try:
 except Exception:
     pass
 
+import bitacora
+
+# Mensajes por código / por base de evidencias (bitácora con niveles y búfer)
+_log = bitacora.obtener('evidencias')
+
 # Verbose debug switch: imprime información detallada por código (clientes, ASIG, bases examinadas)
 DEBUG_VERBOSE = False
 
 def set_verbose(v=True):
-    """Habilita/deshabilita logs verbosos en tiempo de ejecución."""
+    """Habilita/deshabilita logs verbosos en tiempo de ejecución (nivel DEBUG de la bitácora)."""
     global DEBUG_VERBOSE
     DEBUG_VERBOSE = bool(v)
+    bitacora.establecer_nivel(bitacora.DEBUG if DEBUG_VERBOSE else bitacora.INFO)
 
 # Activar automáticamente si la variable de entorno `GENERADOR_VERBOSE` está presente
 try:
     if str(os.environ.get('GENERADOR_VERBOSE', '')).lower() in ('1', 'true', 'yes', 'y'):
-        DEBUG_VERBOSE = True
+        set_verbose(True)
 except Exception:
     pass
 
@@ -43,7 +51,19 @@ from plantillaPDF import (
 )
 
 from DictamenPDF import PDFGenerator
+from etiqueta_dictamen import flowable_etiqueta
 import folio_manager
+import trazas
+import hashes_imagenes
+from diario_lote import DiarioLote, buscar_lote_pendiente, clave_familia, hash_datos, hash_familia
+from progreso import PublicadorProgreso
+from normalizacion import (
+    normalizar_codigo,
+    normalizar_carpeta,
+    tokens_alnum,
+    RE_DIGITO,
+    RE_SEP_RUTA,
+)
 
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer, Image as RLImage, PageBreak, KeepTogether
@@ -118,6 +138,97 @@ def reservar_siguiente_folio(timeout=5.0):
         return folio_manager.reserve_next(timeout=timeout)
     except Exception as e:
         raise RuntimeError(f"No se pudo reservar siguiente folio: {e}")
+# ---------------- Imágenes compartidas dentro de un PDF ----------------
+def _jpeg_evidencia(ruta):
+    """Verifica la foto y la devuelve como JPEG RGB (calidad 90) en memoria."""
+    from PIL import Image as PILImage
+    with PILImage.open(ruta) as im:
+        im.verify()
+    with PILImage.open(ruta) as im2:
+        if im2.mode != 'RGB':
+            im2 = im2.convert('RGB')
+        bio = BytesIO()
+        im2.save(bio, format='JPEG', quality=90, optimize=True)
+        bio.seek(0)
+    return bio
+
+
+class _ImagenCompartida(RLImage):
+    """RLImage que dibuja con un ImageReader ya existente (no vuelve a decodificar)."""
+
+    def __init__(self, lector, width, height):
+        # platypus crea `self._img` solo si no existe; así reutiliza el lector
+        self._img = lector
+        super().__init__(BytesIO(), width=width, height=height)
+
+
+class AlmacenImagenesPDF:
+    """
+    Imágenes de un dictamen indexadas por el MD5 de su contenido.
+
+    ReportLab ya agrupa en un solo XObject las imágenes cuyos píxeles
+    coinciden, pero cada RLImage(BytesIO) crea su propio ImageReader y
+    decodifica la imagen completa para calcular esa huella. Con el almacén,
+    una foto o etiqueta repetida en el mismo PDF usa un único lector: se
+    decodifica una vez y todas sus apariciones apuntan al mismo XObject.
+    """
+
+    def __init__(self):
+        self._lectores = {}
+        self._preparadas = {}
+        self.unicas = 0
+        self.repetidas = 0
+
+    @staticmethod
+    def _leer_bytes(origen):
+        if isinstance(origen, (bytes, bytearray)):
+            return bytes(origen)
+        pos = origen.tell()
+        try:
+            origen.seek(0)
+            return origen.read()
+        finally:
+            origen.seek(pos)
+
+    def lector(self, origen):
+        """ImageReader compartido para los bytes de `origen` (bytes o archivo en memoria)."""
+        datos = self._leer_bytes(origen)
+        clave = hashlib.md5(datos).hexdigest()
+        lector = self._lectores.get(clave)
+        if lector is None:
+            lector = ImageReader(BytesIO(datos))
+            self._lectores[clave] = lector
+            self.unicas += 1
+        else:
+            self.repetidas += 1
+        return lector
+
+    def flowable(self, origen, width, height):
+        """Flowable de imagen que comparte lector (y XObject) con sus repeticiones."""
+        try:
+            return _ImagenCompartida(self.lector(origen), width, height)
+        except Exception:
+            # Si algo falla, el camino de siempre
+            if hasattr(origen, 'seek'):
+                origen.seek(0)
+            else:
+                origen = BytesIO(origen)
+            return RLImage(origen, width=width, height=height)
+
+    def preparada(self, ruta, preparar):
+        """
+        Resultado de `preparar(ruta)` memorizado por ruta: la misma foto
+        listada varias veces se convierte a JPEG una sola vez.
+        """
+        clave = os.path.normcase(os.path.abspath(str(ruta)))
+        if clave not in self._preparadas:
+            self._preparadas[clave] = preparar(ruta)
+        bio = self._preparadas[clave]
+        if bio is not None:
+            bio.seek(0)
+        return bio
+
+
 class PDFGeneratorConDatos(PDFGenerator):
     """Subclase que genera PDFs con datos reales y tablas dinámicas
        Evita saltos de página vacíos y calcula correctamente total_pages.
@@ -126,6 +237,8 @@ class PDFGeneratorConDatos(PDFGenerator):
     def __init__(self, datos):
         super().__init__()
         self.datos = datos or {}
+        # Imágenes repetidas en el documento -> un solo lector/XObject
+        self._imagenes = AlmacenImagenesPDF()
         # Calcular total_pages basándose en etiquetas (no añadimos página extra para firmas)
         self.calcular_total_paginas()
 
@@ -410,14 +523,14 @@ class PDFGeneratorConDatos(PDFGenerator):
                 imgs = []
                 colwidths = []
                 for etq in fila:
-                    img_bytes = etq.get('imagen_bytes')
                     size_cm = etq.get('tamaño_cm', (5,5))
-                    if img_bytes:
-                        img_bytes.seek(0)
-                        w_cm, h_cm = size_cm
-                        img = RLImage(img_bytes,
-                                    width=w_cm*0.393701*inch,
-                                    height=h_cm*0.393701*inch)
+                    w_cm, h_cm = size_cm
+                    # Imagen PNG o etiqueta vectorial según el formato de etiqueta_dictamen
+                    img = flowable_etiqueta(etq,
+                                            w_cm*0.393701*inch,
+                                            h_cm*0.393701*inch,
+                                            almacen=self._imagenes)
+                    if img is not None:
                         imgs.append(img)
                         colwidths.append((w_cm*0.393701 + 0.2)*inch)
 
@@ -498,25 +611,15 @@ class PDFGeneratorConDatos(PDFGenerator):
             except Exception:
                 DEDUPE_CONTENT = False
 
-            def _image_normalized_hash_path(p, size=(64,64)):
+            # Hashes de contenido (caché persistente, calculados en paralelo)
+            hashes_contenido = {}
+            if DEDUPE_CONTENT:
                 try:
-                    from PIL import Image as _Image
-                    with _Image.open(p) as _im:
-                        im = _im.convert('RGB')
-                        im = im.resize(size, resample=_Image.LANCZOS)
-                        data = im.tobytes()
-                    import hashlib as _hashlib
-                    return _hashlib.md5(data).hexdigest()
+                    hashes_contenido = hashes_imagenes.hashes_contenido(
+                        _os.path.normcase(_os.path.normpath(ev)) if isinstance(ev, str) else ev.get('imagen_path')
+                        for ev in evidencias if isinstance(ev, (str, dict)))
                 except Exception:
-                    try:
-                        import hashlib as _hashlib
-                        h = _hashlib.md5()
-                        with open(p, 'rb') as fh:
-                            for chunk in iter(lambda: fh.read(8192), b''):
-                                h.update(chunk)
-                        return h.hexdigest()
-                    except Exception:
-                        return None
+                    hashes_contenido = {}
 
             for ev in evidencias:
                 try:
@@ -598,7 +701,7 @@ class PDFGeneratorConDatos(PDFGenerator):
                             elif isinstance(ev, dict):
                                 pth = ev.get('imagen_path')
                             if pth and _os.path.exists(pth):
-                                hval = _image_normalized_hash_path(pth)
+                                hval = hashes_contenido.get(str(pth)) or hashes_imagenes.hash_contenido(pth)
                                 if hval and hval in seen_hashes:
                                     # marcar ruta como vista y omitir
                                     seen.add(key)
@@ -647,14 +750,7 @@ class PDFGeneratorConDatos(PDFGenerator):
                             else:
                                 print(f"         ⚠️ Ruta no encontrada: {ruta} (omitida)")
                                 continue
-                    with PILImage.open(ruta) as im:
-                        im.verify()
-                    with PILImage.open(ruta) as im2:
-                        if im2.mode != 'RGB':
-                            im2 = im2.convert('RGB')
-                        bio = BytesIO()
-                        im2.save(bio, format='JPEG', quality=90, optimize=True)
-                        bio.seek(0)
+                    bio = self._imagenes.preparada(ruta, _jpeg_evidencia)
 
                 elif isinstance(ev, dict):
                     img_bytes = ev.get('imagen_bytes') or ev.get('imagen_path_bytes')
@@ -676,14 +772,7 @@ class PDFGeneratorConDatos(PDFGenerator):
                     else:
                         p = ev.get('imagen_path')
                         if p and os.path.exists(p):
-                            with PILImage.open(p) as im:
-                                im.verify()
-                            with PILImage.open(p) as im2:
-                                if im2.mode != 'RGB':
-                                    im2 = im2.convert('RGB')
-                                bio = BytesIO()
-                                im2.save(bio, format='JPEG', quality=90, optimize=True)
-                                bio.seek(0)
+                            bio = self._imagenes.preparada(p, _jpeg_evidencia)
                         else:
                             print(f"         ⚠️ imagen_path no existe o inválida: {p}")
                             continue
@@ -702,7 +791,7 @@ class PDFGeneratorConDatos(PDFGenerator):
 
                 # Crear RLImage con tamaño adecuado para 2 columnas x 2 filas (4 por página)
                 try:
-                    img = RLImage(bio, width=3.4*inch, height=3.0*inch)
+                    img = self._imagenes.flowable(bio, 3.4*inch, 3.0*inch)
                 except Exception:
                     try:
                         tmp = BytesIO(bio.read() if hasattr(bio, 'read') else bio)
@@ -784,22 +873,18 @@ class PDFGeneratorConDatos(PDFGenerator):
                 img_bytes = ev.get('imagen_bytes')
                 if img_bytes:
                     img_bytes.seek(0)
-                    try:
-                        img = RLImage(img_bytes, width=4.5*inch, height=4.5*inch)
-                    except Exception:
-                        img = RLImage(img_bytes, width=4.5*inch, height=4.5*inch)
+                    img = self._imagenes.flowable(img_bytes, 4.5*inch, 4.5*inch)
                     self.elements.append(img)
                     self.elements.append(Spacer(1, 0.25 * inch))
 
         # --- Mostrar etiquetas a un tamaño menor ---
         if etiquetas:
             for etq in etiquetas:
-                img_bytes = etq.get('imagen_bytes')
                 w_cm, h_cm = etq.get("tamaño_cm", (5,5))
-                if img_bytes:
-                    img_bytes.seek(0)
-                    img = RLImage(img_bytes, width=w_cm*0.393701*inch/1.4,
-                                            height=h_cm*0.393701*inch/1.4)
+                img = flowable_etiqueta(etq, w_cm*0.393701*inch/1.4,
+                                        h_cm*0.393701*inch/1.4,
+                                        almacen=self._imagenes)
+                if img is not None:
                     self.elements.append(img)
                     self.elements.append(Spacer(1, 0.15 * inch))
 
@@ -1201,20 +1286,89 @@ def detectar_flujo_cliente(cliente_nombre, norma_nombre=""):
     # Por defecto: evidencia
     return "evidencia"
 
-def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_manual=None):
+def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_manual=None, ruta_traza=None,
+                                 silencioso=None, listas=None, reanudar=True, cola_progreso=None):
+    """
+    Genera los dictámenes de todas las familias de la tabla de relación.
+
+    Mide cada etapa (carga de catálogos, reserva de folios, preparación de
+    datos, etiquetas, búsqueda de evidencias, PDF y JSON) con `trazas` y
+    devuelve los totales por etapa y por familia en `resultado['timings']`.
+
+    Args:
+        ruta_traza: Archivo JSON (o carpeta) donde escribir la traza en formato
+            Chrome trace. Si no se indica se usa la variable de entorno
+            `IMAGENESVC_TRAZA_DICTAMENES` (si está definida).
+        silencioso: Modo lote de la bitácora: omite los mensajes por código
+            (solo avisos y errores). Por defecto lo activa la variable de
+            entorno `IMAGENESVC_LOTE_SILENCIOSO=1`.
+        listas: Si se indica, solo se generan esas familias (claves LISTA de
+            `procesar_familias`); lo usa `cli_dictamenes` para repartir un
+            lote entre procesos.
+        reanudar: Usar el diario de `directorio_destino` (`diario_lote`) para
+            omitir las familias ya generadas con los mismos datos y conservar
+            los folios asignados en corridas anteriores. Con False se
+            regenera todo (y el diario empieza de nuevo).
+        cola_progreso: Cola thread-safe (`queue.Queue`) donde publicar los
+            eventos de avance por familia y etapa, con ETA (ver `progreso`).
+
+    Returns:
+        (exito, mensaje, resultado)
+    """
+    if silencioso is None:
+        silencioso = os.environ.get('IMAGENESVC_LOTE_SILENCIOSO') == '1'
+    traza = trazas.Traza('generar_dictamenes_completos')
+    progreso = PublicadorProgreso(cola_progreso)
+    with trazas.activa(traza):
+        if silencioso:
+            with bitacora.modo_lote():
+                exito, mensaje, resultado = _generar_dictamenes_completos(
+                    directorio_destino, cliente_manual, rfc_manual, listas, reanudar, progreso)
+        else:
+            exito, mensaje, resultado = _generar_dictamenes_completos(
+                directorio_destino, cliente_manual, rfc_manual, listas, reanudar, progreso)
+    try:
+        if isinstance(resultado, dict):
+            resultado['timings'] = traza.resumen()
+        print(traza.texto_resumen())
+        ruta_traza = ruta_traza or os.environ.get('IMAGENESVC_TRAZA_DICTAMENES')
+        if ruta_traza:
+            if os.path.isdir(ruta_traza) or not ruta_traza.lower().endswith('.json'):
+                ruta_traza = os.path.join(ruta_traza, f"traza_dictamenes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            traza.escribir_chrome_trace(ruta_traza)
+            print(f"   🧭 Traza escrita en: {ruta_traza}")
+            if isinstance(resultado, dict):
+                resultado['traza_path'] = ruta_traza
+    except Exception as e:
+        print(f"   ⚠️ No se pudo registrar la traza de tiempos: {e}")
+    hashes_imagenes.guardar()
+    progreso.fin(exito, mensaje)
+    return exito, mensaje, resultado
+
+
+def _generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_manual=None, listas=None,
+                                  reanudar=True, progreso=None):
     print("🚀 INICIANDO GENERACIÓN DE DICTÁMENES")
     print("="*60)
+    if progreso is None:
+        progreso = PublicadorProgreso()
 
     # Cargar datos
-    tabla_datos = cargar_tabla_relacion()
-    normas_map, normas_info_completa = cargar_normas()
-    clientes_map = cargar_clientes()
-    firmas_map = cargar_firmas()
+    progreso.preparacion("Cargando tabla y catálogos...")
+    with trazas.span('carga_catalogos'):
+        tabla_datos = cargar_tabla_relacion()
+        normas_map, normas_info_completa = cargar_normas()
+        clientes_map = cargar_clientes()
+        firmas_map = cargar_firmas()
 
     if tabla_datos is None or tabla_datos.empty:
         return False, "No se pudieron cargar los datos de la tabla de relación", None
 
-    familias = procesar_familias(tabla_datos)
+    with trazas.span('procesar_familias'):
+        familias = procesar_familias(tabla_datos)
+    if listas is not None:
+        seleccion = {str(l) for l in listas}
+        familias = {k: v for k, v in familias.items() if str(k) in seleccion}
     if not familias:
         return False, "No se encontraron familias para procesar", None
 
@@ -1255,9 +1409,8 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
         pass
 
     IMG_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
-    import re
     def _normalizar(s):
-        return re.sub(r"[^A-Za-z0-9]", "", str(s or "")).upper()
+        return normalizar_codigo(s)
 
     def _construir_indice_de_carpetas(cfg):
         """Construye un índice dict: base_norm -> [paths]
@@ -1361,7 +1514,48 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
     sin_firma_detalle = []
     folios_usados_set = set()
 
+    # ---------------- Reanudación (diario del lote) ----------------
+    # Las familias que ya se generaron con los mismos datos (y cuyo PDF sigue
+    # igual) se omiten; las demás conservan el folio que tenían en el diario.
+    diario = None
+    claves_diario = {}
+    hashes_familia = {}
+    vigentes = {}
+    folios_diario = {}
+    reanudadas = 0
+    try:
+        diario = DiarioLote(directorio_destino, reanudar=reanudar)
+        contexto = hash_datos({
+            'normas': normas_map, 'normas_info': normas_info_completa, 'clientes': clientes_map,
+            'firmas': firmas_map, 'evidencias': evidencia_cfg,
+            'cliente_manual': cliente_manual, 'rfc_manual': rfc_manual,
+        })
+        for lista, registros in familias.items():
+            clave = clave_familia(registros, lista)
+            if clave in claves_diario.values():
+                # Misma NORMA/SOLICITUD/LISTA con otro folio en la tabla: usar la clave completa
+                clave = str(lista)
+            claves_diario[lista] = clave
+            hashes_familia[lista] = hash_familia(registros, contexto)
+            evento = diario.familia_vigente(clave, hashes_familia[lista])
+            if evento:
+                vigentes[lista] = evento
+                continue
+            folio_previo = diario.folio_previo(clave)
+            if folio_previo is not None:
+                folios_diario[lista] = folio_previo
+        if vigentes or folios_diario:
+            print(f"   ⏯️ Reanudando lote: {len(vigentes)} familia(s) sin cambios se omiten, "
+                  f"{len(folios_diario)} conservan su folio anterior")
+    except Exception as e:
+        print(f"   ⚠️ No se pudo usar el diario del lote: {e}")
+        diario = None
+        vigentes = {}
+        folios_diario = {}
+
     # Calcular bloque de folios a asignar para este proceso.
+    progreso.preparacion("Reservando folios...")
+    span_folios = trazas.abrir('reserva_folios')
     total_needed = len(familias)
     last_known = None
     try:
@@ -1447,6 +1641,22 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
     except Exception:
         use_preassigned = False
 
+    # Con diario: las familias omitidas o con folio anterior no necesitan uno
+    # nuevo, y los folios que sobraron de un bloque reservado antes se usan
+    # primero (evita huecos en la numeración tras una caída). En una corrida
+    # repartida por `listas` no se reutilizan: otro proceso podría tomar los mismos.
+    if diario is not None and not use_preassigned:
+        try:
+            sin_folio = [l for l in familias if l not in vigentes and l not in folios_diario]
+            libres = diario.folios_libres() if sin_folio and listas is None else []
+            for lista_libre, folio_libre in zip(sin_folio, libres):
+                folios_diario[lista_libre] = folio_libre
+            if libres:
+                print(f"   ♻️ {min(len(libres), len(sin_folio))} folio(s) reservados en la corrida anterior se reutilizan")
+            total_needed = max(0, len(sin_folio) - len(libres))
+        except Exception:
+            pass
+
     next_folio_to_assign = None
     reserved_here = False
 
@@ -1508,7 +1718,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
         # Asegurar coherencia: si conocemos el último folio persistido, el siguiente
         # folio a asignar no debe ser menor que last_known + 1.
         try:
-            if last_known is not None and not use_preassigned:
+            if last_known is not None and not use_preassigned and total_needed > 0:
                 minimo = int(last_known) + 1
                 if next_folio_to_assign is None:
                     print(f"   ℹ️ Usando folio_counter como inicio: {minimo}")
@@ -1523,30 +1733,66 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         next_folio_to_assign = minimo
         except Exception:
             pass
+    if diario is not None and not use_preassigned and next_folio_to_assign is not None and total_needed > 0:
+        diario.registrar_reserva(next_folio_to_assign, total_needed)
+    span_folios.cerrar()
 
+    progreso.inicio(len(familias))
     for lista, registros in familias.items():
+        trazas.establecer_familia(lista)
+        progreso.familia_iniciada(lista)
         print(f"\n📄 Procesando familia LISTA {lista} ({len(registros)} registros)...")
+        clave_diario = claves_diario.get(lista, str(lista))
+        if lista in vigentes:
+            # Sin cambios desde la corrida anterior: contar el PDF existente
+            evento = vigentes[lista]
+            reanudadas += 1
+            dictamenes_generados += 1
+            archivos_creados.append(evento['pdf'])
+            try:
+                folios_usados_set.add(int(evento.get('folio')))
+            except Exception:
+                pass
+            if evento.get('con_firma'):
+                dictamenes_con_firma += 1
+            else:
+                dictamenes_sin_firma += 1
+                if evento.get('sin_firma_detalle'):
+                    sin_firma_detalle.append(evento['sin_firma_detalle'])
+            print(f"   ⏭️ Sin cambios desde la corrida anterior: {os.path.basename(evento['pdf'])}")
+            progreso.familia_terminada(lista, ok=True, omitida=True)
+            continue
         try:
-            datos = preparar_datos_familia(
-                registros,
-                normas_map,
-                normas_info_completa,
-                clientes_map,
-                firmas_map,
-                cliente_manual,
-                rfc_manual
-            )
+            progreso.etapa('datos')
+            with trazas.span('preparar_datos_familia'):
+                datos = preparar_datos_familia(
+                    registros,
+                    normas_map,
+                    normas_info_completa,
+                    clientes_map,
+                    firmas_map,
+                    cliente_manual,
+                    rfc_manual
+                )
             
             if datos is None:
                 dictamenes_error += 1
                 print(f"   ❌ ERROR: No se pudieron preparar datos para lista {lista}")
+                if diario is not None:
+                    diario.registrar_familia(clave_diario, hashes_familia.get(lista), folios_diario.get(lista),
+                                             estado='error', error='preparar_datos_familia')
+                progreso.familia_terminada(lista, ok=False)
                 continue
 
             # ---------------- Asignar folio automático por familia (LISTA) ----------------
+            span_folio = trazas.abrir('asignacion_folio')
             try:
                 # Si pre-calculamos un bloque, usarlo y avanzar la variable local;
                 # si no, usar el mecanismo de reserva atómica por compatibilidad.
-                if use_preassigned:
+                if lista in folios_diario:
+                    # Reanudación: conservar el folio que la familia ya tenía en el diario
+                    folio_num = folios_diario[lista]
+                elif use_preassigned:
                     # usar folio preasignado por la tabla (por lista)
                     folio_num = preassigned_map.get(lista)
                     if folio_num is None:
@@ -1596,9 +1842,14 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                             print(f"   ℹ️ Usando folio preexistente: {datos['folio']}")
                     except Exception:
                         pass
+            span_folio.cerrar()
+            if diario is not None:
+                diario.registrar_familia(clave_diario, hashes_familia.get(lista), datos.get('folio'))
 
             # 🎯 DETECTAR Y ASIGNAR FLUJO AUTOMÁTICAMENTE
             # --- Intentar asignar evidencias a partir del índice global ---
+            progreso.etapa('evidencias')
+            span_evidencias = trazas.abrir('busqueda_evidencias')
             try:
                 # Construir lista de códigos a buscar a partir de los registros (campo CODIGO)
                 etiquetas = datos.get('etiquetas_lista', []) or []
@@ -1644,10 +1895,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                 for base in lst:
                                     try:
                                         carpeta_codigo = Path(base) / str(code_hint)
-                                        try:
-                                            print(f"         -> Revisando base: {base}, carpeta esperada: {carpeta_codigo}")
-                                        except Exception:
-                                            pass
+                                        _log.debug("         -> Revisando base: %s, carpeta esperada: %s", base, carpeta_codigo)
                                         # Si la carpeta exacta no existe, intentar búsqueda insensible a mayúsculas
                                         if not carpeta_codigo.exists() or not carpeta_codigo.is_dir():
                                             carpeta_encontrada = None
@@ -1666,12 +1914,11 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                 # por nombre normalizado (solo alfanumérico, mayúsculas).
                                                 if carpeta_encontrada is None:
                                                     try:
-                                                        import re as _re2
-                                                        norm_target = _re2.sub(r"[^A-Za-z0-9]", "", str(code_hint or "")).upper()
+                                                        norm_target = normalizar_codigo(code_hint)
                                                         if norm_target:
                                                             for root, dirs, files in os.walk(base):
                                                                 for d in dirs:
-                                                                    d_norm = _re2.sub(r"[^A-Za-z0-9]", "", d).upper()
+                                                                    d_norm = normalizar_carpeta(d)
                                                                     if d_norm and d_norm == norm_target:
                                                                         carpeta_encontrada = Path(root) / d
                                                                         break
@@ -1684,9 +1931,8 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                 # (p.ej. 'CEDIS AXO' -> probar 'AXO', buscar por contención)
                                                 if carpeta_encontrada is None:
                                                     try:
-                                                        import re as _re3
                                                         # extraer tokens alfanuméricos
-                                                        tokens = [t for t in _re3.split(r"[^A-Za-z0-9]", str(code_hint or "")) if t]
+                                                        tokens = tokens_alnum(code_hint)
                                                         # invertir tokens para probar sufijos primero (ej. AXO)
                                                         for tok in reversed(tokens):
                                                             tok_low = tok.lower()
@@ -1710,24 +1956,21 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
 
                                             if carpeta_encontrada:
                                                 carpeta_codigo = carpeta_encontrada
-                                                try:
-                                                    print(f"         -> Carpeta encontrada (normalizada): {carpeta_codigo}")
-                                                except Exception:
-                                                    pass
+                                                _log.debug("         -> Carpeta encontrada (normalizada): %s", carpeta_codigo)
                                             else:
                                                 # No hay carpeta con el código; como fallback, buscar
                                                 # en la raíz de la base archivos cuyo nombre normalizado
                                                 # coincida o contenga el código.
                                                 try:
                                                     found_root = []
-                                                    code_norm = _re.sub(r"[^A-Za-z0-9]", "", str(code_hint or "")).upper()
+                                                    code_norm = normalizar_codigo(code_hint)
                                                     for fn in os.listdir(base):
                                                         fpath = Path(base) / fn
                                                         if not fpath.is_file():
                                                             continue
                                                         if fpath.suffix.lower() not in exts:
                                                             continue
-                                                        name_core = re.sub(r"[^A-Za-z0-9]", "", fpath.stem).upper()
+                                                        name_core = normalizar_codigo(fpath.stem)
                                                         if not name_core:
                                                             continue
                                                         # Solo aceptar coincidencia NORMALIZADA EXACTA para
@@ -1735,10 +1978,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                         if code_norm == name_core:
                                                             found_root.append(str(fpath))
                                                     if found_root:
-                                                        try:
-                                                            print(f"         → Imágenes encontradas en raíz {base}: {found_root[:3]}")
-                                                        except Exception:
-                                                            pass
+                                                        _log.debug("         → Imágenes encontradas en raíz %s: %s", base, found_root[:3])
                                                         return found_root
                                                 except Exception:
                                                     pass
@@ -1752,12 +1992,13 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                         if not found:
                                             try:
                                                 try:
-                                                    sample_files = []
-                                                    for i, ftest in enumerate(carpeta_codigo.iterdir()):
-                                                        if i >= 5:
-                                                            break
-                                                        sample_files.append(str(ftest))
-                                                    print(f"         -> Archivos de muestra en carpeta {carpeta_codigo}: {sample_files}")
+                                                    if _log.isEnabledFor(bitacora.DEBUG):
+                                                        sample_files = []
+                                                        for i, ftest in enumerate(carpeta_codigo.iterdir()):
+                                                            if i >= 5:
+                                                                break
+                                                            sample_files.append(str(ftest))
+                                                        _log.debug("         -> Archivos de muestra en carpeta %s: %s", carpeta_codigo, sample_files)
                                                 except Exception:
                                                     pass
                                                 for f in carpeta_codigo.iterdir():
@@ -1767,21 +2008,17 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                 pass
                                         if found:
                                             # Logear muestra
-                                            try:
-                                                print(f"         → Imágenes encontradas en {carpeta_codigo}: {found[:3]}")
-                                            except Exception:
-                                                pass
+                                            _log.debug("         → Imágenes encontradas en %s: %s", carpeta_codigo, found[:3])
                                             return found
                                     except Exception:
                                         continue
                             return None
 
                         # Si key parece un código (contiene dígitos), devolver todos los ficheros en base/key
-                        import re as _re
-                        if _re.search(r"\d", str(key)):
+                        if RE_DIGITO.search(str(key)):
                             out = []
                             try:
-                                code_norm = _re.sub(r"[^A-Za-z0-9]", "", str(key or "")).upper()
+                                code_norm = normalizar_codigo(key)
                             except Exception:
                                 code_norm = str(key)
                             for grp, lst in (evidencia_cfg or {}).items():
@@ -1799,7 +2036,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                             try:
                                                 for root, dirs, _files in os.walk(base):
                                                     for d in dirs:
-                                                        d_norm = _re.sub(r"[^A-Za-z0-9]", "", d).upper()
+                                                        d_norm = normalizar_carpeta(d)
                                                         if d_norm == code_norm:
                                                             carpeta_encontrada = Path(root) / d
                                                             break
@@ -1824,7 +2061,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                         continue
                                                     if fpath.suffix.lower() not in exts:
                                                         continue
-                                                    name_core = re.sub(r"[^A-Za-z0-9]", "", fpath.stem).upper()
+                                                    name_core = normalizar_codigo(fpath.stem)
                                                     if not name_core:
                                                         continue
                                                     # Aceptar solo coincidencia NORMALIZADA EXACTA
@@ -1861,11 +2098,8 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         cols = list(tabla_datos.columns)
                         norm_map = {c: _colnorm(c) for c in cols}
                         # Depuración: mostrar columnas detectadas y su normalización
-                        try:
-                            print(f"   🐞 tabla_de_relacion columns: {cols}")
-                            print(f"   🐞 normalized columns: {norm_map}")
-                        except Exception:
-                            pass
+                        _log.debug("   🐞 tabla_de_relacion columns: %s", cols)
+                        _log.debug("   🐞 normalized columns: %s", norm_map)
 
                         possible_code_keys = set()
                         for c, nc in norm_map.items():
@@ -1881,20 +2115,16 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                 if nc.isdigit() or any(ch.isdigit() for ch in nc):
                                     possible_code_keys.add(c)
 
-                        try:
-                            print(f"   🐞 possible_code_keys: {possible_code_keys}")
-                            print(f"   🐞 possible_asign_keys: {possible_asign_keys}")
-                        except Exception:
-                            pass
+                        _log.debug("   🐞 possible_code_keys: %s", possible_code_keys)
+                        _log.debug("   🐞 possible_asign_keys: %s", possible_asign_keys)
 
                         # Comparación directa: intentar coincidencia exacta en las columnas de código
-                        import re as _re_map
-                        s_norm = _re_map.sub(r"[^A-Za-z0-9]", "", s).upper()
+                        s_norm = normalizar_codigo(s)
                         for col in possible_code_keys:
                             try:
                                 # Normalizar la serie de la columna para comparar solo alfanuméricos
                                 serie_raw = tabla_datos[col].astype(str).fillna("")
-                                serie_norm = serie_raw.apply(lambda x: _re_map.sub(r"[^A-Za-z0-9]", "", str(x)).upper())
+                                serie_norm = serie_raw.map(normalizar_codigo)
 
                                 # Comparar por normalización completa
                                 mask = serie_norm == s_norm
@@ -1909,8 +2139,8 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                     idx = mask.idxmax()
                                     row = tabla_datos.loc[idx]
                                     try:
-                                        if DEBUG_VERBOSE:
-                                            print(f"   🐞 matched row idx={idx} row={{}}".format(row.to_dict()))
+                                        if _log.isEnabledFor(bitacora.DEBUG):
+                                            _log.debug("   🐞 matched row idx=%s row=%s", idx, row.to_dict())
                                     except Exception:
                                         pass
                                     # Preferir columna de asignación si existe
@@ -1940,10 +2170,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                         # devolver la segunda columna (si existe) como la asignación esperada
                                         if len(cols) >= 2:
                                             val = row.get(cols[1])
-                                            try:
-                                                print(f"   🐞 fallback: matched in col={col}, returning cols[1]={cols[1]} value={val}")
-                                            except Exception:
-                                                pass
+                                            _log.debug("   🐞 fallback: matched in col=%s, returning cols[1]=%s value=%s", col, cols[1], val)
                                             if val and str(val).strip():
                                                 return str(val).strip()
                                         return None
@@ -1961,21 +2188,20 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         codes_only = [item.get('codigo') if isinstance(item, dict) else item for item in codigos_a_buscar]
                     except Exception:
                         codes_only = codigos_a_buscar
-                    print(f"   🔎 Buscando evidencias para códigos: {codes_only}")
+                    _log.info("   🔎 Buscando evidencias para códigos: %s", codes_only)
                     # Helper: determina si una ruta contiene el código como carpeta/segmento
-                    import re as _re
                     def _path_contains_code(path, code):
                         try:
                             if not path or not code:
                                 return False
                             # normalizar código
-                            code_norm = _re.sub(r"[^A-Za-z0-9]", "", str(code or "")).upper()
+                            code_norm = normalizar_codigo(code)
                             if not code_norm:
                                 return False
                             # dividir en segmentos de ruta y comparar alfanuméricos
-                            parts = [p for p in _re.split(r"[\\/]+", str(path)) if p]
+                            parts = [p for p in RE_SEP_RUTA.split(str(path)) if p]
                             for seg in parts:
-                                seg_norm = _re.sub(r"[^A-Za-z0-9]", "", seg).upper()
+                                seg_norm = normalizar_carpeta(seg)
                                 if not seg_norm:
                                     continue
                                 # Aceptar solo coincidencia EXACTA entre segmento y código
@@ -2003,19 +2229,18 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
 
                         # Verbose per-código: mostrar cliente, código y resumen de grupos de evidencia
                         try:
-                            if DEBUG_VERBOSE:
+                            if _log.isEnabledFor(bitacora.DEBUG):
                                 cliente_nombre = str(datos.get('cliente', '') or '').strip()
                                 grp_keys = list(evidencia_cfg.keys()) if isinstance(evidencia_cfg, dict) else []
-                                print(f"--- VERBOSE START: cliente='{cliente_nombre}', codigo='{codigo}', asig_field='{asig_field}' ---")
-                                print(f"--- VERBOSE: evidencia_cfg grupos: {grp_keys}")
+                                _log.debug("--- VERBOSE START: cliente='%s', codigo='%s', asig_field='%s' ---", cliente_nombre, codigo, asig_field)
+                                _log.debug("--- VERBOSE: evidencia_cfg grupos: %s", grp_keys)
                         except Exception:
                             pass
 
                         try:
                             # 0) Intentar usar índice externo (Excel CONCENTRADO) si tiene una entrada para el código
                             try:
-                                import re as _re
-                                canon_code = _re.sub(r"[^A-Za-z0-9]", "", str(codigo or "")).upper()
+                                canon_code = normalizar_codigo(codigo)
                             except Exception:
                                 canon_code = str(codigo or "").strip()
                             # Respetar la preferencia de modo de pegado configurada por la UI.
@@ -2031,7 +2256,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                 # (no es un error; sirve para diagnóstico en logs)
                                 pass
                             if destino_idx:
-                                print(f"      🔁 Código {codigo} -> destino por índice: {destino_idx}")
+                                _log.info("      🔁 Código %s -> destino por índice: %s", codigo, destino_idx)
                                 try:
                                     # Si destino_idx parece ser un nombre de archivo con extensión de imagen,
                                     # buscar ese archivo EXACTO dentro de las rutas configuradas en evidencia_cfg.
@@ -2051,34 +2276,31 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                                     continue
                                         if cand_list:
                                             found_paths = cand_list
-                                            print(f"         → Encontrado por nombre de archivo (índice): {found_paths[:3]}")
+                                            _log.debug("         → Encontrado por nombre de archivo (índice): %s", found_paths[:3])
                                         else:
-                                            print(f"         → No se encontró el archivo {destino_idx} en rutas de evidencia")
+                                            _log.info("         → No se encontró el archivo %s en rutas de evidencia", destino_idx)
                                     else:
                                         # Tratar destino_idx como carpeta/nombre de base y usar la búsqueda existente
                                         try:
                                             found_paths = _buscar_imagen(codigo, destino_idx)
                                         except Exception as _e:
-                                            print(f"   ⚠️ Error buscando evidencias usando índice como carpeta para {codigo}: {_e}")
+                                            _log.warning("   ⚠️ Error buscando evidencias usando índice como carpeta para %s: %s", codigo, _e)
                                             found_paths = None
 
                                     ps = found_paths
                                 except Exception as _e:
-                                    print(f"   ⚠️ Error buscando evidencias usando índice para {codigo}: {_e}")
+                                    _log.warning("   ⚠️ Error buscando evidencias usando índice para %s: %s", codigo, _e)
                                     ps = None
 
                             # 1) si no se encontró por índice, pero el registro trae columna ASIG, usarla directamente
                             if not ps:
                                 try:
                                     if asig_field:
-                                        try:
-                                            print(f"      ℹ️ Registro contiene ASIG='{asig_field}' -> buscando en esa carpeta para código {codigo}")
-                                        except Exception:
-                                            pass
+                                        _log.info("      ℹ️ Registro contiene ASIG='%s' -> buscando en esa carpeta para código %s", asig_field, codigo)
                                         try:
                                             ps = _buscar_imagen(codigo, asig_field)
                                         except Exception as _e:
-                                            print(f"   ⚠️ Error buscando evidencias para ASIG {asig_field}: {_e}")
+                                            _log.warning("   ⚠️ Error buscando evidencias para ASIG %s: %s", asig_field, _e)
                                             ps = None
                                 except Exception:
                                     pass
@@ -2098,40 +2320,32 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                     necesita_asig = False
 
                                 if necesita_asig:
-                                    try:
-                                        print(f"      🐞 DEBUG: Intentando mapear código {codigo} para cliente '{cliente_nombre}' usando tabla_de_relacion (tabla_datos is None={tabla_datos is None})")
-                                    except Exception:
-                                        pass
+                                    _log.debug("      🐞 DEBUG: Intentando mapear código %s para cliente '%s' usando tabla_de_relacion (tabla_datos is None=%s)",
+                                               codigo, cliente_nombre, tabla_datos is None)
                                     asign = _map_code_to_assignment(codigo)
-                                    try:
-                                        print(f"      🐞 DEBUG: _map_code_to_assignment returned: {asign}")
-                                    except Exception:
-                                        pass
+                                    _log.debug("      🐞 DEBUG: _map_code_to_assignment returned: %s", asign)
                                     if asign:
-                                        print(f"      🔁 Código {codigo} mapeado a asignación: {asign} (tabla_de_relacion)")
+                                        _log.info("      🔁 Código %s mapeado a asignación: %s (tabla_de_relacion)", codigo, asign)
                                         try:
                                             # buscar por el código dentro de la carpeta indicada por 'asign'
                                             ps = _buscar_imagen(codigo, asign)
                                         except Exception as _e:
-                                            print(f"   ⚠️ Error buscando evidencias para asignación {asign}: {_e}")
+                                            _log.warning("   ⚠️ Error buscando evidencias para asignación %s: %s", asign, _e)
                                             ps = None
                                 else:
                                     # No aplicar mapeo por ASIG para este cliente
-                                    try:
-                                        print(f"      ℹ️ Cliente '{cliente_nombre}' no requiere mapping ASIG; omitiendo búsqueda por asignación.")
-                                    except Exception:
-                                        pass
+                                    _log.debug("      ℹ️ Cliente '%s' no requiere mapping ASIG; omitiendo búsqueda por asignación.", cliente_nombre)
 
                             # 2) si no se encontró por asignación, intentar búsqueda directa por el código
                             if not ps:
                                 try:
                                     ps = _buscar_imagen(codigo)
                                 except Exception as _e:
-                                    print(f"   ⚠️ Error buscando evidencias para {codigo}: {_e}")
+                                    _log.warning("   ⚠️ Error buscando evidencias para %s: %s", codigo, _e)
                                     ps = None
 
                         except Exception as _e:
-                            print(f"   ⚠️ Error procesando código {codigo}: {_e}")
+                            _log.warning("   ⚠️ Error procesando código %s: %s", codigo, _e)
                             ps = None
 
                             # Si la búsqueda devolvió múltiples rutas, preferir
@@ -2144,11 +2358,11 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                             except Exception:
                                 pass
 
-                            print(f"      → {codigo} => {ps}")
+                            _log.debug("      → %s => %s", codigo, ps)
                         mapping_codes[str(codigo)] = ps
                         # Verbose summary por código: qué bases se examinaron y resultado
                         try:
-                            if DEBUG_VERBOSE:
+                            if _log.isEnabledFor(bitacora.DEBUG):
                                 bases_examined = []
                                 try:
                                     for g, l in (evidencia_cfg or {}).items():
@@ -2157,7 +2371,8 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                 except Exception:
                                     bases_examined = []
                                 asign_val = locals().get('asign', None)
-                                print(f"--- VERBOSE END: codigo='{codigo}', asign='{asign_val}', resultado={ps}, bases_examined_sample={bases_examined[:6]} ---")
+                                _log.debug("--- VERBOSE END: codigo='%s', asign='%s', resultado=%s, bases_examined_sample=%s ---",
+                                           codigo, asign_val, ps, bases_examined[:6])
                         except Exception:
                             pass
                         if not ps:
@@ -2167,14 +2382,14 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                     # Si el índice tenía una referencia pero no se encontró el archivo
                                     try:
                                         if destino_idx:
-                                            print(f"      ❌ Código {codigo}: referencia en índice ({destino_idx}) pero no se encontró el archivo en las rutas de evidencia cargadas.")
+                                            _log.warning("      ❌ Código %s: referencia en índice (%s) pero no se encontró el archivo en las rutas de evidencia cargadas.", codigo, destino_idx)
                                         else:
-                                            print(f"      ❌ Código {codigo}: no se encontró referencia en el índice ni imagen en las rutas cargadas.")
+                                            _log.warning("      ❌ Código %s: no se encontró referencia en el índice ni imagen en las rutas cargadas.", codigo)
                                     except Exception:
-                                        print(f"      ❌ Código {codigo}: no se encontraron evidencias (modo índice).")
+                                        _log.warning("      ❌ Código %s: no se encontraron evidencias (modo índice).", codigo)
                                 else:
                                     modo_txt = 'carpetas' if modo_cfg == 'carpetas' else 'simple'
-                                    print(f"      ❌ Código {codigo}: no se encontró imagen en las rutas cargadas (modo {modo_txt}).")
+                                    _log.warning("      ❌ Código %s: no se encontró imagen en las rutas cargadas (modo %s).", codigo, modo_txt)
                             except Exception:
                                 pass
                             continue
@@ -2230,10 +2445,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                                     e['imagen_path'] = first_p
 
                 # Imprimir resumen del mapeo código -> rutas (incluso si vacío)
-                try:
-                    print(f"   🔗 Mapeo códigos->evidencias: {mapping_codes}")
-                except Exception:
-                    pass
+                _log.debug("   🔗 Mapeo códigos->evidencias: %s", mapping_codes)
 
                 if rutas_encontradas:
                     # Eliminar duplicados conservando orden (algunos códigos pueden mapear a las mismas rutas)
@@ -2253,25 +2465,15 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         seen_hashes = set()
                         uniq = []
 
-                        def _image_normalized_hash_local(path, size=(64, 64)):
+                        # Hashes de contenido (caché persistente, calculados en paralelo)
+                        hashes_contenido = {}
+                        if DEDUPE_CONTENT:
                             try:
-                                from PIL import Image as _Image
-                                with _Image.open(path) as _im:
-                                    im = _im.convert('RGB')
-                                    im = im.resize(size, resample=_Image.LANCZOS)
-                                    data = im.tobytes()
-                                import hashlib as _hashlib
-                                return _hashlib.md5(data).hexdigest()
+                                hashes_contenido = hashes_imagenes.hashes_contenido(
+                                    _os.path.normcase(_os.path.normpath(str(p.get('imagen_path') if isinstance(p, dict) else p)))
+                                    for p in rutas_encontradas)
                             except Exception:
-                                try:
-                                    import hashlib as _hashlib
-                                    h = _hashlib.md5()
-                                    with open(path, 'rb') as fh:
-                                        for chunk in iter(lambda: fh.read(8192), b''):
-                                            h.update(chunk)
-                                    return h.hexdigest()
-                                except Exception:
-                                    return None
+                                hashes_contenido = {}
 
                         for p in rutas_encontradas:
                             try:
@@ -2293,7 +2495,7 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                             # dedupe por contenido opcional
                             if DEDUPE_CONTENT:
                                 try:
-                                    h = _image_normalized_hash_local(k)
+                                    h = hashes_contenido.get(k) or hashes_imagenes.hash_contenido(k)
                                 except Exception:
                                     h = None
                                 if h and h in seen_hashes:
@@ -2316,17 +2518,21 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         datos['dedupe_by_content'] = False
 
                     datos['evidencias_lista'] = rutas_encontradas
-                    print(f"   ✅ Evidencias asignadas: {rutas_encontradas}")
+                    _log.info("   ✅ Evidencias asignadas: %s", rutas_encontradas)
                 else:
                     # Si no se asignaron evidencias, mostrar pistas útiles
-                    print(f"   ⚠️ No se asignaron evidencias para los códigos provistos.")
+                    _log.warning("   ⚠️ No se asignaron evidencias para los códigos provistos.")
                     try:
                         sample_keys = list(indice_evidencias_global.keys())[:20]
-                        print(f"   ℹ️ Claves indexadas (muestra): {sample_keys}")
+                        _log.debug("   ℹ️ Claves indexadas (muestra): %s", sample_keys)
                     except Exception:
                         pass
             except Exception:
                 pass
+            finally:
+                span_evidencias.cerrar()
+                # Escribir lo pendiente antes de volver a los print de la familia
+                bitacora.vaciar()
 
             cliente = datos.get('cliente', 'DESCONOCIDO')
             cliente = datos.get('cliente', 'DESCONOCIDO')
@@ -2364,8 +2570,10 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
             ruta_completa = os.path.join(carpeta_solicitud, nombre_archivo)
 
             pdf_ok = False
+            progreso.etapa('pdf')
             try:
-                pdf_ok = generador.generar_pdf_con_datos(ruta_completa)
+                with trazas.span('generar_pdf_con_datos'):
+                    pdf_ok = generador.generar_pdf_con_datos(ruta_completa)
             except Exception as e:
                 pdf_ok = False
                 pdf_error_msg = str(e)
@@ -2382,8 +2590,10 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                     pass
 
                 # Guardar JSON del dictamen con metadata indicando PDF creado
+                progreso.etapa('json')
                 meta = {'pdf_generado': True, 'pdf_path': os.path.abspath(ruta_completa)}
-                exito_json, error_json = guardar_dictamen_json(datos, lista, directorio_json, metadata=meta)
+                with trazas.span('guardar_dictamen_json'):
+                    exito_json, error_json = guardar_dictamen_json(datos, lista, directorio_json, metadata=meta)
                 if exito_json:
                     json_generados += 1
                     print(f"   💾 JSON guardado: Dictamen_Lista_{lista}.json")
@@ -2395,25 +2605,36 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                     })
                     print(f"   ⚠️ Error guardando JSON: {error_json}")
 
+                detalle_sin_firma = None
                 if tiene_firma:
                     dictamenes_con_firma += 1
                     print(f"   ✅ Creado CON FIRMA: {nombre_archivo}")
                 else:
                     dictamenes_sin_firma += 1
                     print(f"   ⚠️ Creado SIN FIRMA: {nombre_archivo}")
-                    sin_firma_detalle.append({
+                    detalle_sin_firma = {
                         "lista": lista,
                         "norma": datos.get("norma", ""),
                         "firma_solicitada": datos.get("codigo_firma_solicitado", ""),
                         "razon": datos.get("razon_sin_firma", "Desconocida")
-                    })
+                    }
+                    sin_firma_detalle.append(detalle_sin_firma)
+                if diario is not None:
+                    diario.registrar_familia(clave_diario, hashes_familia.get(lista), datos.get('folio'),
+                                             estado='ok', pdf=ruta_completa, con_firma=bool(tiene_firma),
+                                             sin_firma_detalle=detalle_sin_firma)
+                progreso.familia_terminada(lista, ok=True)
             else:
                 dictamenes_error += 1
                 print(f"   ❌ Error creando dictamen para lista {lista}")
+                if diario is not None:
+                    diario.registrar_familia(clave_diario, hashes_familia.get(lista), datos.get('folio'),
+                                             estado='error', error=str(pdf_error_msg or 'Error desconocido'))
                 # Incluso si el PDF falló, intentar guardar JSON con metadata de error
                 try:
                     meta = {'pdf_generado': False, 'pdf_error': str(pdf_error_msg or 'Error desconocido')}
-                    exito_json, error_json = guardar_dictamen_json(datos, lista, directorio_json, metadata=meta)
+                    with trazas.span('guardar_dictamen_json'):
+                        exito_json, error_json = guardar_dictamen_json(datos, lista, directorio_json, metadata=meta)
                     if exito_json:
                         json_generados += 1
                         print(f"   💾 JSON guardado (error): Dictamen_Lista_{lista}.json")
@@ -2426,13 +2647,26 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
                         print(f"   ⚠️ Error guardando JSON tras fallo de PDF: {error_json}")
                 except Exception:
                     pass
+                progreso.familia_terminada(lista, ok=False)
 
         except Exception as e:
             dictamenes_error += 1
             print(f"   ❌ Error en familia {lista}: {e}")
             traceback.print_exc()
+            if diario is not None:
+                try:
+                    folio_error = datos.get('folio') if isinstance(datos, dict) else folios_diario.get(lista)
+                except NameError:
+                    folio_error = folios_diario.get(lista)
+                diario.registrar_familia(clave_diario, hashes_familia.get(lista), folio_error,
+                                         estado='error', error=str(e))
+            progreso.familia_terminada(lista, ok=False)
             continue
 
+    if diario is not None:
+        diario.registrar_fin(progreso.ok - progreso.omitidas, progreso.errores)
+        diario.cerrar()
+
     # Actualizar folio_counter.json al último folio asignado para este lote
     try:
         # Si usamos folios preasignados por la tabla, asumimos que ya se hizo
@@ -2563,7 +2797,9 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
         'json_errores': json_errores,
         'json_errores_detalle': json_errores_detalle,
         'folios_utilizados': folios_info,
-        'folios_usados_list': folios_list
+        'folios_usados_list': folios_list,
+        'reanudadas': reanudadas,
+        'diario': diario.carpeta if diario is not None else None,
     }
 
     # Exportar una copia plana de la tabla de relación con los folios actualizados
@@ -2616,23 +2852,54 @@ def generar_dictamenes_completos(directorio_destino, cliente_manual=None, rfc_ma
     success = dictamenes_generados > 0
     return success, mensaje if success else "No se pudo generar ningún dictamen", resultado
 
-def generar_dictamenes_gui(callback_progreso=None, callback_finalizado=None, cliente_manual=None, rfc_manual=None):
+def generar_dictamenes_gui(callback_progreso=None, callback_finalizado=None, cliente_manual=None, rfc_manual=None,
+                           cola_progreso=None):
+    """
+    Pide la carpeta de destino y genera los dictámenes.
+
+    Cada corrida escribe en una carpeta `Dictamenes_<fecha>` nueva; si la más
+    reciente de ese destino quedó incompleta (diario sin terminar o con
+    errores), se ofrece continuarla ahí mismo para reanudar el lote.
+
+    Con `cola_progreso` el avance se publica por familia en esa cola (la
+    interfaz la drena desde su propio hilo); `callback_progreso` solo recibe
+    el inicio y el final.
+    """
     try:
         import tkinter as tk
         from tkinter import filedialog
         root = tk.Tk()
         root.withdraw()
         directorio_destino = filedialog.askdirectory(title="Seleccione dónde guardar los dictámenes")
-        root.destroy()
         if not directorio_destino:
+            root.destroy()
             if callback_finalizado:
                 callback_finalizado(False, "Operación cancelada por el usuario", None)
             return False, "Operación cancelada", None
 
-        carpeta_final = os.path.join(directorio_destino, f"Dictamenes_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        carpeta_final = None
+        pendiente = buscar_lote_pendiente(directorio_destino)
+        if pendiente:
+            try:
+                from tkinter import messagebox
+                if messagebox.askyesno(
+                        "Lote incompleto",
+                        f"El último lote en esta carpeta no terminó:\n{os.path.basename(pendiente)}\n\n"
+                        "¿Continuarlo? Se omiten las familias ya generadas y las demás "
+                        "conservan su folio.\n\n(No = empezar un lote nuevo)",
+                        parent=root):
+                    carpeta_final = pendiente
+                    print(f"🔁 Continuando lote incompleto: {pendiente}")
+            except Exception:
+                traceback.print_exc()
+        root.destroy()
+
+        if carpeta_final is None:
+            carpeta_final = os.path.join(directorio_destino, f"Dictamenes_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
         if callback_progreso:
             callback_progreso(10, "Iniciando...")
-        exito, mensaje, resultado = generar_dictamenes_completos(carpeta_final, cliente_manual, rfc_manual)
+        exito, mensaje, resultado = generar_dictamenes_completos(carpeta_final, cliente_manual, rfc_manual,
+                                                                 cola_progreso=cola_progreso)
         if callback_progreso:
             callback_progreso(100, mensaje)
         if callback_finalizado:
@@ -0,0 +1,258 @@
+"""Hashes de imágenes con caché persistente (deduplicación por contenido).
+
+Con `dedupe_by_content` activo, el generador de dictámenes y el pegado de
+evidencias comparaban fotos por un MD5 de la imagen reducida a 64x64
+(LANCZOS): cada corrida volvía a decodificar todas las fotos, y había tres
+copias de la misma función. Este módulo es el único servicio de hashes:
+
+    import hashes_imagenes
+    claves = hashes_imagenes.hashes_contenido(rutas)   # {ruta: hash}
+    hashes_imagenes.guardar()
+
+- `hash_archivo(ruta)`: MD5 de los bytes del archivo.
+- `hash_normalizado(ruta)`: MD5 de la imagen en RGB reducida a 64x64; dos
+  fotos iguales guardadas con distinta compresión/metadatos dan el mismo.
+- `hash_contenido(ruta)`: la clave de deduplicación; el normalizado o, si
+  la imagen no se puede abrir, el MD5 del archivo (como antes).
+- `hashes_contenido(rutas)`: igual para una lista; las que no están en caché
+  se calculan en un pool de hilos (Pillow suelta el GIL al decodificar).
+
+La caché se guarda en JSON (`%APPDATA%/ImagenesVC/cache_hashes_imagenes.json`
+o la ruta de `IMAGENESVC_CACHE_HASHES`) con clave ruta + tamaño + mtime: si
+el archivo cambia, se recalcula. Se escribe con `guardar()` (como mucho cada
+`INTERVALO_GUARDADO` segundos durante un lote) y al salir del proceso; si
+varios procesos la actualizan, se combinan las entradas al guardar.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+TAMANO_NORMALIZADO = (64, 64)
+MAX_ENTRADAS = 50000
+INTERVALO_GUARDADO = 30.0
+HILOS = min(8, (os.cpu_count() or 2))
+NOMBRE_CACHE = 'cache_hashes_imagenes.json'
+VERSION_CACHE = 1
+
+
+def _ruta_cache_por_defecto() -> str:
+    ruta = os.environ.get('IMAGENESVC_CACHE_HASHES')
+    if ruta:
+        return os.path.abspath(ruta)
+    base = os.getenv('APPDATA') or os.path.join(os.path.expanduser('~'), '.imagenesvc')
+    return os.path.join(base, 'ImagenesVC', NOMBRE_CACHE)
+
+
+def _clave_ruta(ruta) -> str:
+    return os.path.normcase(os.path.abspath(str(ruta)))
+
+
+# ============================================================
+# CÁLCULO
+# ============================================================
+def calcular_md5_archivo(ruta) -> Optional[str]:
+    """MD5 de los bytes del archivo (None si no se puede leer)."""
+    try:
+        h = hashlib.md5()
+        with open(ruta, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(65536), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def calcular_hash_normalizado(ruta, size=TAMANO_NORMALIZADO) -> Optional[str]:
+    """MD5 de la imagen convertida a RGB y reducida a `size` (None si no se puede abrir)."""
+    try:
+        from PIL import Image
+        with Image.open(ruta) as im:
+            im = im.convert('RGB')
+            im = im.resize(size, resample=Image.LANCZOS)
+            data = im.tobytes()
+        return hashlib.md5(data).hexdigest()
+    except Exception:
+        return None
+
+
+# ============================================================
+# CACHÉ PERSISTENTE
+# ============================================================
+class CacheHashes:
+    """Hashes por (ruta, tamaño, mtime) guardados en un archivo JSON."""
+
+    def __init__(self, ruta: Optional[str] = None):
+        self.ruta = ruta or _ruta_cache_por_defecto()
+        self._entradas: Optional[Dict[str, dict]] = None
+        self._nuevas: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._ultimo_guardado = time.monotonic()
+        self.aciertos = 0
+        self.calculados = 0
+
+    # ---------------- carga ----------------
+    def _leer_disco(self) -> Dict[str, dict]:
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f) or {}
+            if datos.get('version') != VERSION_CACHE:
+                return {}
+            entradas = datos.get('entradas') or {}
+            return entradas if isinstance(entradas, dict) else {}
+        except Exception:
+            return {}
+
+    def _cargar(self) -> Dict[str, dict]:
+        if self._entradas is None:
+            with self._lock:
+                if self._entradas is None:
+                    self._entradas = self._leer_disco()
+        return self._entradas
+
+    # ---------------- consulta ----------------
+    def _entrada(self, ruta):
+        """(clave, entrada vigente o nueva) para `ruta`; None si el archivo no existe."""
+        try:
+            st = os.stat(ruta)
+        except (OSError, TypeError, ValueError):
+            return None, None
+        clave = _clave_ruta(ruta)
+        entradas = self._cargar()
+        with self._lock:
+            entrada = entradas.get(clave)
+            if (not entrada or entrada.get('tamano') != st.st_size
+                    or entrada.get('mtime_ns') != st.st_mtime_ns):
+                entrada = {'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns}
+                entradas[clave] = entrada
+        return clave, entrada
+
+    def _obtener(self, ruta, campo: str, calcular) -> Optional[str]:
+        clave, entrada = self._entrada(ruta)
+        if entrada is None:
+            return None
+        if campo in entrada:
+            self.aciertos += 1
+            return entrada[campo]
+        valor = calcular(ruta)
+        with self._lock:
+            entrada[campo] = valor
+            entrada['uso'] = time.time()
+            self._nuevas[clave] = entrada
+            self.calculados += 1
+        return valor
+
+    def hash_archivo(self, ruta) -> Optional[str]:
+        return self._obtener(ruta, 'md5', calcular_md5_archivo)
+
+    def hash_normalizado(self, ruta) -> Optional[str]:
+        return self._obtener(ruta, 'normalizado', calcular_hash_normalizado)
+
+    def hash_contenido(self, ruta) -> Optional[str]:
+        """Hash normalizado o, si la imagen no se puede abrir, MD5 del archivo."""
+        valor = self.hash_normalizado(ruta)
+        if valor is None:
+            valor = self.hash_archivo(ruta)
+        return valor
+
+    def hashes_contenido(self, rutas: Iterable, hilos: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """`{ruta: hash_contenido}`; las rutas sin caché se calculan en paralelo."""
+        rutas = list(dict.fromkeys(str(r) for r in rutas if r))
+        if not rutas:
+            return {}
+        pendientes = []
+        for ruta in rutas:
+            _clave, entrada = self._entrada(ruta)
+            if entrada is not None and 'normalizado' not in entrada:
+                pendientes.append(ruta)
+        hilos = HILOS if hilos is None else hilos
+        if len(pendientes) > 1 and hilos > 1:
+            with ThreadPoolExecutor(max_workers=min(hilos, len(pendientes)),
+                                    thread_name_prefix='hash_imagenes') as pool:
+                list(pool.map(self.hash_contenido, pendientes))
+        resultado = {ruta: self.hash_contenido(ruta) for ruta in rutas}
+        self.guardar(forzar=False)
+        return resultado
+
+    # ---------------- escritura ----------------
+    def guardar(self, forzar: bool = True) -> bool:
+        """
+        Escribe las entradas nuevas (combinadas con lo que haya en disco).
+        Con `forzar=False` solo si pasaron `INTERVALO_GUARDADO` segundos.
+        """
+        with self._lock:
+            if not self._nuevas:
+                return False
+            if not forzar and time.monotonic() - self._ultimo_guardado < INTERVALO_GUARDADO:
+                return False
+            nuevas = dict(self._nuevas)
+            self._nuevas.clear()
+            self._ultimo_guardado = time.monotonic()
+        try:
+            # Otro proceso pudo guardar mientras tanto: partir de lo que hay en disco
+            entradas = self._leer_disco()
+            entradas.update(nuevas)
+            if len(entradas) > MAX_ENTRADAS:
+                ordenadas = sorted(entradas.items(), key=lambda kv: kv[1].get('uso', 0), reverse=True)
+                entradas = dict(ordenadas[:MAX_ENTRADAS])
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            tmp = f"{self.ruta}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': VERSION_CACHE, 'entradas': entradas}, f, separators=(',', ':'))
+            os.replace(tmp, self.ruta)
+            with self._lock:
+                base = self._entradas or {}
+                entradas.update(base)
+                self._entradas = entradas
+            return True
+        except Exception as e:
+            with self._lock:
+                # Reintentar en el próximo guardado
+                for clave, entrada in nuevas.items():
+                    self._nuevas.setdefault(clave, entrada)
+            print(f"   ⚠️ No se pudo guardar la caché de hashes de imágenes: {e}")
+            return False
+
+
+_CACHE: Optional[CacheHashes] = None
+_LOCK_CACHE = threading.Lock()
+
+
+def obtener_cache() -> CacheHashes:
+    """Caché compartida del proceso (se guarda también al salir)."""
+    global _CACHE
+    if _CACHE is None:
+        with _LOCK_CACHE:
+            if _CACHE is None:
+                _CACHE = CacheHashes()
+                atexit.register(_CACHE.guardar)
+    return _CACHE
+
+
+def hash_archivo(ruta) -> Optional[str]:
+    return obtener_cache().hash_archivo(ruta)
+
+
+def hash_normalizado(ruta) -> Optional[str]:
+    return obtener_cache().hash_normalizado(ruta)
+
+
+def hash_contenido(ruta) -> Optional[str]:
+    return obtener_cache().hash_contenido(ruta)
+
+
+def hashes_contenido(rutas: Iterable, hilos: Optional[int] = None) -> Dict[str, Optional[str]]:
+    return obtener_cache().hashes_contenido(rutas, hilos)
+
+
+def guardar() -> bool:
+    """Escribe la caché si hay entradas nuevas."""
+    if _CACHE is None:
+        return False
+    return _CACHE.guardar()
@@ -0,0 +1,91 @@
+"""Utilidades de normalización de texto compartidas.
+
+Centraliza las normalizaciones que antes se repetían (con `re.sub` sin
+compilar e `import re` locales) en el generador de dictámenes, las
+herramientas de pegado de evidencias, el buscador del historial y el
+control de folios:
+
+- `normalizar_codigo(s)`: solo alfanumérico en mayúsculas (códigos, EAN,
+  nombres de archivo de evidencia).
+- `normalizar_carpeta(nombre)`: misma regla aplicada a nombres de
+  carpeta; tiene su propio caché porque durante un recorrido de
+  directorios se consultan los mismos nombres una y otra vez.
+- `sin_acentos(s)`: elimina marcas diacríticas (NFD, categoría Mn).
+- `plegar_acentos(s)`: NFKD -> ASCII (descarta lo no representable).
+- `normalizar_nombre(s)`: NFKD sin combinantes en mayúsculas, usado para
+  nombres de inspectores.
+
+Todas las funciones están memoizadas con `lru_cache`: los catálogos y los
+índices de imágenes repiten los mismos valores miles de veces por corrida,
+así que después de la primera llamada el costo es una búsqueda en dict.
+Las expresiones regulares se compilan una sola vez al importar el módulo.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Expresiones precompiladas (reutilizadas por los módulos que importan este)
+RE_NO_ALNUM = re.compile(r"[^A-Za-z0-9]")
+RE_DIGITO = re.compile(r"\d")
+RE_DIGITOS = re.compile(r"\d+")
+RE_SEP_RUTA = re.compile(r"[\\/]+")
+# Sufijos de copia comunes al final de un nombre: ' (2)', '-2', '_2'
+RE_SUFIJO_PARENTESIS = re.compile(r"[\s\-_]*\(\s*\d+\s*\)$")
+RE_SUFIJO_NUMERICO = re.compile(r"[\s\-_]+\d+$")
+
+_CACHE_CODIGOS = 65536
+_CACHE_TEXTO = 16384
+
+
+@lru_cache(maxsize=_CACHE_CODIGOS)
+def _alnum_mayus(s: str) -> str:
+    return RE_NO_ALNUM.sub("", s).upper()
+
+
+def normalizar_codigo(s) -> str:
+    """Devuelve solo los caracteres alfanuméricos de `s` en mayúsculas.
+
+    Equivale a `re.sub(r"[^A-Za-z0-9]", "", str(s or "")).upper()`.
+    """
+    if s is None:
+        return ""
+    if not isinstance(s, str):
+        s = str(s or "")
+    return _alnum_mayus(s)
+
+
+@lru_cache(maxsize=_CACHE_CODIGOS)
+def normalizar_carpeta(nombre: str) -> str:
+    """Normaliza un nombre de carpeta con la misma regla que los códigos."""
+    return RE_NO_ALNUM.sub("", str(nombre or "")).upper()
+
+
+def tokens_alnum(s) -> list:
+    """Divide `s` en tokens alfanuméricos (descarta separadores vacíos)."""
+    return [t for t in RE_NO_ALNUM.split(str(s or "")) if t]
+
+
+def core_base(nombre: str) -> str:
+    """Elimina sufijos de copia (' (2)', '-2', '_2') al final de un nombre."""
+    core = RE_SUFIJO_PARENTESIS.sub("", nombre)
+    return RE_SUFIJO_NUMERICO.sub("", core)
+
+
+@lru_cache(maxsize=_CACHE_TEXTO)
+def sin_acentos(s: str) -> str:
+    """Quita acentos (descomposición NFD y eliminación de marcas Mn)."""
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+@lru_cache(maxsize=_CACHE_TEXTO)
+def plegar_acentos(s: str) -> str:
+    """NFKD -> ASCII, descartando caracteres no representables."""
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+@lru_cache(maxsize=_CACHE_TEXTO)
+def normalizar_nombre(s: str) -> str:
+    """Mayúsculas sin marcas combinantes (NFKD)."""
+    nfkd = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in nfkd if not unicodedata.combining(c)).upper()
@@ -0,0 +1,67 @@
+"""Numeración "Página X de Y" sin guardar el estado completo de cada página.
+
+Los `NumberedCanvas` de `DictamenPDF.py` y `Constancia.py` guardaban
+`dict(self.__dict__)` en cada `showPage` (incluido el flujo de contenido de la
+página) y en `save()` los reproducían para conocer el total. Un dictamen con
+40 páginas de evidencias mantenía todas esas páginas en memoria a la vez.
+
+`CanvasNumerado` emite cada página en cuanto se cierra: en su lugar deja una
+referencia a un form XObject (`NumPagina<N>`) que todavía no existe. Al
+guardar ya se conoce el total, y cada form se define con el texto completo
+"Página X de Y"; ReportLab resuelve las referencias al escribir el archivo.
+Solo se conserva la lista de números de página.
+
+Las subclases indican dónde y con qué fuente se dibuja el texto
+sobrescribiendo `dibujar_numero_pagina(pagina, total)`.
+"""
+
+from reportlab.pdfgen.canvas import Canvas
+
+
+class CanvasNumerado(Canvas):
+    """Canvas que imprime "Página X de Y" mediante forms definidos al guardar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._paginas_numeradas = []
+
+    @staticmethod
+    def _nombre_form_numero(pagina: int) -> str:
+        return f"NumPagina{pagina}"
+
+    def marcar_numero_pagina(self) -> None:
+        """Referencia en la página actual el form con su "Página X de Y"."""
+        pagina = self._pageNumber
+        self.doForm(self._nombre_form_numero(pagina))
+        self._paginas_numeradas.append(pagina)
+
+    def cerrar_pagina(self) -> None:
+        """Numera y emite la página actual sin pasar por `showPage` de la subclase."""
+        self.marcar_numero_pagina()
+        Canvas.showPage(self)
+
+    def showPage(self):
+        self.cerrar_pagina()
+
+    def definir_numeros_pagina(self) -> None:
+        """Define los forms pendientes ahora que se conoce el total de páginas."""
+        total = len(self._paginas_numeradas)
+        for pagina in self._paginas_numeradas:
+            self.beginForm(self._nombre_form_numero(pagina))
+            try:
+                self.dibujar_numero_pagina(pagina, total)
+            except Exception:
+                pass
+            self.endForm()
+
+    def dibujar_numero_pagina(self, pagina: int, total: int) -> None:
+        """Texto de numeración; las subclases ajustan posición y fuente."""
+        self.setFont('Helvetica', 9)
+        self.drawRightString(self._pagesize[0] - 72, self._pagesize[1] - 40, f"Página {pagina} de {total}")
+
+    def save(self):
+        # Contenido pendiente después del último showPage: es una página más
+        if len(self._code):
+            self.cerrar_pagina()
+        self.definir_numeros_pagina()
+        Canvas.save(self)
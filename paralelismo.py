@@ -0,0 +1,39 @@
+"""Número de procesos/hilos para los lotes en paralelo.
+
+El pegado de evidencias (`pool_pegado`), las constancias, el control de
+folios anual y los documentos de visita resuelven cuántos trabajadores usar
+con la misma regla: argumento explícito, variable de entorno, valor de la
+configuración y, sin ninguno, un valor por defecto; `0` o `"auto"` usa
+todos los núcleos y el resto se acota a un máximo por lote.
+"""
+
+import os
+from typing import Optional
+
+
+def obtener_workers(valor=None, env: Optional[str] = None, config=None, maximo: int = 32,
+                    por_defecto: int = 1, auto: Optional[int] = None) -> int:
+    """Número de procesos (o hilos) para un lote en paralelo.
+
+    Prioridad: argumento `valor`, luego la variable de entorno `env`, luego
+    `config` (valor ya leído de la configuración); sin ninguno, `por_defecto`.
+    `0` o `"auto"` devuelven `auto` (por defecto todos los núcleos); un valor
+    inválido, `por_defecto`. El resto se acota a `1..maximo`.
+    """
+    if valor in (None, "") and env:
+        valor = os.environ.get(env)
+    if valor in (None, ""):
+        valor = config
+    if valor in (None, ""):
+        return por_defecto
+    if auto is None:
+        auto = os.cpu_count() or 1
+    try:
+        if str(valor).strip().lower() == "auto":
+            return auto
+        n = int(valor)
+    except Exception:
+        return por_defecto
+    if n <= 0:
+        return auto
+    return max(1, min(n, maximo))
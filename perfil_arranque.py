@@ -0,0 +1,71 @@
+"""Perfil de tiempos del arranque de la aplicación.
+
+Registra cuánto tarda cada fase del inicio (imports, sincronización de datos,
+construcción de la ventana, login...) para poder comparar arranques del .exe
+empaquetado contra el script. Las fases se miden con `fase(nombre)` (context
+manager) o con `marcar(nombre)` (tiempo transcurrido desde la marca anterior).
+
+`reportar()` imprime el resumen; si la variable de entorno
+`IMAGENESVC_PERFIL_ARRANQUE=1` está definida también lo agrega a
+`startup_profile.log` en la carpeta indicada.
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+
+class PerfilArranque:
+    """Acumula (fase, segundos) desde la creación del objeto."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self._ultima = self.inicio
+        self.fases: List[Tuple[str, float]] = []
+        self.reportado = False
+
+    def marcar(self, nombre: str) -> float:
+        """Registra el tiempo desde la marca anterior como la fase `nombre`."""
+        ahora = time.perf_counter()
+        dt = ahora - self._ultima
+        self._ultima = ahora
+        self.fases.append((nombre, dt))
+        return dt
+
+    @contextmanager
+    def fase(self, nombre: str):
+        """Mide el bloque `with` como la fase `nombre`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ahora = time.perf_counter()
+            self.fases.append((nombre, ahora - t0))
+            self._ultima = ahora
+
+    def total(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    def resumen(self) -> dict:
+        """{'total': segundos, 'fases': {fase: segundos}} (fases repetidas se suman)."""
+        fases = {}
+        for nombre, dt in self.fases:
+            fases[nombre] = round(fases.get(nombre, 0.0) + dt, 3)
+        return {'total': round(self.total(), 3), 'fases': fases}
+
+    def reportar(self, carpeta_log: Optional[str] = None) -> str:
+        """Imprime (y opcionalmente guarda) el resumen; devuelve el texto."""
+        datos = self.resumen()
+        partes = [f"{k}={v:.3f}s" for k, v in datos['fases'].items()]
+        texto = f"⏱️ Arranque en {datos['total']:.3f}s: " + ", ".join(partes)
+        self.reportado = True
+        print(texto)
+        if carpeta_log and os.environ.get('IMAGENESVC_PERFIL_ARRANQUE') == '1':
+            try:
+                with open(os.path.join(carpeta_log, 'startup_profile.log'), 'a', encoding='utf-8') as f:
+                    f.write(time.strftime('%Y-%m-%d %H:%M:%S') + ' ' + texto + '\n')
+            except Exception:
+                pass
+        return texto
@@ -7,6 +7,7 @@ import os
 import sys
 import traceback
 from etiqueta_dictamen import GeneradorEtiquetasDecathlon
+import trazas
 
 # ---------------------------------------------------------
 # FUNCIONES AUXILIARES
@@ -462,7 +463,8 @@ def preparar_datos_familia(
     obs = "" if obs_raw.upper() == "NINGUNA" else obs_raw
 
     print("   🔍 Iniciando generación de etiquetas...")
-    generador_etiquetas = GeneradorEtiquetasDecathlon()
+    with trazas.span('carga_base_etiquetado'):
+        generador_etiquetas = GeneradorEtiquetasDecathlon()
 
     # Generar etiquetas usando clave compuesta para evitar reutilizar una etiqueta
     # de otro registro que comparte el mismo código pero pertenece a distinta
@@ -492,7 +494,8 @@ def preparar_datos_familia(
     if codigos_compuestos:
         try:
             print(f"   🏷️ Generando etiquetas para {len(codigos_compuestos)} entradas (clave compuesta)...")
-            etiquetas_generadas = generador_etiquetas.generar_etiquetas_por_codigos(codigos_compuestos)
+            with trazas.span('generacion_etiquetas', codigos=len(codigos_compuestos)):
+                etiquetas_generadas = generador_etiquetas.generar_etiquetas_por_codigos(codigos_compuestos)
             print(f"   ✅ Etiquetas generadas: {len(etiquetas_generadas)}")
         except Exception as e:
             print(f"   ⚠️ Error generando etiquetas: {e}")
@@ -0,0 +1,210 @@
+"""Eventos de progreso de los lotes (dictámenes) para la interfaz.
+
+La generación corre en un hilo aparte y antes solo informaba 10% y 100%; la
+barra se animaba con un hilo que la empujaba cada 0.8 s. Ahora el generador
+publica eventos estructurados en una cola thread-safe:
+
+    publicador = PublicadorProgreso(cola)
+    publicador.inicio(total_familias)
+    for lista in familias:
+        publicador.familia_iniciada(lista)
+        publicador.etapa('pdf')
+        publicador.familia_terminada(lista, ok=True)
+    publicador.fin(exito, mensaje)
+
+y la interfaz los consume desde el hilo de Tk con un solo ciclo `after`
+(`drenar` + aplicar el último evento), así que ningún hilo de trabajo toca
+widgets ni programa `after`. El cierre del lote (éxito o error) también viaja
+por la cola como `evento_resultado` y la interfaz abre el diálogo al drenarlo.
+
+Cada evento es un dict (`tipo`, `lista`, `etapa`, `hechas`, `total`, `ok`,
+`errores`, `omitidas`, `porcentaje`, `eta_s`, `transcurrido_s`, `mensaje`).
+El ETA usa la duración media de las últimas familias generadas (las omitidas
+al reanudar no cuentan). Sin cola, `PublicadorProgreso(None)` no hace nada.
+"""
+from __future__ import annotations
+
+import queue
+import time
+from collections import deque
+from typing import List, Optional
+
+# Tramos de la barra: carga de catálogos/folios antes de la primera familia
+# y cierre (contador de folios, respaldos) después de la última.
+PORCENTAJE_INICIO = 5.0
+PORCENTAJE_FAMILIAS = 90.0
+
+# Avance dentro de una familia al entrar a cada etapa
+AVANCE_ETAPA = {
+    'datos': 0.05,
+    'evidencias': 0.2,
+    'pdf': 0.4,
+    'json': 0.9,
+}
+
+NOMBRE_ETAPA = {
+    'datos': 'preparando datos',
+    'evidencias': 'buscando evidencias',
+    'pdf': 'generando PDF',
+    'json': 'guardando JSON',
+}
+
+# Familias recientes que entran al promedio del ETA
+MUESTRAS_ETA = 20
+
+
+def formatear_eta(segundos: Optional[float]) -> str:
+    """'1:05:30' / '4:07'; cadena vacía si no hay estimación."""
+    if segundos is None:
+        return ''
+    segundos = int(round(segundos))
+    horas, resto = divmod(segundos, 3600)
+    minutos, seg = divmod(resto, 60)
+    return f"{horas}:{minutos:02d}:{seg:02d}" if horas else f"{minutos}:{seg:02d}"
+
+
+class PublicadorProgreso:
+    """Publica el avance de un lote en `cola` (cualquier objeto con `put`)."""
+
+    def __init__(self, cola=None):
+        self.cola = cola
+        self.total = 0
+        self.hechas = 0
+        self.ok = 0
+        self.errores = 0
+        self.omitidas = 0
+        self.lista = None
+        self.etapa_actual = None
+        self._inicio = time.perf_counter()
+        self._inicio_familia = None
+        self._duraciones = deque(maxlen=MUESTRAS_ETA)
+
+    @property
+    def activo(self) -> bool:
+        return self.cola is not None
+
+    # ---------------- cálculo ----------------
+    def eta_s(self) -> Optional[float]:
+        restantes = self.total - self.hechas
+        if not self._duraciones or restantes <= 0:
+            return None
+        media = sum(self._duraciones) / len(self._duraciones)
+        # Restar lo que ya lleva la familia en curso
+        en_curso = time.perf_counter() - self._inicio_familia if self._inicio_familia else 0.0
+        return max(0.0, media * restantes - min(en_curso, media))
+
+    def porcentaje(self) -> float:
+        if not self.total:
+            return PORCENTAJE_INICIO
+        avance = self.hechas
+        if self._inicio_familia is not None:
+            avance += AVANCE_ETAPA.get(self.etapa_actual, 0.0)
+        return PORCENTAJE_INICIO + PORCENTAJE_FAMILIAS * min(1.0, avance / self.total)
+
+    def _texto(self) -> str:
+        partes = []
+        if self.total:
+            actual = min(self.total, self.hechas + (1 if self._inicio_familia is not None else 0))
+            partes.append(f"Familia {actual}/{self.total}")
+        if self.lista is not None and self._inicio_familia is not None:
+            partes.append(f"LISTA {self.lista}")
+        if self.etapa_actual and self._inicio_familia is not None:
+            partes.append(NOMBRE_ETAPA.get(self.etapa_actual, self.etapa_actual))
+        eta = formatear_eta(self.eta_s())
+        if eta:
+            partes.append(f"ETA {eta}")
+        return ' · '.join(partes)
+
+    def _publicar(self, tipo: str, mensaje: Optional[str] = None, porcentaje: Optional[float] = None,
+                  **extra) -> None:
+        evento = {
+            'tipo': tipo,
+            'lista': self.lista,
+            'etapa': self.etapa_actual,
+            'hechas': self.hechas,
+            'total': self.total,
+            'ok': self.ok,
+            'errores': self.errores,
+            'omitidas': self.omitidas,
+            'porcentaje': round(self.porcentaje() if porcentaje is None else porcentaje, 1),
+            'eta_s': self.eta_s(),
+            'transcurrido_s': round(time.perf_counter() - self._inicio, 2),
+            'mensaje': mensaje if mensaje is not None else self._texto(),
+        }
+        evento.update(extra)
+        try:
+            self.cola.put(evento)
+        except Exception:
+            pass
+
+    # ---------------- eventos ----------------
+    def preparacion(self, mensaje: str) -> None:
+        """Pasos previos a las familias (catálogos, folios)."""
+        if self.cola is not None:
+            self._publicar('preparacion', mensaje=mensaje, porcentaje=min(PORCENTAJE_INICIO, 2.0))
+
+    def inicio(self, total: int) -> None:
+        self.total = int(total or 0)
+        if self.cola is not None:
+            self._publicar('inicio', mensaje=f"{self.total} familias por generar")
+
+    def familia_iniciada(self, lista) -> None:
+        self.lista = lista
+        self.etapa_actual = None
+        self._inicio_familia = time.perf_counter()
+        if self.cola is not None:
+            self._publicar('familia_inicio')
+
+    def etapa(self, nombre: str) -> None:
+        self.etapa_actual = nombre
+        if self.cola is not None:
+            self._publicar('etapa')
+
+    def familia_terminada(self, lista, ok: bool = True, omitida: bool = False) -> None:
+        if self._inicio_familia is not None and not omitida:
+            self._duraciones.append(time.perf_counter() - self._inicio_familia)
+        self._inicio_familia = None
+        self.etapa_actual = None
+        self.lista = lista
+        self.hechas += 1
+        if omitida:
+            self.omitidas += 1
+        if ok:
+            self.ok += 1
+        else:
+            self.errores += 1
+        if self.cola is not None:
+            self._publicar('familia_fin', exito=bool(ok), omitida=bool(omitida))
+
+    def fin(self, exito: bool, mensaje: str) -> None:
+        if self.cola is not None:
+            self._inicio_familia = None
+            self._publicar('fin', mensaje=mensaje, porcentaje=100.0, exito=bool(exito))
+
+
+def evento_manual(porcentaje, mensaje: str) -> dict:
+    """Evento con porcentaje y texto fijos (generadores sin eventos por familia)."""
+    try:
+        porcentaje = float(porcentaje)
+    except (TypeError, ValueError):
+        porcentaje = 0.0
+    return {'tipo': 'manual', 'porcentaje': max(0.0, min(100.0, porcentaje)), 'mensaje': mensaje}
+
+
+def evento_resultado(exito: bool, mensaje: str, resultado: Optional[dict] = None) -> dict:
+    """
+    Resultado final del lote; el hilo de trabajo lo encola y la interfaz abre
+    el diálogo correspondiente al drenarlo.
+    """
+    return {'tipo': 'resultado', 'exito': bool(exito), 'mensaje': mensaje, 'resultado': resultado}
+
+
+def drenar(cola, maximo: int = 1000) -> List[dict]:
+    """Saca sin bloquear hasta `maximo` eventos pendientes de `cola`."""
+    eventos = []
+    while len(eventos) < maximo:
+        try:
+            eventos.append(cola.get_nowait())
+        except queue.Empty:
+            break
+    return eventos
@@ -0,0 +1,271 @@
+"""Sincronización de los datos y recursos empacados con el .exe.
+
+Antes, cada arranque del ejecutable recorría con `os.walk` la carpeta `data`
+empacada y las carpetas de recursos (`Plantillas PDF`, `Firmas`, `img`...),
+consultando `getsize`/`getmtime` archivo por archivo para decidir qué copiar.
+En carpetas sincronizadas por la nube eso tardaba varios segundos.
+
+Ahora, al empacar, `generar_manifiesto` escribe `manifest_recursos.json` con
+el SHA-256 y el tamaño de cada archivo y una huella por carpeta. Al arrancar,
+`sincronizar` compara esa huella con la del último manifiesto aplicado
+(guardado junto a los datos en `.manifiesto_aplicado.json`): si coinciden no
+se toca el disco; si no, solo se copian las entradas cuyo hash cambió o cuyo
+destino falta o está vacío. En `data` un archivo que el usuario modificó desde
+la última sincronización (su hash ya no es el aplicado) no se reemplaza.
+
+Uso al empacar:
+    python sincronizacion_datos.py --generar
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Optional
+
+NOMBRE_MANIFIESTO = 'manifest_recursos.json'
+NOMBRE_APLICADO = '.manifiesto_aplicado.json'
+
+# Carpetas empacadas junto al .exe (mismas que los --add-data del build)
+CARPETAS_BUNDLE = [
+    'data',
+    'Plantillas PDF',
+    'Pegado de Evidenvia Fotografica',
+    'Documentos Inspeccion',
+    'Firmas',
+    'img',
+]
+
+# Política de copia por carpeta:
+# - 'actualizar': copiar si el archivo del bundle cambió desde la última
+#   sincronización y el destino no fue modificado (o si falta / está vacío)
+# - 'faltantes': copiar solo si falta o está vacío en destino
+POLITICA_DATA = 'actualizar'
+POLITICA_RECURSOS = 'faltantes'
+
+# Archivos que no se incluyen en el manifiesto
+_IGNORAR = {'__pycache__', '.git', NOMBRE_APLICADO}
+
+
+def _sha256(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _huella_archivos(archivos: Dict[str, dict]) -> str:
+    h = hashlib.sha256()
+    for rel in sorted(archivos):
+        h.update(f"{rel}\0{archivos[rel]['sha256']}\0{archivos[rel]['tamano']}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _rel(ruta: str, base: str) -> str:
+    # Separador '/' en el manifiesto para que no dependa del sistema
+    return os.path.relpath(ruta, base).replace(os.sep, '/')
+
+
+def manifiesto_carpeta(origen: str) -> dict:
+    """{'archivos': {rel: {sha256, tamano}}, 'huella': ...} de una carpeta."""
+    archivos = {}
+    for root, dirs, files in os.walk(origen):
+        dirs[:] = sorted(d for d in dirs if d not in _IGNORAR)
+        for f in sorted(files):
+            if f in _IGNORAR or f.endswith(('.pyc', '.pyo')):
+                continue
+            ruta = os.path.join(root, f)
+            try:
+                archivos[_rel(ruta, origen)] = {'sha256': _sha256(ruta), 'tamano': os.path.getsize(ruta)}
+            except OSError:
+                continue
+    return {'archivos': archivos, 'huella': _huella_archivos(archivos)}
+
+
+def generar_manifiesto(raiz: str, carpetas=None, salida: Optional[str] = None) -> dict:
+    """
+    Genera el manifiesto de las carpetas empacadas.
+
+    Args:
+        raiz: Carpeta del proyecto (donde están `data`, `img`, ...)
+        carpetas: Carpetas a incluir (por defecto `CARPETAS_BUNDLE`; se omiten
+            las que no existen)
+        salida: Ruta del JSON a escribir (opcional)
+
+    Returns:
+        El manifiesto como dict.
+    """
+    manifiesto = {'version': 1, 'generado_en': datetime.now().isoformat(), 'carpetas': {}}
+    for carpeta in (carpetas or CARPETAS_BUNDLE):
+        origen = os.path.join(raiz, carpeta)
+        if os.path.isdir(origen):
+            manifiesto['carpetas'][carpeta] = manifiesto_carpeta(origen)
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    return manifiesto
+
+
+def _leer_json(ruta: str):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def leer_manifiesto(ruta: Optional[str]) -> Optional[dict]:
+    """Manifiesto empacado o None si no existe / es inválido."""
+    if not ruta or not os.path.exists(ruta):
+        return None
+    datos = _leer_json(ruta)
+    if not isinstance(datos, dict) or not isinstance(datos.get('carpetas'), dict):
+        return None
+    return datos
+
+
+def _vacio_o_faltante(ruta: str) -> bool:
+    try:
+        return os.path.getsize(ruta) == 0
+    except OSError:
+        return True
+
+
+def _debe_copiar(rel: str, info: dict, src: str, dst: str, politica: str,
+                 aplicados: Optional[dict], forzar: bool) -> bool:
+    if forzar or _vacio_o_faltante(dst):
+        return True
+    if politica != POLITICA_DATA:
+        return False
+    if aplicados is not None and rel in aplicados:
+        if aplicados[rel] == info.get('sha256'):
+            return False
+        # El bundle trae otra versión: solo reemplazar si el destino sigue
+        # siendo la copia aplicada la última vez. Si el usuario lo modificó
+        # (folio_counter.json, historial, usuarios...) se conserva el suyo.
+        try:
+            return _sha256(dst) == aplicados[rel]
+        except OSError:
+            return False
+    # Sin registro previo (primera vez con manifiesto): regla anterior por mtime,
+    # para no pisar datos del usuario más nuevos que los del bundle
+    try:
+        return os.path.getmtime(src) > os.path.getmtime(dst) + 1
+    except OSError:
+        return False
+
+
+def sincronizar(manifiesto: dict, origenes: Dict[str, str], destinos: Dict[str, str],
+                archivo_aplicado: str, politicas: Optional[Dict[str, str]] = None,
+                forzar: bool = False) -> dict:
+    """
+    Copia a `destinos` las entradas del manifiesto que difieren de lo aplicado.
+
+    Args:
+        manifiesto: Manifiesto empacado (ver `generar_manifiesto`)
+        origenes: carpeta -> ruta empacada (p. ej. 'data' -> _MEIPASS/data)
+        destinos: carpeta -> ruta destino (p. ej. 'data' -> DATA_DIR)
+        archivo_aplicado: JSON con las huellas del último manifiesto aplicado
+        politicas: carpeta -> 'actualizar' | 'faltantes' (por defecto
+            'actualizar' para 'data' y 'faltantes' para el resto)
+        forzar: Copiar todo (equivale a IMAGENESVC_FORCE_REFRESH=1)
+
+    Returns:
+        {carpeta: {'omitida': bool, 'copiados': n, 'errores': n}}
+    """
+    politicas = politicas or {}
+    aplicado = _leer_json(archivo_aplicado) or {}
+    estado = aplicado.get('carpetas') if isinstance(aplicado.get('carpetas'), dict) else {}
+    resultado = {}
+    cambios = False
+    for carpeta, destino in destinos.items():
+        entrada = manifiesto.get('carpetas', {}).get(carpeta)
+        origen = origenes.get(carpeta)
+        if not entrada or not origen or not os.path.isdir(origen):
+            continue
+        if os.path.abspath(origen) == os.path.abspath(destino):
+            continue
+        previo = estado.get(carpeta) or {}
+        if not forzar and previo.get('huella') == entrada.get('huella') and os.path.isdir(destino):
+            resultado[carpeta] = {'omitida': True, 'copiados': 0, 'errores': 0}
+            continue
+        politica = politicas.get(carpeta) or (POLITICA_DATA if carpeta == 'data' else POLITICA_RECURSOS)
+        aplicados = previo.get('archivos') if isinstance(previo.get('archivos'), dict) else None
+        copiados = errores = 0
+        for rel, info in entrada.get('archivos', {}).items():
+            src = os.path.join(origen, *rel.split('/'))
+            dst = os.path.join(destino, *rel.split('/'))
+            try:
+                if _debe_copiar(rel, info, src, dst, politica, aplicados, forzar):
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    copiados += 1
+            except Exception:
+                errores += 1
+        resultado[carpeta] = {'omitida': False, 'copiados': copiados, 'errores': errores}
+        if not errores:
+            # Registrar lo aplicado (si algo falló se reintenta en el siguiente arranque)
+            estado[carpeta] = {
+                'huella': entrada.get('huella'),
+                'archivos': {rel: info.get('sha256') for rel, info in entrada.get('archivos', {}).items()},
+            }
+            cambios = True
+    if cambios:
+        try:
+            os.makedirs(os.path.dirname(archivo_aplicado), exist_ok=True)
+            with open(archivo_aplicado, 'w', encoding='utf-8') as f:
+                json.dump({'aplicado_en': datetime.now().isoformat(),
+                           'generado_en': manifiesto.get('generado_en'),
+                           'carpetas': estado}, f, ensure_ascii=False)
+        except Exception:
+            pass
+    return resultado
+
+
+def sincronizar_por_recorrido(origen: str, destino: str, politica: str, forzar: bool = False) -> int:
+    """
+    Sincronización sin manifiesto (builds anteriores): recorre `origen` con la
+    regla de siempre (faltante, vacío o, para 'actualizar', mtime más nuevo).
+    Devuelve el número de archivos copiados.
+    """
+    copiados = 0
+    for root, dirs, files in os.walk(origen):
+        rel_dir = os.path.relpath(root, origen)
+        target_root = os.path.join(destino, rel_dir) if rel_dir != '.' else destino
+        os.makedirs(target_root, exist_ok=True)
+        for f in files:
+            src = os.path.join(root, f)
+            dst = os.path.join(target_root, f)
+            try:
+                if _debe_copiar(f, {}, src, dst, politica, None, forzar):
+                    shutil.copy2(src, dst)
+                    copiados += 1
+            except Exception:
+                pass
+    return copiados
+
+
+def main():
+    """Genera el manifiesto de recursos para el empaquetado."""
+    parser = argparse.ArgumentParser(description="Manifiesto de datos y recursos empacados con el .exe")
+    parser.add_argument("--generar", action="store_true", help="Generar el manifiesto")
+    parser.add_argument("--raiz", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Carpeta del proyecto (default: la de este script)")
+    parser.add_argument("--salida", default=None, help=f"Ruta del manifiesto (default: <raiz>/{NOMBRE_MANIFIESTO})")
+    args = parser.parse_args()
+    if not args.generar:
+        parser.print_help()
+        return 1
+    salida = args.salida or os.path.join(args.raiz, NOMBRE_MANIFIESTO)
+    manifiesto = generar_manifiesto(args.raiz, salida=salida)
+    total = sum(len(c['archivos']) for c in manifiesto['carpetas'].values())
+    print(f"Manifiesto escrito en {salida}: {len(manifiesto['carpetas'])} carpetas, {total} archivos")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,62 @@
+"""Sincronización del bundle: no pisar datos que el usuario modificó."""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sincronizacion_datos as sd
+
+
+def _escribir(ruta, datos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+
+
+def _leer(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SincronizarDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        base = self._tmp.name
+        self.bundle = os.path.join(base, 'bundle')
+        self.data = os.path.join(base, 'usuario', 'data')
+        self.aplicado = os.path.join(self.data, sd.NOMBRE_APLICADO)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _sincronizar(self):
+        manifiesto = sd.generar_manifiesto(self.bundle, carpetas=['data'])
+        return sd.sincronizar(manifiesto, {'data': os.path.join(self.bundle, 'data')},
+                              {'data': self.data}, self.aplicado)
+
+    def test_conserva_archivo_modificado_por_usuario(self):
+        _escribir(os.path.join(self.bundle, 'data', 'folio_counter.json'), {'last': 1})
+        self._sincronizar()
+        destino = os.path.join(self.data, 'folio_counter.json')
+        self.assertEqual(_leer(destino), {'last': 1})
+
+        # El usuario emite folios y después llega un bundle nuevo
+        _escribir(destino, {'last': 500})
+        _escribir(os.path.join(self.bundle, 'data', 'folio_counter.json'), {'last': 12})
+        self._sincronizar()
+        self.assertEqual(_leer(destino), {'last': 500})
+
+    def test_actualiza_archivo_sin_cambios_del_usuario(self):
+        _escribir(os.path.join(self.bundle, 'data', 'Clientes.json'), ['A'])
+        self._sincronizar()
+        _escribir(os.path.join(self.bundle, 'data', 'Clientes.json'), ['A', 'B'])
+        self._sincronizar()
+        self.assertEqual(_leer(os.path.join(self.data, 'Clientes.json')), ['A', 'B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,303 @@
+"""Trazas por etapa para los procesos por lotes (generación de dictámenes).
+
+Hasta ahora la única retroalimentación de un lote era el flujo de `print` y
+los conteos de `resultado`. Este módulo mide etapas con spans ligeros:
+
+    traza = Traza('dictamenes')
+    with activa(traza):
+        with span('carga_catalogos'):
+            ...
+        for lista in familias:
+            establecer_familia(lista)
+            with span('preparar_datos_familia'):
+                ...
+    resultado['timings'] = traza.resumen()
+
+`span(...)` busca la traza activa del hilo actual; si no hay ninguna no hace
+nada (costo de una consulta a `threading.local`), así que los módulos que
+solo a veces corren dentro de un lote (`plantillaPDF`, por ejemplo) pueden
+instrumentarse sin condiciones. Para bloques largos donde un `with` obligaría
+a reindentar, `abrir(nombre)` devuelve un span que se cierra con `.cerrar()`.
+
+`Traza.escribir_chrome_trace(ruta)` guarda los eventos en el formato JSON de
+chrome://tracing / Perfetto.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_LOCAL = threading.local()
+
+
+class Span:
+    """Un intervalo abierto; `cerrar()` lo registra en su traza (una sola vez)."""
+
+    __slots__ = ('traza', 'nombre', 'familia', 'args', 'inicio', 'hijos', 'cerrado')
+
+    def __init__(self, traza: 'Traza', nombre: str, args: Optional[dict] = None):
+        self.traza = traza
+        self.nombre = nombre
+        self.familia = traza.familia
+        self.args = args
+        self.hijos = 0.0
+        self.cerrado = False
+        self.inicio = time.perf_counter()
+
+    def cerrar(self) -> float:
+        if self.cerrado:
+            return 0.0
+        self.cerrado = True
+        return self.traza._registrar(self, time.perf_counter())
+
+
+class _SpanNulo:
+    """Sustituto cuando no hay traza activa."""
+
+    __slots__ = ()
+
+    def cerrar(self) -> float:
+        return 0.0
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+class Traza:
+    """Acumula spans por etapa y por familia de un lote."""
+
+    def __init__(self, nombre: str = 'lote'):
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.fin: Optional[float] = None
+        self.familia: Optional[str] = None
+        self._inicio_familia: Optional[float] = None
+        self._lock = threading.Lock()
+        # etapa -> [llamadas, total, propio, máximo]
+        self._etapas: Dict[str, List[float]] = {}
+        # familia -> {etapa: total}
+        self._familias: Dict[str, Dict[str, float]] = {}
+        self._eventos: List[dict] = []
+        self._pid = os.getpid()
+
+    # ---------------- registro ----------------
+    def _pila(self) -> list:
+        pilas = getattr(_LOCAL, 'pilas', None)
+        if pilas is None:
+            pilas = _LOCAL.pilas = {}
+        return pilas.setdefault(id(self), [])
+
+    def abrir(self, nombre: str, **args) -> Span:
+        s = Span(self, nombre, args or None)
+        self._pila().append(s)
+        return s
+
+    def _registrar(self, s: Span, fin: float) -> float:
+        dur = fin - s.inicio
+        pila = self._pila()
+        if s in pila:
+            # Cerrar también los hijos que quedaron abiertos (p. ej. por una excepción)
+            while pila:
+                tope = pila.pop()
+                if tope is s:
+                    break
+                tope.cerrado = True
+        if pila:
+            pila[-1].hijos += dur
+        propio = max(0.0, dur - s.hijos)
+        with self._lock:
+            etapa = self._etapas.get(s.nombre)
+            if etapa is None:
+                etapa = self._etapas[s.nombre] = [0, 0.0, 0.0, 0.0]
+            etapa[0] += 1
+            etapa[1] += dur
+            etapa[2] += propio
+            etapa[3] = max(etapa[3], dur)
+            if s.familia is not None:
+                fam = self._familias.setdefault(s.familia, {})
+                fam[s.nombre] = fam.get(s.nombre, 0.0) + dur
+            evento = {
+                'name': s.nombre,
+                'cat': 'etapa',
+                'ph': 'X',
+                'ts': round((s.inicio - self.inicio) * 1e6, 1),
+                'dur': round(dur * 1e6, 1),
+                'pid': self._pid,
+                'tid': threading.get_ident(),
+            }
+            args = dict(s.args or {})
+            if s.familia is not None:
+                args['familia'] = s.familia
+            if args:
+                evento['args'] = args
+            self._eventos.append(evento)
+        return dur
+
+    def establecer_familia(self, familia) -> None:
+        """Atribuye los spans siguientes a `familia` y cierra el intervalo de la anterior."""
+        ahora = time.perf_counter()
+        self._cerrar_familia(ahora)
+        self.familia = None if familia is None else str(familia)
+        self._inicio_familia = ahora if familia is not None else None
+
+    def _cerrar_familia(self, ahora: float) -> None:
+        if self.familia is None or self._inicio_familia is None:
+            return
+        dur = ahora - self._inicio_familia
+        with self._lock:
+            fam = self._familias.setdefault(self.familia, {})
+            fam['total'] = fam.get('total', 0.0) + dur
+            self._eventos.append({
+                'name': f'familia {self.familia}',
+                'cat': 'familia',
+                'ph': 'X',
+                'ts': round((self._inicio_familia - self.inicio) * 1e6, 1),
+                'dur': round(dur * 1e6, 1),
+                'pid': self._pid,
+                'tid': threading.get_ident(),
+            })
+        self._inicio_familia = None
+
+    def terminar(self) -> None:
+        """Cierra el intervalo de la última familia y fija la duración total."""
+        if self.fin is None:
+            self.fin = time.perf_counter()
+            self._cerrar_familia(self.fin)
+            self.familia = None
+
+    # ---------------- reportes ----------------
+    def resumen(self) -> dict:
+        """
+        {'total_s', 'etapas': {etapa: {llamadas, total_s, propio_s, max_s}},
+         'familias': {familia: {etapa: s, 'total': s}}}
+
+        `total_s` de una etapa incluye sus etapas anidadas; `propio_s` no
+        (p. ej. 'generacion_etiquetas' corre dentro de 'preparar_datos_familia').
+        """
+        fin = self.fin if self.fin is not None else time.perf_counter()
+        with self._lock:
+            etapas = {
+                nombre: {
+                    'llamadas': int(v[0]),
+                    'total_s': round(v[1], 4),
+                    'propio_s': round(v[2], 4),
+                    'max_s': round(v[3], 4),
+                }
+                for nombre, v in sorted(self._etapas.items(), key=lambda kv: -kv[1][1])
+            }
+            familias = {f: {k: round(v, 4) for k, v in d.items()} for f, d in self._familias.items()}
+        return {'total_s': round(fin - self.inicio, 4), 'etapas': etapas, 'familias': familias}
+
+    def texto_resumen(self, maximo: int = 8) -> str:
+        datos = self.resumen()
+        partes = [f"{k}={v['total_s']:.2f}s" for k, v in list(datos['etapas'].items())[:maximo]]
+        return f"⏱️ {self.nombre} en {datos['total_s']:.2f}s: " + ", ".join(partes)
+
+    def escribir_chrome_trace(self, ruta: str) -> str:
+        """Escribe los eventos en formato Chrome trace (abrir en chrome://tracing o ui.perfetto.dev)."""
+        with self._lock:
+            eventos = list(self._eventos)
+        meta = {'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'args': {'name': self.nombre}}
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': [meta] + eventos, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return ruta
+
+
+# ============================================================
+# TRAZA ACTIVA (POR HILO)
+# ============================================================
+def actual() -> Optional[Traza]:
+    """Traza activa en el hilo actual o None."""
+    return getattr(_LOCAL, 'traza', None)
+
+
+@contextmanager
+def activa(traza: Traza):
+    """Activa `traza` en el hilo actual durante el bloque y la termina al salir."""
+    anterior = getattr(_LOCAL, 'traza', None)
+    _LOCAL.traza = traza
+    try:
+        yield traza
+    finally:
+        traza.terminar()
+        _LOCAL.traza = anterior
+        getattr(_LOCAL, 'pilas', {}).pop(id(traza), None)
+
+
+def abrir(nombre: str, **args):
+    """Abre un span en la traza activa (o uno nulo); cerrarlo con `.cerrar()`."""
+    traza = getattr(_LOCAL, 'traza', None)
+    if traza is None:
+        return _SPAN_NULO
+    return traza.abrir(nombre, **args)
+
+
+@contextmanager
+def span(nombre: str, **args):
+    """Mide el bloque `with` como la etapa `nombre` de la traza activa."""
+    s = abrir(nombre, **args)
+    try:
+        yield s
+    finally:
+        s.cerrar()
+
+
+def establecer_familia(familia) -> None:
+    """Atribuye los spans siguientes del hilo a `familia` (si hay traza activa)."""
+    traza = getattr(_LOCAL, 'traza', None)
+    if traza is not None:
+        traza.establecer_familia(familia)
+
+
+# ============================================================
+# COMBINAR TRAZAS DE VARIOS PROCESOS
+# ============================================================
+def combinar_resumenes(resumenes: List[dict], total_s: Optional[float] = None) -> dict:
+    """
+    Suma los `Traza.resumen()` de varios procesos (p. ej. los workers de
+    `cli_dictamenes`). `total_s` es el tiempo de pared del lote; si no se
+    indica se usa el mayor de los totales.
+    """
+    etapas: Dict[str, dict] = {}
+    familias: Dict[str, dict] = {}
+    for r in resumenes:
+        if not r:
+            continue
+        for nombre, v in (r.get('etapas') or {}).items():
+            acc = etapas.setdefault(nombre, {'llamadas': 0, 'total_s': 0.0, 'propio_s': 0.0, 'max_s': 0.0})
+            acc['llamadas'] += int(v.get('llamadas') or 0)
+            acc['total_s'] += float(v.get('total_s') or 0.0)
+            acc['propio_s'] += float(v.get('propio_s') or 0.0)
+            acc['max_s'] = max(acc['max_s'], float(v.get('max_s') or 0.0))
+        familias.update(r.get('familias') or {})
+    for acc in etapas.values():
+        for k in ('total_s', 'propio_s', 'max_s'):
+            acc[k] = round(acc[k], 4)
+    if total_s is None:
+        total_s = max((float(r.get('total_s') or 0.0) for r in resumenes if r), default=0.0)
+    return {
+        'total_s': round(total_s, 4),
+        'etapas': dict(sorted(etapas.items(), key=lambda kv: -kv[1]['total_s'])),
+        'familias': familias,
+    }
+
+
+def combinar_chrome_traces(rutas: List[str], destino: str) -> str:
+    """Une varios archivos Chrome trace (uno por proceso) en `destino`."""
+    eventos = []
+    for ruta in rutas:
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                eventos.extend(json.load(f).get('traceEvents') or [])
+        except Exception:
+            continue
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return destino